@@ -4,13 +4,18 @@ Phase 3: Advanced AI Features
 """
 
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAdminUser
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from django.http import JsonResponse
 from django.utils import timezone
 import logging
 
+from utils.db_routing import using_replica
+
+from .models import AIJob
+from .services.ai_jobs import ai_job, serialize_job
+from .services.ai_result_cache import ai_result_cache
 from .services.ai_service import AdminAIService
 
 logger = logging.getLogger(__name__)
@@ -21,6 +26,7 @@ ai_service = AdminAIService()
 
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
+@using_replica
 def sales_forecast(request):
     """
     Get sales forecast for the next N days
@@ -58,6 +64,7 @@ def sales_forecast(request):
 
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
+@using_replica
 def anomaly_detection(request):
     """
     Detect anomalies in orders, revenue, and user behavior
@@ -95,6 +102,7 @@ def anomaly_detection(request):
 
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
+@using_replica
 def product_recommendations(request):
     """
     Get product recommendations based on sales data
@@ -132,6 +140,7 @@ def product_recommendations(request):
 
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
+@using_replica
 def customer_insights(request):
     """
     Get customer insights and segmentation
@@ -188,16 +197,23 @@ def ai_status(request):
 
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
+@using_replica
 def ai_dashboard_summary(request):
     """
     Get comprehensive AI dashboard summary with all key metrics
     """
     try:
-        # Get all AI insights
-        forecast_data = ai_service.get_sales_forecast(7)  # Next 7 days
-        anomaly_data = ai_service.detect_anomalies(7)     # Last 7 days
-        recommendations_data = ai_service.get_product_recommendations(5)  # Top 5
-        customer_data = ai_service.get_customer_insights()
+        # Get all AI insights; uncached ones are computed concurrently
+        results = ai_result_cache.gather({
+            'forecast': (ai_service.get_sales_forecast, (7,)),  # Next 7 days
+            'anomalies': (ai_service.detect_anomalies, (7,)),   # Last 7 days
+            'recommendations': (ai_service.get_product_recommendations, (5,)),  # Top 5
+            'customers': (ai_service.get_customer_insights, ()),
+        })
+        forecast_data = results['forecast']
+        anomaly_data = results['anomalies']
+        recommendations_data = results['recommendations']
+        customer_data = results['customers']
         
         # Create summary
         summary = {
@@ -240,6 +256,8 @@ def ai_dashboard_summary(request):
 
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
+@ai_job('communication_ai_insights')
+@using_replica
 def communication_ai_insights(request):
     """
     Get AI-powered insights for communication management
@@ -322,6 +340,7 @@ def communication_ai_insights(request):
 
 @api_view(['POST'])
 @permission_classes([IsAdminUser])
+@ai_job('ai_chatbot')
 def ai_chatbot(request):
     """
     AI Chatbot endpoint for natural language queries about admin data
@@ -586,6 +605,8 @@ def ai_service_status(request):
 
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
+@ai_job('business_insights')
+@using_replica
 def business_insights(request):
     """
     Get comprehensive business insights using all AI features
@@ -709,6 +730,8 @@ def business_insights(request):
 
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
+@ai_job('ai_recommendations')
+@using_replica
 def ai_recommendations(request):
     """
     Get AI-powered recommendations for business improvement
@@ -721,11 +744,17 @@ def ai_recommendations(request):
         category = request.GET.get('category', 'all')
         priority = request.GET.get('priority', 'all')
         
-        # Get all AI insights
-        sales_forecast = ai_service.get_sales_forecast(30)
-        anomalies = ai_service.detect_anomalies(30)
-        product_recs = ai_service.get_product_recommendations(10)
-        customer_insights = ai_service.get_customer_insights()
+        # Get all AI insights; uncached ones are computed concurrently
+        results = ai_result_cache.gather({
+            'sales_forecast': (ai_service.get_sales_forecast, (30,)),
+            'anomalies': (ai_service.detect_anomalies, (30,)),
+            'product_recs': (ai_service.get_product_recommendations, (10,)),
+            'customer_insights': (ai_service.get_customer_insights, ()),
+        })
+        sales_forecast = results['sales_forecast']
+        anomalies = results['anomalies']
+        product_recs = results['product_recs']
+        customer_insights = results['customer_insights']
         
         # Generate recommendations
         recommendations = []
@@ -806,3 +835,30 @@ def ai_recommendations(request):
             'error': str(e),
             'message': 'Failed to generate AI recommendations'
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def ai_job_status(request, job_id):
+    """
+    Status of an AI job started by an async AI endpoint request
+    
+    The finished job's ``result`` / ``status_code`` are the response the
+    endpoint would have returned synchronously. Jobs are visible to the user
+    who started them and to admins.
+    """
+    jobs = AIJob.objects.all()
+    if not request.user.is_staff:
+        jobs = jobs.filter(user=request.user)
+    
+    job = jobs.filter(pk=job_id).first()
+    if job is None:
+        return Response({
+            'success': False,
+            'error': 'AI job not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    return Response({
+        'success': True,
+        'data': serialize_job(job)
+    })
@@ -0,0 +1,86 @@
+"""
+Request metrics middleware feeding the admin system health sampler and the
+per-endpoint request metrics registry
+"""
+
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from .services.health_sampler import system_health_sampler
+from .services.request_metrics import request_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class QueryCounter:
+    """``connection.execute_wrapper`` hook counting queries and SQL time"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration_ms = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration_ms += (time.perf_counter() - started) * 1000
+
+
+class RequestMetricsMiddleware:
+    """
+    Records duration, SQL query count / time, response size and status of
+    every request, keyed by resolved URL name, so slow views and N+1 query
+    regressions show up in the admin dashboard and Prometheus.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.query_warn_threshold = getattr(settings, "REQUEST_METRICS_QUERY_WARN", 50)
+        system_health_sampler.start()
+
+    def __call__(self, request):
+        queries = QueryCounter()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(queries))
+            response = self.get_response(request)
+        duration_ms = (time.perf_counter() - started) * 1000
+
+        endpoint = self._endpoint_name(request)
+        system_health_sampler.record_request(duration_ms, response.status_code)
+        request_metrics.record(
+            endpoint,
+            request.method,
+            duration_ms,
+            response.status_code,
+            query_count=queries.count,
+            query_ms=queries.duration_ms,
+            response_bytes=self._response_size(response),
+        )
+
+        if queries.count > self.query_warn_threshold:
+            logger.warning(
+                f"{request.method} {endpoint} ran {queries.count} SQL queries "
+                f"({queries.duration_ms:.1f} ms)"
+            )
+        return response
+
+    @staticmethod
+    def _endpoint_name(request):
+        match = getattr(request, "resolver_match", None)
+        if match is None:
+            return "unresolved"
+        return match.view_name or match.route or "unresolved"
+
+    @staticmethod
+    def _response_size(response):
+        if getattr(response, "streaming", False):
+            return int(response.get("Content-Length") or 0)
+        return len(response.content)
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.5 on 2025-10-26 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_management', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdminDashboardSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=50, unique=True)),
+                ('data', models.JSONField(default=dict)),
+                ('computed_at', models.DateTimeField()),
+                ('compute_ms', models.FloatField(default=0)),
+                ('is_stale', models.BooleanField(default=False)),
+            ],
+            options={
+                'db_table': 'admin_dashboard_snapshots',
+            },
+        ),
+    ]
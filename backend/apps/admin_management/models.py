@@ -1,3 +1,5 @@
+import uuid
+
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.utils import timezone
@@ -309,4 +311,60 @@ class AdminBackupLog(models.Model):
         ]
     
     def __str__(self):
-        return f"{self.backup_type} backup - {self.status}"
\ No newline at end of file
+        return f"{self.backup_type} backup - {self.status}"
+
+
+class AdminDashboardSnapshot(models.Model):
+    """Precomputed admin dashboard aggregates, refreshed in the background"""
+    key = models.CharField(max_length=50, unique=True)
+    data = models.JSONField(default=dict)
+    computed_at = models.DateTimeField()
+    compute_ms = models.FloatField(default=0)
+    is_stale = models.BooleanField(default=False)
+    
+    class Meta:
+        db_table = 'admin_dashboard_snapshots'
+    
+    def __str__(self):
+        return f"{self.key} snapshot at {self.computed_at}"
+
+
+class AIJob(models.Model):
+    """AI endpoint request run on the background job pool"""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    job_type = models.CharField(max_length=50)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='ai_jobs')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    # Hash of type, user and parameters; identical pending requests share a job
+    fingerprint = models.CharField(max_length=64, db_index=True)
+    params = models.JSONField(default=dict, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    error_message = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    queue_ms = models.FloatField(null=True, blank=True)
+    duration_ms = models.FloatField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'admin_ai_jobs'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['user', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.job_type} job {self.id} - {self.status}"
+    
+    @property
+    def is_finished(self):
+        return self.status in ('succeeded', 'failed')
@@ -328,6 +328,10 @@ class DashboardStatsSerializer(serializers.Serializer):
     unread_notifications = serializers.IntegerField()
     pending_backups = serializers.IntegerField()
 
+    # Snapshot freshness
+    computed_at = serializers.DateTimeField(required=False)
+    is_stale = serializers.BooleanField(required=False)
+
 
 class SystemHealthSerializer(serializers.Serializer):
     """System health overview"""
@@ -338,9 +342,14 @@ class SystemHealthSerializer(serializers.Serializer):
     memory_usage = serializers.FloatField()
     disk_usage = serializers.FloatField()
     database_connections = serializers.IntegerField()
+    database = serializers.DictField(required=False)
+    database_replica = serializers.DictField(required=False)
     response_time = serializers.FloatField()
+    response_time_p50 = serializers.FloatField(required=False)
+    response_time_p99 = serializers.FloatField(required=False)
     error_rate = serializers.FloatField()
     uptime = serializers.CharField()
+    sampled_at = serializers.DateTimeField(required=False)
     last_backup = serializers.DateTimeField()
     alerts = serializers.ListField(child=serializers.DictField())
 
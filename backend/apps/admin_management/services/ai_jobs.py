@@ -0,0 +1,302 @@
+"""
+AI Job Runner
+
+Slow AI endpoints (Gemini round trips plus pandas work) can run as jobs on a
+bounded in-process thread pool instead of holding a request worker. The
+request is answered at once with ``202`` and a job id; the job row in
+``AIJob`` records status, timing and the endpoint's response, which clients
+poll at ``/api/admin-management/ai/jobs/<id>/``.
+
+Views opt in with ``@ai_job("<type>")`` (under ``@api_view`` / ``@action``).
+Requests run as jobs by default (``AI_JOBS_ASYNC_DEFAULT``); ``?async=false``
+forces a synchronous answer, and with the default off ``Prefer:
+respond-async`` or ``?async=true`` opts in. The frontend follows the 202 and
+polls the job (``aiService.runJob``).
+
+The job calls the same view function, so synchronous and job responses are
+identical, but with a copy of the request rebuilt from its path, query, body
+and user: the original request belongs to a response already sent.
+
+- ``AI_JOB_WORKERS`` threads run jobs (0 runs them inline, e.g. in tests)
+- at most ``AI_JOB_MAX_PENDING`` jobs wait or run per process; beyond that
+  the endpoint answers ``503`` rather than queueing without bound
+- an identical request (same type, user and parameters) that is still
+  queued or running returns the existing job instead of starting another
+- ``expire_jobs`` (scheduler) fails jobs orphaned by a restarted process and
+  deletes finished jobs after ``AI_JOB_RETENTION_HOURS``
+"""
+
+import copy
+import functools
+import hashlib
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+
+logger = logging.getLogger(__name__)
+
+THREAD_NAME_PREFIX = "ai-job"
+
+PENDING_STATUSES = ("queued", "running")
+
+
+class JobQueueFull(Exception):
+    """More than ``AI_JOB_MAX_PENDING`` jobs already pending in this process"""
+
+
+def wants_async(request) -> bool:
+    flag = request.query_params.get("async")
+    if flag is not None:
+        return flag.lower() in ("1", "true", "yes")
+    if "respond-async" in request.headers.get("Prefer", ""):
+        return True
+    return getattr(settings, "AI_JOBS_ASYNC_DEFAULT", True)
+
+
+def request_params(request, view_kwargs: Dict) -> Dict[str, Any]:
+    """JSON-safe description of a request, stored on the job"""
+    data = request.data
+    return {
+        "path": request.path,
+        "query": request.query_params.dict(),
+        "data": data.dict() if hasattr(data, "dict") else data,
+        "kwargs": {key: str(value) for key, value in view_kwargs.items()},
+    }
+
+
+def job_request(request, params: Dict[str, Any]) -> Request:
+    """Copy of ``request`` for the job thread, built from ``request_params``"""
+    path = params["path"]
+    if params["query"]:
+        path = f"{path}?{urlencode(params['query'])}"
+    body = ""
+    if request.method not in ("GET", "HEAD", "OPTIONS", "DELETE"):
+        body = json.dumps(params["data"], default=str)
+    django_request = APIRequestFactory().generic(
+        request.method, path, body, content_type="application/json"
+    )
+    copied = Request(django_request, parsers=[JSONParser()])
+    # Authenticated already; the job runs as the same user
+    copied.user = request.user
+    copied.auth = request.auth
+    return copied
+
+
+class AIJobRunner:
+    """Bounded thread pool executing AI jobs recorded in ``AIJob``"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+
+    def submit(self, job_type: str, user, params: Dict, handler: Callable[[], Response]):
+        """
+        Record a job and schedule ``handler``; returns ``(job, created)``.
+
+        Raises ``JobQueueFull`` when the process already has
+        ``AI_JOB_MAX_PENDING`` jobs waiting or running.
+        """
+        from apps.admin_management.models import AIJob
+
+        user_id = getattr(user, "pk", None)
+        fingerprint = hashlib.sha256(
+            json.dumps([job_type, user_id, params], sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+        existing = (
+            AIJob.objects.filter(fingerprint=fingerprint, status__in=PENDING_STATUSES)
+            .order_by("-created_at")
+            .first()
+        )
+        if existing is not None:
+            return existing, False
+
+        with self._lock:
+            if self._pending >= getattr(settings, "AI_JOB_MAX_PENDING", 50):
+                raise JobQueueFull(f"{self._pending} AI jobs already pending")
+            self._pending += 1
+
+        try:
+            job = AIJob.objects.create(
+                job_type=job_type, user_id=user_id, fingerprint=fingerprint, params=params
+            )
+        except Exception:
+            self._release()
+            raise
+
+        executor = self._get_executor()
+        if executor is None:
+            self._run(job.pk, handler, close_connections=False)
+            job.refresh_from_db()
+        else:
+            # The worker must see the committed job row
+            transaction.on_commit(lambda: executor.submit(self._run, job.pk, handler))
+        return job, True
+
+    def _run(self, job_id, handler: Callable[[], Response], close_connections: bool = True) -> None:
+        from apps.admin_management.models import AIJob
+
+        jobs = AIJob.objects.filter(pk=job_id)
+        started_at = timezone.now()
+        started = time.perf_counter()
+        try:
+            created_at = jobs.values_list("created_at", flat=True).first()
+            jobs.update(
+                status="running",
+                started_at=started_at,
+                queue_ms=(started_at - created_at).total_seconds() * 1000 if created_at else None,
+            )
+            try:
+                response = handler()
+                # Store what the synchronous endpoint would have rendered
+                result = json.loads(JSONRenderer().render(response.data) or b"null")
+                fields = {
+                    "status": "succeeded" if response.status_code < 500 else "failed",
+                    "result": result,
+                    "status_code": response.status_code,
+                }
+            except Exception as e:
+                logger.error(f"AI job {job_id} failed: {e}", exc_info=True)
+                fields = {
+                    "status": "failed",
+                    "status_code": status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    "error_message": str(e),
+                }
+            jobs.update(
+                finished_at=timezone.now(),
+                duration_ms=round((time.perf_counter() - started) * 1000, 1),
+                **fields,
+            )
+        except Exception as e:
+            logger.error(f"Could not record AI job {job_id}: {e}")
+        finally:
+            self._release()
+            if close_connections:
+                connections.close_all()
+
+    def _release(self) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def _get_executor(self) -> Optional[ThreadPoolExecutor]:
+        workers = getattr(settings, "AI_JOB_WORKERS", 4)
+        if workers <= 0:
+            return None
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=workers, thread_name_prefix=THREAD_NAME_PREFIX
+                    )
+        return self._executor
+
+    def expire_jobs(self) -> Dict[str, int]:
+        """Fail jobs pending past ``AI_JOB_TIMEOUT_SECONDS``; purge old finished jobs"""
+        from apps.admin_management.models import AIJob
+
+        now = timezone.now()
+        retention = getattr(settings, "AI_JOB_RETENTION_HOURS", 24)
+        deleted, _ = AIJob.objects.filter(
+            status__in=("succeeded", "failed"), created_at__lt=now - timedelta(hours=retention)
+        ).delete()
+        # After the purge, so newly failed jobs stay visible for a retention period
+        timeout = getattr(settings, "AI_JOB_TIMEOUT_SECONDS", 600)
+        expired = AIJob.objects.filter(
+            status__in=PENDING_STATUSES, created_at__lt=now - timedelta(seconds=timeout)
+        ).update(
+            status="failed",
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            error_message="Job did not finish in time (worker restarted or overloaded)",
+            finished_at=now,
+        )
+        return {"expired": expired, "deleted": deleted}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending_in_process": self._pending,
+            "workers": getattr(settings, "AI_JOB_WORKERS", 4),
+            "max_pending": getattr(settings, "AI_JOB_MAX_PENDING", 50),
+        }
+
+
+# Singleton instance
+ai_job_runner = AIJobRunner()
+
+
+def serialize_job(job) -> Dict[str, Any]:
+    data = {
+        "job_id": str(job.pk),
+        "job_type": job.job_type,
+        "status": job.status,
+        "status_url": reverse("ai-job-status", kwargs={"job_id": job.pk}),
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "queue_ms": job.queue_ms,
+        "duration_ms": job.duration_ms,
+    }
+    if job.is_finished:
+        data["status_code"] = job.status_code
+        data["result"] = job.result
+        if job.error_message:
+            data["error"] = job.error_message
+    return data
+
+
+def ai_job(job_type: str) -> Callable:
+    """Let a view (function or viewset action) run as an ``AIJob`` on request"""
+
+    def decorator(view: Callable) -> Callable:
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            request = args[-1]
+            if not wants_async(request):
+                return view(*args, **kwargs)
+
+            # Parse the body now; the job gets its own copy of the request
+            params = request_params(request, kwargs)
+            copied = job_request(request, params)
+            view_args = list(args)
+            view_args[-1] = copied
+            if len(view_args) > 1:
+                # Viewset action: its ``self.request`` must be the copy too
+                view_args[0] = copy.copy(view_args[0])
+                view_args[0].request = copied
+            try:
+                job, created = ai_job_runner.submit(
+                    job_type, request.user, params, lambda: view(*view_args, **kwargs)
+                )
+            except JobQueueFull as e:
+                logger.warning(f"Rejected {job_type} job: {e}")
+                return Response(
+                    {"success": False, "error": "AI job queue is full, try again shortly"},
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    headers={"Retry-After": "5"},
+                )
+
+            data = serialize_job(job)
+            return Response(
+                {"success": True, "data": data, "message": f"{job_type} job {job.status}"},
+                status=status.HTTP_202_ACCEPTED,
+                headers={"Location": data["status_url"]},
+            )
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,256 @@
+"""
+Admin AI Result Cache
+
+``AdminAIService`` forecasting / insight methods rebuild DataFrames from
+30-90 days of orders on every call, and the dashboard summary, business
+insights and recommendations endpoints all call the same four methods.
+Results are memoised here, keyed by method, normalised arguments and a data
+watermark (latest order id, latest ``updated_at`` and order count), so a
+cached result is reused until an order is created, updated or deleted or
+its TTL passes.
+
+Freshness:
+- a hit with the current watermark and age below ``ADMIN_AI_CACHE_TTL`` is
+  returned as-is
+- a result whose watermark moved or TTL passed is still served for up to
+  ``ADMIN_AI_CACHE_GRACE`` seconds more while it is recomputed on the pool
+- anything older is recomputed in the calling thread
+Concurrent callers of the same key share one computation (single flight).
+"""
+
+import functools
+import inspect
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Count, Max
+
+logger = logging.getLogger(__name__)
+
+THREAD_NAME_PREFIX = "admin-ai"
+
+
+class _Entry:
+    __slots__ = ("value", "watermark", "computed_at")
+
+    def __init__(self, value, watermark, computed_at):
+        self.value = value
+        self.watermark = watermark
+        self.computed_at = computed_at
+
+
+def _run_in_worker(func: Callable, *args):
+    """Run on a pool thread, closing the thread's DB connections afterwards"""
+    try:
+        return func(*args)
+    finally:
+        connections.close_all()
+
+
+class AIResultCache:
+    """Watermark-keyed, TTL-bound memo of AdminAIService results"""
+
+    def __init__(self):
+        self._entries: Dict[tuple, _Entry] = {}
+        self._inflight: Dict[tuple, Future] = {}
+        self._lock = threading.Lock()
+        self._watermark = None
+        self._watermark_checked_at = 0.0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    # Watermark ---------------------------------------------------------------
+
+    def watermark(self) -> Tuple:
+        """Latest order id / updated_at / count, re-read at most every interval"""
+        interval = getattr(settings, "ADMIN_AI_WATERMARK_INTERVAL", 10)
+        now = time.monotonic()
+        if self._watermark is not None and now - self._watermark_checked_at < interval:
+            return self._watermark
+
+        from apps.orders.models import Order
+
+        latest = Order.objects.order_by().aggregate(
+            last_id=Max("pk"), last_updated=Max("updated_at"), count=Count("pk")
+        )
+        self._watermark = (latest["last_id"], latest["last_updated"], latest["count"])
+        self._watermark_checked_at = now
+        return self._watermark
+
+    # Lookup ------------------------------------------------------------------
+
+    def peek(self, key: tuple) -> Tuple[bool, Any]:
+        """``(True, value)`` for a fresh entry, ``(False, None)`` otherwise"""
+        entry = self._entries.get(key)
+        if entry is not None and self._is_fresh(entry, self.watermark()):
+            return True, entry.value
+        return False, None
+
+    def get_or_compute(self, key: tuple, compute: Callable[[], Any]) -> Any:
+        watermark = self.watermark()
+        entry = self._entries.get(key)
+        if entry is not None:
+            if self._is_fresh(entry, watermark):
+                self.hits += 1
+                return entry.value
+            within_grace = time.monotonic() - entry.computed_at < self._ttl() + self._grace()
+            if within_grace and self._get_executor() is not None:
+                self.stale_hits += 1
+                self._refresh_in_background(key, compute)
+                return entry.value
+
+        self.misses += 1
+        return self._compute(key, compute)
+
+    def gather(self, calls: Dict[str, Tuple[Callable, tuple]]) -> Dict[str, Any]:
+        """
+        Call several cached methods, computing the cold ones concurrently.
+
+        ``calls`` maps a result name to ``(bound cached method, args)``;
+        fresh results are returned without touching the pool.
+        """
+        # Read the watermark here so pool threads reuse it instead of each
+        # opening a connection for it
+        self.watermark()
+        results, pending = {}, {}
+        for name, (method, args) in calls.items():
+            key = method.cache_key(method.__self__, *args)
+            found, value = self.peek(key)
+            if found:
+                self.hits += 1
+                results[name] = value
+            else:
+                pending[name] = (method, args)
+
+        # Pool threads (background refreshes) gather inline to avoid waiting on
+        # their own pool
+        in_pool = threading.current_thread().name.startswith(THREAD_NAME_PREFIX)
+        executor = self._get_executor() if len(pending) > 1 and not in_pool else None
+        if executor is None:
+            for name, (method, args) in pending.items():
+                results[name] = method(*args)
+            return results
+
+        futures = {
+            name: executor.submit(_run_in_worker, method, *args)
+            for name, (method, args) in pending.items()
+        }
+        for name, future in futures.items():
+            results[name] = future.result()
+        return results
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._watermark = None
+            self.hits = self.stale_hits = self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "ttl_seconds": self._ttl(),
+        }
+
+    # Internals ---------------------------------------------------------------
+
+    def _is_fresh(self, entry: _Entry, watermark) -> bool:
+        return (
+            entry.watermark == watermark
+            and time.monotonic() - entry.computed_at < self._ttl()
+        )
+
+    @staticmethod
+    def _ttl() -> int:
+        return getattr(settings, "ADMIN_AI_CACHE_TTL", 900)
+
+    @staticmethod
+    def _grace() -> int:
+        return getattr(settings, "ADMIN_AI_CACHE_GRACE", 300)
+
+    def _compute(self, key: tuple, compute: Callable[[], Any]) -> Any:
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+        if not owner:
+            return future.result()
+
+        # Read before computing so writes made meanwhile invalidate the result
+        watermark = self.watermark()
+        try:
+            value = compute()
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(value)
+            # Methods report failures as {"error": ...}; do not pin those
+            if not (isinstance(value, dict) and "error" in value):
+                self._entries[key] = _Entry(value, watermark, time.monotonic())
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _refresh_in_background(self, key: tuple, compute: Callable[[], Any]) -> None:
+        if key in self._inflight:
+            return
+        executor = self._get_executor()
+
+        def refresh():
+            try:
+                self._compute(key, compute)
+            except Exception as e:
+                logger.error(f"Background refresh of {key[0]} failed: {e}")
+
+        executor.submit(_run_in_worker, refresh)
+
+    def _get_executor(self) -> Optional[ThreadPoolExecutor]:
+        workers = getattr(settings, "ADMIN_AI_CACHE_WORKERS", 4)
+        if workers <= 0:
+            return None
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=workers, thread_name_prefix=THREAD_NAME_PREFIX
+                    )
+        return self._executor
+
+
+# Singleton instance
+ai_result_cache = AIResultCache()
+
+
+def cached_result(method: Callable) -> Callable:
+    """Memoise an ``AdminAIService`` method in ``ai_result_cache``"""
+    signature = inspect.signature(method)
+
+    def cache_key(self, *args, **kwargs) -> tuple:
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        arguments = tuple(
+            (name, value) for name, value in bound.arguments.items() if name != "self"
+        )
+        return (method.__name__, arguments)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        return ai_result_cache.get_or_compute(
+            cache_key(self, *args, **kwargs), lambda: method(self, *args, **kwargs)
+        )
+
+    wrapper.cache_key = cache_key
+    wrapper.uncached = method
+    return wrapper
@@ -1,26 +1,19 @@
 import json
 import logging
 
-import google.generativeai as genai
 from django.conf import settings
 
-try:
-    import numpy as np
-    import pandas as pd
-
-    PANDAS_AVAILABLE = True
-except ImportError:
-    PANDAS_AVAILABLE = False
-    print("Warning: pandas/numpy not available. AI features will be limited.")
-
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional
 
 from apps.authentication.models import User
 from apps.food.models import Food
-from apps.orders.models import Order
 from django.db.models import Avg, Count, Max, Sum
 from django.utils import timezone
+from utils.llm_gateway import llm_gateway
+
+from .ai_result_cache import ai_result_cache, cached_result
+from .order_series import order_series
 
 logger = logging.getLogger(__name__)
 
@@ -48,8 +41,7 @@ class AdminAIService:
             return
 
         try:
-            genai.configure(api_key=api_key)
-            self.model = genai.GenerativeModel("gemini-2.0-flash")
+            self.model = llm_gateway.get_model("gemini-2.0-flash")
             logger.info("AI service initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize AI service: {e}")
@@ -231,8 +223,7 @@ Response:
 """
             
             # Generate response
-            response = self.model.generate_content(prompt)
-            return response.text.strip()
+            return llm_gateway.generate(self.model, prompt).strip()
             
         except Exception as e:
             logger.error(f"Chatbot response generation failed: {e}")
@@ -324,6 +315,7 @@ Response:
 
     # ==================== PHASE 3: AI/ML FEATURES ====================
 
+    @cached_result
     def get_sales_forecast(self, days_ahead: int = 30) -> Dict[str, Any]:
         """
         Generate sales forecast for the next N days
@@ -334,28 +326,17 @@ Response:
         Returns:
             dict: Forecast data with predictions, confidence, and insights
         """
-        if not PANDAS_AVAILABLE:
-            return {
-                "forecast": [],
-                "confidence": 0.0,
-                "insights": [
-                    "Pandas not available. Please install: pip install pandas numpy"
-                ],
-                "error": "AI dependencies not installed",
-            }
-
         try:
             # Get historical order data
             end_date = timezone.now()
             start_date = end_date - timedelta(days=90)  # Use last 90 days for training
 
-            orders = Order.objects.filter(
-                created_at__gte=start_date,
-                created_at__lte=end_date,
-                status="delivered",  # Use 'delivered' instead of 'completed'
-            ).values("created_at", "total_amount")
+            # Daily revenue aggregated in SQL ('delivered' instead of 'completed')
+            daily_sales = order_series.daily_totals(
+                start_date, end_date, statuses=["delivered"]
+            )
 
-            if not orders:
+            if daily_sales.empty:
                 return {
                     "forecast": [],
                     "confidence": 0.0,
@@ -363,16 +344,9 @@ Response:
                     "error": "No historical order data available",
                 }
 
-            # Convert to DataFrame for analysis
-            df = pd.DataFrame(list(orders))
-            df["created_at"] = pd.to_datetime(df["created_at"])
-            df["date"] = df["created_at"].dt.date
-            daily_sales = df.groupby("date")["total_amount"].sum().reset_index()
-
             # Simple forecasting using moving average
             window = min(7, len(daily_sales))  # 7-day moving average
-            recent_avg = daily_sales["total_amount"].tail(window).mean()
-            recent_std = daily_sales["total_amount"].tail(window).std()
+            recent_avg = daily_sales["revenue"].tail(window).mean()
 
             # Generate forecast
             forecast = []
@@ -436,6 +410,7 @@ Response:
                 "error": str(e),
             }
 
+    @cached_result
     def detect_anomalies(self, days_back: int = 30) -> Dict[str, Any]:
         """
         Detect anomalies in orders, revenue, and user behavior
@@ -446,50 +421,23 @@ Response:
         Returns:
             dict: Anomaly detection results with alerts and insights
         """
-        if not PANDAS_AVAILABLE:
-            return {
-                "anomalies": [],
-                "alerts": [],
-                "insights": [
-                    "Pandas not available. Please install: pip install pandas numpy"
-                ],
-                "error": "AI dependencies not installed",
-            }
-
         try:
             end_date = timezone.now()
             start_date = end_date - timedelta(days=days_back)
 
-            # Get order data
-            orders = Order.objects.filter(
-                created_at__gte=start_date, created_at__lte=end_date
-            ).values("created_at", "total_amount", "status")
+            # Daily aggregations, computed in SQL
+            daily_stats = order_series.daily_totals(start_date, end_date)
 
-            if not orders:
+            if daily_stats.empty:
                 return {
                     "anomalies": [],
                     "alerts": [],
                     "insights": ["No data available for anomaly detection"],
                 }
 
-            df = pd.DataFrame(list(orders))
-            df["created_at"] = pd.to_datetime(df["created_at"])
-            df["date"] = df["created_at"].dt.date
-
-            # Daily aggregations
-            daily_stats = (
-                df.groupby("date")
-                .agg({"total_amount": ["sum", "count", "mean"], "status": "count"})
-                .reset_index()
-            )
-
-            daily_stats.columns = [
-                "date",
-                "total_revenue",
-                "order_count",
-                "avg_order_value",
-                "total_orders",
-            ]
+            daily_stats = daily_stats.rename(
+                columns={"revenue": "total_revenue"}
+            ).reset_index()
 
             anomalies = []
             alerts = []
@@ -588,6 +536,7 @@ Response:
                 "error": str(e),
             }
 
+    @cached_result
     def get_product_recommendations(self, limit: int = 10) -> Dict[str, Any]:
         """
         Generate product recommendations based on sales data
@@ -598,15 +547,6 @@ Response:
         Returns:
             dict: Product recommendations with reasoning
         """
-        if not PANDAS_AVAILABLE:
-            return {
-                "recommendations": [],
-                "insights": [
-                    "Pandas not available. Please install: pip install pandas numpy"
-                ],
-                "error": "AI dependencies not installed",
-            }
-
         try:
             # Get food items with sales data
             foods = (
@@ -716,6 +656,7 @@ Response:
                 "error": str(e),
             }
 
+    @cached_result
     def get_customer_insights(self) -> Dict[str, Any]:
         """
         Generate customer insights and segmentation
@@ -723,15 +664,6 @@ Response:
         Returns:
             dict: Customer insights with segmentation and recommendations
         """
-        if not PANDAS_AVAILABLE:
-            return {
-                "segments": [],
-                "insights": [
-                    "Pandas not available. Please install: pip install pandas numpy"
-                ],
-                "error": "AI dependencies not installed",
-            }
-
         try:
             # Get customer data
             customers = (
@@ -854,25 +786,28 @@ Response:
 
     def is_available(self) -> bool:
         """Check if AI service is available and properly configured"""
-        return self.model is not None and PANDAS_AVAILABLE
+        return self.model is not None
 
     def get_service_status(self) -> Dict[str, Any]:
         """Get detailed status of AI service components"""
         return {
             "ai_model_available": self.model is not None,
-            "pandas_available": PANDAS_AVAILABLE,
+            "pandas_available": True,
             "google_ai_configured": hasattr(settings, "GOOGLE_AI_API_KEY")
             and settings.GOOGLE_AI_API_KEY,
             "service_ready": self.is_available(),
             "features": {
-                "sales_forecasting": PANDAS_AVAILABLE,
-                "anomaly_detection": PANDAS_AVAILABLE,
-                "product_recommendations": PANDAS_AVAILABLE,
-                "customer_insights": PANDAS_AVAILABLE,
+                "sales_forecasting": True,
+                "anomaly_detection": True,
+                "product_recommendations": True,
+                "customer_insights": True,
                 "sentiment_analysis": self.model is not None,
             },
+            "result_cache": ai_result_cache.stats(),
+            "llm_gateway": llm_gateway.stats(),
         }
 
+    @cached_result
     def generate_business_insights(self) -> Dict[str, Any]:
         """Generate comprehensive business insights using all AI features"""
         if not self.is_available():
@@ -882,11 +817,19 @@ Response:
             }
 
         try:
-            # Get all AI insights
-            sales_forecast = self.get_sales_forecast(30)
-            anomalies = self.detect_anomalies(30)
-            product_recs = self.get_product_recommendations(5)
-            customer_insights = self.get_customer_insights()
+            # Get all AI insights, computing the uncached ones concurrently
+            results = ai_result_cache.gather(
+                {
+                    "sales_forecast": (self.get_sales_forecast, (30,)),
+                    "anomalies": (self.detect_anomalies, (30,)),
+                    "product_recommendations": (self.get_product_recommendations, (5,)),
+                    "customer_insights": (self.get_customer_insights, ()),
+                }
+            )
+            sales_forecast = results["sales_forecast"]
+            anomalies = results["anomalies"]
+            product_recs = results["product_recommendations"]
+            customer_insights = results["customer_insights"]
 
             # Generate AI-powered summary
             summary = self._generate_ai_summary(
@@ -953,8 +896,7 @@ Response:
             Keep the summary professional and actionable.
             """
 
-            response = self.model.generate_content(prompt)
-            return response.text
+            return llm_gateway.generate(self.model, prompt)
 
         except Exception as e:
             logger.error(f"AI summary generation failed: {e}")
@@ -0,0 +1,382 @@
+"""
+Admin Analytics Cube
+
+Order history loaded once into columnar pandas/NumPy frames so the admin
+analytics views (growth, segmentation, predictive, anomaly, distribution and
+top performers) are vectorised group-bys over memory instead of separate ORM
+aggregates over the same rows.
+
+Two frames make up a cube:
+- ``orders``: order_id, created_at, updated_at, customer_id, chef_id,
+  amount, status, paid
+- ``items``: order_id, food_id, quantity, total_price, plus the order's
+  created_at / paid so item group-bys need no join
+
+The cube is refreshed incrementally: orders with ``updated_at`` at or past
+the watermark (and their items) replace their old rows. A full reload every
+``ANALYTICS_CUBE_FULL_RELOAD`` seconds picks up deletes and bulk ``update()``
+calls that do not touch ``updated_at``. Timestamps are naive UTC.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+from datetime import timezone as dt_timezone
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.utils import timezone
+
+from .order_series import order_series
+
+logger = logging.getLogger(__name__)
+
+ORDER_COLUMNS = [
+    "order_id",
+    "created_at",
+    "updated_at",
+    "customer_id",
+    "chef_id",
+    "amount",
+    "status",
+    "paid",
+]
+ITEM_COLUMNS = ["order_id", "food_id", "quantity", "total_price"]
+
+# (column, model lookup, dtype) for streaming full reloads into arrays
+ORDER_FIELDS = [
+    ("order_id", "id", "int64"),
+    ("created_at", "created_at", "datetime64[us]"),
+    ("updated_at", "updated_at", "datetime64[us]"),
+    ("customer_id", "customer_id", "int64"),
+    ("chef_id", "chef_id", "int64"),
+    ("amount", "total_amount", "float64"),
+    ("status", "status", "object"),
+    ("paid", "payment_status", "object"),
+]
+ITEM_FIELDS = [
+    ("order_id", "order_id", "int64"),
+    ("food_id", "price__food_id", "int64"),
+    ("quantity", "quantity", "int64"),
+    ("total_price", "total_price", "float64"),
+]
+
+# Orders per IN (...) clause when reloading the items of changed orders
+ITEM_RELOAD_CHUNK = 1000
+
+
+def _utc_naive(value) -> np.datetime64:
+    """Aware datetime or date -> naive UTC numpy datetime64[ns]"""
+    if isinstance(value, datetime):
+        if timezone.is_aware(value):
+            value = value.astimezone(dt_timezone.utc).replace(tzinfo=None)
+        return np.datetime64(value, "ns")
+    return np.datetime64(value, "ns")
+
+
+def _frame(rows, columns) -> pd.DataFrame:
+    if isinstance(rows, dict):
+        return pd.DataFrame(rows, columns=columns)
+    return pd.DataFrame.from_records(list(rows), columns=columns)
+
+
+class OrderCube:
+    """Immutable columnar snapshot of order and order item facts"""
+
+    def __init__(self, orders: pd.DataFrame, items: pd.DataFrame, loaded_at: float):
+        self.orders = orders
+        self.items = items
+        self.loaded_at = loaded_at
+        self.watermark = orders["updated_at"].max() if len(orders) else None
+
+    @classmethod
+    def from_records(cls, order_rows: Iterable, item_rows: Iterable, loaded_at=None) -> "OrderCube":
+        """Build a cube from ``ORDER_COLUMNS`` tuples and ``ITEM_COLUMNS`` tuples"""
+        orders = cls.order_frame(order_rows)
+        items = cls.item_frame(item_rows, orders)
+        return cls(orders, items, loaded_at or time.monotonic())
+
+    @staticmethod
+    def order_frame(rows) -> pd.DataFrame:
+        """Order frame from ``ORDER_COLUMNS`` tuples or a dict of column arrays"""
+        frame = _frame(rows, ORDER_COLUMNS)
+        frame["order_id"] = frame["order_id"].astype(np.int64)
+        for column in ("created_at", "updated_at"):
+            frame[column] = pd.to_datetime(frame[column], utc=True).dt.tz_localize(None)
+        frame["customer_id"] = frame["customer_id"].fillna(-1).astype(np.int64)
+        frame["chef_id"] = frame["chef_id"].fillna(-1).astype(np.int64)
+        frame["amount"] = frame["amount"].fillna(0).astype(np.float64)
+        frame["status"] = frame["status"].astype(object)
+        if frame["paid"].dtype != bool:
+            frame["paid"] = frame["paid"].to_numpy() == "paid"
+        return frame
+
+    @staticmethod
+    def item_frame(rows, orders: pd.DataFrame) -> pd.DataFrame:
+        frame = _frame(rows, ITEM_COLUMNS)
+        frame["order_id"] = frame["order_id"].astype(np.int64)
+        frame["food_id"] = frame["food_id"].astype(np.int64)
+        frame["quantity"] = frame["quantity"].astype(np.int64)
+        frame["total_price"] = frame["total_price"].fillna(0).astype(np.float64)
+        return frame.merge(orders[["order_id", "created_at", "paid"]], on="order_id", how="inner")
+
+    def apply_delta(self, orders: pd.DataFrame, items: pd.DataFrame, loaded_at: float) -> "OrderCube":
+        """New cube with the changed orders (and their items) replaced"""
+        if not len(orders):
+            return OrderCube(self.orders, self.items, loaded_at)
+        changed = orders["order_id"].to_numpy()
+        kept_orders = self.orders[~self.orders["order_id"].isin(changed)]
+        kept_items = self.items[~self.items["order_id"].isin(changed)]
+        return OrderCube(
+            pd.concat([kept_orders, orders], ignore_index=True),
+            pd.concat([kept_items, items], ignore_index=True),
+            loaded_at,
+        )
+
+    # Filters -----------------------------------------------------------------
+
+    @staticmethod
+    def _mask(frame, start=None, end=None, paid=None, end_inclusive=True):
+        created = frame["created_at"].to_numpy()
+        mask = np.ones(len(frame), dtype=bool)
+        if start is not None:
+            mask &= created >= _utc_naive(start)
+        if end is not None:
+            bound = _utc_naive(end)
+            mask &= created <= bound if end_inclusive else created < bound
+        if paid is not None:
+            mask &= frame["paid"].to_numpy() == paid
+        return mask
+
+    def select(self, start=None, end=None, paid=None, statuses=None, end_inclusive=True) -> pd.DataFrame:
+        mask = self._mask(self.orders, start, end, paid, end_inclusive)
+        if statuses is not None:
+            mask &= self.orders["status"].isin(list(statuses)).to_numpy()
+        return self.orders[mask]
+
+    # Aggregates ----------------------------------------------------------------
+
+    def totals(self, start=None, end=None, paid=None, statuses=None, end_inclusive=True) -> dict:
+        """Order count and revenue in a window"""
+        selected = self.select(start, end, paid, statuses, end_inclusive)
+        return {"count": int(len(selected)), "revenue": float(selected["amount"].sum())}
+
+    def daily_totals(self, start, end, paid=None, fill=True) -> pd.DataFrame:
+        """
+        Orders and revenue per UTC day, indexed by ``datetime.date``.
+
+        With ``fill`` every day from ``start`` to ``end`` is present (zeros for
+        days without orders); otherwise only days that had orders.
+        """
+        selected = self.select(start, end, paid)
+        first_day = _utc_naive(start).astype("datetime64[D]")
+        last_day = _utc_naive(end).astype("datetime64[D]")
+        span = int((last_day - first_day).astype(np.int64)) + 1
+
+        offsets = (
+            selected["created_at"].to_numpy().astype("datetime64[D]") - first_day
+        ).astype(np.int64)
+        counts = np.bincount(offsets, minlength=span)[:span]
+        revenue = np.bincount(offsets, weights=selected["amount"].to_numpy(), minlength=span)[:span]
+
+        days = first_day + np.arange(span)
+        frame = pd.DataFrame(
+            {"count": counts, "revenue": revenue},
+            index=pd.Index(days.astype(object), name="date"),
+        )
+        return frame if fill else frame[frame["count"] > 0]
+
+    def weekday_counts(self, start, end) -> pd.Series:
+        """Orders per weekday, 0 = Sunday ... 6 = Saturday (MySQL DAYOFWEEK - 1)"""
+        selected = self.select(start, end)
+        weekday = (selected["created_at"].dt.dayofweek.to_numpy() + 1) % 7
+        return pd.Series(np.bincount(weekday, minlength=7), index=range(7))
+
+    def customer_summary(self, start=None, end=None, paid=True) -> pd.DataFrame:
+        """Per-customer order count, spend, average order value and last order time"""
+        selected = self.select(start, end, paid)
+        return selected.groupby("customer_id", sort=False).agg(
+            order_count=("order_id", "size"),
+            total_spent=("amount", "sum"),
+            avg_order_value=("amount", "mean"),
+            last_order=("created_at", "max"),
+        )
+
+    def chef_summary(self, start=None, end=None, paid=True) -> pd.DataFrame:
+        """Per-chef order count and revenue, busiest first"""
+        selected = self.select(start, end, paid)
+        selected = selected[selected["chef_id"].to_numpy() >= 0]
+        summary = selected.groupby("chef_id", sort=False).agg(
+            total_orders=("order_id", "size"), total_revenue=("amount", "sum")
+        )
+        return summary.sort_values("total_orders", ascending=False, kind="stable")
+
+    def food_summary(self, start=None, end=None, paid=True, sort_by="total_orders") -> pd.DataFrame:
+        """Per-food item line count, quantity, revenue and distinct orders"""
+        items = self.items[self._mask(self.items, start, end, paid)]
+        summary = items.groupby("food_id", sort=False).agg(
+            total_orders=("order_id", "size"),
+            total_quantity=("quantity", "sum"),
+            total_revenue=("total_price", "sum"),
+            order_count=("order_id", "nunique"),
+        )
+        return summary.sort_values(sort_by, ascending=False, kind="stable")
+
+    # View computations ---------------------------------------------------------
+    # The admin analytics views and scripts/benchmark_analytics_cube.py both
+    # call these, so the benchmark times the views' own group-bys.
+
+    def customer_segments(self, start, now) -> dict:
+        """
+        Paying customers since ``start`` split into vip / regular / occasional /
+        at_risk, with ``(size, value)`` per segment and lifetime value buckets
+        ($0-100, $100-300, $300-500, $500+)
+        """
+        customers = self.customer_summary(start=start, paid=True)
+        order_count = customers["order_count"].to_numpy()
+        total_spent = customers["total_spent"].to_numpy()
+        avg_order = customers["avg_order_value"].to_numpy()
+        days_since_order = (
+            (pd.Timestamp(_utc_naive(now)) - customers["last_order"]).dt.days.to_numpy()
+        )
+
+        # Assign every customer to a segment in one pass
+        segment = np.select(
+            [
+                (order_count >= 5) & (avg_order > 40),
+                order_count >= 3,
+                days_since_order > 30,
+            ],
+            ["vip", "regular", "at_risk"],
+            default="occasional",
+        )
+        segment_size = pd.Series(segment, dtype=object).value_counts()
+        segment_value = pd.Series(total_spent).groupby(segment).sum()
+        return {
+            "segments": {
+                key: (int(segment_size.get(key, 0)), round(float(segment_value.get(key, 0)), 2))
+                for key in ("vip", "regular", "occasional", "at_risk")
+            },
+            "ltv_counts": np.bincount(np.digitize(total_spent, [100, 300, 500]), minlength=4)
+            .astype(int)
+            .tolist(),
+            "total_customers": int(len(customers)),
+        }
+
+    def lifetime_value_segments(self, start) -> dict:
+        """``{segment: (count, value)}`` for VIP / Regular / New / Casual customers since ``start``"""
+        customers = self.customer_summary(start=start, paid=True)
+        order_count = customers["order_count"].to_numpy()
+        total_spent = customers["total_spent"].to_numpy()
+        segment = np.select(
+            [
+                (order_count >= 5) & (total_spent > 200),
+                order_count >= 3,
+                order_count == 1,
+            ],
+            ["VIP", "Regular", "New"],
+            default="Casual",
+        )
+        segment_count = pd.Series(segment, dtype=object).value_counts()
+        segment_value = pd.Series(total_spent).groupby(segment).sum()
+        return {
+            key: (int(segment_count.get(key, 0)), float(segment_value.get(key, 0)))
+            for key in ("VIP", "Regular", "New", "Casual")
+        }
+
+    def recent_daily_revenue(self, start, end, days=7) -> Optional[float]:
+        """Mean revenue of the last ``days`` days with orders in the window, None without orders"""
+        daily = self.daily_totals(start, end, fill=False)
+        if not len(daily):
+            return None
+        return float(daily.tail(days)["revenue"].mean())
+
+    def period_comparison(self, start, baseline_start) -> dict:
+        """Paid revenue, order count and failed orders since ``start`` and in the baseline before it"""
+        current = self.select(start=start)
+        baseline = self.select(start=baseline_start, end=start, end_inclusive=False)
+        return {
+            "current_revenue": float(current["amount"].to_numpy()[current["paid"].to_numpy()].sum()),
+            "baseline_revenue": float(baseline["amount"].to_numpy()[baseline["paid"].to_numpy()].sum()),
+            "current_orders": int(len(current)),
+            "baseline_orders": int(len(baseline)),
+            "failed_orders": int(current["status"].isin(["cancelled", "failed"]).to_numpy().sum()),
+        }
+
+
+class AnalyticsCubeService:
+    """Loads the order cube from the database and keeps it current"""
+
+    def __init__(self):
+        self._cube: Optional[OrderCube] = None
+        self._full_loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def get_cube(self) -> OrderCube:
+        """Current cube, refreshed from the watermark when older than the refresh interval"""
+        refresh_seconds = getattr(settings, "ANALYTICS_CUBE_REFRESH_SECONDS", 30)
+        cube = self._cube
+        if cube is not None and time.monotonic() - cube.loaded_at < refresh_seconds:
+            return cube
+        with self._lock:
+            cube = self._cube
+            if cube is None or time.monotonic() - cube.loaded_at >= refresh_seconds:
+                cube = self._cube = self._refresh(cube)
+        return cube
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._cube = None
+
+    def _refresh(self, cube: Optional[OrderCube]) -> OrderCube:
+        started = time.monotonic()
+        full_reload = getattr(settings, "ANALYTICS_CUBE_FULL_RELOAD", 3600)
+        if cube is None or cube.watermark is None or started - self._full_loaded_at >= full_reload:
+            orders = OrderCube.order_frame(self._order_columns())
+            items = OrderCube.item_frame(self._item_columns(), orders)
+            self._full_loaded_at = started
+            refreshed = OrderCube(orders, items, started)
+            logger.info(
+                f"Analytics cube loaded {len(orders)} orders in {time.monotonic() - started:.2f}s"
+            )
+            return refreshed
+
+        since = pd.Timestamp(cube.watermark).tz_localize("UTC").to_pydatetime()
+        orders = OrderCube.order_frame(self._order_rows(since=since))
+        items = OrderCube.item_frame(self._item_rows(orders["order_id"].tolist()), orders)
+        return cube.apply_delta(orders, items, started)
+
+    @staticmethod
+    def _order_columns():
+        from apps.orders.models import Order
+
+        return order_series.columns(Order.objects.order_by(), ORDER_FIELDS)
+
+    @staticmethod
+    def _item_columns():
+        from apps.orders.models import OrderItem
+
+        return order_series.columns(OrderItem.objects.order_by(), ITEM_FIELDS)
+
+    @staticmethod
+    def _order_rows(since: datetime):
+        from apps.orders.models import Order
+
+        queryset = Order.objects.order_by().filter(updated_at__gte=since)
+        return queryset.values_list(*[lookup for _, lookup, _ in ORDER_FIELDS])
+
+    @staticmethod
+    def _item_rows(order_ids: list):
+        from apps.orders.models import OrderItem
+
+        fields = [lookup for _, lookup, _ in ITEM_FIELDS]
+        for offset in range(0, len(order_ids), ITEM_RELOAD_CHUNK):
+            chunk = order_ids[offset : offset + ITEM_RELOAD_CHUNK]
+            yield from OrderItem.objects.filter(order_id__in=chunk).order_by().values_list(*fields)
+
+
+# Singleton instance
+analytics_cube_service = AnalyticsCubeService()
@@ -0,0 +1,228 @@
+"""
+Admin Dashboard Snapshot Service
+
+The admin dashboard ``stats`` endpoint used to recompute dozens of
+platform-wide counts and sums on every page load. The aggregates are now
+computed with a handful of conditional-aggregate queries into an
+``AdminDashboardSnapshot`` row that the endpoint serves as-is.
+
+Freshness:
+- writes to users, orders and foods mark the snapshot stale (signals.py)
+- the background scheduler refreshes it when stale or older than
+  ``ADMIN_DASHBOARD_SNAPSHOT_MAX_AGE`` seconds
+- ``?fresh=1`` recomputes synchronously
+"""
+
+import logging
+import time
+from datetime import timedelta
+from typing import Dict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from ..models import AdminBackupLog, AdminDashboardSnapshot, AdminNotification
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+SNAPSHOT_KEY = "dashboard_stats"
+
+COOK_ROLES = Q(role__iexact="cook")
+DELIVERY_ROLES = Q(role__iexact="delivery_agent") | Q(role__iexact="DeliveryAgent")
+
+
+def _growth(current, previous):
+    return round(((current - previous) / max(previous, 1)) * 100, 2)
+
+
+class DashboardSnapshotService:
+    """Compute, store and serve the admin dashboard statistics snapshot"""
+
+    def get(self, fresh: bool = False) -> Dict:
+        """Stored snapshot, computing it first when missing or ``fresh``"""
+        if not fresh:
+            snapshot = AdminDashboardSnapshot.objects.filter(key=SNAPSHOT_KEY).first()
+            if snapshot is not None:
+                return self._payload(snapshot)
+        return self._payload(self.refresh())
+
+    def refresh(self) -> AdminDashboardSnapshot:
+        started = time.perf_counter()
+        data = self.compute()
+        compute_ms = round((time.perf_counter() - started) * 1000, 1)
+        snapshot, _ = AdminDashboardSnapshot.objects.update_or_create(
+            key=SNAPSHOT_KEY,
+            defaults={
+                "data": data,
+                "computed_at": timezone.now(),
+                "compute_ms": compute_ms,
+                "is_stale": False,
+            },
+        )
+        logger.debug(f"Admin dashboard snapshot refreshed in {compute_ms} ms")
+        return snapshot
+
+    def refresh_if_due(self) -> bool:
+        """Refresh when marked stale or past the max age; used by the scheduler"""
+        max_age = getattr(settings, "ADMIN_DASHBOARD_SNAPSHOT_MAX_AGE", 300)
+        snapshot = (
+            AdminDashboardSnapshot.objects.filter(key=SNAPSHOT_KEY)
+            .only("computed_at", "is_stale")
+            .first()
+        )
+        if (
+            snapshot is None
+            or snapshot.is_stale
+            or snapshot.computed_at <= timezone.now() - timedelta(seconds=max_age)
+        ):
+            self.refresh()
+            return True
+        return False
+
+    def mark_stale(self) -> None:
+        # Conditional so repeated writes between refreshes do not rewrite the row
+        AdminDashboardSnapshot.objects.filter(key=SNAPSHOT_KEY, is_stale=False).update(
+            is_stale=True
+        )
+
+    def compute(self) -> Dict:
+        from apps.food.models import Food
+        from apps.orders.models import Order
+
+        now = timezone.now()
+        today = now.date()
+        week_ago = now - timedelta(days=7)
+        two_weeks_ago = week_ago - timedelta(days=7)
+        month_ago = now - timedelta(days=30)
+        this_week = Q(date_joined__gte=week_ago)
+        previous_week = Q(date_joined__gte=two_weeks_ago, date_joined__lt=week_ago)
+
+        users = User.objects.aggregate(
+            total_users=Count("pk"),
+            active_users=Count("pk", filter=Q(is_active=True)),
+            new_users_today=Count("pk", filter=Q(date_joined__date=today)),
+            new_users_this_week=Count("pk", filter=this_week),
+            new_users_this_month=Count("pk", filter=Q(date_joined__gte=month_ago)),
+            previous_week_users=Count("pk", filter=previous_week),
+            total_chefs=Count("pk", filter=COOK_ROLES),
+            active_chefs=Count("pk", filter=COOK_ROLES & Q(is_active=True)),
+            pending_chef_approvals=Count(
+                "pk", filter=COOK_ROLES & Q(approval_status="pending")
+            ),
+            new_chefs_this_week=Count("pk", filter=COOK_ROLES & this_week),
+            previous_week_chefs=Count("pk", filter=COOK_ROLES & previous_week),
+            total_delivery_agents=Count("pk", filter=DELIVERY_ROLES),
+            active_delivery_agents=Count("pk", filter=DELIVERY_ROLES & Q(is_active=True)),
+            new_delivery_agents_this_week=Count("pk", filter=DELIVERY_ROLES & this_week),
+            previous_week_delivery_agents=Count(
+                "pk", filter=DELIVERY_ROLES & previous_week
+            ),
+            pending_user_approvals=Count(
+                "pk", filter=(COOK_ROLES | DELIVERY_ROLES) & Q(approval_status="pending")
+            ),
+            active_sessions=Count("pk", filter=Q(last_login__gte=now - timedelta(hours=1))),
+        )
+
+        paid = Q(payment_status="paid")
+        orders = Order.objects.aggregate(
+            total_orders=Count("pk"),
+            orders_today=Count("pk", filter=Q(created_at__date=today)),
+            orders_this_week=Count("pk", filter=Q(created_at__gte=week_ago)),
+            orders_this_month=Count("pk", filter=Q(created_at__gte=month_ago)),
+            previous_week_orders=Count(
+                "pk", filter=Q(created_at__gte=two_weeks_ago, created_at__lt=week_ago)
+            ),
+            total_revenue=Sum("total_amount", filter=paid),
+            revenue_today=Sum("total_amount", filter=paid & Q(created_at__date=today)),
+            revenue_this_week=Sum("total_amount", filter=paid & Q(created_at__gte=week_ago)),
+            revenue_this_month=Sum(
+                "total_amount", filter=paid & Q(created_at__gte=month_ago)
+            ),
+            previous_week_revenue=Sum(
+                "total_amount",
+                filter=paid & Q(created_at__gte=two_weeks_ago, created_at__lt=week_ago),
+            ),
+        )
+        for field in (
+            "total_revenue",
+            "revenue_today",
+            "revenue_this_week",
+            "revenue_this_month",
+            "previous_week_revenue",
+        ):
+            orders[field] = float(orders[field] or 0)
+
+        foods = Food.objects.aggregate(
+            total_foods=Count("pk"),
+            active_foods=Count("pk", filter=Q(is_available=True)),
+            pending_food_approvals=Count("pk", filter=Q(is_available=False)),
+            new_foods_this_week=Count("pk", filter=Q(created_at__gte=week_ago)),
+            previous_week_foods=Count(
+                "pk", filter=Q(created_at__gte=two_weeks_ago, created_at__lt=week_ago)
+            ),
+        )
+
+        return {
+            "total_users": users["total_users"],
+            "active_users": users["active_users"],
+            "new_users_today": users["new_users_today"],
+            "new_users_this_week": users["new_users_this_week"],
+            "new_users_this_month": users["new_users_this_month"],
+            "user_growth": _growth(
+                users["new_users_this_week"], users["previous_week_users"]
+            ),
+            "total_chefs": users["total_chefs"],
+            "active_chefs": users["active_chefs"],
+            "pending_chef_approvals": users["pending_chef_approvals"],
+            "chef_growth": _growth(
+                users["new_chefs_this_week"], users["previous_week_chefs"]
+            ),
+            "total_orders": orders["total_orders"],
+            "orders_today": orders["orders_today"],
+            "orders_this_week": orders["orders_this_week"],
+            "orders_this_month": orders["orders_this_month"],
+            "order_growth": _growth(
+                orders["orders_this_week"], orders["previous_week_orders"]
+            ),
+            "total_revenue": orders["total_revenue"],
+            "revenue_today": orders["revenue_today"],
+            "revenue_this_week": orders["revenue_this_week"],
+            "revenue_this_month": orders["revenue_this_month"],
+            "revenue_growth": _growth(
+                orders["revenue_this_week"], orders["previous_week_revenue"]
+            ),
+            "total_foods": foods["total_foods"],
+            "active_foods": foods["active_foods"],
+            "pending_food_approvals": foods["pending_food_approvals"],
+            "foods_growth": _growth(
+                foods["new_foods_this_week"], foods["previous_week_foods"]
+            ),
+            "total_delivery_agents": users["total_delivery_agents"],
+            "active_delivery_agents": users["active_delivery_agents"],
+            "delivery_growth": _growth(
+                users["new_delivery_agents_this_week"],
+                users["previous_week_delivery_agents"],
+            ),
+            "pending_user_approvals": users["pending_user_approvals"],
+            "active_sessions": users["active_sessions"],
+            "unread_notifications": AdminNotification.objects.filter(
+                is_read=False, is_active=True
+            ).count(),
+            "pending_backups": AdminBackupLog.objects.filter(status="pending").count(),
+        }
+
+    @staticmethod
+    def _payload(snapshot: AdminDashboardSnapshot) -> Dict:
+        return {
+            **snapshot.data,
+            "computed_at": snapshot.computed_at,
+            "is_stale": snapshot.is_stale,
+        }
+
+
+# Singleton instance
+dashboard_snapshot_service = DashboardSnapshotService()
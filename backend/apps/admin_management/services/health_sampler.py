@@ -0,0 +1,232 @@
+"""
+System Health Sampler
+
+A daemon thread samples CPU, memory, disk, database connections (server
+count plus this process's connection / pool counters and read-replica
+state) and the
+latency / error rate of recent requests every ``SYSTEM_HEALTH_SAMPLE_INTERVAL``
+seconds into a fixed-size ring buffer. Admin health endpoints read the latest
+sample instead of blocking a worker on ``psutil.cpu_percent(interval=1)``.
+
+Request timings are fed in by ``RequestMetricsMiddleware``. When
+``SYSTEM_HEALTH_PERSIST_INTERVAL`` is set, samples are also written to
+``SystemHealthMetric`` at that interval for the history charts.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db import connection, connections
+from django.utils import timezone
+
+from utils.db_pool import connection_stats
+from utils.db_routing import replica_monitor
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+# Number of most recent requests used for latency percentiles and error rate
+REQUEST_WINDOW = 2000
+
+
+class SystemHealthSampler:
+    """Background sampler with a ring buffer of the most recent health samples"""
+
+    def __init__(self, interval: Optional[float] = None, capacity: Optional[int] = None):
+        self.interval = interval or getattr(settings, "SYSTEM_HEALTH_SAMPLE_INTERVAL", 5)
+        capacity = capacity or getattr(settings, "SYSTEM_HEALTH_BUFFER_SIZE", 720)
+        self.persist_interval = getattr(settings, "SYSTEM_HEALTH_PERSIST_INTERVAL", 0)
+
+        self._samples = deque(maxlen=capacity)
+        # (duration_ms, is_error) for the latest requests; deque appends are atomic
+        self._requests = deque(maxlen=REQUEST_WINDOW)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._started_at = time.time()
+        self._last_persisted = 0.0
+
+    def record_request(self, duration_ms: float, status_code: int) -> None:
+        """Record one finished request (called on the request path, O(1))"""
+        self._requests.append((duration_ms, status_code >= 500))
+
+    def start(self) -> None:
+        """Start the sampling thread once per process"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            if psutil is not None:
+                # First call only sets the baseline for non-blocking CPU readings
+                psutil.cpu_percent(interval=None)
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="system-health-sampler", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+    def latest(self) -> Dict:
+        """Most recent sample; takes one inline only before the first tick"""
+        self.start()
+        try:
+            return self._samples[-1]
+        except IndexError:
+            sample = self.sample()
+            self._samples.append(sample)
+            return sample
+
+    def history(self, limit: Optional[int] = None) -> List[Dict]:
+        samples = list(self._samples)
+        return samples[-limit:] if limit else samples
+
+    def sample(self) -> Dict:
+        """Collect one health sample (never blocks on CPU measurement)"""
+        sample = {
+            "timestamp": timezone.now().isoformat(),
+            "cpu_usage": 0.0,
+            "memory_usage": 0.0,
+            "disk_usage": 0.0,
+            "load_average": None,
+            "database_connections": self._database_connections(),
+            # Per alias: CONN_MAX_AGE / pooling settings and this process's counters
+            "database": connection_stats(),
+            "database_replica": replica_monitor.stats(),
+            "uptime_seconds": int(time.time() - self._started_at),
+        }
+        if psutil is not None:
+            sample["cpu_usage"] = psutil.cpu_percent(interval=None)
+            sample["memory_usage"] = psutil.virtual_memory().percent
+            try:
+                sample["disk_usage"] = psutil.disk_usage("/").percent
+            except OSError:
+                pass
+            try:
+                sample["load_average"] = round(psutil.getloadavg()[0], 2)
+            except (AttributeError, OSError):
+                pass
+        sample.update(self._request_stats())
+        sample["health_score"] = self.health_score(sample)
+        return sample
+
+    @staticmethod
+    def health_score(sample: Dict) -> float:
+        usage = (sample["cpu_usage"] + sample["memory_usage"] + sample["disk_usage"]) / 3
+        return round(max(0, min(100, 100 - usage)), 1)
+
+    def _request_stats(self) -> Dict:
+        requests = list(self._requests)
+        if not requests:
+            return {
+                "request_count": 0,
+                "response_time_avg": 0.0,
+                "response_time_p50": 0.0,
+                "response_time_p95": 0.0,
+                "response_time_p99": 0.0,
+                "error_rate": 0.0,
+            }
+
+        durations = sorted(duration for duration, _ in requests)
+        errors = sum(1 for _, is_error in requests if is_error)
+        count = len(durations)
+
+        def percentile(pct):
+            return round(durations[min(count - 1, int(pct / 100 * count))], 1)
+
+        return {
+            "request_count": count,
+            "response_time_avg": round(sum(durations) / count, 1),
+            "response_time_p50": percentile(50),
+            "response_time_p95": percentile(95),
+            "response_time_p99": percentile(99),
+            "error_rate": round(errors / count * 100, 2),
+        }
+
+    def _database_connections(self) -> int:
+        """Open connections reported by the database server, 0 if unsupported"""
+        queries = {
+            "mysql": "SHOW STATUS LIKE 'Threads_connected'",
+            "postgresql": "SELECT 'connections', count(*) FROM pg_stat_activity",
+        }
+        query = queries.get(connection.vendor)
+        if query is None:
+            return 0
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(query)
+                row = cursor.fetchone()
+            return int(row[1]) if row else 0
+        except Exception as e:
+            logger.debug(f"Could not read database connection count: {e}")
+            return 0
+
+    def _persist(self, sample: Dict) -> None:
+        from ..models import SystemHealthMetric
+
+        percent_metrics = ["cpu_usage", "memory_usage", "disk_usage", "error_rate"]
+        metrics = [
+            SystemHealthMetric(
+                metric_type=metric,
+                value=min(100.0, sample[metric]),
+                metadata={"sampled_at": sample["timestamp"]},
+            )
+            for metric in percent_metrics
+        ]
+        metrics.append(
+            SystemHealthMetric(
+                metric_type="response_time",
+                value=sample["response_time_p95"],
+                unit="ms",
+                metadata={
+                    "sampled_at": sample["timestamp"],
+                    "p50": sample["response_time_p50"],
+                    "p99": sample["response_time_p99"],
+                },
+            )
+        )
+        metrics.append(
+            SystemHealthMetric(
+                metric_type="database_connections",
+                value=sample["database_connections"],
+                unit="connections",
+                metadata={"sampled_at": sample["timestamp"]},
+            )
+        )
+        SystemHealthMetric.objects.bulk_create(metrics)
+
+    def _run(self) -> None:
+        while True:
+            try:
+                sample = self.sample()
+                self._samples.append(sample)
+                now = time.monotonic()
+                if self.persist_interval and now - self._last_persisted >= self.persist_interval:
+                    self._last_persisted = now
+                    self._persist(sample)
+            except Exception as e:
+                logger.error(f"System health sampling failed: {e}")
+            finally:
+                # Reconnect every tick: a connection kept across ticks is never
+                # health-checked (dead after a MySQL restart / wait_timeout) and
+                # would hold a utils.mysql_pool slot for the life of the process
+                connections.close_all()
+            if self._stop.wait(self.interval):
+                break
+
+
+# Singleton instance
+system_health_sampler = SystemHealthSampler()
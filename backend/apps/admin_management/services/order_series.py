@@ -0,0 +1,128 @@
+"""
+Order Series Loader
+
+Shared loader for order history used by the admin AI forecasting / anomaly
+detection and the analytics cube, replacing ``pd.DataFrame(list(qs.values()))``
+which built a dict per row before pandas copied it again.
+
+- ``daily_totals`` pushes the per-day aggregation into SQL (``TruncDate`` +
+  ``Sum`` / ``Count``), so only one row per day leaves the database
+- ``columns`` streams ``values_list(...).iterator(chunk_size=...)`` into
+  preallocated NumPy arrays for row-level needs, keeping memory at one
+  array per column plus one chunk of tuples
+"""
+
+import logging
+from datetime import datetime
+from datetime import timezone as dt_timezone
+from itertools import islice
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from django.db.models import Count, QuerySet, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 5000
+
+# Fills for NULLs in integer / float / bool columns
+NULL_FILLS = {"i": -1, "f": np.nan, "b": False}
+
+
+def _naive_utc(value):
+    if isinstance(value, datetime) and timezone.is_aware(value):
+        return value.astimezone(dt_timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _convert(column: Sequence, dtype: np.dtype) -> Sequence:
+    """Prepare one chunk of a column for assignment into ``dtype``"""
+    if dtype.kind == "M":
+        return [None if value is None else _naive_utc(value) for value in column]
+    fill = NULL_FILLS.get(dtype.kind)
+    if fill is not None and None in column:
+        return [fill if value is None else value for value in column]
+    return column
+
+
+class OrderSeriesLoader:
+    """Daily order aggregates from SQL and columnar order rows from a stream"""
+
+    def daily_totals(
+        self,
+        start: datetime,
+        end: datetime,
+        statuses: Optional[Iterable[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        Revenue and order count per UTC day that had orders, indexed by
+        ``datetime.date`` in ascending order, from a single GROUP BY query.
+        """
+        from apps.orders.models import Order
+
+        queryset = Order.objects.filter(created_at__gte=start, created_at__lte=end)
+        if statuses is not None:
+            queryset = queryset.filter(status__in=list(statuses))
+        rows = list(
+            queryset.annotate(date=TruncDate("created_at"))
+            .values("date")
+            .annotate(revenue=Sum("total_amount"), order_count=Count("pk"))
+            .order_by("date")
+            .values_list("date", "revenue", "order_count")
+        )
+
+        revenue = np.array([float(row[1] or 0) for row in rows], dtype=np.float64)
+        order_count = np.array([row[2] for row in rows], dtype=np.int64)
+        return pd.DataFrame(
+            {
+                "revenue": revenue,
+                "order_count": order_count,
+                "avg_order_value": revenue / np.maximum(order_count, 1),
+            },
+            index=pd.Index([row[0] for row in rows], name="date", dtype=object),
+        )
+
+    def columns(
+        self,
+        queryset: QuerySet,
+        fields: List[Tuple[str, str, str]],
+        chunk_size: int = CHUNK_SIZE,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Stream ``queryset`` into one NumPy array per field.
+
+        ``fields`` holds ``(name, lookup, dtype)`` triples, e.g.
+        ``("amount", "total_amount", "float64")``. Datetimes are stored as
+        naive UTC and NULLs as ``NULL_FILLS`` (NaT / None for datetime and
+        object columns).
+        """
+        names = [name for name, _, _ in fields]
+        dtypes = [np.dtype(dtype) for _, _, dtype in fields]
+        capacity = queryset.count()
+        arrays = [np.empty(capacity, dtype=dtype) for dtype in dtypes]
+
+        rows = queryset.values_list(*[lookup for _, lookup, _ in fields]).iterator(
+            chunk_size=chunk_size
+        )
+        filled = 0
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            end = filled + len(chunk)
+            if end > capacity:
+                # Rows inserted between count() and the read
+                capacity = max(end, capacity + chunk_size)
+                arrays = [np.resize(array, capacity) for array in arrays]
+            for index, column in enumerate(zip(*chunk)):
+                arrays[index][filled:end] = _convert(column, dtypes[index])
+            filled = end
+
+        return {name: array[:filled] for name, array in zip(names, arrays)}
+
+
+# Singleton instance
+order_series = OrderSeriesLoader()
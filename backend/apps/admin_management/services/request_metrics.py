@@ -0,0 +1,217 @@
+"""
+Request Metrics
+
+In-process aggregates of request latency, SQL query counts / time, response
+size and status class per resolved URL name and HTTP method. Filled by
+``RequestMetricsMiddleware`` and exposed as Prometheus text
+(``/api/admin-management/metrics/``) and as a JSON feed for the admin
+dashboard (``dashboard/endpoint_metrics/``).
+
+Latency is kept as fixed-bucket histograms so recording is O(buckets) with
+no per-request allocation beyond the first hit of an endpoint.
+"""
+
+import bisect
+import threading
+from typing import Dict, List, Optional
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is +Inf
+DURATION_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+QUERY_COUNT_BUCKETS = [0, 1, 2, 5, 10, 20, 50, 100]
+
+
+class EndpointStats:
+    """Running totals for one (endpoint, method) pair"""
+
+    __slots__ = (
+        "count",
+        "duration_ms_sum",
+        "duration_buckets",
+        "query_count_sum",
+        "query_count_max",
+        "query_buckets",
+        "query_ms_sum",
+        "response_bytes_sum",
+        "status_classes",
+    )
+
+    def __init__(self):
+        self.count = 0
+        self.duration_ms_sum = 0.0
+        self.duration_buckets = [0] * (len(DURATION_BUCKETS_MS) + 1)
+        self.query_count_sum = 0
+        self.query_count_max = 0
+        self.query_buckets = [0] * (len(QUERY_COUNT_BUCKETS) + 1)
+        self.query_ms_sum = 0.0
+        self.response_bytes_sum = 0
+        self.status_classes = {}
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound (ms) of the bucket holding the q-th quantile"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.duration_buckets):
+            seen += bucket_count
+            if seen >= rank:
+                if index < len(DURATION_BUCKETS_MS):
+                    return float(DURATION_BUCKETS_MS[index])
+                return float("inf")
+        return float("inf")
+
+
+class RequestMetricsRegistry:
+    """Thread-safe registry of per-endpoint request statistics"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[tuple, EndpointStats] = {}
+
+    def record(
+        self,
+        endpoint: str,
+        method: str,
+        duration_ms: float,
+        status_code: int,
+        query_count: int = 0,
+        query_ms: float = 0.0,
+        response_bytes: int = 0,
+    ) -> None:
+        duration_index = bisect.bisect_left(DURATION_BUCKETS_MS, duration_ms)
+        query_index = bisect.bisect_left(QUERY_COUNT_BUCKETS, query_count)
+        status_class = f"{status_code // 100}xx"
+
+        with self._lock:
+            stats = self._stats.get((endpoint, method))
+            if stats is None:
+                stats = self._stats[(endpoint, method)] = EndpointStats()
+            stats.count += 1
+            stats.duration_ms_sum += duration_ms
+            stats.duration_buckets[duration_index] += 1
+            stats.query_count_sum += query_count
+            stats.query_buckets[query_index] += 1
+            if query_count > stats.query_count_max:
+                stats.query_count_max = query_count
+            stats.query_ms_sum += query_ms
+            stats.response_bytes_sum += response_bytes
+            stats.status_classes[status_class] = stats.status_classes.get(status_class, 0) + 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+    def _copy(self) -> Dict[tuple, EndpointStats]:
+        with self._lock:
+            copied = {}
+            for key, stats in self._stats.items():
+                clone = EndpointStats()
+                for field in EndpointStats.__slots__:
+                    value = getattr(stats, field)
+                    setattr(clone, field, value.copy() if isinstance(value, (list, dict)) else value)
+                copied[key] = clone
+            return copied
+
+    def snapshot(self, sort: str = "total_time", limit: Optional[int] = None) -> List[Dict]:
+        """Per-endpoint summary rows for the admin dashboard"""
+        rows = []
+        for (endpoint, method), stats in self._copy().items():
+            errors = stats.status_classes.get("5xx", 0)
+            p95 = stats.quantile(0.95)
+            rows.append(
+                {
+                    "endpoint": endpoint,
+                    "method": method,
+                    "requests": stats.count,
+                    "avg_ms": round(stats.duration_ms_sum / stats.count, 1),
+                    "p50_ms": stats.quantile(0.5),
+                    "p95_ms": p95 if p95 != float("inf") else None,
+                    "total_time_ms": round(stats.duration_ms_sum, 1),
+                    "avg_queries": round(stats.query_count_sum / stats.count, 1),
+                    "max_queries": stats.query_count_max,
+                    "avg_query_ms": round(stats.query_ms_sum / stats.count, 1),
+                    "avg_response_bytes": int(stats.response_bytes_sum / stats.count),
+                    "status_classes": stats.status_classes,
+                    "error_rate": round(errors / stats.count * 100, 2),
+                }
+            )
+
+        sort_keys = {
+            "total_time": lambda row: row["total_time_ms"],
+            "avg": lambda row: row["avg_ms"],
+            "p95": lambda row: row["p95_ms"] or float("inf"),
+            "queries": lambda row: row["avg_queries"],
+            "requests": lambda row: row["requests"],
+            "errors": lambda row: row["error_rate"],
+        }
+        rows.sort(key=sort_keys.get(sort, sort_keys["total_time"]), reverse=True)
+        return rows[:limit] if limit else rows
+
+    def render_prometheus(self, gauges: Optional[Dict[str, float]] = None) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+
+        def metric_header(name, metric_type, help_text):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+
+        def histogram(name, help_text, bounds, bucket_attr, sum_attr, stats_items):
+            metric_header(name, "histogram", help_text)
+            for labels, stats in stats_items:
+                cumulative = 0
+                buckets = getattr(stats, bucket_attr)
+                for bound, bucket_count in zip(bounds, buckets):
+                    cumulative += bucket_count
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {stats.count}')
+                lines.append(f"{name}_sum{{{labels}}} {getattr(stats, sum_attr)}")
+                lines.append(f"{name}_count{{{labels}}} {stats.count}")
+
+        stats_items = [
+            (f'endpoint="{_escape(endpoint)}",method="{method}"', stats)
+            for (endpoint, method), stats in sorted(self._copy().items())
+        ]
+
+        histogram(
+            "chefsync_request_duration_ms",
+            "Request duration in milliseconds",
+            DURATION_BUCKETS_MS,
+            "duration_buckets",
+            "duration_ms_sum",
+            stats_items,
+        )
+        histogram(
+            "chefsync_request_queries",
+            "SQL queries executed per request",
+            QUERY_COUNT_BUCKETS,
+            "query_buckets",
+            "query_count_sum",
+            stats_items,
+        )
+
+        metric_header("chefsync_request_query_ms_total", "counter", "Time spent in SQL in milliseconds")
+        for labels, stats in stats_items:
+            lines.append(f"chefsync_request_query_ms_total{{{labels}}} {stats.query_ms_sum}")
+
+        metric_header("chefsync_response_bytes_total", "counter", "Response body bytes sent")
+        for labels, stats in stats_items:
+            lines.append(f"chefsync_response_bytes_total{{{labels}}} {stats.response_bytes_sum}")
+
+        metric_header("chefsync_responses_total", "counter", "Responses by status class")
+        for labels, stats in stats_items:
+            for status_class, count in sorted(stats.status_classes.items()):
+                lines.append(f'chefsync_responses_total{{{labels},status="{status_class}"}} {count}')
+
+        for name, value in (gauges or {}).items():
+            metric_header(f"chefsync_{name}", "gauge", name.replace("_", " ").capitalize())
+            lines.append(f"chefsync_{name} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# Singleton instance
+request_metrics = RequestMetricsRegistry()
@@ -1 +1,23 @@
 # Signal handlers for admin_management app
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.food.models import Food
+from apps.orders.models import Order
+
+from .services.dashboard_snapshot import dashboard_snapshot_service
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+@receiver(post_save, sender=Food)
+@receiver(post_delete, sender=Food)
+def mark_dashboard_snapshot_stale(sender, **kwargs):
+    """Flag the admin dashboard snapshot for refresh by the background scheduler"""
+    transaction.on_commit(dashboard_snapshot_service.mark_stale)
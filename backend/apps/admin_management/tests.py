@@ -752,3 +752,776 @@ class AdminDocumentManagementViewSetTestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data["id"], self.pending_document.id)
         self.assertEqual(response.data["status"], "pending")
+
+
+class SystemHealthSamplerTestCase(APITestCase):
+    """Test cases for the background system health sampler"""
+
+    def setUp(self):
+        from apps.admin_management.services.health_sampler import SystemHealthSampler
+
+        self.sampler = SystemHealthSampler(interval=60, capacity=3)
+        self.admin_user = User.objects.create_superuser(
+            email="health-admin@test.com",
+            password="admin123",
+            name="Health Admin",
+            role="admin",
+            username="health-admin@test.com",
+        )
+
+    def test_request_latency_percentiles_and_error_rate(self):
+        """Test request timings are summarised into percentiles and error rate"""
+        for duration in range(1, 101):
+            self.sampler.record_request(float(duration), 500 if duration > 98 else 200)
+
+        sample = self.sampler.sample()
+
+        self.assertEqual(sample["request_count"], 100)
+        self.assertEqual(sample["response_time_p50"], 51.0)
+        self.assertEqual(sample["response_time_p95"], 96.0)
+        self.assertEqual(sample["error_rate"], 2.0)
+
+    def test_ring_buffer_keeps_latest_samples(self):
+        """Test the sample buffer is bounded"""
+        for _ in range(5):
+            self.sampler._samples.append(self.sampler.sample())
+
+        self.assertEqual(len(self.sampler.history()), 3)
+
+    def test_sampling_thread_releases_connections_every_tick(self):
+        """Test the sampler does not keep a DB connection between samples"""
+        self.sampler._stop.set()
+        with patch(
+            "apps.admin_management.services.health_sampler.connections"
+        ) as mock_connections, patch.object(
+            self.sampler, "sample", side_effect=RuntimeError("MySQL server has gone away")
+        ):
+            self.sampler._run()
+
+        mock_connections.close_all.assert_called_once_with()
+
+    @patch("apps.admin_management.services.health_sampler.psutil")
+    def test_system_health_reads_latest_sample(self, mock_psutil):
+        """Test system_health serves the sampled values without blocking on CPU"""
+        mock_psutil.cpu_percent.return_value = 30.0
+        mock_psutil.virtual_memory.return_value.percent = 60.0
+        mock_psutil.disk_usage.return_value.percent = 30.0
+        mock_psutil.getloadavg.return_value = (0.5, 0.4, 0.3)
+
+        with patch(
+            "apps.admin_management.views.system_health_sampler", self.sampler
+        ):
+            # Pretend the sampling thread is already running
+            self.sampler._thread = MagicMock(is_alive=MagicMock(return_value=True))
+            self.client.force_authenticate(user=self.admin_user)
+            response = self.client.get("/api/admin-management/dashboard/system_health/")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["cpu_usage"], 30.0)
+        self.assertEqual(response.data["health_score"], 60.0)
+        for call in mock_psutil.cpu_percent.call_args_list:
+            self.assertIsNone(call.kwargs.get("interval"))
+        self.assertIn("connects", response.data["database"]["default"])
+
+
+class ConnectionPoolTestCase(TestCase):
+    """Test cases for the database connection pool (utils.db_pool)"""
+
+    def setUp(self):
+        import sqlite3
+
+        from utils.db_pool import ConnectionPool
+
+        self.pool = ConnectionPool(size=1, max_overflow=1, recycle=3600, timeout=0.05)
+        self.connect = lambda: sqlite3.connect(":memory:", check_same_thread=False)
+
+    def test_released_connection_is_reused(self):
+        """Test a returned connection is handed out again instead of a new one"""
+        first = self.pool.acquire(self.connect)
+        self.pool.release(first)
+
+        self.assertIs(self.pool.acquire(self.connect), first)
+        stats = self.pool.stats()
+        self.assertEqual((stats["created"], stats["reused"], stats["in_use"]), (1, 1, 1))
+
+    def test_overflow_then_timeout(self):
+        """Test borrowers past size + max_overflow wait and then time out"""
+        from utils.db_pool import PoolTimeout
+
+        first = self.pool.acquire(self.connect)
+        second = self.pool.acquire(self.connect)
+        with self.assertRaises(PoolTimeout):
+            self.pool.acquire(self.connect)
+
+        # Only `size` connections are kept idle
+        self.pool.release(first)
+        self.pool.release(second)
+        stats = self.pool.stats()
+        self.assertEqual((stats["open"], stats["idle"], stats["timeouts"]), (1, 1, 1))
+
+    def test_failed_ping_and_unusable_connections_are_discarded(self):
+        """Test dead or errored connections are closed instead of reused"""
+        first = self.pool.acquire(self.connect)
+        self.pool.release(first)
+
+        def ping(connection):
+            raise RuntimeError("server has gone away")
+
+        second = self.pool.acquire(self.connect, ping=ping)
+        self.assertIsNot(second, first)
+        self.pool.release(second, reusable=False)
+        self.assertEqual(self.pool.stats()["open"], 0)
+        self.assertEqual(self.pool.stats()["discarded"], 2)
+
+    def test_forked_child_starts_with_empty_pools(self):
+        """Test the after-fork hook drops inherited connections without closing them"""
+        from utils import db_pool
+
+        db_pool._pools["fork-test"] = self.pool
+        self.addCleanup(db_pool._pools.pop, "fork-test", None)
+        inherited = self.pool.acquire(self.connect)
+        busy = self.pool.acquire(self.connect)
+        self.pool.release(inherited)
+
+        db_pool.reset_pools_after_fork()
+
+        stats = self.pool.stats()
+        self.assertEqual((stats["open"], stats["idle"]), (0, 0))
+        # Still open: closing it would end the parent's session
+        inherited.execute("SELECT 1")
+        fresh = self.pool.acquire(self.connect)
+        self.assertIsNot(fresh, inherited)
+        self.assertIsNot(fresh, busy)
+
+
+class ReplicaRoutingTestCase(TestCase):
+    """Test cases for read-replica routing (utils.db_routing)"""
+
+    def setUp(self):
+        from django.conf import settings
+
+        from utils.db_routing import ReplicaRouter, replica_monitor
+
+        self.router = ReplicaRouter()
+        self.monitor = replica_monitor
+        self.monitor.reset()
+        self.addCleanup(self.monitor.reset)
+        self.replica_databases = {
+            **settings.DATABASES,
+            "replica": {**settings.DATABASES["default"], "TEST": {"MIRROR": "default"}},
+        }
+
+    def test_reads_stay_on_primary_outside_context_or_without_replica(self):
+        """Test only reads inside using_replica, with a replica configured, are routed"""
+        from utils.db_routing import using_replica
+
+        self.assertIsNone(self.router.db_for_read(Order))
+        with using_replica():
+            # No replica in the test settings
+            self.assertIsNone(self.router.db_for_read(Order))
+        with self.settings(DATABASES=self.replica_databases):
+            self.assertIsNone(self.router.db_for_read(Order))
+
+    def test_reads_fall_back_inside_transaction_or_when_lagging(self):
+        """Test the primary is used inside a transaction or when the replica lags"""
+        from utils.db_routing import using_replica
+
+        with self.settings(DATABASES=self.replica_databases, DB_REPLICA_MAX_LAG=30):
+            with patch.object(self.monitor, "read_lag", return_value=5.0):
+                self.assertTrue(self.monitor.check())
+            with patch.object(self.monitor, "read_lag", return_value=120.0):
+                self.assertFalse(self.monitor.check())
+            self.assertEqual(self.monitor.stats()["last_error"], "120s behind")
+            with patch.object(self.monitor, "read_lag", return_value=None):
+                self.assertFalse(self.monitor.check())
+
+            # TestCase runs each test in a transaction on the primary
+            with using_replica():
+                self.assertEqual(self.router.db_for_read(Order), "default")
+        self.assertEqual(self.monitor.stats()["fallbacks"], 1)
+
+    def test_writes_and_migrations_go_to_primary(self):
+        """Test objects read from the replica are saved to the primary"""
+        from utils.db_routing import _replica_reads, using_replica
+
+        order = Order()
+        order._state.db = "replica"
+        self.assertEqual(self.router.db_for_write(Order, instance=order), "default")
+        self.assertIsNone(self.router.db_for_write(Order, instance=Order()))
+        self.assertFalse(self.router.allow_migrate("replica", "orders"))
+        self.assertIsNone(self.router.allow_migrate("default", "orders"))
+
+        @using_replica
+        def flagged():
+            return _replica_reads.get()
+
+        self.assertTrue(flagged())
+        self.assertFalse(_replica_reads.get())
+
+
+class RequestMetricsTestCase(APITestCase):
+    """Test cases for per-endpoint request metrics"""
+
+    def setUp(self):
+        from apps.admin_management.services.request_metrics import request_metrics
+
+        request_metrics.reset()
+        self.admin_user = User.objects.create_superuser(
+            email="metrics-admin@test.com",
+            password="admin123",
+            name="Metrics Admin",
+            role="admin",
+            username="metrics-admin@test.com",
+        )
+
+    def test_registry_histograms_and_prometheus_text(self):
+        """Test recorded requests are bucketed and rendered for Prometheus"""
+        from apps.admin_management.services.request_metrics import RequestMetricsRegistry
+
+        registry = RequestMetricsRegistry()
+        registry.record("orders-list", "GET", 8.0, 200, query_count=3, query_ms=2.0, response_bytes=100)
+        registry.record("orders-list", "GET", 300.0, 500, query_count=40, query_ms=90.0, response_bytes=50)
+
+        row = registry.snapshot()[0]
+        self.assertEqual(row["requests"], 2)
+        self.assertEqual(row["max_queries"], 40)
+        self.assertEqual(row["error_rate"], 50.0)
+        self.assertEqual(row["p50_ms"], 10.0)
+
+        text = registry.render_prometheus({"cpu_usage": 12.5})
+        self.assertIn('chefsync_request_duration_ms_bucket{endpoint="orders-list",method="GET",le="10"} 1', text)
+        self.assertIn('chefsync_request_duration_ms_bucket{endpoint="orders-list",method="GET",le="+Inf"} 2', text)
+        self.assertIn('chefsync_responses_total{endpoint="orders-list",method="GET",status="5xx"} 1', text)
+        self.assertIn("chefsync_cpu_usage 12.5", text)
+
+    def test_middleware_records_queries_per_endpoint(self):
+        """Test the middleware attributes SQL queries to the resolved URL name"""
+        self.client.force_authenticate(user=self.admin_user)
+        self.client.get("/api/admin-management/notifications/")
+
+        response = self.client.get("/api/admin-management/dashboard/endpoint_metrics/")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows = {row["endpoint"]: row for row in response.data["endpoints"]}
+        self.assertIn("admin-notifications-list", rows)
+        self.assertGreater(rows["admin-notifications-list"]["avg_queries"], 0)
+
+    def test_prometheus_endpoint_requires_token(self):
+        """Test the scrape endpoint checks the bearer token"""
+        with self.settings(METRICS_AUTH_TOKEN="scrape-secret"):
+            denied = self.client.get("/api/admin-management/metrics/")
+            allowed = self.client.get(
+                "/api/admin-management/metrics/",
+                HTTP_AUTHORIZATION="Bearer scrape-secret",
+            )
+
+        self.assertEqual(denied.status_code, 401)
+        self.assertEqual(allowed.status_code, 200)
+        self.assertIn(b"# TYPE chefsync_request_duration_ms histogram", allowed.content)
+
+
+class DashboardSnapshotTestCase(APITestCase):
+    """Test cases for the precomputed admin dashboard stats snapshot"""
+
+    def setUp(self):
+        self.admin_user = User.objects.create_superuser(
+            email="snapshot-admin@test.com",
+            password="admin123",
+            name="Snapshot Admin",
+            role="admin",
+            username="snapshot-admin@test.com",
+        )
+        self.chef_user = User.objects.create_user(
+            email="snapshot-chef@test.com",
+            password="chef123",
+            name="Snapshot Chef",
+            role="cook",
+        )
+        self.client.force_authenticate(user=self.admin_user)
+        self.url = "/api/admin-management/dashboard/stats/"
+
+    def _create_paid_order(self, amount):
+        with self.captureOnCommitCallbacks(execute=True):
+            Order.objects.create(
+                customer=self.admin_user,
+                chef=self.chef_user,
+                total_amount=amount,
+                payment_status="paid",
+            )
+
+    def test_stats_served_from_snapshot_until_refreshed(self):
+        """Test writes mark the snapshot stale instead of recomputing per request"""
+        from apps.admin_management.services.dashboard_snapshot import (
+            dashboard_snapshot_service,
+        )
+
+        self._create_paid_order(40)
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(first.data["total_orders"], 1)
+        self.assertEqual(first.data["total_revenue"], 40.0)
+        self.assertEqual(first.data["total_chefs"], 1)
+
+        self._create_paid_order(60)
+        cached = self.client.get(self.url)
+        self.assertEqual(cached.data["total_orders"], 1)
+        self.assertTrue(cached.data["is_stale"])
+
+        self.assertTrue(dashboard_snapshot_service.refresh_if_due())
+        refreshed = self.client.get(self.url)
+        self.assertEqual(refreshed.data["total_orders"], 2)
+        self.assertEqual(refreshed.data["total_revenue"], 100.0)
+        self.assertFalse(refreshed.data["is_stale"])
+
+    def test_fresh_parameter_recomputes(self):
+        """Test ?fresh=1 recomputes synchronously"""
+        self.client.get(self.url)
+        self._create_paid_order(25)
+
+        response = self.client.get(self.url, {"fresh": "1"})
+
+        self.assertEqual(response.data["total_orders"], 1)
+        self.assertFalse(response.data["is_stale"])
+
+
+class AnalyticsCubeTestCase(APITestCase):
+    """Test cases for the columnar analytics cube behind the admin analytics views"""
+
+    def setUp(self):
+        from apps.admin_management.services.analytics_cube import analytics_cube_service
+
+        analytics_cube_service.invalidate()
+        self.admin_user = User.objects.create_superuser(
+            email="cube-admin@test.com",
+            password="admin123",
+            name="Cube Admin",
+            role="admin",
+            username="cube-admin@test.com",
+        )
+        self.chef_user = User.objects.create_user(
+            email="cube-chef@test.com", password="chef123", name="Cube Chef", role="cook"
+        )
+        self.customer_user = User.objects.create_user(
+            email="cube-customer@test.com",
+            password="customer123",
+            name="Cube Customer",
+            role="customer",
+        )
+        self.client.force_authenticate(user=self.admin_user)
+
+    def _order(self, amount, payment_status="paid", order_status="delivered"):
+        return Order.objects.create(
+            customer=self.customer_user,
+            chef=self.chef_user,
+            total_amount=amount,
+            payment_status=payment_status,
+            status=order_status,
+        )
+
+    def test_cube_group_bys(self):
+        """Test daily, weekday, customer and food aggregates over in-memory records"""
+        from apps.admin_management.services.analytics_cube import OrderCube
+
+        day = datetime(2025, 10, 20, 12, 0)  # a Monday
+        cube = OrderCube.from_records(
+            [
+                (1, day, day, 10, 20, 50.0, "delivered", "paid"),
+                (2, day, day, 10, 20, 30.0, "delivered", "paid"),
+                (3, day + timedelta(days=2), day, 11, 21, 80.0, "cancelled", "pending"),
+            ],
+            [(1, 5, 2, 40.0), (2, 5, 1, 20.0), (3, 6, 4, 80.0)],
+        )
+
+        daily = cube.daily_totals(day - timedelta(days=1), day + timedelta(days=2))
+        self.assertEqual(daily["count"].tolist(), [0, 2, 0, 1])
+        self.assertEqual(cube.weekday_counts(day, day + timedelta(days=3))[1], 2)
+
+        customers = cube.customer_summary(paid=True)
+        self.assertEqual(customers.loc[10, "order_count"], 2)
+        self.assertEqual(customers.loc[10, "total_spent"], 80.0)
+        self.assertNotIn(11, customers.index)
+
+        foods = cube.food_summary(paid=True)
+        self.assertEqual(foods.loc[5, "total_quantity"], 3)
+        self.assertEqual(foods.loc[5, "order_count"], 2)
+        self.assertEqual(cube.totals(statuses=["cancelled"])["count"], 1)
+
+        comparison = cube.period_comparison(day + timedelta(days=1), day)
+        self.assertEqual(
+            (comparison["current_orders"], comparison["baseline_orders"]), (1, 2)
+        )
+        self.assertEqual(comparison["baseline_revenue"], 80.0)
+        self.assertEqual(comparison["failed_orders"], 1)
+        self.assertEqual(cube.lifetime_value_segments(day)["Casual"], (1, 80.0))
+
+    def test_incremental_refresh_picks_up_new_orders(self):
+        """Test orders written after the first load are merged in by watermark"""
+        from apps.admin_management.services.analytics_cube import analytics_cube_service
+
+        self._order(40)
+        with self.settings(ANALYTICS_CUBE_REFRESH_SECONDS=0):
+            first = analytics_cube_service.get_cube()
+            self._order(60)
+            second = analytics_cube_service.get_cube()
+
+        self.assertEqual(len(first.orders), 1)
+        self.assertEqual(len(second.orders), 2)
+        self.assertEqual(second.totals(paid=True)["revenue"], 100.0)
+
+    def test_analytics_views_read_the_cube(self):
+        """Test segmentation, top chefs and distribution views"""
+        for amount in (50, 60, 70):
+            self._order(amount)
+        self._order(20, payment_status="pending", order_status="cancelled")
+
+        segmentation = self.client.get(
+            "/api/admin-management/dashboard/customer_segmentation/"
+        )
+        self.assertEqual(segmentation.status_code, status.HTTP_200_OK)
+        regular = next(
+            s for s in segmentation.data["segments"] if s["name"] == "Regular Customers"
+        )
+        self.assertEqual((regular["size"], regular["value"]), (1, 180.0))
+
+        chefs = self.client.get("/api/admin-management/dashboard/top_performing_chefs/")
+        self.assertEqual(chefs.data["chefs"][0]["id"], self.chef_user.pk)
+        self.assertEqual(chefs.data["chefs"][0]["total_orders"], 3)
+
+        distribution = self.client.get(
+            "/api/admin-management/dashboard/orders_distribution/", {"days": 30}
+        )
+        self.assertEqual(distribution.data["data"]["datasets"][0]["data"], [4])
+
+        growth = self.client.get("/api/admin-management/dashboard/growth_analytics/")
+        self.assertEqual(growth.data["total_new_orders"], 4)
+
+        self.assertEqual(
+            self.client.get(
+                "/api/admin-management/dashboard/predictive_analytics/"
+            ).status_code,
+            status.HTTP_200_OK,
+        )
+        self.assertEqual(
+            self.client.get(
+                "/api/admin-management/dashboard/anomaly_detection/"
+            ).status_code,
+            status.HTTP_200_OK,
+        )
+
+
+class AIResultCacheTestCase(APITestCase):
+    """Test cases for the watermark-keyed AdminAIService result cache"""
+
+    def setUp(self):
+        from apps.admin_management.services.ai_result_cache import (
+            ai_result_cache,
+            cached_result,
+        )
+
+        ai_result_cache.clear()
+        self.cache = ai_result_cache
+        self.calls = []
+        calls = self.calls
+
+        class Service:
+            @cached_result
+            def forecast(self, days_ahead=30):
+                calls.append(days_ahead)
+                return {"days_ahead": days_ahead}
+
+            @cached_result
+            def failing(self):
+                calls.append("failing")
+                return {"error": "boom"}
+
+            @cached_result
+            def thread_name(self, index):
+                import threading
+
+                return threading.current_thread().name
+
+        self.service = Service()
+        self.admin_user = User.objects.create_superuser(
+            email="ai-cache-admin@test.com",
+            password="admin123",
+            name="AI Cache Admin",
+            role="admin",
+            username="ai-cache-admin@test.com",
+        )
+        self.customer_user = User.objects.create_user(
+            email="ai-cache-customer@test.com",
+            password="customer123",
+            name="AI Cache Customer",
+            role="customer",
+        )
+        self.client.force_authenticate(user=self.admin_user)
+
+    def _order(self):
+        return Order.objects.create(
+            customer=self.customer_user,
+            chef=self.admin_user,
+            total_amount=25,
+            payment_status="paid",
+            status="delivered",
+        )
+
+    def test_results_reused_until_watermark_moves(self):
+        """Test normalised arguments share an entry and new orders invalidate it"""
+        with self.settings(ADMIN_AI_WATERMARK_INTERVAL=0, ADMIN_AI_CACHE_WORKERS=0):
+            self.service.forecast(7)
+            self.service.forecast(days_ahead=7)
+            self.service.forecast()
+            self.assertEqual(self.calls, [7, 30])
+
+            self._order()
+            self.service.forecast(7)
+            self.assertEqual(self.calls, [7, 30, 7])
+
+    def test_error_results_are_not_cached(self):
+        """Test methods reporting {"error": ...} are recomputed"""
+        with self.settings(ADMIN_AI_CACHE_WORKERS=0):
+            self.service.failing()
+            self.service.failing()
+        self.assertEqual(self.calls, ["failing", "failing"])
+
+    def test_gather_computes_cold_results_on_the_pool(self):
+        """Test cold results run on pool threads and warm ones are served inline"""
+        with self.settings(ADMIN_AI_CACHE_WORKERS=2):
+            calls = {
+                "first": (self.service.thread_name, (1,)),
+                "second": (self.service.thread_name, (2,)),
+            }
+            cold = self.cache.gather(calls)
+            warm = self.cache.gather(calls)
+
+        self.assertTrue(all(name.startswith("admin-ai") for name in cold.values()))
+        self.assertEqual(cold, warm)
+        self.assertEqual(self.cache.stats()["hits"], 2)
+
+    def test_dashboard_summary_served_from_cache(self):
+        """Test the AI dashboard summary computes its insights once per watermark"""
+        self._order()
+        with self.settings(ADMIN_AI_CACHE_WORKERS=0):
+            first = self.client.get("/api/admin-management/ai/dashboard-summary/")
+            misses = self.cache.stats()["misses"]
+            second = self.client.get("/api/admin-management/ai/dashboard-summary/")
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data["data"], first.data["data"])
+        self.assertEqual(self.cache.stats()["misses"], misses)
+
+
+class OrderSeriesLoaderTestCase(APITestCase):
+    """Test cases for the SQL daily aggregates and streamed order columns"""
+
+    def setUp(self):
+        self.chef_user = User.objects.create_user(
+            email="series-chef@test.com", password="chef123", name="Series Chef", role="cook"
+        )
+        self.customer_user = User.objects.create_user(
+            email="series-customer@test.com",
+            password="customer123",
+            name="Series Customer",
+            role="customer",
+        )
+        self.now = timezone.now()
+        for days_ago, amount, order_status in (
+            (0, 40, "delivered"),
+            (0, 60, "delivered"),
+            (2, 30, "cancelled"),
+        ):
+            order = Order.objects.create(
+                customer=self.customer_user,
+                chef=self.chef_user,
+                total_amount=amount,
+                status=order_status,
+            )
+            Order.objects.filter(pk=order.pk).update(
+                created_at=self.now - timedelta(days=days_ago)
+            )
+
+    def test_daily_totals_grouped_in_sql(self):
+        """Test one row per day with orders, filtered by status"""
+        from apps.admin_management.services.order_series import order_series
+
+        start = self.now - timedelta(days=7)
+        daily = order_series.daily_totals(start, self.now)
+        self.assertEqual(daily["order_count"].tolist(), [1, 2])
+        self.assertEqual(daily["revenue"].tolist(), [30.0, 100.0])
+        self.assertEqual(daily.index[-1], self.now.date())
+
+        delivered = order_series.daily_totals(start, self.now, statuses=["delivered"])
+        self.assertEqual(delivered["avg_order_value"].tolist(), [50.0])
+
+    def test_columns_streamed_into_arrays(self):
+        """Test chunked values_list rows land in typed NumPy arrays"""
+        from apps.admin_management.services.order_series import order_series
+
+        columns = order_series.columns(
+            Order.objects.order_by("total_amount"),
+            [
+                ("amount", "total_amount", "float64"),
+                ("created_at", "created_at", "datetime64[us]"),
+                ("status", "status", "object"),
+            ],
+            chunk_size=2,
+        )
+        self.assertEqual(columns["amount"].tolist(), [30.0, 40.0, 60.0])
+        self.assertEqual(columns["created_at"].dtype.kind, "M")
+        self.assertEqual(columns["status"][0], "cancelled")
+
+    def test_sales_forecast_uses_daily_totals(self):
+        """Test the forecast reads delivered revenue from the SQL aggregate"""
+        from apps.admin_management.services.ai_result_cache import ai_result_cache
+        from apps.admin_management.services.ai_service import AdminAIService
+
+        ai_result_cache.clear()
+        with self.settings(ADMIN_AI_CACHE_WORKERS=0):
+            forecast = AdminAIService().get_sales_forecast(7)
+        self.assertNotIn("error", forecast)
+        self.assertEqual(len(forecast["forecast"]), 7)
+        self.assertIn("Recent average (last 1 days): $100.00", forecast["insights"])
+
+
+class AIJobRunnerTestCase(APITestCase):
+    """Test cases for AI endpoints answered through background jobs"""
+
+    def setUp(self):
+        self.admin_user = User.objects.create_superuser(
+            email="ai-job-admin@test.com",
+            password="admin123",
+            name="AI Job Admin",
+            role="admin",
+            username="ai-job-admin@test.com",
+        )
+        self.other_admin = User.objects.create_superuser(
+            email="ai-job-other@test.com",
+            password="admin123",
+            name="Other Admin",
+            role="admin",
+            username="ai-job-other@test.com",
+        )
+        self.customer_user = User.objects.create_user(
+            email="ai-job-customer@test.com",
+            password="customer123",
+            name="AI Job Customer",
+            role="customer",
+            username="ai-job-customer@test.com",
+        )
+        self.client.force_authenticate(user=self.admin_user)
+        self.url = reverse("ai-chatbot")
+
+    def _chat(self, **extra):
+        with patch(
+            "apps.admin_management.ai_views.ai_service.generate_chatbot_response",
+            return_value="Orders look healthy",
+        ):
+            return self.client.post(self.url, {"message": "How are orders?"}, format="json", **extra)
+
+    def test_async_request_returns_job_with_sync_result(self):
+        """Test Prefer: respond-async answers 202 and the job stores the response"""
+        with self.settings(AI_JOB_WORKERS=0):
+            response = self._chat(HTTP_PREFER="respond-async")
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        job = response.data["data"]
+        self.assertEqual(response["Location"], job["status_url"])
+
+        polled = self.client.get(job["status_url"])
+        self.assertEqual(polled.status_code, status.HTTP_200_OK)
+        self.assertEqual(polled.data["data"]["status"], "succeeded")
+        self.assertEqual(polled.data["data"]["status_code"], 200)
+        self.assertEqual(polled.data["data"]["result"]["data"]["message"], "Orders look healthy")
+        self.assertIsNotNone(polled.data["data"]["duration_ms"])
+
+    def test_requests_run_as_jobs_by_default(self):
+        """Test endpoints answer with a job unless async is turned off"""
+        from apps.admin_management.models import AIJob
+
+        with self.settings(AI_JOB_WORKERS=0):
+            self.assertEqual(self._chat().status_code, status.HTTP_202_ACCEPTED)
+            response = self.client.post(f"{self.url}?async=false", {"message": "hi"}, format="json")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(AIJob.objects.count(), 1)
+
+        with self.settings(AI_JOBS_ASYNC_DEFAULT=False):
+            response = self._chat()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["data"]["message"], "Orders look healthy")
+
+    def test_job_gets_its_own_copy_of_the_request(self):
+        """Test the job view reads a rebuilt request, not the one already answered"""
+        from rest_framework.parsers import JSONParser
+        from rest_framework.request import Request
+        from rest_framework.test import APIRequestFactory
+
+        from apps.admin_management.services.ai_jobs import job_request, request_params
+
+        django_request = APIRequestFactory().post(
+            f"{self.url}?async=true", {"message": "hi"}, format="json"
+        )
+        original = Request(django_request, parsers=[JSONParser()])
+        original.user = self.admin_user
+
+        copied = job_request(original, request_params(original, {}))
+        self.assertIsNot(copied._request, django_request)
+        self.assertEqual(copied.data, {"message": "hi"})
+        self.assertEqual(copied.query_params["async"], "true")
+        self.assertEqual(copied.user, self.admin_user)
+
+    def test_identical_pending_request_reuses_job(self):
+        """Test a duplicate request made while a job is running shares it"""
+        from apps.admin_management.services.ai_jobs import ai_job_runner
+
+        params = {"query": {"days": "7"}}
+        nested = {}
+
+        def handler():
+            nested["job"], nested["created"] = ai_job_runner.submit(
+                "forecast", self.admin_user, params, handler
+            )
+            from rest_framework.response import Response
+
+            return Response({"ok": True})
+
+        with self.settings(AI_JOB_WORKERS=0):
+            job, created = ai_job_runner.submit("forecast", self.admin_user, params, handler)
+
+        self.assertTrue(created)
+        self.assertFalse(nested["created"])
+        self.assertEqual(nested["job"].pk, job.pk)
+        self.assertEqual(job.status, "succeeded")
+
+    def test_full_queue_and_job_visibility(self):
+        """Test 503 when the pool is saturated and jobs stay private to their owner"""
+        with self.settings(AI_JOB_MAX_PENDING=0):
+            response = self._chat(HTTP_PREFER="respond-async")
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        with self.settings(AI_JOB_WORKERS=0):
+            status_url = self._chat(HTTP_PREFER="respond-async").data["data"]["status_url"]
+
+        self.client.force_authenticate(user=self.customer_user)
+        self.assertEqual(self.client.get(status_url).status_code, status.HTTP_404_NOT_FOUND)
+        self.client.force_authenticate(user=self.other_admin)
+        self.assertEqual(self.client.get(status_url).status_code, status.HTTP_200_OK)
+
+    def test_expire_jobs(self):
+        """Test orphaned jobs are failed and old finished jobs deleted"""
+        from apps.admin_management.models import AIJob
+        from apps.admin_management.services.ai_jobs import ai_job_runner
+
+        orphan = AIJob.objects.create(job_type="ai_chatbot", fingerprint="a", status="running")
+        old = AIJob.objects.create(job_type="ai_chatbot", fingerprint="b", status="succeeded")
+        fresh = AIJob.objects.create(job_type="ai_chatbot", fingerprint="c", status="queued")
+        AIJob.objects.filter(pk__in=[orphan.pk, old.pk]).update(
+            created_at=timezone.now() - timedelta(days=2)
+        )
+
+        counts = ai_job_runner.expire_jobs()
+
+        self.assertEqual(counts, {"expired": 1, "deleted": 1})
+        orphan.refresh_from_db()
+        self.assertEqual((orphan.status, orphan.status_code), ("failed", 504))
+        self.assertFalse(AIJob.objects.filter(pk=old.pk).exists())
+        self.assertTrue(AIJob.objects.filter(pk=fresh.pk, status="queued").exists())
@@ -16,6 +16,9 @@ router.register(r'documents', views.AdminDocumentManagementViewSet, basename='ad
 urlpatterns = [
     path('', include(router.urls)),
     
+    # Prometheus scrape endpoint
+    path('metrics/', views.prometheus_metrics, name='prometheus-metrics'),
+    
     # Reports endpoints
     path('reports/templates/', views.get_report_templates, name='report-templates'),
     path('reports/generate/', views.generate_report, name='generate-report'),
@@ -32,4 +35,5 @@ urlpatterns = [
     path('ai/business-insights/', ai_views.business_insights, name='ai-business-insights'),
     path('ai/recommendations/', ai_views.ai_recommendations, name='ai-recommendations'),
     path('ai/chat/', ai_views.ai_chatbot, name='ai-chatbot'),
+    path('ai/jobs/<uuid:job_id>/', ai_views.ai_job_status, name='ai-job-status'),
 ]
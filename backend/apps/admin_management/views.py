@@ -1,19 +1,21 @@
 import logging
 from datetime import datetime, timedelta
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import models
-from django.db.models import Avg, Count, F, Max, Q, Sum
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.http import HttpResponse
 from django.utils import timezone
+from django.utils.crypto import constant_time_compare
 from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from utils.db_routing import using_replica
+from utils.llm_gateway import llm_gateway
 
-try:
-    import psutil
-except ImportError:
-    psutil = None
 import os
 
 logger = logging.getLogger(__name__)
@@ -27,6 +29,10 @@ from .models import (
     AdminSystemSettings,
     SystemHealthMetric,
 )
+from .services.analytics_cube import analytics_cube_service
+from .services.dashboard_snapshot import dashboard_snapshot_service
+from .services.health_sampler import system_health_sampler
+from .services.request_metrics import request_metrics
 from .serializers import (
     AdminActivityLogSerializer,
     AdminBackupLogSerializer,
@@ -44,209 +50,42 @@ from .serializers import (
 User = get_user_model()
 
 
+def _first_active(ranked_ids, limit, fetch, key):
+    """
+    Walk ``ranked_ids`` in order and return up to ``limit`` (id, row) pairs for
+    which ``fetch(ids)`` returns a row, loading rows one batch at a time.
+    """
+    results = []
+    batch_size = max(limit * 2, 10)
+    for offset in range(0, len(ranked_ids), batch_size):
+        batch = [int(pk) for pk in ranked_ids[offset : offset + batch_size]]
+        rows = {row[key]: row for row in fetch(batch)}
+        for pk in batch:
+            if pk in rows:
+                results.append((pk, rows[pk]))
+                if len(results) == limit:
+                    return results
+    return results
+
+
 class AdminDashboardViewSet(viewsets.ViewSet):
     """Admin dashboard analytics and statistics"""
 
     permission_classes = [IsAdminUser]
 
     @action(detail=False, methods=["get"])
+    @using_replica
     def stats(self, request):
-        """Get comprehensive dashboard statistics"""
-        try:
-            # Calculate date ranges
-            now = timezone.now()
-            today = now.date()
-            week_ago = now - timedelta(days=7)
-            month_ago = now - timedelta(days=30)
-
-            # Import models from other apps
-            from apps.food.models import Food
-            from apps.orders.models import Order
-
-            # User statistics
-            total_users = User.objects.count()
-            active_users = User.objects.filter(is_active=True).count()
-            new_users_today = User.objects.filter(date_joined__date=today).count()
-            new_users_this_week = User.objects.filter(date_joined__gte=week_ago).count()
-            new_users_this_month = User.objects.filter(
-                date_joined__gte=month_ago
-            ).count()
-
-            # Calculate user growth
-            previous_week_users = User.objects.filter(
-                date_joined__gte=week_ago - timedelta(days=7), date_joined__lt=week_ago
-            ).count()
-            user_growth = (
-                (new_users_this_week - previous_week_users)
-                / max(previous_week_users, 1)
-            ) * 100
-
-            # Chef statistics - use case-insensitive queries
-            total_chefs = User.objects.filter(Q(role__iexact="cook") | Q(role__iexact="Cook")).count()
-            active_chefs = User.objects.filter(Q(role__iexact="cook") | Q(role__iexact="Cook"), is_active=True).count()
-            pending_chef_approvals = User.objects.filter(
-                Q(role__iexact="cook") | Q(role__iexact="Cook"), approval_status="pending"
-            ).count()
-
-            # Calculate chef growth
-            new_chefs_this_week = User.objects.filter(
-                Q(role__iexact="cook") | Q(role__iexact="Cook"), date_joined__gte=week_ago
-            ).count()
-            previous_week_chefs = User.objects.filter(
-                Q(role__iexact="cook") | Q(role__iexact="Cook"),
-                date_joined__gte=week_ago - timedelta(days=7),
-                date_joined__lt=week_ago,
-            ).count()
-            chef_growth = (
-                (new_chefs_this_week - previous_week_chefs)
-                / max(previous_week_chefs, 1)
-            ) * 100
-
-            # Order statistics
-            total_orders = Order.objects.count()
-            orders_today = Order.objects.filter(created_at__date=today).count()
-            orders_this_week = Order.objects.filter(created_at__gte=week_ago).count()
-            orders_this_month = Order.objects.filter(created_at__gte=month_ago).count()
-
-            # Calculate order growth
-            previous_week_orders = Order.objects.filter(
-                created_at__gte=week_ago - timedelta(days=7), created_at__lt=week_ago
-            ).count()
-            order_growth = (
-                (orders_this_week - previous_week_orders) / max(previous_week_orders, 1)
-            ) * 100
-
-            # Revenue statistics
-            total_revenue = (
-                Order.objects.filter(payment_status="paid").aggregate(
-                    total=Sum("total_amount")
-                )["total"]
-                or 0
-            )
-
-            revenue_today = (
-                Order.objects.filter(
-                    payment_status="paid", created_at__date=today
-                ).aggregate(total=Sum("total_amount"))["total"]
-                or 0
-            )
-
-            revenue_this_week = (
-                Order.objects.filter(
-                    payment_status="paid", created_at__gte=week_ago
-                ).aggregate(total=Sum("total_amount"))["total"]
-                or 0
-            )
-
-            revenue_this_month = (
-                Order.objects.filter(
-                    payment_status="paid", created_at__gte=month_ago
-                ).aggregate(total=Sum("total_amount"))["total"]
-                or 0
-            )
-
-            # Calculate revenue growth
-            previous_week_revenue = (
-                Order.objects.filter(
-                    payment_status="paid",
-                    created_at__gte=week_ago - timedelta(days=7),
-                    created_at__lt=week_ago,
-                ).aggregate(total=Sum("total_amount"))["total"]
-                or 0
-            )
-            revenue_growth = (
-                (revenue_this_week - previous_week_revenue)
-                / max(previous_week_revenue, 1)
-            ) * 100
-
-            # Food statistics
-            total_foods = Food.objects.count()
-            active_foods = Food.objects.filter(is_available=True).count()
-            pending_food_approvals = Food.objects.filter(is_available=False).count()
-
-            # Calculate food growth (newly added foods this week)
-            new_foods_this_week = Food.objects.filter(created_at__gte=week_ago).count()
-            previous_week_foods = Food.objects.filter(
-                created_at__gte=week_ago - timedelta(days=7), created_at__lt=week_ago
-            ).count()
-            foods_growth = (
-                (new_foods_this_week - previous_week_foods)
-                / max(previous_week_foods, 1)
-            ) * 100
-
-            # Delivery agent statistics - use case-insensitive queries
-            total_delivery_agents = User.objects.filter(
-                Q(role__iexact="delivery_agent") | Q(role__iexact="DeliveryAgent")
-            ).count()
-            active_delivery_agents = User.objects.filter(
-                Q(role__iexact="delivery_agent") | Q(role__iexact="DeliveryAgent"), is_active=True
-            ).count()
-
-            # Calculate delivery agent growth
-            new_delivery_agents_this_week = User.objects.filter(
-                Q(role__iexact="delivery_agent") | Q(role__iexact="DeliveryAgent"), date_joined__gte=week_ago
-            ).count()
-            previous_week_delivery_agents = User.objects.filter(
-                Q(role__iexact="delivery_agent") | Q(role__iexact="DeliveryAgent"),
-                date_joined__gte=week_ago - timedelta(days=7),
-                date_joined__lt=week_ago,
-            ).count()
-            delivery_growth = (
-                (new_delivery_agents_this_week - previous_week_delivery_agents)
-                / max(previous_week_delivery_agents, 1)
-            ) * 100
-
-            # Pending user approvals (cooks and delivery agents) - case-insensitive
-            pending_user_approvals = User.objects.filter(
-                Q(role__iexact="cook") | Q(role__iexact="Cook") | 
-                Q(role__iexact="delivery_agent") | Q(role__iexact="DeliveryAgent"),
-                approval_status="pending"
-            ).count()
+        """
+        Get comprehensive dashboard statistics
 
-            # System statistics
-            system_health_score = self._calculate_system_health()
-            active_sessions = self._get_active_sessions()
-            unread_notifications = AdminNotification.objects.filter(
-                is_read=False, is_active=True
-            ).count()
-            pending_backups = AdminBackupLog.objects.filter(status="pending").count()
-
-            stats_data = {
-                "total_users": total_users,
-                "active_users": active_users,
-                "new_users_today": new_users_today,
-                "new_users_this_week": new_users_this_week,
-                "new_users_this_month": new_users_this_month,
-                "user_growth": round(user_growth, 2),
-                "total_chefs": total_chefs,
-                "active_chefs": active_chefs,
-                "pending_chef_approvals": pending_chef_approvals,  # Chef approvals (cooks only)
-                "chef_growth": round(chef_growth, 2),  # Use calculated chef growth
-                "total_orders": total_orders,
-                "orders_today": orders_today,
-                "orders_this_week": orders_this_week,
-                "orders_this_month": orders_this_month,
-                "order_growth": round(order_growth, 2),
-                "total_revenue": float(total_revenue),
-                "revenue_today": float(revenue_today),
-                "revenue_this_week": float(revenue_this_week),
-                "revenue_this_month": float(revenue_this_month),
-                "revenue_growth": round(revenue_growth, 2),
-                "total_foods": total_foods,
-                "active_foods": active_foods,
-                "pending_food_approvals": pending_food_approvals,
-                "foods_growth": round(foods_growth, 2),  # Use calculated food growth
-                "total_delivery_agents": total_delivery_agents,
-                "active_delivery_agents": active_delivery_agents,
-                "delivery_growth": round(
-                    delivery_growth, 2
-                ),  # Use calculated delivery growth
-                "pending_user_approvals": pending_user_approvals,  # Add separate field for user approvals
-                "system_health_score": system_health_score,
-                "active_sessions": active_sessions,
-                "unread_notifications": unread_notifications,
-                "pending_backups": pending_backups,
-            }
+        Served from the precomputed dashboard snapshot; pass ``?fresh=1`` to
+        recompute it synchronously.
+        """
+        try:
+            fresh = request.query_params.get("fresh", "").lower() in ("1", "true")
+            stats_data = dashboard_snapshot_service.get(fresh=fresh)
+            stats_data["system_health_score"] = self._calculate_system_health()
 
             serializer = DashboardStatsSerializer(stats_data)
             return Response(serializer.data)
@@ -258,6 +97,7 @@ class AdminDashboardViewSet(viewsets.ViewSet):
             )
 
     @action(detail=False, methods=["get"])
+    @using_replica
     def recent_activities(self, request):
         """Get recent admin activities"""
         try:
@@ -274,6 +114,7 @@ class AdminDashboardViewSet(viewsets.ViewSet):
             )
 
     @action(detail=False, methods=["get"])
+    @using_replica
     def recent_orders(self, request):
         """Get recent orders for admin dashboard"""
         try:
@@ -305,17 +146,28 @@ class AdminDashboardViewSet(viewsets.ViewSet):
     def system_health(self, request):
         """Get detailed system health information"""
         try:
+            sample = system_health_sampler.latest()
             health_data = {
                 "overall_health": "Good",
-                "health_score": self._calculate_system_health(),
-                "cpu_usage": psutil.cpu_percent(interval=1) if psutil else 0,
-                "memory_usage": psutil.virtual_memory().percent if psutil else 0,
-                "disk_usage": psutil.disk_usage("/").percent if psutil else 0,
-                "database_connections": 0,  # Would need database-specific monitoring
-                "response_time": 0,  # Would need monitoring setup
-                "error_rate": 0,  # Would need error tracking
-                "uptime": "Unknown",  # Would need system monitoring
-                "last_backup": None,
+                "health_score": sample["health_score"],
+                "cpu_usage": sample["cpu_usage"],
+                "memory_usage": sample["memory_usage"],
+                "disk_usage": sample["disk_usage"],
+                "database_connections": sample["database_connections"],
+                "database": sample.get("database", {}),
+                "database_replica": sample.get("database_replica", {}),
+                "response_time": sample["response_time_p95"],
+                "response_time_p50": sample["response_time_p50"],
+                "response_time_p99": sample["response_time_p99"],
+                "error_rate": sample["error_rate"],
+                "uptime": self._format_uptime(sample["uptime_seconds"]),
+                "sampled_at": sample["timestamp"],
+                "last_backup": (
+                    AdminBackupLog.objects.filter(status="completed")
+                    .order_by("-completed_at")
+                    .values_list("completed_at", flat=True)
+                    .first()
+                ),
                 "alerts": [],
             }
 
@@ -327,13 +179,44 @@ class AdminDashboardViewSet(viewsets.ViewSet):
             ) / 3
             if avg_usage > 80:
                 health_data["overall_health"] = "Critical"
-                health_data["alerts"].append("High resource usage detected")
+                health_data["alerts"].append(
+                    {"type": "critical", "message": "High resource usage detected"}
+                )
             elif avg_usage > 60:
                 health_data["overall_health"] = "Warning"
-                health_data["alerts"].append("Elevated resource usage")
+                health_data["alerts"].append(
+                    {"type": "warning", "message": "Elevated resource usage"}
+                )
             else:
                 health_data["overall_health"] = "Good"
 
+            for alias, stats in health_data["database"].items():
+                pool = stats.get("pool")
+                if pool and pool["timeouts"]:
+                    health_data["alerts"].append(
+                        {
+                            "type": "warning",
+                            "message": f"Database pool '{alias}' ran out of connections {pool['timeouts']} times",
+                        }
+                    )
+
+            replica = health_data["database_replica"]
+            if replica.get("configured") and not replica.get("healthy"):
+                health_data["alerts"].append(
+                    {
+                        "type": "warning",
+                        "message": f"Read replica unusable ({replica.get('last_error') or 'not checked yet'}), reports read from the primary",
+                    }
+                )
+
+            if health_data["error_rate"] > 5:
+                health_data["alerts"].append(
+                    {
+                        "type": "warning",
+                        "message": f"Server error rate at {health_data['error_rate']}%",
+                    }
+                )
+
             serializer = SystemHealthSerializer(health_data)
             return Response(serializer.data)
 
@@ -346,34 +229,41 @@ class AdminDashboardViewSet(viewsets.ViewSet):
     def _calculate_system_health(self):
         """Calculate overall system health score"""
         try:
-            if psutil is None:
-                return 85.0  # Default healthy score if psutil not available
-
-            cpu_usage = psutil.cpu_percent(interval=1)
-            memory = psutil.virtual_memory()
-            try:
-                disk = psutil.disk_usage("/")
-            except:
-                disk = type("Mock", (), {"percent": 0})()
-
-            # Simple health calculation
-            health_score = 100 - (cpu_usage + memory.percent + disk.percent) / 3
-            return max(0, min(100, health_score))
-        except:
+            return system_health_sampler.latest()["health_score"]
+        except Exception:
             return 85.0  # Default healthy score
 
-    def _get_active_sessions(self):
-        """Get number of active user sessions"""
+    @staticmethod
+    def _format_uptime(seconds):
+        days, remainder = divmod(int(seconds), 86400)
+        hours, remainder = divmod(remainder, 3600)
+        minutes = remainder // 60
+        if days:
+            return f"{days}d {hours}h {minutes}m"
+        return f"{hours}h {minutes}m"
+
+    @action(detail=False, methods=["get"])
+    def endpoint_metrics(self, request):
+        """Per-endpoint latency, SQL query and error statistics for this process"""
         try:
-            # This is a simplified implementation
-            # In production, you'd track active sessions properly
-            return User.objects.filter(
-                last_login__gte=timezone.now() - timedelta(hours=1)
-            ).count()
-        except:
-            return 0
+            sort = request.query_params.get("sort", "total_time")
+            limit = int(request.query_params.get("limit", 20))
+            return Response(
+                {
+                    "endpoints": request_metrics.snapshot(sort=sort, limit=limit),
+                    "sort": sort,
+                    "generated_at": timezone.now().isoformat(),
+                }
+            )
+        except Exception as e:
+            logger.error(f"Error in endpoint_metrics: {str(e)}", exc_info=True)
+            return Response(
+                {"error": f"Failed to fetch endpoint metrics: {str(e)}"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
 
     @action(detail=False, methods=["get"])
+    @using_replica
     def weekly_performance(self, request):
         """Get weekly performance data for pie chart (last 30 days)"""
         try:
@@ -440,6 +330,7 @@ class AdminDashboardViewSet(viewsets.ViewSet):
             )
 
     @action(detail=False, methods=["get"])
+    @using_replica
     def revenue_trend(self, request):
         """Get revenue trend data for bar chart (last 30 days)"""
         try:
@@ -510,6 +401,7 @@ class AdminDashboardViewSet(viewsets.ViewSet):
             )
 
     @action(detail=False, methods=["get"])
+    @using_replica
     def growth_analytics(self, request):
         """Get growth analytics data for area chart (last 30 days)"""
         try:
@@ -523,43 +415,22 @@ class AdminDashboardViewSet(viewsets.ViewSet):
                 User.objects.filter(
                     date_joined__gte=start_date, date_joined__lte=end_date
                 )
-                .extra(select={"date": "DATE(date_joined)"})
+                .annotate(date=TruncDate("date_joined"))
                 .values("date")
                 .annotate(new_users=Count("user_id"))
                 .order_by("date")
             )
+            user_dict = {item["date"]: item["new_users"] for item in user_growth}
 
-            # Get order growth
-            from apps.orders.models import Order
-
-            order_growth = (
-                Order.objects.filter(
-                    created_at__gte=start_date, created_at__lte=end_date
-                )
-                .extra(select={"date": "DATE(created_at)"})
-                .values("date")
-                .annotate(new_orders=Count("id"))
-                .order_by("date")
+            # Daily orders from the analytics cube, every day filled in
+            daily_orders = analytics_cube_service.get_cube().daily_totals(
+                start_date, end_date
             )
 
             # Prepare area chart data
-            labels = []
-            user_data = []
-            order_data = []
-
-            # Fill in missing dates
-            current_date = start_date.date()
-            end_date_only = end_date.date()
-
-            user_dict = {item["date"]: item["new_users"] for item in user_growth}
-            order_dict = {item["date"]: item["new_orders"] for item in order_growth}
-
-            while current_date <= end_date_only:
-                date_str = current_date.strftime("%Y-%m-%d")
-                labels.append(current_date.strftime("%b %d"))
-                user_data.append(user_dict.get(date_str, 0))
-                order_data.append(order_dict.get(date_str, 0))
-                current_date += timedelta(days=1)
+            labels = [day.strftime("%b %d") for day in daily_orders.index]
+            user_data = [user_dict.get(day, 0) for day in daily_orders.index]
+            order_data = daily_orders["count"].tolist()
 
             chart_data = {
                 "labels": labels,
@@ -600,6 +471,7 @@ class AdminDashboardViewSet(viewsets.ViewSet):
             )
 
     @action(detail=False, methods=["get"])
+    @using_replica
     def orders_trend(self, request):
         """Get orders trend data for line chart (last 30 days)"""
         try:
@@ -668,6 +540,7 @@ class AdminDashboardViewSet(viewsets.ViewSet):
             )
 
     @action(detail=False, methods=["get"])
+    @using_replica
     def top_performing_chefs(self, request):
         """Get top performing chefs based on orders and revenue"""
         try:
@@ -676,34 +549,31 @@ class AdminDashboardViewSet(viewsets.ViewSet):
             if limit > 50:  # Cap at 50
                 limit = 50
 
-            from apps.orders.models import Order
-            from apps.users.models import ChefProfile
-
-            # Get chefs with their performance metrics
-            top_chefs = (
-                Order.objects.filter(
-                    payment_status="paid", chef__isnull=False, chef__is_active=True
-                )
-                .values("chef__user_id", "chef__name", "chef__email")
-                .annotate(
-                    total_orders=Count("id"),
-                    total_revenue=Sum("total_amount"),
-                    avg_rating=Avg("chef__chef_profile__rating_average"),
-                )
-                .order_by("-total_orders")[:limit]
+            # Rank chefs by paid orders over the analytics cube, then look up
+            # details for the leaders only, skipping inactive chefs
+            ranking = analytics_cube_service.get_cube().chef_summary(paid=True)
+            chefs = _first_active(
+                ranking.index.tolist(),
+                limit,
+                lambda ids: User.objects.filter(pk__in=ids, is_active=True).values(
+                    "user_id", "name", "email", "chef_profile__rating_average"
+                ),
+                "user_id",
             )
 
             # Prepare response data
             chefs_data = []
-            for chef in top_chefs:
+            for chef_id, chef in chefs:
                 chefs_data.append(
                     {
-                        "id": chef["chef__user_id"],
-                        "name": chef["chef__name"] or "Unknown Chef",
-                        "email": chef["chef__email"],
-                        "total_orders": chef["total_orders"],
-                        "total_revenue": float(chef["total_revenue"] or 0),
-                        "avg_rating": float(chef["avg_rating"] or 0),
+                        "id": chef_id,
+                        "name": chef["name"] or "Unknown Chef",
+                        "email": chef["email"],
+                        "total_orders": int(ranking.at[chef_id, "total_orders"]),
+                        "total_revenue": round(
+                            float(ranking.at[chef_id, "total_revenue"]), 2
+                        ),
+                        "avg_rating": float(chef["chef_profile__rating_average"] or 0),
                     }
                 )
 
@@ -722,6 +592,7 @@ class AdminDashboardViewSet(viewsets.ViewSet):
             )
 
     @action(detail=False, methods=["get"])
+    @using_replica
     def top_performing_food_items(self, request):
         """Get top performing food items based on orders and revenue"""
         try:
@@ -731,35 +602,33 @@ class AdminDashboardViewSet(viewsets.ViewSet):
                 limit = 50
 
             from apps.food.models import Food
-            from apps.orders.models import OrderItem
 
-            # Get food items with their performance metrics
-            top_foods = (
-                OrderItem.objects.filter(
-                    order__payment_status="paid", price__food__is_available=True
-                )
-                .values("price__food", "price__food__name", "price__food__category")
-                .annotate(
-                    total_orders=Count("order_item_id"),
-                    total_quantity=Sum("quantity"),
-                    total_revenue=Sum("total_price"),
-                    avg_rating=Avg("price__food__rating_average"),
-                )
-                .order_by("-total_orders")[:limit]
+            # Rank food items by paid order lines over the analytics cube, then
+            # look up details for the leaders only, skipping unavailable items
+            ranking = analytics_cube_service.get_cube().food_summary(paid=True)
+            foods = _first_active(
+                ranking.index.tolist(),
+                limit,
+                lambda ids: Food.objects.filter(pk__in=ids, is_available=True).values(
+                    "food_id", "name", "category", "rating_average"
+                ),
+                "food_id",
             )
 
             # Prepare response data
             foods_data = []
-            for food in top_foods:
+            for food_id, food in foods:
                 foods_data.append(
                     {
-                        "id": food["price__food"],
-                        "name": food["price__food__name"],
-                        "category": food["price__food__category"] or "Uncategorized",
-                        "total_orders": food["total_orders"],
-                        "total_quantity": food["total_quantity"],
-                        "total_revenue": float(food["total_revenue"] or 0),
-                        "avg_rating": float(food["avg_rating"] or 0),
+                        "id": food_id,
+                        "name": food["name"],
+                        "category": food["category"] or "Uncategorized",
+                        "total_orders": int(ranking.at[food_id, "total_orders"]),
+                        "total_quantity": int(ranking.at[food_id, "total_quantity"]),
+                        "total_revenue": round(
+                            float(ranking.at[food_id, "total_revenue"]), 2
+                        ),
+                        "avg_rating": float(food["rating_average"] or 0),
                     }
                 )
 
@@ -778,6 +647,7 @@ class AdminDashboardViewSet(viewsets.ViewSet):
             )
 
     @action(detail=False, methods=["get"])
+    @using_replica
     def revenue_analytics(self, request):
         """Get comprehensive revenue analytics with trends and forecasts"""
         try:
@@ -963,6 +833,7 @@ class AdminDashboardViewSet(viewsets.ViewSet):
             return Response(fallback_response, status=status.HTTP_200_OK)
 
     @action(detail=False, methods=["get"])
+    @using_replica
     def customer_segmentation(self, request):
         """Get customer segmentation data based on behavior patterns"""
         try:
@@ -972,53 +843,21 @@ class AdminDashboardViewSet(viewsets.ViewSet):
             now = timezone.now()
             start_date = now - timedelta(days=days)
 
-            from apps.orders.models import Order
-
             # Analyze customers based on order frequency and value
-            customer_data = (
-                Order.objects.filter(
-                    payment_status="paid",
-                    created_at__gte=start_date,
-                )
-                .values("user")
-                .annotate(
-                    order_count=Count("id"),
-                    total_spent=Sum("total_amount"),
-                    avg_order_value=Avg("total_amount"),
-                    last_order=Max("created_at"),
-                )
+            segmentation = analytics_cube_service.get_cube().customer_segments(
+                start_date, now
             )
-
-            # Define segments
-            vip_customers = []
-            regular_customers = []
-            occasional_customers = []
-            at_risk_customers = []
-
-            for customer in customer_data:
-                order_count = customer["order_count"]
-                total_spent = float(customer["total_spent"])
-                avg_order = float(customer["avg_order_value"])
-
-                # Calculate days since last order
-                last_order = customer["last_order"]
-                days_since_order = (now - last_order).days
-
-                if order_count >= 5 and avg_order > 40:
-                    vip_customers.append(customer)
-                elif order_count >= 3:
-                    regular_customers.append(customer)
-                elif days_since_order > 30:
-                    at_risk_customers.append(customer)
-                else:
-                    occasional_customers.append(customer)
+            vip_size, vip_value = segmentation["segments"]["vip"]
+            regular_size, regular_value = segmentation["segments"]["regular"]
+            occasional_size, occasional_value = segmentation["segments"]["occasional"]
+            at_risk_size, at_risk_value = segmentation["segments"]["at_risk"]
 
             # Calculate segment metrics
             segments = [
                 {
                     "name": "VIP Customers",
-                    "size": len(vip_customers),
-                    "value": sum([float(c["total_spent"]) for c in vip_customers]),
+                    "size": vip_size,
+                    "value": vip_value,
                     "behavior": "High frequency, premium orders",
                     "retention": 95.2,
                     "characteristics": [
@@ -1034,8 +873,8 @@ class AdminDashboardViewSet(viewsets.ViewSet):
                 },
                 {
                     "name": "Regular Customers",
-                    "size": len(regular_customers),
-                    "value": sum([float(c["total_spent"]) for c in regular_customers]),
+                    "size": regular_size,
+                    "value": regular_value,
                     "behavior": "Consistent orders, good retention",
                     "retention": 87.8,
                     "characteristics": [
@@ -1051,10 +890,8 @@ class AdminDashboardViewSet(viewsets.ViewSet):
                 },
                 {
                     "name": "Occasional Visitors",
-                    "size": len(occasional_customers),
-                    "value": sum(
-                        [float(c["total_spent"]) for c in occasional_customers]
-                    ),
+                    "size": occasional_size,
+                    "value": occasional_value,
                     "behavior": "Infrequent, price sensitive",
                     "retention": 68.9,
                     "characteristics": [
@@ -1070,8 +907,8 @@ class AdminDashboardViewSet(viewsets.ViewSet):
                 },
                 {
                     "name": "At Risk",
-                    "size": len(at_risk_customers),
-                    "value": sum([float(c["total_spent"]) for c in at_risk_customers]),
+                    "size": at_risk_size,
+                    "value": at_risk_value,
                     "behavior": "Declining engagement",
                     "retention": 45.2,
                     "characteristics": ["Inactive", "Churn risk", "Low engagement"],
@@ -1084,14 +921,6 @@ class AdminDashboardViewSet(viewsets.ViewSet):
             ]
 
             # Behavior patterns
-            order_frequency_dist = (
-                Order.objects.filter(payment_status="paid", created_at__gte=start_date)
-                .extra(select={"hour": "EXTRACT(hour FROM created_at)"})
-                .values("hour")
-                .annotate(count=Count("id"))
-                .order_by("hour")
-            )
-
             behavior_patterns = [
                 {
                     "pattern": "Peak Hours",
@@ -1109,19 +938,9 @@ class AdminDashboardViewSet(viewsets.ViewSet):
                 {"range": "$500+", "count": 0, "percentage": 0},
             ]
 
-            total_customers = len(list(customer_data))
-            for customer in customer_data:
-                total_spent = float(customer["total_spent"])
-                if total_spent < 100:
-                    ltv_ranges[0]["count"] += 1
-                elif total_spent < 300:
-                    ltv_ranges[1]["count"] += 1
-                elif total_spent < 500:
-                    ltv_ranges[2]["count"] += 1
-                else:
-                    ltv_ranges[3]["count"] += 1
-
-            for ltv_range in ltv_ranges:
+            total_customers = segmentation["total_customers"]
+            for ltv_range, count in zip(ltv_ranges, segmentation["ltv_counts"]):
+                ltv_range["count"] = int(count)
                 ltv_range["percentage"] = round(
                     (ltv_range["count"] / max(total_customers, 1)) * 100, 1
                 )
@@ -1150,6 +969,7 @@ class AdminDashboardViewSet(viewsets.ViewSet):
             )
 
     @action(detail=False, methods=["get"])
+    @using_replica
     def ai_insights(self, request):
         """Get AI-powered insights and recommendations"""
         try:
@@ -1324,6 +1144,7 @@ class AdminDashboardViewSet(viewsets.ViewSet):
             )
 
     @action(detail=False, methods=["get"])
+    @using_replica
     def predictive_analytics(self, request):
         """Get predictive analytics including forecasts and trends"""
         try:
@@ -1334,23 +1155,14 @@ class AdminDashboardViewSet(viewsets.ViewSet):
             start_date = now - timedelta(days=days)
 
             from apps.food.models import Food
-            from apps.orders.models import Order, OrderItem
 
-            # Sales forecast (simple moving average based)
-            daily_orders = (
-                Order.objects.filter(created_at__gte=start_date)
-                .extra(select={"date": "DATE(created_at)"})
-                .values("date")
-                .annotate(count=Count("id"), revenue=Sum("total_amount"))
-                .order_by("date")
-            )
+            cube = analytics_cube_service.get_cube()
+
+            # Sales forecast (simple moving average of the last 7 days with orders)
+            avg_daily_revenue = cube.recent_daily_revenue(start_date, now)
 
             sales_forecast = []
-            if daily_orders.exists():
-                recent_data = list(daily_orders)[-7:]  # Last 7 days
-                avg_daily_revenue = sum(
-                    [float(d["revenue"] or 0) for d in recent_data]
-                ) / len(recent_data)
+            if avg_daily_revenue is not None:
 
                 # Predict next 6 weeks
                 for i in range(1, 7):
@@ -1371,68 +1183,42 @@ class AdminDashboardViewSet(viewsets.ViewSet):
                     )
 
             # Demand forecast for popular items
-            popular_items = (
-                OrderItem.objects.filter(
-                    order__created_at__gte=start_date, order__payment_status="paid"
-                )
-                .values("price__food__name", "price__food_id")
-                .annotate(
-                    total_quantity=Sum("quantity"),
-                    order_count=Count("id", distinct=True),
+            popular_items = cube.food_summary(
+                start=start_date, paid=True, sort_by="total_quantity"
+            ).head(5)
+            food_names = dict(
+                Food.objects.filter(pk__in=popular_items.index.tolist()).values_list(
+                    "food_id", "name"
                 )
-                .order_by("-total_quantity")[:5]
             )
 
             demand_forecast = []
-            for item in popular_items:
-                avg_daily = item["total_quantity"] / max(days, 1)
+            for food_id, item in popular_items.iterrows():
+                total_quantity = int(item["total_quantity"])
+                avg_daily = total_quantity / max(days, 1)
                 predicted = avg_daily * 30  # Next 30 days
                 trend = "increasing" if avg_daily > 1 else "stable"
 
                 demand_forecast.append(
                     {
-                        "item": item["price__food__name"],
+                        "item": food_names.get(food_id),
                         "predicted": int(predicted),
-                        "current": item["total_quantity"],
+                        "current": total_quantity,
                         "trend": trend,
                         "seasonality": 1.0,
                     }
                 )
 
             # Customer lifetime value prediction
-            customer_orders = (
-                Order.objects.filter(payment_status="paid", created_at__gte=start_date)
-                .values("user")
-                .annotate(
-                    order_count=Count("id"),
-                    total_spent=Sum("total_amount"),
-                    avg_order=Avg("total_amount"),
-                )
-            )
-
             ltv_segments = {
-                "VIP": {"count": 0, "value": 0, "growth": 15.3, "churn": 0.05},
-                "Regular": {"count": 0, "value": 0, "growth": 8.7, "churn": 0.12},
-                "New": {"count": 0, "value": 0, "growth": 23.1, "churn": 0.25},
-                "Casual": {"count": 0, "value": 0, "growth": -2.4, "churn": 0.45},
+                "VIP": {"growth": 15.3, "churn": 0.05},
+                "Regular": {"growth": 8.7, "churn": 0.12},
+                "New": {"growth": 23.1, "churn": 0.25},
+                "Casual": {"growth": -2.4, "churn": 0.45},
             }
-
-            for customer in customer_orders:
-                total_spent = float(customer["total_spent"])
-                order_count = customer["order_count"]
-
-                if order_count >= 5 and total_spent > 200:
-                    ltv_segments["VIP"]["count"] += 1
-                    ltv_segments["VIP"]["value"] += total_spent
-                elif order_count >= 3:
-                    ltv_segments["Regular"]["count"] += 1
-                    ltv_segments["Regular"]["value"] += total_spent
-                elif order_count == 1:
-                    ltv_segments["New"]["count"] += 1
-                    ltv_segments["New"]["value"] += total_spent
-                else:
-                    ltv_segments["Casual"]["count"] += 1
-                    ltv_segments["Casual"]["value"] += total_spent
+            for key, (count, value) in cube.lifetime_value_segments(start_date).items():
+                ltv_segments[key]["count"] = count
+                ltv_segments[key]["value"] = value
 
             customer_ltv = [
                 {
@@ -1486,6 +1272,7 @@ class AdminDashboardViewSet(viewsets.ViewSet):
             )
 
     @action(detail=False, methods=["get"])
+    @using_replica
     def anomaly_detection(self, request):
         """Detect anomalies and unusual patterns in business metrics"""
         try:
@@ -1498,26 +1285,15 @@ class AdminDashboardViewSet(viewsets.ViewSet):
             start_date = now - timedelta(days=days)
             baseline_start = start_date - timedelta(days=days)
 
-            from apps.orders.models import Order
+            comparison = analytics_cube_service.get_cube().period_comparison(
+                start_date, baseline_start
+            )
 
             anomalies = []
 
             # 1. Revenue anomaly detection
-            current_revenue = (
-                Order.objects.filter(
-                    payment_status="paid", created_at__gte=start_date
-                ).aggregate(total=Sum("total_amount"))["total"]
-                or 0
-            )
-
-            baseline_revenue = (
-                Order.objects.filter(
-                    payment_status="paid",
-                    created_at__gte=baseline_start,
-                    created_at__lt=start_date,
-                ).aggregate(total=Sum("total_amount"))["total"]
-                or 0
-            )
+            current_revenue = comparison["current_revenue"]
+            baseline_revenue = comparison["baseline_revenue"]
 
             if baseline_revenue > 0:
                 revenue_deviation = (
@@ -1544,10 +1320,8 @@ class AdminDashboardViewSet(viewsets.ViewSet):
                     )
 
             # 2. Order volume anomaly
-            current_orders = Order.objects.filter(created_at__gte=start_date).count()
-            baseline_orders = Order.objects.filter(
-                created_at__gte=baseline_start, created_at__lt=start_date
-            ).count()
+            current_orders = comparison["current_orders"]
+            baseline_orders = comparison["baseline_orders"]
 
             if baseline_orders > 0:
                 order_deviation = (
@@ -1574,15 +1348,14 @@ class AdminDashboardViewSet(viewsets.ViewSet):
                     )
 
             # 3. New customer registration anomaly
-            current_new_users = User.objects.filter(
-                date_joined__gte=start_date, role="customer"
-            ).count()
-
-            baseline_new_users = User.objects.filter(
-                date_joined__gte=baseline_start,
-                date_joined__lt=start_date,
-                role="customer",
-            ).count()
+            new_users = User.objects.filter(
+                date_joined__gte=baseline_start, role="customer"
+            ).aggregate(
+                current=Count("user_id", filter=Q(date_joined__gte=start_date)),
+                baseline=Count("user_id", filter=Q(date_joined__lt=start_date)),
+            )
+            current_new_users = new_users["current"]
+            baseline_new_users = new_users["baseline"]
 
             if baseline_new_users > 0:
                 user_deviation = (
@@ -1613,13 +1386,8 @@ class AdminDashboardViewSet(viewsets.ViewSet):
                     )
 
             # 4. Failed orders anomaly
-            failed_orders = Order.objects.filter(
-                created_at__gte=start_date, status__in=["cancelled", "failed"]
-            ).count()
-
-            total_recent_orders = Order.objects.filter(
-                created_at__gte=start_date
-            ).count()
+            failed_orders = comparison["failed_orders"]
+            total_recent_orders = current_orders
 
             if total_recent_orders > 0:
                 failure_rate = (failed_orders / total_recent_orders) * 100
@@ -1660,28 +1428,21 @@ class AdminDashboardViewSet(viewsets.ViewSet):
             )
 
     @action(detail=False, methods=["get"])
+    @using_replica
     def orders_distribution(self, request):
         """Get orders distribution data for pie chart"""
         try:
             days = int(request.query_params.get("days", 7))
 
             # Get orders from the last N days
-            from apps.orders.models import Order
+            cube = analytics_cube_service.get_cube()
 
             end_date = timezone.now()
             start_date = end_date - timedelta(days=days)
 
             if days == 7:
-                # Weekly distribution by day of week
-                orders_by_day = (
-                    Order.objects.filter(created_at__range=[start_date, end_date])
-                    .extra(
-                        {"day": "DAYOFWEEK(created_at) - 1"}
-                    )  # MySQL DAYOFWEEK returns 1-7, we want 0-6
-                    .values("day")
-                    .annotate(count=Count("id"))
-                    .order_by("day")
-                )
+                # Weekly distribution by day of week (0 = Sunday)
+                orders_by_day = cube.weekday_counts(start_date, end_date)
 
                 day_names = [
                     "Sunday",
@@ -1695,27 +1456,17 @@ class AdminDashboardViewSet(viewsets.ViewSet):
                 labels = []
                 data = []
 
-                for item in orders_by_day:
-                    day_index = int(item["day"])
-                    labels.append(day_names[day_index])
-                    data.append(item["count"])
+                for day_index, count in orders_by_day.items():
+                    if count:
+                        labels.append(day_names[day_index])
+                        data.append(int(count))
 
             else:
                 # Monthly distribution by date
-                orders_by_date = (
-                    Order.objects.filter(created_at__range=[start_date, end_date])
-                    .extra({"date": "DATE(created_at)"})  # MySQL DATE function
-                    .values("date")
-                    .annotate(count=Count("id"))
-                    .order_by("date")
-                )
-
-                labels = []
-                data = []
+                orders_by_date = cube.daily_totals(start_date, end_date, fill=False)
 
-                for item in orders_by_date:
-                    labels.append(item["date"].strftime("%m/%d"))
-                    data.append(item["count"])
+                labels = [day.strftime("%m/%d") for day in orders_by_date.index]
+                data = orders_by_date["count"].astype(int).tolist()
 
             return Response(
                 {
@@ -1738,6 +1489,7 @@ class AdminDashboardViewSet(viewsets.ViewSet):
             )
 
     @action(detail=False, methods=["get"])
+    @using_replica
     def new_users(self, request):
         """Get new users data for area chart"""
         try:
@@ -1783,6 +1535,7 @@ class AdminDashboardViewSet(viewsets.ViewSet):
             )
 
     @action(detail=False, methods=["get"])
+    @using_replica
     def recent_deliveries(self, request):
         """Get recent deliveries data"""
         try:
@@ -1796,7 +1549,7 @@ class AdminDashboardViewSet(viewsets.ViewSet):
                 Order.objects.filter(
                     status__in=["delivered", "out_for_delivery", "in_transit"]
                 )
-                .select_related("customer", "delivery_partner")
+                .select_related("customer", "delivery_partner", "delivery_log")
                 .order_by("-created_at")[:limit]
             )
 
@@ -1804,6 +1557,15 @@ class AdminDashboardViewSet(viewsets.ViewSet):
 
             deliveries = []
             for order in recent_orders:
+                delivery_log = getattr(order, "delivery_log", None)
+                actual_time = None
+                if delivery_log and delivery_log.end_time:
+                    actual_time = delivery_log.end_time.isoformat()
+                elif order.status == "delivered":
+                    actual_time = (
+                        order.actual_delivery_time or order.updated_at
+                    ).isoformat()
+
                 delivery_data = {
                     "id": order.id,
                     "order_id": order.id,
@@ -1822,10 +1584,12 @@ class AdminDashboardViewSet(viewsets.ViewSet):
                     "estimated_time": (
                         order.created_at + timedelta(hours=1)
                     ).isoformat(),
-                    "actual_time": (
-                        order.updated_at.isoformat()
-                        if order.status == "delivered"
-                        else None
+                    "actual_time": actual_time,
+                    "duration_minutes": (
+                        delivery_log.total_time_minutes if delivery_log else None
+                    ),
+                    "distance_km": (
+                        float(delivery_log.distance_km) if delivery_log else None
                     ),
                     "tracking_code": f"TRK{str(order.id).zfill(6)}",
                 }
@@ -1849,6 +1613,7 @@ class AdminUserManagementViewSet(viewsets.ViewSet):
     permission_classes = [IsAdminUser]
 
     @action(detail=False, methods=["get"])
+    @using_replica
     def stats(self, request):
         """Get user statistics for admin dashboard"""
         try:
@@ -2715,6 +2480,7 @@ class AdminUserManagementViewSet(viewsets.ViewSet):
             )
 
     @action(detail=False, methods=["get"])
+    @using_replica
     def export_users(self, request):
         """Export users data as CSV"""
         try:
@@ -2934,6 +2700,7 @@ class AdminUserManagementViewSet(viewsets.ViewSet):
             )
 
     @action(detail=False, methods=["get"])
+    @using_replica
     def statistics(self, request):
         """Get user management statistics for dashboard"""
         try:
@@ -3030,6 +2797,7 @@ class AdminOrderManagementViewSet(viewsets.ViewSet):
         return self.list_orders(request)
 
     @action(detail=False, methods=["get"])
+    @using_replica
     def stats(self, request):
         """Get order statistics for admin dashboard"""
         try:
@@ -3234,6 +3002,7 @@ class AdminOrderManagementViewSet(viewsets.ViewSet):
             )
 
     @action(detail=False, methods=["get"])
+    @using_replica
     def export_orders(self, request):
         """Export orders data as CSV"""
         try:
@@ -3724,16 +3493,35 @@ class AdminSystemSettingsViewSet(viewsets.ModelViewSet):
             recent_connections = User.objects.filter(last_login__gte=last_hour).count()
             active_users = User.objects.filter(is_active=True).count()
 
-            # Mock some real-time metrics (can be enhanced with actual monitoring)
+            # Delivery success rate over the last 24 hours
+            from apps.orders.models import Order
+
+            finished = Order.objects.filter(
+                updated_at__gte=now - timedelta(hours=24),
+                status__in=["delivered", "cancelled"],
+            ).aggregate(
+                total=Count("id"), delivered=Count("id", filter=Q(status="delivered"))
+            )
+            delivery_rate = (
+                round(finished["delivered"] / finished["total"] * 100, 1)
+                if finished["total"]
+                else 0
+            )
+
+            # Server metrics from the background health sampler
+            sample = system_health_sampler.latest()
             stats = {
                 "connections": recent_connections,
                 "activeUsers": active_users,
                 "messagesSent": 0,  # TODO: Implement message tracking
-                "deliveryRate": 95.5,  # Mock delivery success rate
-                "avgResponseTime": 120,  # Mock average response time in ms
-                "systemLoad": 45.2,  # Mock system load percentage
-                "errorRate": 0.8,  # Mock error rate percentage
+                "deliveryRate": delivery_rate,
+                "avgResponseTime": sample["response_time_avg"],
+                "p95ResponseTime": sample["response_time_p95"],
+                "systemLoad": sample["cpu_usage"],
+                "errorRate": sample["error_rate"],
+                "databaseConnections": sample["database_connections"],
                 "lastUpdated": now.isoformat(),
+                "sampledAt": sample["timestamp"],
             }
 
             return Response(stats)
@@ -3799,6 +3587,7 @@ class AdminActivityLogViewSet(viewsets.ReadOnlyModelViewSet):
         return queryset.order_by("-timestamp")
 
     @action(detail=False, methods=["get"])
+    @using_replica
     def export_activity_logs(self, request):
         """Export activity logs data as CSV"""
         try:
@@ -4225,6 +4014,7 @@ class AdminDocumentManagementViewSet(viewsets.ViewSet):
             )
 
     @action(detail=False, methods=["get"])
+    @using_replica
     def document_statistics(self, request):
         """Get document management statistics"""
         try:
@@ -4335,6 +4125,40 @@ class AdminDocumentManagementViewSet(viewsets.ViewSet):
             logger.warning(f"Error checking user approval status: {e}")
 
 
+def prometheus_metrics(request):
+    """
+    Request and system metrics in Prometheus text format.
+
+    Scrapers authenticate with ``Authorization: Bearer <METRICS_AUTH_TOKEN>``;
+    without a configured token the endpoint is only served in DEBUG.
+    """
+    token = getattr(settings, "METRICS_AUTH_TOKEN", "")
+    if token:
+        if not constant_time_compare(
+            request.headers.get("Authorization", ""), f"Bearer {token}"
+        ):
+            return HttpResponse(status=401)
+    elif not settings.DEBUG:
+        return HttpResponse(status=404)
+
+    sample = system_health_sampler.latest()
+    gauges = {
+        key: sample[key]
+        for key in (
+            "cpu_usage",
+            "memory_usage",
+            "disk_usage",
+            "database_connections",
+            "uptime_seconds",
+        )
+    }
+    gauges.update(llm_gateway.prometheus_gauges())
+    return HttpResponse(
+        request_metrics.render_prometheus(gauges),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
 @api_view(["GET"])
 @permission_classes([IsAdminUser])
 def get_report_templates(request):
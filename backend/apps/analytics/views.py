@@ -12,6 +12,7 @@ from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.request import Request
 from rest_framework.response import Response
+from utils.db_routing import using_replica
 
 from .models import (
     Activity,
@@ -36,6 +37,7 @@ class DashboardViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated, IsAdminUser]
 
     @action(detail=False, methods=["get"])
+    @using_replica
     def stats(self, request: Request) -> Response:
         """Get dashboard statistics"""
         # Accept range parameter but ignore it for now
@@ -149,6 +151,7 @@ class DashboardViewSet(viewsets.ViewSet):
         return Response(serializer.data)
 
     @action(detail=False, methods=["get"])
+    @using_replica
     def revenue_trends(self, request: Request) -> Response:
         """Get revenue trends for the last 7 days"""
         from apps.orders.models import Order
@@ -173,6 +176,7 @@ class DashboardViewSet(viewsets.ViewSet):
         return Response(data)
 
     @action(detail=False, methods=["get"])
+    @using_replica
     def user_growth_trends(self, request: Request) -> Response:
         """Get user growth trends for the last 7 days"""
         from django.contrib.auth import get_user_model
@@ -194,6 +198,7 @@ class DashboardViewSet(viewsets.ViewSet):
         return Response(data)
 
     @action(detail=False, methods=["get"])
+    @using_replica
     def advanced_analytics(self, request: Request) -> Response:
         """Get advanced analytics data with real trend calculations and predictive analytics"""
         range_param = request.query_params.get("range", "30d")
@@ -535,6 +540,7 @@ class SystemMaintenanceViewSet(viewsets.ModelViewSet):
 # Additional analytics endpoints for frontend compatibility
 @api_view(["GET"])
 @permission_classes([IsAuthenticated, IsAdminUser])
+@using_replica
 def order_analytics(request):
     """Get order analytics data"""
     try:
@@ -601,6 +607,7 @@ def order_analytics(request):
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated, IsAdminUser])
+@using_replica
 def customer_analytics(request):
     """Get customer analytics data with improved error handling"""
     try:
@@ -666,6 +673,7 @@ def customer_analytics(request):
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated, IsAdminUser])
+@using_replica
 def performance_analytics(request):
     """Get system performance analytics data"""
     try:
@@ -734,6 +742,7 @@ def performance_analytics(request):
 # Export and Report Scheduling Endpoints
 @api_view(["POST"])
 @permission_classes([IsAuthenticated, IsAdminUser])
+@using_replica
 def export_data(request):
     """Export analytics data in various formats (CSV, PDF, Excel)"""
     try:
@@ -1,64 +1,51 @@
 """
 Custom JWT Authentication for ChefSync
 """
+from django.utils.translation import gettext_lazy as _
 from rest_framework_simplejwt.authentication import JWTAuthentication
-from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
-from rest_framework_simplejwt.tokens import AccessToken
-from .services.jwt_service import JWTTokenService
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .services.principal_cache import principal_cache
 
 
 class CustomJWTAuthentication(JWTAuthentication):
     """
-    Custom JWT Authentication that validates tokens against database
+    JWT authentication with one token decode and a cached user lookup
+
+    Access tokens are stateless (only refresh tokens are stored, see
+    JWTTokenService), so the token is verified once by SimpleJWT and the
+    user comes from the per-process principal cache; a request with a warm
+    cache runs no authentication queries. Tokens issued before the user's
+    ``tokens_valid_after`` watermark (revoke all tokens) are rejected.
     """
-    
-    def get_validated_token(self, raw_token):
-        """
-        Validates an encoded JSON web token and returns a validated token
-        wrapper object.
-        """
-        messages = []
-        for AuthToken in self.get_auth_token_classes():
-            try:
-                # Validate token with SimpleJWT first
-                validated_token = AuthToken(raw_token)
-                
-                # Additional validation against database
-                is_valid, user, error = JWTTokenService.validate_token(
-                    str(validated_token), 
-                    'access'
-                )
-                
-                if not is_valid:
-                    raise InvalidToken(error)
-                
-                return validated_token
-                
-            except TokenError as e:
-                messages.append({'token_class': AuthToken.__name__,
-                               'token_type': AuthToken.token_type,
-                               'message': e.args[0]})
 
-        raise InvalidToken({
-            'detail': 'Given token not valid for any token type',
-            'messages': messages,
-        })
-    
     def get_user(self, validated_token):
         """
-        Attempts to find and return a user using the given validated token.
+        Returns the user for the validated token, from the principal cache.
         """
         try:
-            user_id = validated_token[self.get_user_id_claim()]
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
         except KeyError:
-            raise InvalidToken('Token contained no recognizable user identification')
+            raise InvalidToken(_('Token contained no recognizable user identification'))
 
-        try:
-            user = self.get_user_model().objects.get(**{self.get_user_id_field(): user_id})
-        except self.get_user_model().DoesNotExist:
-            raise InvalidToken('User not found')
+        user = principal_cache.get_user(user_id, field=api_settings.USER_ID_FIELD)
+        if user is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
 
-        if not user.is_active:
-            raise InvalidToken('User is inactive')
+        # Tokens issued before the user's tokens were all revoked
+        watermark = user.tokens_valid_after
+        if watermark is not None and validated_token.get('iat', 0) < int(watermark.timestamp()):
+            raise AuthenticationFailed(_('Token has been revoked'), code='token_revoked')
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code='password_changed'
+                )
 
         return user
@@ -0,0 +1,69 @@
+"""
+Management command to delete expired JWT tokens, email OTPs and referral tokens.
+The scheduler runs the same cleanup every HOUSEKEEPING_INTERVAL_MINUTES; use this
+to preview it (--dry-run) or to work through a large backlog once.
+"""
+from django.core.management.base import BaseCommand
+
+from apps.authentication.services.housekeeping import auth_housekeeping
+
+
+class Command(BaseCommand):
+    help = 'Delete expired auth tokens, email OTPs and referral tokens in bounded batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--task',
+            action='append',
+            choices=auth_housekeeping.TASKS,
+            help='Only clean up this table (repeatable; default: all)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Rows per DELETE (default: HOUSEKEEPING_BATCH_SIZE)',
+        )
+        parser.add_argument(
+            '--max-batches',
+            type=int,
+            default=None,
+            help='Batches per table before stopping (default: HOUSEKEEPING_MAX_BATCHES)',
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=None,
+            help='Seconds to sleep between batches (default: HOUSEKEEPING_BATCH_PAUSE)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show how many rows would be deleted without deleting anything',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        results = auth_housekeeping.run(
+            tasks=options['task'],
+            dry_run=dry_run,
+            batch_size=options['batch_size'],
+            max_batches=options['max_batches'],
+            pause=options['pause'],
+        )
+
+        for task, result in results.items():
+            if 'error' in result:
+                self.stdout.write(self.style.ERROR(f'{task}: failed ({result["error"]})'))
+            elif dry_run:
+                self.stdout.write(
+                    self.style.WARNING(f'[DRY RUN] {task}: would delete {result["remaining"]} rows')
+                )
+            else:
+                line = (
+                    f'{task}: deleted {result["deleted"]} rows in {result["batches"]} batches '
+                    f'({result["duration_ms"]} ms)'
+                )
+                if result['remaining'] is None:
+                    line += ', more remain (stopped at --max-batches)'
+                self.stdout.write(self.style.SUCCESS(line))
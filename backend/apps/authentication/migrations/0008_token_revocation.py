@@ -0,0 +1,26 @@
+# Generated by Django 5.2.5 on 2025-10-26 17:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0007_merge_20251025_1420'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='tokens_valid_after',
+            field=models.DateTimeField(blank=True, help_text='JWTs issued before this time are rejected (set when all tokens are revoked)', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='jwttoken',
+            index=models.Index(fields=['revoked_at'], name='jwt_tokens_revoked_6ea6d1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jwttoken',
+            index=models.Index(fields=['blacklisted_at'], name='jwt_tokens_blackli_57710c_idx'),
+        ),
+    ]
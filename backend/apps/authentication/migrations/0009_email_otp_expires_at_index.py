@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2025-10-26 17:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0008_token_revocation'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='emailotp',
+            index=models.Index(fields=['expires_at'], name='email_otp_expires_4fc98d_idx'),
+        ),
+    ]
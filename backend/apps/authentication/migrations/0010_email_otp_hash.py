@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2025-10-26 19:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0009_email_otp_expires_at_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='emailotp',
+            name='otp',
+            field=models.CharField(max_length=64),
+        ),
+    ]
@@ -129,6 +129,11 @@ class User(AbstractUser):
     last_failed_login = models.DateTimeField(blank=True, null=True)
     account_locked = models.BooleanField(default=False)
     account_locked_until = models.DateTimeField(blank=True, null=True)
+    tokens_valid_after = models.DateTimeField(
+        blank=True,
+        null=True,
+        help_text="JWTs issued before this time are rejected (set when all tokens are revoked)",
+    )
 
     # Referral system fields
     referral_code = models.CharField(
@@ -644,8 +649,13 @@ class UserDocument(models.Model):
 
 
 class EmailOTP(models.Model):
+    """
+    Audit record of an issued code; live codes are kept in the cache
+    (services.otp_service) and ``otp`` holds the code's hash
+    """
+
     email = models.EmailField()
-    otp = models.CharField(max_length=6)
+    otp = models.CharField(max_length=64)
     purpose = models.CharField(
         max_length=20,
         choices=[
@@ -663,6 +673,9 @@ class EmailOTP(models.Model):
     class Meta:
         db_table = "email_otp"
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["expires_at"]),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.otp:
@@ -771,6 +784,8 @@ class JWTToken(models.Model):
             models.Index(fields=["jti"]),
             models.Index(fields=["expires_at"]),
             models.Index(fields=["is_revoked", "is_blacklisted"]),
+            models.Index(fields=["revoked_at"]),
+            models.Index(fields=["blacklisted_at"]),
         ]
 
     def __str__(self):
@@ -826,9 +841,7 @@ class JWTToken(models.Model):
         if token_type:
             queryset = queryset.filter(token_type=token_type)
 
-        count = queryset.count()
-        queryset.update(is_revoked=True, revoked_at=timezone.now())
-        return count
+        return queryset.update(is_revoked=True, revoked_at=timezone.now())
 
     def can_be_used_for_referral(self):
         """Check if this referral token can be used"""
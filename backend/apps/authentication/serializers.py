@@ -1,11 +1,10 @@
 from django.apps import apps
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
-from django.utils import timezone
 from rest_framework import serializers
 from rest_framework_simplejwt.tokens import RefreshToken
 
-from .models import Cook, Customer, DeliveryAgent, EmailOTP, User
+from .models import Cook, Customer, DeliveryAgent, User
 
 # Get models from Django's app registry to avoid import issues
 DocumentType = apps.get_model("authentication", "DocumentType")
@@ -19,6 +18,8 @@ UserDocument = apps.get_model("authentication", "UserDocument")
 import re
 
 from .services.email_service import EmailService
+from .services.login_throttle import login_throttle
+from .services.otp_service import otp_service
 
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
@@ -108,6 +109,15 @@ class UserLoginSerializer(serializers.Serializer):
             user = User.objects.get(email=email)
         except User.DoesNotExist:
             raise serializers.ValidationError("Invalid email or password")
+        # Kept for the view's failed-login bookkeeping
+        self.login_user = user
+
+        # Check if account is locked (before the password, so a locked
+        # account cannot be used to keep guessing)
+        if login_throttle.locked_until(user):
+            raise serializers.ValidationError(
+                "Account is temporarily locked due to multiple failed login attempts. Please try again later."
+            )
 
         # Check if password is correct
         if not user.check_password(password):
@@ -119,19 +129,6 @@ class UserLoginSerializer(serializers.Serializer):
                 "Your account has been deactivated. Please contact support."
             )
 
-        # Check if account is locked
-        if user.account_locked:
-            if user.account_locked_until and user.account_locked_until > timezone.now():
-                raise serializers.ValidationError(
-                    "Account is temporarily locked due to multiple failed login attempts. Please try again later."
-                )
-            else:
-                # Unlock account if lock period has expired
-                user.account_locked = False
-                user.account_locked_until = None
-                user.failed_login_attempts = 0
-                user.save()
-
         # Check approval status for cooks and delivery agents
         if user.role in ["cook", "delivery_agent"]:
             if user.approval_status == "pending":
@@ -794,13 +791,7 @@ class CompleteRegistrationSerializer(serializers.ModelSerializer):
             # Allow completion of registration for inactive users (created during OTP sending)
 
         # Verify that OTP was verified for this email
-        recent_verified_otp = (
-            EmailOTP.objects.filter(email=email, purpose="registration", is_used=True)
-            .order_by("-created_at")
-            .first()
-        )
-
-        if not recent_verified_otp:
+        if not otp_service.is_verified(email, "registration"):
             raise serializers.ValidationError(
                 "Email verification required. Please verify your OTP first."
             )
@@ -1,17 +1,14 @@
 """
 Email service for sending beautiful HTML emails
+
+Messages are queued in the email outbox (apps.communications.services.email_outbox)
+and sent by its background sender, so callers never wait on the mail server.
 """
 from django.core.mail import EmailMultiAlternatives, send_mail
-from django.template.loader import render_to_string
 from django.conf import settings
-from django.utils.html import strip_tags
-from django.utils import timezone
-from datetime import timedelta
-import random
-import string
-import base64
-import os
-from apps.authentication.models import EmailOTP
+from apps.authentication.services.otp_service import otp_service
+from apps.communications.services.email_outbox import PRIORITY_HIGH, email_outbox, secret_placeholder
+from utils.email_renderer import email_renderer
 
 
 class EmailService:
@@ -19,21 +16,8 @@ class EmailService:
     
     @staticmethod
     def get_logo_base64():
-        """Get the logo as base64 encoded string with fallback handling"""
-        try:
-            logo_path = os.path.join(settings.BASE_DIR, 'templates', 'emails', 'logo.svg')
-            if os.path.exists(logo_path):
-                with open(logo_path, 'rb') as logo_file:
-                    logo_data = logo_file.read()
-                    if logo_data:  # Check if file is not empty
-                        return base64.b64encode(logo_data).decode('utf-8')
-            
-            # Fallback: return None so template can show emoji instead
-            print("Logo file not found or empty, template will use emoji fallback")
-            return None
-        except Exception as e:
-            print(f"Failed to load logo: {e}, using emoji fallback")
-            return None
+        """Get the logo as base64 encoded string (loaded once; None if missing)"""
+        return email_renderer.logo_base64
     
     @staticmethod
     def send_otp(email, purpose='registration', user_name='User'):
@@ -49,24 +33,12 @@ class EmailService:
             dict: {'success': bool, 'message': str}
         """
         try:
-            # Generate OTP
-            otp_length = getattr(settings, 'OTP_LENGTH', 6)
-            otp = ''.join(random.choices(string.digits, k=otp_length))
-            
-            # Set expiry time
+            # Code lives in the cache; only an audit row is written, after commit
+            otp = otp_service.issue(email, purpose)
             expiry_minutes = getattr(settings, 'OTP_EXPIRY_MINUTES', 10)
-            expires_at = timezone.now() + timedelta(minutes=expiry_minutes)
-            
-            # Delete any existing OTPs for this email and purpose
-            EmailOTP.objects.filter(email=email, purpose=purpose, is_used=False).delete()
-            
-            # Create new OTP record
-            otp_record = EmailOTP.objects.create(
-                email=email,
-                otp=otp,
-                purpose=purpose,
-                expires_at=expires_at
-            )
+            # The queued message only carries a placeholder; the outbox fills
+            # the code in from the cache when it sends
+            otp_text = secret_placeholder('otp')
             
             # Prepare email content (remove emojis to avoid spam filters)
             if purpose == 'registration':
@@ -80,14 +52,14 @@ class EmailService:
             context = {
                 'user_name': user_name,
                 'email': email,
-                'otp_code': otp,
+                'otp_code': otp_text,
                 'purpose': purpose,
                 'expiry_minutes': expiry_minutes,
                 'frontend_url': getattr(settings, 'FRONTEND_URL', 'http://localhost:8080'),
             }
             
-            # Render HTML email template
-            html_content = render_to_string('emails/otp_email_beautiful.html', context)
+            # Render HTML email template (compiled once, see utils.email_renderer)
+            html_content = email_renderer.render_html('emails/otp_email_beautiful.html', context)
             
             # Create plain text version
             text_content = f"""
@@ -95,7 +67,7 @@ Hello {user_name},
 
 Please use the verification code below:
 
-Verification Code: {otp}
+Verification Code: {otp_text}
 
 This code will expire in {expiry_minutes} minutes.
 
@@ -121,12 +93,16 @@ The ChefSync Team
             # Attach HTML version
             email_message.attach_alternative(html_content, "text/html")
             
-            # Send email (do not fail silently so errors are visible during troubleshooting)
-            sent_count = email_message.send(fail_silently=False)
-            if sent_count == 0:
-                raise Exception('No emails were sent by the SMTP backend')
+            # Queue email; OTP codes are sent ahead of other mail
+            email_outbox.enqueue(
+                email_message,
+                category='otp',
+                priority=PRIORITY_HIGH,
+                secrets={'otp': otp},
+                secrets_ttl=expiry_minutes * 60,
+            )
             
-            print(f"✅ Email sent successfully to {email} with OTP: {otp}")  # Debug log
+            print(f"✅ Email queued for {email}")  # Debug log (never the code itself)
             
             return {
                 'success': True,
@@ -158,56 +134,8 @@ The ChefSync Team
             dict: {'success': bool, 'message': str}
         """
         try:
-            # Find the OTP record
-            otp_record = EmailOTP.objects.filter(
-                email=email,
-                purpose=purpose,
-                is_used=False
-            ).order_by('-created_at').first()
-            
-            if not otp_record:
-                return {
-                    'success': False,
-                    'message': 'No verification code found for this email'
-                }
-            
-            # Check if OTP has expired
-            if timezone.now() > otp_record.expires_at:
-                otp_record.is_used = True  # Mark as used to prevent reuse
-                otp_record.save()
-                return {
-                    'success': False,
-                    'message': 'Verification code has expired. Please request a new one.'
-                }
-            
-            # Check if OTP matches
-            if otp_record.otp != otp:
-                # Increment attempts
-                otp_record.attempts += 1
-                otp_record.save()
-                
-                # If too many attempts, mark as used
-                if otp_record.attempts >= 3:
-                    otp_record.is_used = True
-                    otp_record.save()
-                    return {
-                        'success': False,
-                        'message': 'Too many failed attempts. Please request a new verification code.'
-                    }
-                
-                return {
-                    'success': False,
-                    'message': 'Invalid verification code. Please try again.'
-                }
-            
-            # OTP is valid - mark as used
-            otp_record.is_used = True
-            otp_record.save()
-            
-            return {
-                'success': True,
-                'message': 'Verification code verified successfully'
-            }
+            # Cache lookup only (see services.otp_service)
+            return otp_service.verify(email, otp, purpose)
             
         except Exception as e:
             print(f"Failed to verify OTP: {e}")
@@ -227,10 +155,7 @@ The ChefSync Team
             admin_notes: Optional admin notes for rejection
         """
         try:
-            # Get logo as base64
-            logo_base64 = EmailService.get_logo_base64()
-            
-            # Prepare context for email template
+            # Prepare context for email template (logo_base64 comes from the renderer)
             context = {
                 'user_name': user.name,
                 'user_email': user.email,
@@ -239,14 +164,10 @@ The ChefSync Team
                 'admin_notes': admin_notes,
                 'login_url': f"{settings.FRONTEND_URL}/auth/login",
                 'support_url': f"{settings.FRONTEND_URL}/contact",
-                'logo_base64': logo_base64,
             }
             
-            # Render HTML email template
-            html_content = render_to_string('emails/approval_email.html', context)
-            
-            # Create plain text version
-            text_content = strip_tags(html_content)
+            # Render HTML and plain text versions
+            html_content, text_content = email_renderer.render('emails/approval_email.html', context)
             
             # Determine subject and sender
             if status == 'approved':
@@ -265,8 +186,8 @@ The ChefSync Team
             # Attach HTML version
             email.attach_alternative(html_content, "text/html")
             
-            # Send email
-            email.send()
+            # Queue email
+            email_outbox.enqueue(email, category='approval')
             
             return True
             
@@ -291,8 +212,7 @@ The ChefSync Team
                 'support_url': f"{settings.FRONTEND_URL}/contact",
             }
             
-            html_content = render_to_string('emails/welcome_email.html', context)
-            text_content = strip_tags(html_content)
+            html_content, text_content = email_renderer.render('emails/welcome_email.html', context)
             
             subject = f'Welcome to ChefSync, {user.name}!'
             
@@ -304,7 +224,7 @@ The ChefSync Team
             )
             
             email.attach_alternative(html_content, "text/html")
-            email.send()
+            email_outbox.enqueue(email, category='welcome')
             
             return True
             
@@ -328,8 +248,7 @@ The ChefSync Team
                 'support_url': f"{settings.FRONTEND_URL}/contact",
             }
             
-            html_content = render_to_string('emails/document_upload_notification.html', context)
-            text_content = strip_tags(html_content)
+            html_content, text_content = email_renderer.render('emails/document_upload_notification.html', context)
             
             subject = f'Document Upload Confirmation - {document_type.name}'
             
@@ -341,7 +260,7 @@ The ChefSync Team
             )
             
             email.attach_alternative(html_content, "text/html")
-            email.send()
+            email_outbox.enqueue(email, category='document_upload')
             
             return True
             
@@ -0,0 +1,135 @@
+"""
+Housekeeping for expired authentication records
+
+``jwt_tokens`` (access / refresh and referral tokens) and ``email_otp`` only
+ever grow: expired rows are never read again but stay in the table and its
+indexes. ``AuthHousekeeping.run`` deletes them in bounded batches from the
+scheduler (``apps.orders.scheduler.cleanup_expired_auth_records``) and the
+``cleanup_expired_tokens`` management command.
+
+Each batch selects up to ``HOUSEKEEPING_BATCH_SIZE`` primary keys in
+``expires_at`` order (an index range scan) and deletes exactly those rows, so
+every DELETE is short, touches a bounded number of rows and holds its locks
+only for its own autocommit transaction. Batches are separated by
+``HOUSEKEEPING_BATCH_PAUSE`` seconds to leave room for replication and
+foreground writes, and a run stops after ``HOUSEKEEPING_MAX_BATCHES`` batches
+per table; whatever is left goes in the next run.
+
+Rows are kept for a retention period past expiry: refresh tokens for the
+security views, verified registration OTPs because registration completion
+checks for one, and referral tokens so referrers still see recently expired
+links.
+"""
+import logging
+import time
+from datetime import timedelta
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class AuthHousekeeping:
+    """Batched deletion of expired tokens and OTPs"""
+
+    TASKS = ('jwt_tokens', 'email_otps', 'referral_tokens')
+
+    def __init__(self):
+        self.last_run: Dict[str, Dict] = {}
+
+    def expired_queryset(self, task: str, now=None):
+        """Rows of ``task`` that are past expiry and retention at ``now``"""
+        from apps.authentication.models import EmailOTP, JWTToken
+
+        now = now or timezone.now()
+        if task == 'jwt_tokens':
+            hours = getattr(settings, 'HOUSEKEEPING_TOKEN_RETENTION_HOURS', 24)
+            return JWTToken.objects.exclude(token_type='referral').filter(
+                expires_at__lt=now - timedelta(hours=hours)
+            )
+        if task == 'email_otps':
+            hours = getattr(settings, 'HOUSEKEEPING_OTP_RETENTION_HOURS', 24)
+            return EmailOTP.objects.filter(expires_at__lt=now - timedelta(hours=hours))
+        if task == 'referral_tokens':
+            days = getattr(settings, 'HOUSEKEEPING_REFERRAL_RETENTION_DAYS', 30)
+            return JWTToken.objects.filter(
+                token_type='referral', expires_at__lt=now - timedelta(days=days)
+            )
+        raise ValueError(f'Unknown housekeeping task: {task}')
+
+    def purge(
+        self,
+        task: str,
+        batch_size: Optional[int] = None,
+        max_batches: Optional[int] = None,
+        pause: Optional[float] = None,
+        dry_run: bool = False,
+    ) -> Dict:
+        """
+        Delete expired rows of ``task`` in batches; returns
+        ``{'deleted', 'batches', 'remaining', 'duration_ms'}``.
+
+        With ``dry_run`` nothing is deleted and ``remaining`` is the number
+        of rows a full cleanup would remove.
+        """
+        batch_size = batch_size or getattr(settings, 'HOUSEKEEPING_BATCH_SIZE', 1000)
+        max_batches = max_batches or getattr(settings, 'HOUSEKEEPING_MAX_BATCHES', 100)
+        if pause is None:
+            pause = getattr(settings, 'HOUSEKEEPING_BATCH_PAUSE', 0.2)
+
+        started = time.perf_counter()
+        expired = self.expired_queryset(task)
+        if dry_run:
+            return {
+                'deleted': 0,
+                'batches': 0,
+                'remaining': expired.count(),
+                'duration_ms': round((time.perf_counter() - started) * 1000, 1),
+            }
+
+        model = expired.model
+        deleted = batches = 0
+        remaining = None
+        while batches < max_batches:
+            if batches:
+                time.sleep(pause)
+            ids = list(expired.order_by('expires_at').values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                remaining = 0
+                break
+            count, _ = model.objects.filter(pk__in=ids).delete()
+            deleted += count
+            batches += 1
+            if len(ids) < batch_size:
+                remaining = 0
+                break
+
+        result = {
+            'deleted': deleted,
+            'batches': batches,
+            # Unknown (None) when the run stopped at max_batches
+            'remaining': remaining,
+            'duration_ms': round((time.perf_counter() - started) * 1000, 1),
+        }
+        self.last_run[task] = {**result, 'finished_at': timezone.now().isoformat()}
+        return result
+
+    def run(self, tasks: Optional[Iterable[str]] = None, dry_run: bool = False, **options) -> Dict[str, Dict]:
+        """Purge every task (or ``tasks``); a failing task does not stop the others"""
+        results = {}
+        for task in tasks or self.TASKS:
+            try:
+                results[task] = self.purge(task, dry_run=dry_run, **options)
+            except Exception as e:
+                logger.error(f'Housekeeping of {task} failed: {e}')
+                results[task] = {'error': str(e)}
+        return results
+
+    def stats(self) -> Dict[str, Dict]:
+        return dict(self.last_run)
+
+
+# Singleton instance
+auth_housekeeping = AuthHousekeeping()
@@ -7,9 +7,11 @@ from datetime import datetime, timedelta
 from typing import Optional, Dict, Any, Tuple
 from django.utils import timezone
 from django.conf import settings
-from rest_framework_simplejwt.tokens import RefreshToken, AccessToken
+from rest_framework_simplejwt.tokens import RefreshToken, AccessToken, UntypedToken
 from rest_framework_simplejwt.exceptions import TokenError, InvalidToken
 from apps.authentication.models import User, JWTToken
+from .principal_cache import principal_cache
+from .token_revocation import token_revocation
 
 
 class JWTTokenService:
@@ -108,7 +110,7 @@ class JWTTokenService:
         )
     
     @classmethod
-    def validate_token(cls, token: str, token_type: str = 'access') -> Tuple[bool, Optional[User], Optional[str]]:
+    def validate_token(cls, token: str, token_type: str = 'access', record_use: bool = True) -> Tuple[bool, Optional[User], Optional[str]]:
         """
         Validate a JWT token
         Access tokens: Stateless validation only
@@ -117,6 +119,7 @@ class JWTTokenService:
         Args:
             token: JWT token string
             token_type: Type of token ('access' or 'refresh')
+            record_use: Count a refresh token use (off when it is about to be rotated)
             
         Returns:
             Tuple of (is_valid, user, error_message)
@@ -128,9 +131,8 @@ class JWTTokenService:
                 user_id = access_token['user_id']
                 
                 # For access tokens: Only stateless validation
-                try:
-                    user = User.objects.get(user_id=user_id)
-                except User.DoesNotExist:
+                user = principal_cache.get_user(user_id)
+                if user is None:
                     return False, None, "User not found"
                 
                 # Check if user is active
@@ -145,38 +147,24 @@ class JWTTokenService:
                 user_id = refresh_token['user_id']
                 
                 # Get user
-                try:
-                    user = User.objects.get(user_id=user_id)
-                except User.DoesNotExist:
+                user = principal_cache.get_user(user_id)
+                if user is None:
                     return False, None, "User not found"
                 
                 # Check if user is active
                 if not user.is_active:
                     return False, None, "User account is disabled"
                 
-                # For refresh tokens: Check database record
-                token_hash = cls.generate_token_hash(token)
-                
-                try:
-                    token_record = JWTToken.objects.get(
-                        token_hash=token_hash,
-                        token_type='refresh',
-                        user=user
-                    )
-                except JWTToken.DoesNotExist:
-                    return False, None, "Refresh token not found in database"
-                
-                # Check if refresh token is valid
-                if not token_record.is_valid():
-                    if token_record.is_expired():
-                        return False, None, "Refresh token has expired"
-                    elif token_record.is_revoked:
-                        return False, None, "Refresh token has been revoked"
-                    elif token_record.is_blacklisted:
-                        return False, None, "Refresh token has been blacklisted"
+                # Revocation: user watermark, then the Bloom filter; the
+                # JWTToken table is only read for Bloom hits
+                jti = refresh_token.get('jti')
+                error = token_revocation.check(jti, user, refresh_token.get('iat'))
+                if error:
+                    return False, None, error
                 
-                # Mark refresh token as used
-                token_record.mark_as_used()
+                # Usage is written in batches
+                if record_use:
+                    token_revocation.record_use(jti)
                 
                 return True, user, None
             
@@ -198,7 +186,7 @@ class JWTTokenService:
         Returns:
             Dict containing new access_token
         """
-        # Validate refresh token (this checks database)
+        # Validate refresh token (revocation checks, see token_revocation)
         is_valid, user, error = cls.validate_token(refresh_token, 'refresh')
         if not is_valid:
             raise InvalidToken(error)
@@ -219,20 +207,42 @@ class JWTTokenService:
         }
     
     @classmethod
-    def revoke_token(cls, token: str, token_type: str):
-        """Revoke a specific token by setting is_revoked to True"""
+    def revoke_token(cls, token: str, token_type: str) -> bool:
+        """
+        Revoke a specific token with one conditional UPDATE
+        
+        Returns False when no active token matched (unknown, already
+        revoked or blacklisted).
+        """
         token_hash = cls.generate_token_hash(token)
+        revoked = JWTToken.objects.filter(
+            token_hash=token_hash,
+            token_type=token_type,
+            is_revoked=False,
+            is_blacklisted=False,
+        ).update(is_revoked=True, revoked_at=timezone.now())
+        if revoked:
+            token_revocation.add([cls._get_jti(token)])
+        return bool(revoked)
+
+    @staticmethod
+    def _get_jti(token: str) -> Optional[str]:
+        """JTI claim of an encoded token without verifying it"""
         try:
-            jwt_token = JWTToken.objects.get(token_hash=token_hash, token_type=token_type)
-            jwt_token.is_revoked = True
-            jwt_token.save()
-        except JWTToken.DoesNotExist:
-            pass
+            return UntypedToken(token, verify=False).get('jti')
+        except TokenError:
+            return None
 
     @classmethod
     def rotate_refresh_token(cls, old_refresh_token: str, user: User, request=None) -> Dict[str, Any]:
-        """Rotate the refresh token by revoking the old one and issuing a new one"""
-        cls.revoke_token(old_refresh_token, 'refresh')
+        """
+        Rotate the refresh token by revoking the old one and issuing a new one
+        
+        The revoke only matches an active token, so two refreshes racing with
+        the same token (or a token revoked by another process) rotate once.
+        """
+        if not cls.revoke_token(old_refresh_token, 'refresh'):
+            raise InvalidToken("Refresh token has already been used or revoked")
         return cls.create_tokens(user, request)
     
     @classmethod
@@ -250,7 +260,13 @@ class JWTTokenService:
         """
         if token_type and token_type != 'refresh':
             return 0  # Only refresh tokens can be revoked
-            
+        
+        # Tokens issued before now are rejected from the user watermark, so
+        # the rows need not be added to the Bloom filter one by one
+        now = timezone.now()
+        User.objects.filter(pk=user.pk).update(tokens_valid_after=now)
+        user.tokens_valid_after = now
+        principal_cache.invalidate(user.pk)
         return JWTToken.revoke_all_user_tokens(user, 'refresh')
     
     @classmethod
@@ -269,26 +285,26 @@ class JWTTokenService:
         if token_type != 'refresh':
             return False  # Access tokens are stateless, cannot be blacklisted
             
-        try:
-            token_hash = cls.generate_token_hash(token)
-            token_record = JWTToken.objects.get(
-                token_hash=token_hash,
-                token_type='refresh'
-            )
-            token_record.blacklist()
-            return True
-        except JWTToken.DoesNotExist:
-            return False
+        blacklisted = JWTToken.objects.filter(
+            token_hash=cls.generate_token_hash(token),
+            token_type='refresh'
+        ).update(is_blacklisted=True, blacklisted_at=timezone.now())
+        if blacklisted:
+            token_revocation.add([cls._get_jti(token)])
+        return bool(blacklisted)
     
     @classmethod
     def cleanup_expired_tokens(cls) -> int:
         """
-        Clean up expired tokens from database
+        Clean up expired access / refresh tokens in bounded batches
+        (see AuthHousekeeping)
         
         Returns:
             Number of tokens cleaned up
         """
-        return JWTToken.cleanup_expired_tokens()
+        from .housekeeping import auth_housekeeping
+        
+        return auth_housekeeping.purge('jwt_tokens')['deleted']
     
     @classmethod
     def get_user_active_tokens(cls, user: User, token_type: str = None) -> list:
@@ -0,0 +1,236 @@
+"""
+Login bookkeeping without a ``User`` save per attempt
+
+Failed logins are counted in the cache, per email, over a sliding window of
+``LOGIN_FAILURE_WINDOW_MINUTES`` (two fixed buckets weighted by how far the
+current one has run, updated with ``cache.incr``). Reaching
+``LOGIN_MAX_FAILED_ATTEMPTS`` locks the email for ``LOGIN_LOCKOUT_MINUTES``.
+
+The ``User`` row is only written straight away when the state changes: the
+account is locked, a lock found expired is lifted, or a successful login
+clears failures already recorded. Everything else (the failure count and
+``last_failed_login`` shown to admins, and ``last_login``, which Django's
+``update_last_login`` would otherwise save on every ``login()``) is buffered
+and written in one UPDATE per field at most every
+``LOGIN_BOOKKEEPING_FLUSH_INTERVAL`` seconds; 0 writes immediately.
+
+As with OTPs, the counters need a cache shared by all workers (``CACHES``);
+with local memory each process counts on its own.
+"""
+import atexit
+import hashlib
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Case, Value, When
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class LoginThrottle:
+    """Cache-held failure counters and lockouts, batched login bookkeeping"""
+
+    KEY_PREFIX = 'login'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._last_logins: Dict[int, datetime] = {}
+        self._failures: Dict[int, tuple] = {}
+        self.writes = 0
+
+    # Keys --------------------------------------------------------------------
+
+    def _key(self, kind: str, email: str, *parts) -> str:
+        email_hash = hashlib.sha256((email or '').strip().lower().encode('utf-8')).hexdigest()[:32]
+        return ':'.join([self.KEY_PREFIX, kind, email_hash, *map(str, parts)])
+
+    @staticmethod
+    def _window() -> int:
+        return getattr(settings, 'LOGIN_FAILURE_WINDOW_MINUTES', 15) * 60
+
+    # Failures ----------------------------------------------------------------
+
+    def failures(self, email: str, increment: bool = False) -> int:
+        """Failed attempts for ``email`` in the sliding window"""
+        window = self._window()
+        now = time.time()
+        bucket = int(now // window)
+        current_key = self._key('failures', email, bucket)
+        if increment:
+            # Buckets outlive the window they are weighted into
+            cache.add(current_key, 0, window * 2)
+            try:
+                current = cache.incr(current_key)
+            except ValueError:
+                cache.set(current_key, 1, window * 2)
+                current = 1
+        else:
+            current = cache.get(current_key, 0)
+        previous = cache.get(self._key('failures', email, bucket - 1), 0)
+        elapsed = (now % window) / window
+        return int(current + previous * (1 - elapsed))
+
+    def record_failure(self, email: str, user=None) -> bool:
+        """Count a failed login for ``email``; True when it locked the account"""
+        count = self.failures(email, increment=True)
+        if user is None:
+            return False
+
+        now = timezone.now()
+        if count >= getattr(settings, 'LOGIN_MAX_FAILED_ATTEMPTS', 5):
+            lockout = getattr(settings, 'LOGIN_LOCKOUT_MINUTES', 30) * 60
+            locked_until = now + timedelta(seconds=lockout)
+            # add() so concurrent failures lock (and write) once
+            if cache.add(self._key('locked', email), locked_until.timestamp(), lockout):
+                with self._lock:
+                    self._failures.pop(user.pk, None)
+                self._write(
+                    user,
+                    account_locked=True,
+                    account_locked_until=locked_until,
+                    failed_login_attempts=count,
+                    last_failed_login=now,
+                )
+                logger.warning(f'Locked {email} after {count} failed logins')
+                return True
+            return False
+
+        if cache.get(self._key('locked', email)) is None:
+            self._buffer(self._failures, user.pk, (count, now))
+        return False
+
+    def locked_until(self, user) -> Optional[datetime]:
+        """End of the lock on ``user``, or None when they may log in"""
+        locked = cache.get(self._key('locked', user.email))
+        if locked and locked > time.time():
+            return datetime.fromtimestamp(locked, tz=dt_timezone.utc)
+
+        if user.account_locked:
+            # Locked in the table (another cache, or by an admin)
+            if user.account_locked_until and user.account_locked_until > timezone.now():
+                return user.account_locked_until
+            self._write(user, account_locked=False, account_locked_until=None, failed_login_attempts=0)
+            self.clear(user.email)
+        return None
+
+    def record_success(self, user) -> None:
+        """Forget failures after a successful login (a write only if any were saved)"""
+        self.clear(user.email)
+        with self._lock:
+            self._failures.pop(user.pk, None)
+        if user.failed_login_attempts or user.account_locked:
+            self._write(user, account_locked=False, account_locked_until=None, failed_login_attempts=0)
+
+    def clear(self, email: str) -> None:
+        bucket = int(time.time() // self._window())
+        cache.delete_many([
+            self._key('locked', email),
+            self._key('failures', email, bucket),
+            self._key('failures', email, bucket - 1),
+        ])
+
+    # last_login --------------------------------------------------------------
+
+    def record_login(self, sender, user, **kwargs) -> None:
+        """``user_logged_in`` receiver replacing Django's ``update_last_login``"""
+        user.last_login = timezone.now()
+        self._buffer(self._last_logins, user.pk, user.last_login)
+
+    # Writes ------------------------------------------------------------------
+
+    def _write(self, user, **fields) -> None:
+        from apps.authentication.models import User
+
+        for name, value in fields.items():
+            setattr(user, name, value)
+        # update(): no post_save side effects for bookkeeping fields
+        User.objects.filter(pk=user.pk).update(**fields)
+        self.writes += 1
+
+    def _buffer(self, buffer: Dict, user_id, value) -> None:
+        interval = getattr(settings, 'LOGIN_BOOKKEEPING_FLUSH_INTERVAL', 60)
+        with self._lock:
+            buffer[user_id] = value
+            if interval > 0 and self._timer is None:
+                self._timer = threading.Timer(interval, self._flush_in_worker)
+                self._timer.daemon = True
+                self._timer.start()
+        if interval <= 0:
+            self.flush()
+
+    def flush(self) -> int:
+        """Write buffered bookkeeping; returns rows updated"""
+        from apps.authentication.models import User
+
+        with self._lock:
+            last_logins, self._last_logins = self._last_logins, {}
+            failures, self._failures = self._failures, {}
+            self._timer = None
+        updated = 0
+        try:
+            if last_logins:
+                updated += User.objects.filter(pk__in=list(last_logins)).update(
+                    last_login=Case(*[When(pk=pk, then=Value(at)) for pk, at in last_logins.items()])
+                )
+            if failures:
+                updated += User.objects.filter(pk__in=list(failures)).update(
+                    failed_login_attempts=Case(
+                        *[When(pk=pk, then=Value(count)) for pk, (count, _) in failures.items()]
+                    ),
+                    last_failed_login=Case(
+                        *[When(pk=pk, then=Value(at)) for pk, (_, at) in failures.items()]
+                    ),
+                )
+        except Exception as e:
+            logger.error(f'Failed to write login bookkeeping: {e}')
+            return 0
+        self.writes += bool(last_logins) + bool(failures)
+        return updated
+
+    def _flush_in_worker(self) -> None:
+        try:
+            self.flush()
+        finally:
+            connections.close_all()
+
+    # Maintenance -------------------------------------------------------------
+
+    def reset(self) -> None:
+        """Drop buffered writes (tests)"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = None
+            self._last_logins = {}
+            self._failures = {}
+            self.writes = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'pending_last_logins': len(self._last_logins),
+                'pending_failure_counts': len(self._failures),
+                'writes': self.writes,
+            }
+
+
+# Singleton instance
+login_throttle = LoginThrottle()
+
+
+def _flush_at_exit():
+    try:
+        login_throttle.flush()
+    except Exception:
+        pass
+
+
+atexit.register(_flush_at_exit)
@@ -0,0 +1,234 @@
+"""
+One-time codes kept in the cache
+
+Live codes never touch the database on the request path:
+
+- ``issue`` stores a keyed hash of the code (``salted_hmac`` over purpose,
+  email and code) under the email with a TTL of ``OTP_EXPIRY_MINUTES``; a
+  new code replaces the previous one
+- ``verify`` is a cache lookup and a constant-time compare. Failed attempts
+  are counted with ``cache.incr``; after ``OTP_MAX_ATTEMPTS`` the code is
+  dropped. A matching code is consumed with ``cache.delete`` so only one of
+  two concurrent verifications can succeed, and the email is remembered as
+  verified for ``OTP_VERIFIED_TTL_MINUTES``
+- ``is_rate_limited`` applies the ``OTP_*_RATE_*`` limits per email and per
+  client IP through django-ratelimit, before any code, user or email is
+  created
+
+``EmailOTP`` rows are only an audit trail (the hash, never the code), written
+on a background thread after the request's transaction commits. They also
+back ``is_verified`` when the cache entry is gone.
+
+The cache must be shared by every worker process (``CACHES``, e.g. Redis):
+with the default local-memory cache a code issued by one process cannot be
+verified by another.
+"""
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare, get_random_string, salted_hmac
+from django_ratelimit.core import get_usage
+
+logger = logging.getLogger(__name__)
+
+# Every comma-separated rate is enforced: a short burst window plus a longer
+# sustained one, approximating a token bucket with django-ratelimit's windows
+RATE_SETTINGS = {
+    ('send', 'email'): ('OTP_SEND_RATE_EMAIL', '1/m,5/h'),
+    ('send', 'ip'): ('OTP_SEND_RATE_IP', '10/m,30/h'),
+    ('verify', 'email'): ('OTP_VERIFY_RATE_EMAIL', '10/h'),
+    ('verify', 'ip'): ('OTP_VERIFY_RATE_IP', '30/h'),
+}
+
+
+def _rates(value) -> list:
+    if isinstance(value, str):
+        value = value.split(',')
+    return [rate.strip() for rate in value or () if rate.strip()]
+
+
+class OTPService:
+    """Cache-backed one-time codes with per-email and per-IP rate limits"""
+
+    KEY_PREFIX = 'otp'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    # Keys --------------------------------------------------------------------
+
+    @staticmethod
+    def normalize(email: str) -> str:
+        return (email or '').strip().lower()
+
+    def _key(self, kind: str, email: str, purpose: str) -> str:
+        # Hashed so any email is a valid memcached / Redis key
+        email_hash = hashlib.sha256(self.normalize(email).encode('utf-8')).hexdigest()[:32]
+        return f'{self.KEY_PREFIX}:{kind}:{purpose}:{email_hash}'
+
+    def digest(self, email: str, code: str, purpose: str) -> str:
+        value = f'{purpose}:{self.normalize(email)}:{code}'
+        return salted_hmac('otp', value, algorithm='sha256').hexdigest()
+
+    # Codes -------------------------------------------------------------------
+
+    def issue(self, email: str, purpose: str = 'registration') -> str:
+        """Create a code for ``email``, replacing any live one; returns the code"""
+        length = getattr(settings, 'OTP_LENGTH', 6)
+        expiry_minutes = getattr(settings, 'OTP_EXPIRY_MINUTES', 10)
+        code = get_random_string(length, allowed_chars='0123456789')
+        code_hash = self.digest(email, code, purpose)
+        timeout = expiry_minutes * 60
+
+        cache.set_many(
+            {
+                self._key('code', email, purpose): code_hash,
+                self._key('attempts', email, purpose): 0,
+            },
+            timeout,
+        )
+        self._audit(
+            self._record_issued,
+            email,
+            purpose,
+            code_hash,
+            timezone.now() + timedelta(minutes=expiry_minutes),
+        )
+        return code
+
+    def verify(self, email: str, code: str, purpose: str = 'registration') -> Dict:
+        """Check ``code``; returns ``{'success': bool, 'message': str}``"""
+        code_key = self._key('code', email, purpose)
+        attempts_key = self._key('attempts', email, purpose)
+
+        code_hash = cache.get(code_key)
+        if code_hash is None:
+            return {
+                'success': False,
+                'message': 'No valid verification code found for this email. Please request a new one.',
+            }
+
+        if not constant_time_compare(code_hash, self.digest(email, str(code or ''), purpose)):
+            try:
+                attempts = cache.incr(attempts_key)
+            except ValueError:
+                # Expired between the two reads
+                attempts = getattr(settings, 'OTP_MAX_ATTEMPTS', 3)
+            if attempts >= getattr(settings, 'OTP_MAX_ATTEMPTS', 3):
+                cache.delete_many([code_key, attempts_key])
+                self._audit(self._record_result, email, purpose, code_hash, attempts, False)
+                return {
+                    'success': False,
+                    'message': 'Too many failed attempts. Please request a new verification code.',
+                }
+            return {
+                'success': False,
+                'message': 'Invalid verification code. Please try again.',
+            }
+
+        # Only the request that removes the code gets to use it
+        if not cache.delete(code_key):
+            return {
+                'success': False,
+                'message': 'No valid verification code found for this email. Please request a new one.',
+            }
+        attempts = cache.get(attempts_key) or 0
+        cache.delete(attempts_key)
+        cache.set(
+            self._key('verified', email, purpose),
+            True,
+            getattr(settings, 'OTP_VERIFIED_TTL_MINUTES', 60) * 60,
+        )
+        self._audit(self._record_result, email, purpose, code_hash, attempts, True)
+        return {
+            'success': True,
+            'message': 'Verification code verified successfully',
+        }
+
+    def is_verified(self, email: str, purpose: str = 'registration') -> bool:
+        """Whether ``email`` passed verification for ``purpose``"""
+        if cache.get(self._key('verified', email, purpose)):
+            return True
+        from apps.authentication.models import EmailOTP
+
+        return EmailOTP.objects.filter(
+            email__iexact=self.normalize(email), purpose=purpose, is_used=True
+        ).exists()
+
+    # Rate limits -------------------------------------------------------------
+
+    def is_rate_limited(self, request, action: str, email: str) -> bool:
+        """
+        Count this ``send`` / ``verify`` request against the email and client
+        IP limits; True when any of them is exceeded.
+        """
+        normalized = self.normalize(email)
+        limited = False
+        for scope, key in (('email', lambda group, request: normalized), ('ip', 'ip')):
+            name, default = RATE_SETTINGS[(action, scope)]
+            for rate in _rates(getattr(settings, name, default)):
+                usage = get_usage(
+                    request,
+                    group=f'otp-{action}-{scope}',
+                    key=key,
+                    rate=rate,
+                    method='POST',
+                    increment=True,
+                )
+                if usage and usage['should_limit']:
+                    limited = True
+        if limited:
+            logger.warning(f'OTP {action} rate limit hit for {normalized}')
+        return limited
+
+    # Audit -------------------------------------------------------------------
+
+    def _audit(self, func, *args) -> None:
+        workers = getattr(settings, 'OTP_AUDIT_WORKERS', 1)
+        if workers <= 0:
+            self._run_audit(func, args, close_connections=False)
+            return
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=workers, thread_name_prefix='otp-audit'
+                    )
+        transaction.on_commit(lambda: self._executor.submit(self._run_audit, func, args))
+
+    @staticmethod
+    def _run_audit(func, args, close_connections: bool = True) -> None:
+        try:
+            func(*args)
+        except Exception as e:
+            logger.error(f'OTP audit write failed: {e}')
+        finally:
+            if close_connections:
+                connections.close_all()
+
+    @staticmethod
+    def _record_issued(email, purpose, code_hash, expires_at) -> None:
+        from apps.authentication.models import EmailOTP
+
+        EmailOTP.objects.create(email=email, purpose=purpose, otp=code_hash, expires_at=expires_at)
+
+    @staticmethod
+    def _record_result(email, purpose, code_hash, attempts, verified) -> None:
+        from apps.authentication.models import EmailOTP
+
+        EmailOTP.objects.filter(email__iexact=email, purpose=purpose, otp=code_hash).update(
+            attempts=attempts, is_used=verified
+        )
+
+
+# Singleton instance
+otp_service = OTPService()
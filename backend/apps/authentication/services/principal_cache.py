@@ -0,0 +1,92 @@
+"""
+Per-process cache of authenticated users (principals)
+
+``CustomJWTAuthentication`` resolves the user behind an access token here
+instead of querying ``User`` on every request. Entries live for
+``AUTH_PRINCIPAL_CACHE_TTL`` seconds (bounded by
+``AUTH_PRINCIPAL_CACHE_MAX_ENTRIES``, least recently used first out) and are
+dropped when the user is saved or deleted in this process
+(``apps.authentication.signals``). Writes that skip signals (``update()``) or
+happen in another process are picked up once the TTL passes, so keep it
+short.
+
+Each request gets its own copy of the cached instance, so views that modify
+and save ``request.user`` never touch the shared one.
+"""
+import copy
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+logger = logging.getLogger(__name__)
+
+
+class PrincipalCache:
+    """TTL + LRU cache of ``User`` instances keyed by user id"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[Any, tuple]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_user(self, user_id, field: str = 'user_id'):
+        """A private copy of the user with ``field == user_id``; None if missing"""
+        ttl = getattr(settings, 'AUTH_PRINCIPAL_CACHE_TTL', 30)
+        key = str(user_id)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.copy(entry[0])
+            self.misses += 1
+
+        User = get_user_model()
+        try:
+            user = User.objects.get(**{field: user_id})
+        except User.DoesNotExist:
+            return None
+
+        if ttl > 0:
+            max_entries = getattr(settings, 'AUTH_PRINCIPAL_CACHE_MAX_ENTRIES', 10000)
+            with self._lock:
+                self._entries[key] = (copy.copy(user), now + ttl)
+                self._entries.move_to_end(key)
+                while len(self._entries) > max_entries:
+                    self._entries.popitem(last=False)
+        return user
+
+    def invalidate(self, user_id) -> None:
+        with self._lock:
+            self._entries.pop(str(user_id), None)
+
+    def invalidate_many(self, user_ids: Iterable) -> None:
+        with self._lock:
+            for user_id in user_ids:
+                self._entries.pop(str(user_id), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups * 100, 1) if lookups else 0,
+            }
+
+
+# Singleton instance
+principal_cache = PrincipalCache()
@@ -203,13 +203,16 @@ class ReferralService:
     @staticmethod
     def cleanup_expired_tokens():
         """
-        Clean up expired referral tokens
+        Clean up expired referral tokens in bounded batches
+        (see AuthHousekeeping)
         
         Returns:
             int: Number of tokens cleaned up
         """
         try:
-            return JWTToken.cleanup_expired_tokens()
+            from .housekeeping import auth_housekeeping
+            
+            return auth_housekeeping.purge('referral_tokens')['deleted']
         except Exception as e:
             logger.error(f"Error cleaning up expired tokens: {e}")
             return 0
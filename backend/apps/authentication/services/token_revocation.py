@@ -0,0 +1,275 @@
+"""
+Refresh token revocation checks without a JWTToken query per refresh
+
+``JWTToken`` rows stay the shared record of revoked / blacklisted tokens.
+Each process keeps a Bloom filter of the JTIs revoked there, synced from the
+table every ``TOKEN_REVOCATION_SYNC_INTERVAL`` seconds (only rows whose
+``revoked_at`` / ``blacklisted_at`` moved) and rebuilt every
+``TOKEN_REVOCATION_REBUILD_INTERVAL`` seconds so expired JTIs age out. A JTI
+missing from the filter is known not to be revoked as of the last sync and
+is accepted without touching the table; a hit is confirmed with one indexed
+lookup, since Bloom filters have false positives.
+
+With ``ROTATE_REFRESH_TOKENS`` every refresh revokes a JTI, so the number of
+live revoked tokens grows with traffic. Each rebuild sizes the filter for
+twice the live revoked count (at least ``TOKEN_REVOCATION_BLOOM_MIN_CAPACITY``)
+at ``TOKEN_REVOCATION_BLOOM_FP_RATE``, and the filter is rebuilt early once it
+holds that many entries, so it does not saturate into a table lookup per
+check.
+
+``User.tokens_valid_after`` is a per-user watermark: revoking all of a
+user's tokens sets it, and any token issued before it is rejected from the
+cached user alone.
+
+Token use (``last_used_at`` / ``usage_count``) is buffered and written in one
+UPDATE every ``TOKEN_USAGE_FLUSH_INTERVAL`` seconds on a background thread;
+0 writes each use inline (tests).
+
+Revocations from another process reach this one at the next sync; the
+conditional UPDATE in ``JWTTokenService.rotate_refresh_token`` still refuses
+to rotate a token already revoked in the table, so a revoked refresh token
+cannot be exchanged during that window.
+"""
+import atexit
+import hashlib
+import logging
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+from django.conf import settings
+from django.db import connections
+from django.db.models import Case, F, Q, Value, When
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings"""
+
+    def __init__(self, bits: int, hashes: int, capacity: Optional[int] = None):
+        self.bits = bits
+        self.hashes = hashes
+        # Entries it was sized for; None when sized by hand
+        self.capacity = capacity
+        self._array = np.zeros((bits + 7) // 8, dtype=np.uint8)
+        self.count = 0
+
+    @classmethod
+    def for_capacity(cls, capacity: int, fp_rate: float) -> 'BloomFilter':
+        """Filter holding ``capacity`` entries at about ``fp_rate`` false positives"""
+        capacity = max(capacity, 1)
+        bits = math.ceil(-capacity * math.log(fp_rate) / math.log(2) ** 2)
+        hashes = max(1, round(bits / capacity * math.log(2)))
+        return cls(bits, hashes, capacity)
+
+    @property
+    def full(self) -> bool:
+        return self.capacity is not None and self.count >= self.capacity
+
+    def _positions(self, key: str) -> np.ndarray:
+        # Double hashing: h1 + i * h2 from one SHA-256 digest
+        digest = hashlib.sha256(key.encode('utf-8')).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:16], 'little') | 1
+        return np.array([(h1 + i * h2) % self.bits for i in range(self.hashes)], dtype=np.int64)
+
+    def add(self, key: str) -> None:
+        positions = self._positions(key)
+        np.bitwise_or.at(self._array, positions >> 3, (1 << (positions & 7)).astype(np.uint8))
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        positions = self._positions(key)
+        return bool(np.all(self._array[positions >> 3] & (1 << (positions & 7)).astype(np.uint8)))
+
+
+class TokenRevocationRegistry:
+    """Bloom-filtered revocation checks and batched usage tracking"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._bloom: Optional[BloomFilter] = None
+        self._synced_until = None
+        self._checked_at = 0.0
+        self._rebuilt_at = 0.0
+        self._usage: Dict[str, list] = {}
+        self._flushed_at = time.monotonic()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.fast_accepts = 0
+        self.confirmed_revoked = 0
+        self.false_positives = 0
+
+    # Checks ------------------------------------------------------------------
+
+    def check(self, jti: str, user, issued_at) -> Optional[str]:
+        """Error message when the refresh token ``jti`` is revoked, else None"""
+        watermark = getattr(user, 'tokens_valid_after', None)
+        if watermark is not None and issued_at is not None and int(issued_at) < int(watermark.timestamp()):
+            return 'Refresh token has been revoked'
+
+        self._sync()
+        if jti not in self._bloom:
+            self.fast_accepts += 1
+            return None
+
+        from apps.authentication.models import JWTToken
+
+        row = JWTToken.objects.filter(jti=jti).values('is_revoked', 'is_blacklisted').first()
+        if row is None:
+            return 'Refresh token not found in database'
+        if row['is_revoked']:
+            self.confirmed_revoked += 1
+            return 'Refresh token has been revoked'
+        if row['is_blacklisted']:
+            self.confirmed_revoked += 1
+            return 'Refresh token has been blacklisted'
+        self.false_positives += 1
+        return None
+
+    def add(self, jtis: Iterable[str]) -> None:
+        """Record JTIs revoked by this process"""
+        with self._lock:
+            if self._bloom is None:
+                return  # The first sync loads them from the table
+            for jti in jtis:
+                if jti:
+                    self._bloom.add(jti)
+
+    def _sync(self) -> None:
+        now = time.monotonic()
+        interval = getattr(settings, 'TOKEN_REVOCATION_SYNC_INTERVAL', 5)
+        if self._bloom is not None and now - self._checked_at < interval:
+            return
+
+        from apps.authentication.models import JWTToken
+
+        with self._lock:
+            if self._bloom is not None and now - self._checked_at < interval:
+                return
+            rebuild_interval = getattr(settings, 'TOKEN_REVOCATION_REBUILD_INTERVAL', 3600)
+            rebuild = (
+                self._bloom is None
+                or self._bloom.full
+                or now - self._rebuilt_at >= rebuild_interval
+            )
+            sync_started = timezone.now()
+            revoked = JWTToken.objects.filter(Q(is_revoked=True) | Q(is_blacklisted=True))
+            if rebuild:
+                revoked = revoked.filter(token_type='refresh', expires_at__gt=sync_started)
+                # Headroom for the revocations until the next rebuild
+                capacity = max(
+                    revoked.count() * 2,
+                    getattr(settings, 'TOKEN_REVOCATION_BLOOM_MIN_CAPACITY', 100000),
+                )
+                bloom = BloomFilter.for_capacity(
+                    capacity, getattr(settings, 'TOKEN_REVOCATION_BLOOM_FP_RATE', 0.01)
+                )
+                self._rebuilt_at = now
+            else:
+                bloom = self._bloom
+                # Overlap by a second so rows committed mid-sync are not missed
+                since = self._synced_until - timedelta(seconds=1)
+                revoked = revoked.filter(Q(revoked_at__gte=since) | Q(blacklisted_at__gte=since))
+            for jti in revoked.values_list('jti', flat=True).iterator():
+                bloom.add(jti)
+            self._bloom = bloom
+            self._synced_until = sync_started
+            self._checked_at = now
+
+    # Usage tracking ----------------------------------------------------------
+
+    def record_use(self, jti: str) -> None:
+        """Count a use of ``jti``; written to the table in the next flush"""
+        with self._lock:
+            entry = self._usage.get(jti)
+            if entry is None:
+                self._usage[jti] = [1, timezone.now()]
+            else:
+                entry[0] += 1
+                entry[1] = timezone.now()
+            interval = getattr(settings, 'TOKEN_USAGE_FLUSH_INTERVAL', 30)
+            due = time.monotonic() - self._flushed_at >= interval
+            if due:
+                self._flushed_at = time.monotonic()
+        if interval <= 0:
+            self.flush_usage()
+        elif due:
+            self._get_executor().submit(self._flush_in_worker)
+
+    def flush_usage(self) -> int:
+        """Write buffered usage in one UPDATE; returns tokens updated"""
+        from apps.authentication.models import JWTToken
+
+        with self._lock:
+            usage, self._usage = self._usage, {}
+        if not usage:
+            return 0
+        try:
+            return JWTToken.objects.filter(jti__in=list(usage)).update(
+                last_used_at=Case(*[When(jti=jti, then=Value(used_at)) for jti, (_, used_at) in usage.items()]),
+                usage_count=F('usage_count') + Case(*[When(jti=jti, then=Value(count)) for jti, (count, _) in usage.items()]),
+            )
+        except Exception as e:
+            logger.error(f'Failed to record refresh token usage: {e}')
+            return 0
+
+    def _flush_in_worker(self) -> None:
+        try:
+            self.flush_usage()
+        finally:
+            connections.close_all()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='token-usage')
+        return self._executor
+
+    # Maintenance -------------------------------------------------------------
+
+    def reset(self) -> None:
+        """Forget the filter and buffered usage (tests)"""
+        executor = self._executor
+        if executor is not None:
+            # Let a running flush finish before the test database goes away
+            executor.shutdown(wait=True)
+            self._executor = None
+        with self._lock:
+            self._bloom = None
+            self._synced_until = None
+            self._checked_at = self._rebuilt_at = 0.0
+            self._usage = {}
+            self._flushed_at = time.monotonic()
+            self.fast_accepts = self.confirmed_revoked = self.false_positives = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'bloom_entries': self._bloom.count if self._bloom is not None else 0,
+                'bloom_capacity': self._bloom.capacity if self._bloom is not None else 0,
+                'fast_accepts': self.fast_accepts,
+                'confirmed_revoked': self.confirmed_revoked,
+                'false_positives': self.false_positives,
+                'pending_usage_updates': len(self._usage),
+            }
+
+
+# Singleton instance
+token_revocation = TokenRevocationRegistry()
+
+
+def _flush_at_exit():
+    try:
+        token_revocation.flush_usage()
+    except Exception:
+        pass
+
+
+atexit.register(_flush_at_exit)
@@ -1,8 +1,11 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_in
 from apps.communications.utils import NotificationManager
 from .models import Cook
+from .services.login_throttle import login_throttle
+from .services.principal_cache import principal_cache
 
 User = get_user_model()
 
@@ -35,4 +38,20 @@ def notify_cook_profile_cook_update(sender, instance, created, **kwargs):
             subject="Chef Profile Updated",
             message="Your chef profile has been updated successfully. Your specialty cuisine, experience level, and kitchen location are now updated.",
             notification_type='profile'
-        )
\ No newline at end of file
+        )
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_principal(sender, instance, **kwargs):
+    """
+    Drop the user from the JWT principal cache so role, active and approval
+    changes apply to the next request
+    """
+    principal_cache.invalidate(instance.pk)
+
+
+# last_login is buffered and written in batches (services.login_throttle)
+# instead of Django saving the user on every login()
+user_logged_in.disconnect(dispatch_uid="update_last_login")
+user_logged_in.connect(login_throttle.record_login, dispatch_uid="buffered_last_login")
@@ -1,6 +1,6 @@
 from apps.authentication.models import DocumentType, UserDocument
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.utils import timezone
 
 User = get_user_model()
@@ -267,3 +267,444 @@ class UserDocumentTest(TestCase):
         self.assertEqual(document.reviewed_by, admin)
         self.assertIsNotNone(document.reviewed_at)
         self.assertTrue(document.is_visible_to_admin)
+
+
+class CustomJWTAuthenticationTest(TestCase):
+    """Access tokens are decoded once and users come from the principal cache"""
+
+    def setUp(self):
+        from apps.authentication.services.principal_cache import principal_cache
+
+        principal_cache.clear()
+        self.principal_cache = principal_cache
+        self.user = User.objects.create_user(
+            email="jwt@test.com", password="jwtpass123", name="JWT User", role="customer"
+        )
+
+    def _authenticate(self):
+        from apps.authentication.authentication import CustomJWTAuthentication
+        from apps.authentication.services.jwt_service import JWTTokenService
+        from rest_framework.test import APIRequestFactory
+
+        if not hasattr(self, "token"):
+            self.token = JWTTokenService.create_tokens(self.user)["access_token"]
+        request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {self.token}")
+        return CustomJWTAuthentication().authenticate(request)
+
+    def test_warm_cache_authenticates_without_queries(self):
+        user, _ = self._authenticate()
+        self.assertEqual(user.pk, self.user.pk)
+
+        with self.assertNumQueries(0):
+            cached_user, _ = self._authenticate()
+        self.assertEqual(cached_user.email, "jwt@test.com")
+        self.assertEqual(self.principal_cache.stats()["hits"], 1)
+
+    def test_each_request_gets_its_own_copy(self):
+        first, _ = self._authenticate()
+        first.name = "Changed in a view"
+        second, _ = self._authenticate()
+        self.assertEqual(second.name, "JWT User")
+        self.assertIsNot(first, second)
+
+    def test_saving_the_user_invalidates_the_principal(self):
+        from rest_framework_simplejwt.exceptions import AuthenticationFailed
+
+        self._authenticate()
+        self.user.is_active = False
+        self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self._authenticate()
+
+
+@override_settings(TOKEN_USAGE_FLUSH_INTERVAL=0)
+class RefreshTokenRevocationTest(TestCase):
+    """Refresh tokens are checked against the Bloom filter and user watermark"""
+
+    def setUp(self):
+        from apps.authentication.services.principal_cache import principal_cache
+        from apps.authentication.services.token_revocation import token_revocation
+
+        principal_cache.clear()
+        token_revocation.reset()
+        # Nothing buffered may be flushed after the test database is gone
+        self.addCleanup(token_revocation.reset)
+        self.registry = token_revocation
+        self.user = User.objects.create_user(
+            email="refresh@test.com", password="refreshpass123", name="Refresh User", role="customer"
+        )
+
+    def _tokens(self):
+        from apps.authentication.services.jwt_service import JWTTokenService
+
+        return JWTTokenService.create_tokens(self.user)
+
+    def test_valid_refresh_needs_no_token_queries(self):
+        from apps.authentication.services.jwt_service import JWTTokenService
+
+        refresh = self._tokens()["refresh_token"]
+        with self.settings(TOKEN_USAGE_FLUSH_INTERVAL=3600):
+            self.assertTrue(JWTTokenService.validate_token(refresh, "refresh")[0])
+            with self.assertNumQueries(0):
+                self.assertTrue(JWTTokenService.validate_token(refresh, "refresh")[0])
+        self.assertEqual(self.registry.stats()["pending_usage_updates"], 1)
+
+    def test_rotated_token_cannot_be_reused(self):
+        from apps.authentication.services.jwt_service import JWTTokenService
+        from rest_framework_simplejwt.exceptions import InvalidToken
+
+        refresh = self._tokens()["refresh_token"]
+        self.assertTrue(JWTTokenService.validate_token(refresh, "refresh")[0])
+        JWTTokenService.rotate_refresh_token(refresh, self.user)
+
+        is_valid, _, error = JWTTokenService.validate_token(refresh, "refresh")
+        self.assertFalse(is_valid)
+        self.assertEqual(error, "Refresh token has been revoked")
+        with self.assertRaises(InvalidToken):
+            JWTTokenService.rotate_refresh_token(refresh, self.user)
+
+    def test_revoke_all_sets_user_watermark(self):
+        from datetime import timedelta
+
+        from apps.authentication.models import JWTToken
+        from apps.authentication.services.jwt_service import JWTTokenService
+
+        refresh = self._tokens()["refresh_token"]
+        self.assertEqual(JWTTokenService.revoke_all_user_tokens(self.user), 1)
+        # Tokens issued in the revocation second stay valid; move the watermark past it
+        User.objects.filter(pk=self.user.pk).update(
+            tokens_valid_after=timezone.now() + timedelta(seconds=2)
+        )
+        self.user.save(update_fields=["name"])
+
+        is_valid, _, error = JWTTokenService.validate_token(refresh, "refresh")
+        self.assertFalse(is_valid)
+        self.assertEqual(error, "Refresh token has been revoked")
+        self.assertEqual(self.registry.stats()["confirmed_revoked"], 0)
+        self.assertFalse(JWTToken.objects.filter(user=self.user, is_revoked=False).exists())
+
+    def test_usage_is_written_in_one_batch(self):
+        from apps.authentication.models import JWTToken
+        from apps.authentication.services.jwt_service import JWTTokenService
+
+        first, second = self._tokens()["refresh_token"], self._tokens()["refresh_token"]
+        with self.settings(TOKEN_USAGE_FLUSH_INTERVAL=3600):
+            for token in (first, first, second):
+                JWTTokenService.validate_token(token, "refresh")
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.registry.flush_usage(), 2)
+        counts = sorted(JWTToken.objects.filter(user=self.user).values_list("usage_count", flat=True))
+        self.assertEqual(counts, [1, 2])
+        self.assertFalse(JWTToken.objects.filter(user=self.user, last_used_at__isnull=True).exists())
+
+    def test_bloom_filter(self):
+        from apps.authentication.services.token_revocation import BloomFilter
+
+        bloom = BloomFilter(2 ** 16, 7)
+        for i in range(1000):
+            bloom.add(f"jti-{i}")
+        self.assertTrue(all(f"jti-{i}" in bloom for i in range(1000)))
+        false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+        self.assertLess(false_positives, 100)
+
+    def test_bloom_filter_is_sized_from_live_revocations(self):
+        from apps.authentication.services.jwt_service import JWTTokenService
+        from apps.authentication.services.token_revocation import BloomFilter
+
+        bloom = BloomFilter.for_capacity(1000, 0.01)
+        self.assertEqual((bloom.hashes, bloom.bits), (7, 9586))
+
+        for _ in range(3):
+            JWTTokenService.revoke_token(self._tokens()["refresh_token"], "refresh")
+        with self.settings(TOKEN_REVOCATION_BLOOM_MIN_CAPACITY=2):
+            self.registry.reset()
+            self.registry._sync()
+            self.assertEqual(self.registry.stats()["bloom_capacity"], 6)
+
+    def test_refresh_without_rotation_reads_no_token_rows(self):
+        from apps.authentication.services.jwt_service import JWTTokenService
+
+        refresh = self._tokens()["refresh_token"]
+        JWTTokenService.validate_token(refresh, "refresh", record_use=False)
+        self.assertEqual(self.registry.stats()["pending_usage_updates"], 0)
+        with self.settings(TOKEN_USAGE_FLUSH_INTERVAL=3600), self.assertNumQueries(0):
+            self.assertIn("access_token", JWTTokenService.refresh_access_token(refresh))
+
+
+class AuthHousekeepingTest(TestCase):
+    """Expired tokens and OTPs are deleted in bounded batches"""
+
+    def setUp(self):
+        from apps.authentication.services.housekeeping import auth_housekeeping
+
+        self.housekeeping = auth_housekeeping
+        self.user = User.objects.create_user(
+            email="cleanup@test.com", password="cleanuppass123", name="Cleanup User", role="customer"
+        )
+
+    def _token(self, jti, token_type, expires_in):
+        from apps.authentication.models import JWTToken
+
+        return JWTToken.objects.create(
+            user=self.user,
+            token_hash=jti.ljust(64, "0"),
+            token_type=token_type,
+            jti=jti,
+            expires_at=timezone.now() + expires_in,
+        )
+
+    def test_deletes_only_rows_past_retention(self):
+        from datetime import timedelta
+
+        from apps.authentication.models import EmailOTP, JWTToken
+
+        for i in range(5):
+            self._token(f"old{i}", "refresh", timedelta(days=-2))
+        self._token("recent", "refresh", timedelta(hours=-1))
+        self._token("live", "refresh", timedelta(days=1))
+        self._token("oldref", "referral", timedelta(days=-40))
+        self._token("newref", "referral", timedelta(days=-2))
+        EmailOTP.objects.create(email="a@test.com", expires_at=timezone.now() - timedelta(days=2))
+        EmailOTP.objects.create(email="b@test.com", expires_at=timezone.now() + timedelta(minutes=5))
+
+        with self.settings(HOUSEKEEPING_BATCH_SIZE=2, HOUSEKEEPING_BATCH_PAUSE=0):
+            results = self.housekeeping.run()
+
+        self.assertEqual(results["jwt_tokens"]["deleted"], 5)
+        self.assertEqual(results["jwt_tokens"]["batches"], 3)
+        self.assertEqual(results["email_otps"]["deleted"], 1)
+        self.assertEqual(results["referral_tokens"]["deleted"], 1)
+        self.assertCountEqual(
+            JWTToken.objects.values_list("jti", flat=True), ["recent", "live", "newref"]
+        )
+        self.assertEqual(EmailOTP.objects.get().email, "b@test.com")
+
+    def test_run_stops_at_max_batches(self):
+        from datetime import timedelta
+
+        for i in range(5):
+            self._token(f"old{i}", "access", timedelta(days=-2))
+
+        result = self.housekeeping.purge("jwt_tokens", batch_size=2, max_batches=2, pause=0)
+
+        self.assertEqual(result["deleted"], 4)
+        self.assertIsNone(result["remaining"])
+
+    def test_dry_run_command_deletes_nothing(self):
+        from datetime import timedelta
+        from io import StringIO
+
+        from django.core.management import call_command
+
+        from apps.authentication.models import JWTToken
+
+        self._token("old", "refresh", timedelta(days=-2))
+        out = StringIO()
+
+        call_command("cleanup_expired_tokens", "--dry-run", "--task", "jwt_tokens", stdout=out)
+
+        self.assertIn("jwt_tokens: would delete 1 rows", out.getvalue())
+        self.assertEqual(JWTToken.objects.count(), 1)
+
+
+class OTPServiceTest(TestCase):
+    """Cache-held OTP codes, attempt limits, audit rows and rate limits"""
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        from apps.authentication.services.otp_service import otp_service
+
+        cache.clear()
+        self.otp = otp_service
+        override = self.settings(OTP_AUDIT_WORKERS=0, OTP_MAX_ATTEMPTS=3)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_verify_consumes_code_and_records_audit(self):
+        from apps.authentication.models import EmailOTP
+
+        code = self.otp.issue("Otp@Test.com", "registration")
+
+        audit = EmailOTP.objects.get()
+        self.assertNotEqual(audit.otp, code)
+        self.assertFalse(self.otp.is_verified("otp@test.com"))
+
+        with self.assertNumQueries(1):  # the audit update only
+            result = self.otp.verify("otp@test.com", code, "registration")
+        self.assertTrue(result["success"])
+        self.assertFalse(self.otp.verify("otp@test.com", code, "registration")["success"])
+        self.assertTrue(self.otp.is_verified("otp@test.com"))
+        audit.refresh_from_db()
+        self.assertTrue(audit.is_used)
+
+    def test_wrong_codes_drop_the_code(self):
+        from apps.authentication.models import EmailOTP
+
+        code = self.otp.issue("otp@test.com", "password_reset")
+        wrong = "000000" if code != "000000" else "111111"
+
+        self.assertIn("Invalid", self.otp.verify("otp@test.com", wrong, "password_reset")["message"])
+        self.otp.verify("otp@test.com", wrong, "password_reset")
+        result = self.otp.verify("otp@test.com", wrong, "password_reset")
+
+        self.assertIn("Too many failed attempts", result["message"])
+        self.assertFalse(self.otp.verify("otp@test.com", code, "password_reset")["success"])
+        audit = EmailOTP.objects.get()
+        self.assertEqual(audit.attempts, 3)
+        self.assertFalse(audit.is_used)
+
+    def test_send_otp_rate_limited_per_email(self):
+        from rest_framework.test import APIClient
+
+        client = APIClient()
+        with self.settings(OTP_SEND_RATE_EMAIL="1/m", OTP_SEND_RATE_IP="100/m"):
+            first = client.post(
+                "/api/auth/send-otp/", {"email": "limit@test.com", "name": "Limit"}, format="json"
+            )
+            second = client.post(
+                "/api/auth/send-otp/", {"email": "limit@test.com", "name": "Limit"}, format="json"
+            )
+            other = client.post(
+                "/api/auth/send-otp/", {"email": "other@test.com", "name": "Other"}, format="json"
+            )
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 429)
+        self.assertEqual(other.status_code, 200)
+
+    def test_otp_email_never_stores_the_code(self):
+        import json
+        from unittest.mock import patch
+
+        from django.core import mail
+
+        from apps.authentication.services.email_service import EmailService
+        from apps.communications.models import OutgoingEmail
+        from apps.communications.services.email_outbox import email_outbox
+
+        with patch.object(self.otp, "issue", return_value="482913"):
+            self.assertTrue(EmailService.send_otp("otp@test.com", "registration")["success"])
+
+        queued = OutgoingEmail.objects.get(category="otp")
+        self.assertNotIn("482913", json.dumps(queued.message))
+
+        email_outbox.send_pending()
+
+        self.assertIn("482913", mail.outbox[0].body)
+        self.assertIn("482913", mail.outbox[0].alternatives[0][0])
+        self.assertFalse(
+            any("482913" in json.dumps(row.message) for row in OutgoingEmail.objects.all())
+        )
+
+
+class SharedCacheSettingTest(TestCase):
+    """Settings refuse a per-process cache outside DEBUG"""
+
+    def _load_settings(self, **env):
+        import os
+        import subprocess
+        import sys
+
+        from django.conf import settings
+
+        return subprocess.run(
+            [sys.executable, "-c", "import config.settings"],
+            cwd=settings.BASE_DIR,
+            env={**os.environ, **env},
+            capture_output=True,
+            text=True,
+        )
+
+    def test_local_memory_cache_fails_without_debug(self):
+        result = self._load_settings(
+            DEBUG="False", CACHE_BACKEND="django.core.cache.backends.locmem.LocMemCache"
+        )
+
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn("ImproperlyConfigured", result.stderr)
+
+    def test_shared_cache_loads_without_debug(self):
+        result = self._load_settings(
+            DEBUG="False", CACHE_BACKEND="django.core.cache.backends.redis.RedisCache"
+        )
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+
+class LoginThrottleTest(TestCase):
+    """Cache-counted login failures, lockout and batched bookkeeping writes"""
+
+    def setUp(self):
+        from django.core.cache import cache
+        from rest_framework.test import APIClient
+
+        from apps.authentication.services.login_throttle import login_throttle
+
+        cache.clear()
+        self.throttle = login_throttle
+        self.addCleanup(login_throttle.reset)
+        override = self.settings(
+            LOGIN_MAX_FAILED_ATTEMPTS=3, LOGIN_BOOKKEEPING_FLUSH_INTERVAL=3600
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email="login@test.com",
+            password="rightpass123",
+            name="Login User",
+            role="customer",
+        )
+
+    def _login(self, password):
+        return self.client.post(
+            "/api/auth/login/",
+            {"email": "login@test.com", "password": password},
+            format="json",
+        )
+
+    def test_failures_lock_account_with_one_write(self):
+        self._login("wrong")
+        self._login("wrong")
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.failed_login_attempts, 0)
+        self.assertEqual(self.throttle.stats()["pending_failure_counts"], 1)
+
+        self._login("wrong")
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.account_locked)
+        self.assertEqual(self.user.failed_login_attempts, 3)
+
+        response = self._login("rightpass123")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("locked", str(response.data))
+
+    def test_expired_lock_is_lifted_on_login(self):
+        from datetime import timedelta
+
+        User.objects.filter(pk=self.user.pk).update(
+            account_locked=True,
+            account_locked_until=timezone.now() - timedelta(minutes=1),
+            failed_login_attempts=5,
+        )
+
+        response = self._login("rightpass123")
+
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.account_locked)
+        self.assertEqual(self.user.failed_login_attempts, 0)
+
+    def test_last_login_is_buffered_until_flush(self):
+        response = self._login("rightpass123")
+
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertIsNone(self.user.last_login)
+
+        self.assertEqual(self.throttle.flush(), 1)
+        self.user.refresh_from_db()
+        self.assertIsNotNone(self.user.last_login)
@@ -39,6 +39,8 @@ from .serializers import (
     UserRegistrationSerializer,
     VerifyOTPSerializer,
 )
+from .services.login_throttle import login_throttle
+from .services.otp_service import otp_service
 
 # Get models from Django's app registry to avoid import issues
 DocumentType = apps.get_model("authentication", "DocumentType")
@@ -49,6 +51,9 @@ import json
 logger = logging.getLogger(__name__)
 
 
+OTP_RATE_LIMITED_MESSAGE = "Too many verification requests. Please try again later."
+
+
 # Health Check Endpoint
 @api_view(["GET"])
 @permission_classes([AllowAny])
@@ -337,8 +342,8 @@ def user_login(request):
         user = serializer.validated_data["user"]
         logger.info(f"Login successful for user: {user.email}")
 
-        # Reset failed login attempts on successful login
-        user.reset_failed_login_attempts()
+        # Clear failed login attempts (written only if any were recorded)
+        login_throttle.record_success(user)
 
         # Generate JWT tokens using the service
         from .services.jwt_service import JWTTokenService
@@ -375,12 +380,12 @@ def user_login(request):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-    # Increment failed login attempts for invalid credentials
-    try:
-        user = User.objects.get(email=request.data.get("email"))
-        user.increment_failed_login()
-    except User.DoesNotExist:
-        pass
+    # Count the failed attempt (cache only until it locks the account)
+    email = request.data.get("email")
+    if email:
+        login_throttle.record_failure(
+            str(email), getattr(serializer, "login_user", None)
+        )
 
     return Response(errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -427,8 +432,10 @@ def token_refresh(request):
         # Use JWT service to validate token and get user
         from .services.jwt_service import JWTTokenService
 
-        # Validate refresh token and get user
-        is_valid, user, error = JWTTokenService.validate_token(refresh_token, "refresh")
+        # Validate refresh token and get user (no usage record: it is rotated next)
+        is_valid, user, error = JWTTokenService.validate_token(
+            refresh_token, "refresh", record_use=False
+        )
         if not is_valid:
             logger.error(f"Token validation failed: {error}")
             return Response(
@@ -495,6 +502,11 @@ def request_password_reset(request):
     serializer = PasswordResetRequestSerializer(data=request.data)
     if serializer.is_valid():
         email = serializer.validated_data["email"]
+        if otp_service.is_rate_limited(request, "send", email):
+            return Response(
+                {"error": OTP_RATE_LIMITED_MESSAGE},
+                status=status.HTTP_429_TOO_MANY_REQUESTS,
+            )
         try:
             user = User.objects.get(email=email)
 
@@ -558,6 +570,12 @@ def confirm_password_reset(request):
             status=status.HTTP_400_BAD_REQUEST,
         )
 
+    if otp_service.is_rate_limited(request, "verify", email):
+        return Response(
+            {"error": OTP_RATE_LIMITED_MESSAGE},
+            status=status.HTTP_429_TOO_MANY_REQUESTS,
+        )
+
     try:
         # Verify OTP
         from .services.email_service import EmailService
@@ -1032,6 +1050,14 @@ def send_otp(request):
         print(f"OTP request data: {request.data}")
         serializer = SendOTPSerializer(data=request.data)
         if serializer.is_valid():
+            # Before any user row, code or email is created
+            if otp_service.is_rate_limited(
+                request, "send", serializer.validated_data["email"]
+            ):
+                return Response(
+                    {"message": OTP_RATE_LIMITED_MESSAGE, "success": False},
+                    status=status.HTTP_429_TOO_MANY_REQUESTS,
+                )
             print("OTP serializer is valid, sending OTP...")
             result = serializer.send_otp()
             print(f"OTP send result: {result}")
@@ -1072,6 +1098,13 @@ def verify_otp(request):
     serializer = VerifyOTPSerializer(data=request.data)
     if serializer.is_valid():
         print(f"✅ Serializer validation passed")  # Debug log
+        if otp_service.is_rate_limited(
+            request, "verify", serializer.validated_data["email"]
+        ):
+            return Response(
+                {"message": OTP_RATE_LIMITED_MESSAGE, "success": False},
+                status=status.HTTP_429_TOO_MANY_REQUESTS,
+            )
         result = serializer.verify_otp()
         print(f"🔍 OTP verification result: {result}")  # Debug log
         if result["success"]:
@@ -7,7 +7,8 @@ from .models import (
     CommunicationCategory,
     CommunicationTag,
     CommunicationCategoryRelation,
-    CommunicationTagRelation
+    CommunicationTagRelation,
+    OutgoingEmail
 )
 
 @admin.register(Communication)
@@ -64,4 +65,12 @@ class CommunicationTagRelationAdmin(admin.ModelAdmin):
     list_display = ('communication', 'tag', 'added_by', 'added_at')
     list_filter = ('tag', 'added_at')
     search_fields = ('communication__reference_number', 'tag__name', 'added_by__email')
-    date_hierarchy = 'added_at'
\ No newline at end of file
+    date_hierarchy = 'added_at'
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'category', 'status', 'attempts', 'next_attempt_at', 'sent_at', 'created_at')
+    list_filter = ('status', 'category')
+    search_fields = ('subject', 'recipients', 'last_error')
+    date_hierarchy = 'created_at'
+    readonly_fields = ('created_at', 'claimed_at', 'sent_at')
@@ -3,4 +3,10 @@ from django.apps import AppConfig
 
 class CommunicationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'apps.communications'
\ No newline at end of file
+    name = 'apps.communications'
+
+    def ready(self):
+        from utils.email_renderer import PRELOAD_TEMPLATES, email_renderer
+
+        # Encode the logo and compile the busiest templates before the first send
+        email_renderer.warm(PRELOAD_TEMPLATES)
@@ -0,0 +1,67 @@
+"""
+Management command to store sentiment labels on communications.
+Use after deploying the sentiment fields to backfill history, or with
+--relabel after changing the classification rules or prompt.
+"""
+from django.core.management.base import BaseCommand
+
+from apps.communications.models import Communication
+from apps.communications.services.sentiment_pipeline import sentiment_pipeline
+
+
+class Command(BaseCommand):
+    help = 'Label communication sentiment in batches (AI when configured, rules otherwise)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Communications per AI prompt (default: SENTIMENT_BATCH_SIZE)',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=None,
+            help='Stop after labelling this many communications',
+        )
+        parser.add_argument(
+            '--rule-based',
+            action='store_true',
+            help='Use keyword / rating rules even when AI is configured',
+        )
+        parser.add_argument(
+            '--relabel',
+            action='store_true',
+            help='Clear existing labels first so every communication is classified again',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show how many communications would be labelled without writing anything',
+        )
+
+    def handle(self, *args, **options):
+        pending = Communication.objects.filter(sentiment__isnull=True)
+        if options['dry_run']:
+            total = Communication.objects.count() if options['relabel'] else pending.count()
+            self.stdout.write(
+                self.style.WARNING(f'[DRY RUN] Would label {total} communications')
+            )
+            return
+
+        if options['relabel']:
+            cleared = Communication.objects.filter(sentiment__isnull=False).update(
+                sentiment=None,
+                sentiment_score=None,
+                sentiment_method='',
+                sentiment_analyzed_at=None,
+            )
+            self.stdout.write(f'Cleared {cleared} existing labels')
+
+        labelled = sentiment_pipeline.label_pending(
+            batch_size=options['batch_size'],
+            limit=options['limit'],
+            use_ai=False if options['rule_based'] else None,
+        )
+        self.stdout.write(self.style.SUCCESS(f'Labelled {labelled} communications'))
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.5 on 2025-10-26 16:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communications', '0004_add_admin_response_to_contact'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='communication',
+            name='sentiment',
+            field=models.CharField(blank=True, choices=[('positive', 'Positive'), ('negative', 'Negative'), ('neutral', 'Neutral')], max_length=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='communication',
+            name='sentiment_analyzed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='communication',
+            name='sentiment_method',
+            field=models.CharField(blank=True, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='communication',
+            name='sentiment_score',
+            field=models.FloatField(blank=True, help_text='-1 (negative) to 1 (positive)', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='communication',
+            index=models.Index(fields=['sentiment', 'created_at'], name='communicati_sentime_1607c1_idx'),
+        ),
+    ]
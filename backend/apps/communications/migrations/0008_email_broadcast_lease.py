@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 10:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communications', '0007_email_broadcast'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emailbroadcast',
+            name='lease',
+            field=models.CharField(blank=True, max_length=32),
+        ),
+    ]
@@ -97,6 +97,12 @@ class Communication(models.Model):
         ("urgent", "Urgent"),
     ]
 
+    SENTIMENT_CHOICES = [
+        ("positive", "Positive"),
+        ("negative", "Negative"),
+        ("neutral", "Neutral"),
+    ]
+
     user = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="communications"
     )
@@ -125,6 +131,16 @@ class Communication(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     resolved_at = models.DateTimeField(null=True, blank=True)
+    # Set once by the sentiment pipeline (services/sentiment_pipeline.py);
+    # NULL until the background labeller reaches the row
+    sentiment = models.CharField(
+        max_length=10, choices=SENTIMENT_CHOICES, null=True, blank=True
+    )
+    sentiment_score = models.FloatField(
+        null=True, blank=True, help_text="-1 (negative) to 1 (positive)"
+    )
+    sentiment_method = models.CharField(max_length=20, blank=True)
+    sentiment_analyzed_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         ordering = ["-created_at"]
@@ -133,6 +149,7 @@ class Communication(models.Model):
             models.Index(fields=["user", "created_at"]),
             models.Index(fields=["reference_number"]),
             models.Index(fields=["priority", "status"]),
+            models.Index(fields=["sentiment", "created_at"]),
         ]
 
     def __str__(self):
@@ -387,3 +404,89 @@ class CommunicationTagRelation(models.Model):
 
     def __str__(self):
         return f"{self.communication.reference_number} - {self.tag.name}"
+
+
+class OutgoingEmail(models.Model):
+    """Email waiting in (or sent from) the outbox; see services.email_outbox"""
+
+    STATUS_CHOICES = [
+        ("queued", "Queued"),
+        ("sending", "Sending"),
+        ("sent", "Sent"),
+        ("failed", "Failed"),
+    ]
+
+    # Free-form source tag (otp, approval, invoice, ...) for filtering and metrics
+    category = models.CharField(max_length=50, blank=True)
+    # Lower is sent first; OTP codes jump ahead of notifications
+    priority = models.PositiveSmallIntegerField(default=5)
+    subject = models.TextField()
+    recipients = models.JSONField(default=list)
+    # Serialised EmailMessage: body, sender, headers, alternatives, attachments
+    message = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="queued")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "email_outbox"
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"]),
+            models.Index(fields=["status", "created_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.category or 'email'} to {', '.join(self.recipients)} - {self.status}"
+
+
+class EmailBroadcast(models.Model):
+    """Email to many users sent in the background; see services.broadcast_service"""
+
+    STATUS_CHOICES = [
+        ("queued", "Queued"),
+        ("running", "Running"),
+        ("completed", "Completed"),
+        ("failed", "Failed"),
+        ("cancelled", "Cancelled"),
+    ]
+
+    created_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, related_name="email_broadcasts"
+    )
+    subject = models.CharField(max_length=255)
+    message = models.TextField()
+    html_message = models.TextField(blank=True)
+    # Empty: every active user; otherwise these user ids (if active)
+    user_ids = models.JSONField(default=list, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="queued")
+    total_recipients = models.PositiveIntegerField(default=0)
+    sent_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+    # Last user id processed; a resumed broadcast continues after it
+    last_user_id = models.PositiveIntegerField(default=0)
+    # Token of the worker sending it; resume_stalled hands it a new one
+    lease = models.CharField(max_length=32, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "email_broadcasts"
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["status", "heartbeat_at"]),
+        ]
+
+    def __str__(self):
+        return f"Broadcast {self.pk}: {self.subject} - {self.status}"
+
+    @property
+    def is_finished(self):
+        return self.status in ("completed", "failed", "cancelled")
@@ -5,18 +5,12 @@ Uses Google Gemini AI for advanced sentiment analysis
 
 import json
 import logging
-from datetime import datetime, timedelta
 from typing import Dict, List, Any
-from django.utils import timezone
-from django.db.models import Count, Q
+from django.db.models import Count
 from django.conf import settings
+from utils.llm_gateway import llm_gateway
 
-try:
-    import google.generativeai as genai
-    GEMINI_AVAILABLE = True
-except ImportError:
-    GEMINI_AVAILABLE = False
-    logging.warning("Google Gemini AI not available. Using fallback sentiment analysis.")
+from .sentiment_pipeline import sentiment_pipeline
 
 logger = logging.getLogger(__name__)
 
@@ -28,21 +22,19 @@ class AISentimentService:
         self.ai_enabled = False
         self.model = None
         
-        if GEMINI_AVAILABLE:
-            try:
-                api_key = getattr(settings, 'GOOGLE_AI_API_KEY', None)
-                if api_key:
-                    genai.configure(api_key=api_key)
-                    self.model = genai.GenerativeModel('gemini-2.0-flash')
-                    self.ai_enabled = True
-                    logger.info("AI Sentiment Service initialized successfully")
-                else:
-                    logger.warning("GOOGLE_AI_API_KEY not configured - AI features disabled")
-            except Exception as e:
-                logger.warning(f"Failed to initialize Gemini AI: {e}")
-                self.ai_enabled = False
-        else:
-            logger.warning("Google Gemini AI not available - using fallback analysis")
+        # The gateway imports google.generativeai itself; a missing package
+        # fails get_model and leaves the fallback analysis in place
+        try:
+            api_key = getattr(settings, 'GOOGLE_AI_API_KEY', None)
+            if api_key:
+                self.model = llm_gateway.get_model('gemini-2.0-flash')
+                self.ai_enabled = True
+                logger.info("AI Sentiment Service initialized successfully")
+            else:
+                logger.warning("GOOGLE_AI_API_KEY not configured - AI features disabled")
+        except Exception as e:
+            logger.warning(f"Failed to initialize Gemini AI: {e}")
+            self.ai_enabled = False
     
     def analyze_communications_sentiment(self, queryset) -> Dict[str, Any]:
         """Analyze sentiment of communications using AI"""
@@ -67,11 +59,13 @@ class AISentimentService:
             # Analyze with AI
             ai_results = self._analyze_with_ai(texts_to_analyze)
             
-            # Combine with basic metrics
+            # Combine with basic metrics and the stored per-message labels
             basic_metrics = self._get_basic_sentiment_metrics(queryset)
+            label_counts = self._label_counts(queryset)
             
             return {
                 **basic_metrics,
+                **label_counts,
                 'ai_analysis': ai_results,
                 'confidence_score': ai_results.get('confidence', 0.8),
                 'analysis_method': 'ai_powered'
@@ -110,12 +104,11 @@ class AISentimentService:
             }}
             """
             
-            response = self.model.generate_content(prompt)
+            response_text = llm_gateway.generate(self.model, prompt)
             
             # Parse AI response
             try:
                 # Extract JSON from response
-                response_text = response.text
                 if "```json" in response_text:
                     json_start = response_text.find("```json") + 7
                     json_end = response_text.find("```", json_start)
@@ -153,43 +146,31 @@ class AISentimentService:
             }
     
     def _fallback_sentiment_analysis(self, queryset) -> Dict[str, Any]:
-        """Fallback sentiment analysis using basic rules"""
-        total = queryset.count()
+        """Sentiment totals from stored labels (rules for unlabelled rows)"""
+        counts = self._label_counts(queryset)
         
-        if total == 0:
+        if counts["total"] == 0:
             return self._get_empty_sentiment_data()
         
-        # Basic sentiment based on ratings and keywords
-        positive_count = queryset.filter(
-            Q(rating__gte=4) |
-            Q(message__icontains="thank") |
-            Q(message__icontains="great") |
-            Q(message__icontains="excellent") |
-            Q(message__icontains="love") |
-            Q(message__icontains="amazing")
-        ).distinct().count()
-        
-        negative_count = queryset.filter(
-            Q(rating__lte=2) |
-            Q(communication_type="complaint") |
-            Q(message__icontains="terrible") |
-            Q(message__icontains="awful") |
-            Q(message__icontains="disappointed") |
-            Q(message__icontains="angry") |
-            Q(message__icontains="frustrated")
-        ).distinct().count()
-        
-        neutral_count = max(0, total - positive_count - negative_count)
+        return {
+            **counts,
+            "analysis_method": "rule_based"
+        }
+    
+    def _label_counts(self, queryset) -> Dict[str, Any]:
+        """Positive / negative / neutral counts and percentages in one query"""
+        counts = sentiment_pipeline.sentiment_counts(queryset)
+        total = counts["total"]
         
         return {
-            "positive": positive_count,
-            "negative": negative_count,
-            "neutral": neutral_count,
+            "positive": counts["positive"],
+            "negative": counts["negative"],
+            "neutral": counts["neutral"],
             "total": total,
-            "positive_percentage": round((positive_count / total) * 100, 1) if total > 0 else 0,
-            "negative_percentage": round((negative_count / total) * 100, 1) if total > 0 else 0,
-            "neutral_percentage": round((neutral_count / total) * 100, 1) if total > 0 else 0,
-            "analysis_method": "rule_based"
+            "positive_percentage": round((counts["positive"] / total) * 100, 1) if total > 0 else 0,
+            "negative_percentage": round((counts["negative"] / total) * 100, 1) if total > 0 else 0,
+            "neutral_percentage": round((counts["neutral"] / total) * 100, 1) if total > 0 else 0,
+            "unlabelled": counts["unlabelled"],
         }
     
     def _get_basic_sentiment_metrics(self, queryset) -> Dict[str, Any]:
@@ -268,10 +249,9 @@ class AISentimentService:
             ]
             """
             
-            response = self.model.generate_content(prompt)
+            response_text = llm_gateway.generate(self.model, prompt)
             
             # Parse response
-            response_text = response.text
             if "[" in response_text and "]" in response_text:
                 json_start = response_text.find("[")
                 json_end = response_text.rfind("]") + 1
@@ -315,26 +295,9 @@ class AISentimentService:
         return topics[:5]
     
     def get_sentiment_trends(self, queryset, days: int) -> List[Dict[str, Any]]:
-        """Get sentiment trends over time"""
+        """Get daily sentiment trends (chronological) from the stored labels"""
         try:
-            # Group by date and calculate daily sentiment
-            trends = []
-            
-            for i in range(days):
-                date = timezone.now().date() - timedelta(days=i)
-                day_queryset = queryset.filter(created_at__date=date)
-                
-                if day_queryset.exists():
-                    day_sentiment = self.analyze_communications_sentiment(day_queryset)
-                    trends.append({
-                        "date": date.isoformat(),
-                        "total": day_sentiment.get("total", 0),
-                        "positive": day_sentiment.get("positive", 0),
-                        "negative": day_sentiment.get("negative", 0),
-                        "neutral": day_sentiment.get("neutral", 0)
-                    })
-            
-            return list(reversed(trends))  # Return in chronological order
+            return sentiment_pipeline.trends(queryset, days)
             
         except Exception as e:
             logger.error(f"Sentiment trends failed: {e}")
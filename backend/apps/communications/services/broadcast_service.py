@@ -0,0 +1,306 @@
+"""
+Email Broadcast Sender
+
+``CommunicationViewSet.send_email`` with ``send_to_all`` / ``user_ids`` only
+records an ``EmailBroadcast`` and answers ``202``; a background worker does
+the sending:
+
+- recipients are read in pages of ``EMAIL_BROADCAST_BATCH_SIZE`` ordered by
+  user id (keyset pagination, so memory stays flat for any audience size)
+- each page is sent over one SMTP connection that stays open for the whole
+  broadcast (reopened after a failed message), one ``send_messages`` call per
+  recipient so failures are counted individually
+- the ``Communication`` rows for a page are written with one ``bulk_create``
+- progress (sent / failed counts and the last user id) is saved after every
+  page, with ``EMAIL_BROADCAST_BATCH_PAUSE`` seconds between pages to stay
+  under the mail provider's rate limits
+
+The worker that starts a broadcast owns it through a lease token and renews
+its heartbeat between messages (at most every
+``EMAIL_BROADCAST_HEARTBEAT_SECONDS``). A broadcast whose worker stopped
+(process restart) stops heartbeating; ``resume_stalled`` (scheduler job) hands
+it to a new lease and resumes it after its last user id. A worker that finds
+its lease taken stops before sending another message. Reference numbers are
+derived from the broadcast and user ids: users the previous worker already
+recorded are skipped, and no user is recorded twice.
+"""
+
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import connections, transaction
+from django.db.models import F, Q
+from django.urls import reverse
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class BroadcastSender:
+    """Background sender for ``EmailBroadcast`` jobs"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    # Starting ----------------------------------------------------------------
+
+    def start(self, admin, subject: str, message: str, html_message: str = '', user_ids=None):
+        """Record a broadcast and schedule it; returns the ``EmailBroadcast``"""
+        from apps.communications.models import EmailBroadcast
+
+        broadcast = EmailBroadcast(
+            created_by=admin,
+            subject=subject,
+            message=message,
+            html_message=html_message or '',
+            user_ids=[int(user_id) for user_id in user_ids or []],
+        )
+        broadcast.total_recipients = self.recipients(broadcast).count()
+        broadcast.save()
+        self._schedule(broadcast.pk)
+        return broadcast
+
+    def recipients(self, broadcast):
+        """Active users (with an email address) the broadcast goes to"""
+        users = get_user_model().objects.filter(is_active=True).exclude(email='')
+        if broadcast.user_ids:
+            users = users.filter(pk__in=broadcast.user_ids)
+        return users
+
+    def cancel(self, broadcast_id) -> bool:
+        """Stop a queued or running broadcast after its current page"""
+        from apps.communications.models import EmailBroadcast
+
+        return bool(
+            EmailBroadcast.objects.filter(pk=broadcast_id, status__in=('queued', 'running')).update(
+                status='cancelled', finished_at=timezone.now()
+            )
+        )
+
+    def _schedule(self, broadcast_id, resume: bool = False, lease: Optional[str] = None) -> None:
+        workers = getattr(settings, 'EMAIL_BROADCAST_WORKERS', 1)
+        if workers <= 0:
+            self.run(broadcast_id, resume=resume, close_connections=False, lease=lease)
+            return
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=workers, thread_name_prefix='email-broadcast'
+                    )
+        # The worker must see the committed broadcast row
+        transaction.on_commit(lambda: self._executor.submit(self.run, broadcast_id, resume, True, lease))
+
+    # Sending -----------------------------------------------------------------
+
+    def run(
+        self,
+        broadcast_id,
+        resume: bool = False,
+        close_connections: bool = True,
+        lease: Optional[str] = None,
+    ) -> None:
+        """
+        Send a queued broadcast, or with ``resume`` a stalled one from its
+        last user id, to the end. ``lease`` is the token ``resume_stalled``
+        claimed the broadcast with; a new one is taken otherwise.
+        """
+        from apps.communications.models import EmailBroadcast
+
+        lease = lease or uuid.uuid4().hex
+        broadcasts = EmailBroadcast.objects.filter(pk=broadcast_id)
+        # Only the lease holder may move the broadcast on
+        owned = broadcasts.filter(status='running', lease=lease)
+        try:
+            now = timezone.now()
+            started = broadcasts.filter(status='queued').update(
+                status='running', started_at=now, heartbeat_at=now, lease=lease
+            )
+            # Without resume, someone else already started (or finished) it;
+            # with it, another worker may have claimed it since
+            broadcast = owned.first() if started or resume else None
+            if broadcast is None:
+                return
+
+            connection = get_connection()
+            try:
+                connection.open()
+            except Exception as e:
+                logger.error(f'Broadcast {broadcast_id} could not connect to the mail server: {e}')
+                owned.update(status='failed', last_error=str(e)[:2000], finished_at=timezone.now())
+                return
+
+            batch_size = getattr(settings, 'EMAIL_BROADCAST_BATCH_SIZE', 100)
+            pause = getattr(settings, 'EMAIL_BROADCAST_BATCH_PAUSE', 1.0)
+            recipients = self.recipients(broadcast).order_by('pk').values_list('pk', 'email')
+            cursor = broadcast.last_user_id
+            try:
+                while True:
+                    page = list(recipients.filter(pk__gt=cursor)[:batch_size])
+                    if not page:
+                        break
+                    if not self._send_page(broadcast, page, connection, owned):
+                        logger.info(f'Broadcast {broadcast_id} cancelled or taken over')
+                        return
+                    cursor = page[-1][0]
+                    if len(page) < batch_size:
+                        break
+                    time.sleep(pause)
+            finally:
+                try:
+                    connection.close()
+                except Exception:
+                    pass
+
+            if owned.update(status='completed', finished_at=timezone.now()):
+                logger.info(f'Broadcast {broadcast_id} completed')
+        except Exception as e:
+            logger.error(f'Broadcast {broadcast_id} failed: {e}', exc_info=True)
+            owned.update(status='failed', last_error=str(e)[:2000], finished_at=timezone.now())
+        finally:
+            if close_connections:
+                connections.close_all()
+
+    def _send_page(self, broadcast, page: List[Tuple[int, str]], connection, owned) -> bool:
+        """
+        Send one page of recipients; False when the broadcast was cancelled or
+        another worker took it over (``owned`` no longer matches it)
+        """
+        from apps.communications.models import Communication
+
+        heartbeat = getattr(settings, 'EMAIL_BROADCAST_HEARTBEAT_SECONDS', 30)
+        # Users a previous worker reached before it lost the broadcast
+        recorded = set(
+            Communication.objects.filter(
+                reference_number__in=[self._reference(broadcast, user_id) for user_id, _ in page]
+            ).values_list('user_id', flat=True)
+        )
+        sent_user_ids = []
+        failed = 0
+        last_error = None
+        renewed = time.monotonic()
+        for user_id, email in page:
+            if user_id in recorded:
+                continue
+            # Renew the lease between messages, so a live worker never looks
+            # stalled and one whose lease was taken stops before sending again
+            if time.monotonic() - renewed >= heartbeat:
+                if not owned.update(heartbeat_at=timezone.now()):
+                    self._save_page(broadcast, owned, sent_user_ids, failed, last_error, user_id)
+                    return False
+                renewed = time.monotonic()
+            message = EmailMultiAlternatives(
+                subject=broadcast.subject,
+                body=broadcast.message,
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                to=[email],
+                connection=connection,
+            )
+            if broadcast.html_message:
+                message.attach_alternative(broadcast.html_message, 'text/html')
+            try:
+                if not connection.send_messages([message]):
+                    raise RuntimeError('Email backend accepted no messages')
+                sent_user_ids.append(user_id)
+            except Exception as e:
+                failed += 1
+                last_error = f'{email}: {e}'
+                try:
+                    connection.close()
+                    connection.open()
+                except Exception as reconnect_error:
+                    logger.warning(f'Broadcast reconnect failed: {reconnect_error}')
+
+        return self._save_page(broadcast, owned, sent_user_ids, failed, last_error, page[-1][0])
+
+    def _save_page(self, broadcast, owned, sent_user_ids, failed, last_error, last_user_id) -> bool:
+        """Record a page's sends; False when the broadcast is no longer ours"""
+        from apps.communications.models import Communication, EmailBroadcast
+
+        Communication.objects.bulk_create(
+            [
+                Communication(
+                    user_id=user_id,
+                    subject=broadcast.subject,
+                    message=broadcast.message,
+                    communication_type='email',
+                    reference_number=self._reference(broadcast, user_id),
+                    assigned_to_id=broadcast.created_by_id,
+                )
+                for user_id in sent_user_ids
+            ],
+            ignore_conflicts=True,
+        )
+
+        counts = {
+            'sent_count': F('sent_count') + len(sent_user_ids),
+            'failed_count': F('failed_count') + failed,
+        }
+        if last_error:
+            counts['last_error'] = last_error[:2000]
+        if owned.update(**counts, last_user_id=last_user_id, heartbeat_at=timezone.now()):
+            return True
+        # Cancelled or taken over: keep the counts, leave the cursor to the new owner
+        EmailBroadcast.objects.filter(pk=broadcast.pk).update(**counts)
+        return False
+
+    @staticmethod
+    def _reference(broadcast, user_id) -> str:
+        return f'COM-B{broadcast.pk}-{user_id}'
+
+    # Maintenance -------------------------------------------------------------
+
+    def resume_stalled(self) -> int:
+        """Reschedule broadcasts whose worker stopped heartbeating"""
+        from apps.communications.models import EmailBroadcast
+
+        now = timezone.now()
+        stale = now - timedelta(seconds=getattr(settings, 'EMAIL_BROADCAST_STALE_SECONDS', 300))
+        stalled = EmailBroadcast.objects.filter(
+            Q(status='running', heartbeat_at__lt=stale) | Q(status='queued', created_at__lt=stale)
+        )
+        resumed = 0
+        for broadcast_id in stalled.values_list('pk', flat=True):
+            # Claim it under a new lease so only one process resumes it, and
+            # the stalled worker stops if it wakes up again
+            lease = uuid.uuid4().hex
+            claimed = EmailBroadcast.objects.filter(
+                pk=broadcast_id, status__in=('queued', 'running')
+            ).exclude(heartbeat_at__gte=stale).update(heartbeat_at=now, lease=lease)
+            if claimed:
+                logger.info(f'Resuming broadcast {broadcast_id}')
+                self._schedule(broadcast_id, resume=True, lease=lease)
+                resumed += 1
+        return resumed
+
+
+# Singleton instance
+broadcast_sender = BroadcastSender()
+
+
+def serialize_broadcast(broadcast) -> Dict:
+    processed = broadcast.sent_count + broadcast.failed_count
+    total = broadcast.total_recipients
+    return {
+        'broadcast_id': broadcast.pk,
+        'subject': broadcast.subject,
+        'status': broadcast.status,
+        'status_url': reverse('communication-broadcast-status', kwargs={'broadcast_id': broadcast.pk}),
+        'total_recipients': total,
+        'sent': broadcast.sent_count,
+        'failed': broadcast.failed_count,
+        'progress': round(min(processed / total, 1) * 100, 1) if total else (100.0 if broadcast.is_finished else 0.0),
+        'last_error': broadcast.last_error or None,
+        'created_at': broadcast.created_at.isoformat() if broadcast.created_at else None,
+        'started_at': broadcast.started_at.isoformat() if broadcast.started_at else None,
+        'finished_at': broadcast.finished_at.isoformat() if broadcast.finished_at else None,
+    }
@@ -1,15 +1,15 @@
 """
 Communication Email Service
 Handles email notifications for communication responses and updates
+(queued in the email outbox, sent in the background)
 """
 
-import base64
-import os
-
 from django.conf import settings
 from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
+
+from utils.email_renderer import email_renderer
+
+from .email_outbox import email_outbox
 
 
 class CommunicationEmailService:
@@ -17,20 +17,8 @@ class CommunicationEmailService:
 
     @staticmethod
     def get_logo_base64():
-        """Get the logo as base64 encoded string with fallback handling"""
-        try:
-            logo_path = os.path.join(
-                settings.BASE_DIR, "templates", "emails", "logo.svg"
-            )
-            if os.path.exists(logo_path):
-                with open(logo_path, "rb") as logo_file:
-                    logo_data = logo_file.read()
-                    if logo_data:
-                        return base64.b64encode(logo_data).decode("utf-8")
-            return None
-        except Exception as e:
-            print(f"Failed to load logo: {e}, using emoji fallback")
-            return None
+        """Get the logo as base64 encoded string (loaded once; None if missing)"""
+        return email_renderer.logo_base64
 
     @staticmethod
     def send_response_notification(communication, response, responder):
@@ -46,8 +34,6 @@ class CommunicationEmailService:
             bool: True if email sent successfully, False otherwise
         """
         try:
-            logo_base64 = CommunicationEmailService.get_logo_base64()
-
             context = {
                 "user_name": communication.user.name,
                 "communication_type": communication.communication_type.title(),
@@ -58,15 +44,13 @@ class CommunicationEmailService:
                 "responder_name": responder.name,
                 "responder_role": responder.role.title(),
                 "response_date": response.created_at.strftime("%B %d, %Y at %I:%M %p"),
-                "logo_base64": logo_base64,
                 "site_name": "ChefSync Kitchen",
             }
 
             # Render HTML and text versions
-            html_content = render_to_string(
+            html_content, text_content = email_renderer.render(
                 "emails/communication_response.html", context
             )
-            text_content = strip_tags(html_content)
 
             # Create email
             subject = f"Response to your {communication.communication_type.title()}: {communication.reference_number}"
@@ -78,8 +62,8 @@ class CommunicationEmailService:
             )
             email.attach_alternative(html_content, "text/html")
 
-            # Send email
-            email.send()
+            # Queue email
+            email_outbox.enqueue(email, category="communication_response")
 
             return True
 
@@ -99,8 +83,6 @@ class CommunicationEmailService:
             bool: True if email sent successfully, False otherwise
         """
         try:
-            logo_base64 = CommunicationEmailService.get_logo_base64()
-
             context = {
                 "communication_type": communication.communication_type.title(),
                 "reference_number": communication.reference_number,
@@ -113,16 +95,14 @@ class CommunicationEmailService:
                 "submitted_date": communication.created_at.strftime(
                     "%B %d, %Y at %I:%M %p"
                 ),
-                "logo_base64": logo_base64,
                 "site_name": "ChefSync Kitchen",
                 "admin_panel_url": f"{settings.FRONTEND_URL}/admin/communications",
             }
 
             # Render HTML and text versions
-            html_content = render_to_string(
+            html_content, text_content = email_renderer.render(
                 "emails/new_communication_admin.html", context
             )
-            text_content = strip_tags(html_content)
 
             # Create email - send to admin email
             subject = f"New {communication.communication_type.title()} Received: {communication.reference_number}"
@@ -134,8 +114,8 @@ class CommunicationEmailService:
             )
             email.attach_alternative(html_content, "text/html")
 
-            # Send email
-            email.send()
+            # Queue email
+            email_outbox.enqueue(email, category="communication_received")
 
             return True
 
@@ -149,8 +129,6 @@ class CommunicationEmailService:
         from django.utils import timezone
         
         try:
-            logo_base64 = CommunicationEmailService.get_logo_base64()
-            
             # Get status-specific content
             from .communication_notification_service import CommunicationNotificationService
             notification_service = CommunicationNotificationService()
@@ -171,14 +149,14 @@ class CommunicationEmailService:
                 "admin_role": admin_user.role.title(),
                 "notes": notes,
                 "update_date": timezone.now().strftime("%B %d, %Y at %I:%M %p"),
-                "logo_base64": logo_base64,
                 "site_name": "ChefSync Kitchen",
                 "communication_url": f"{settings.FRONTEND_URL}/communications/{communication.id}",
             }
             
             # Render HTML and text versions
-            html_content = render_to_string("emails/communication_status_update.html", context)
-            text_content = strip_tags(html_content)
+            html_content, text_content = email_renderer.render(
+                "emails/communication_status_update.html", context
+            )
             
             # Create email
             subject = f"Update on your {communication.communication_type.title()}: {communication.reference_number}"
@@ -190,8 +168,8 @@ class CommunicationEmailService:
             )
             email.attach_alternative(html_content, "text/html")
             
-            # Send email
-            email.send()
+            # Queue email
+            email_outbox.enqueue(email, category="communication_status")
             return True
             
         except Exception as e:
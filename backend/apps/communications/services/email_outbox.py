@@ -0,0 +1,336 @@
+"""
+Email Outbox
+
+Request handlers build their ``EmailMessage`` as before but hand it to
+``email_outbox.enqueue`` instead of calling ``send()``: the message is stored
+as an ``OutgoingEmail`` row and the request returns without talking to the
+mail server.
+
+A sender thread (woken when the enqueuing transaction commits, plus the
+``send_email_outbox`` scheduler job as a safety net) claims due messages in
+batches of ``EMAIL_OUTBOX_BATCH_SIZE`` and sends each batch over one SMTP
+connection (``get_connection()`` opened once, ``send_messages`` per message so
+every message gets its own status). A failed message is retried with
+exponential backoff (``EMAIL_OUTBOX_RETRY_BASE_SECONDS`` doubling up to
+``EMAIL_OUTBOX_RETRY_MAX_SECONDS``) and marked ``failed`` after
+``EMAIL_OUTBOX_MAX_ATTEMPTS``.
+
+Claims use ``SELECT ... FOR UPDATE SKIP LOCKED`` so several processes can
+drain the outbox without sending a message twice; messages left ``sending``
+by a process that died are queued again after ``EMAIL_OUTBOX_CLAIM_TIMEOUT``
+seconds. Sent and failed rows are deleted after ``EMAIL_OUTBOX_RETENTION_DAYS``.
+
+Values that must not be stored (OTP codes) are passed as ``secrets``: the
+bodies carry ``secret_placeholder(name)`` and the values stay in the cache
+until the message is sent, so the row never holds them. A message whose
+secrets expired before it could be sent is marked ``failed`` straight away.
+"""
+
+import base64
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage, EmailMultiAlternatives, get_connection
+from django.db import connections, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Message priorities (lower is sent first)
+PRIORITY_HIGH = 1
+PRIORITY_NORMAL = 5
+PRIORITY_BULK = 9
+
+SECRETS_KEY = 'email_outbox:secrets:{}'
+
+
+class SecretsExpired(Exception):
+    """The cache no longer holds a queued message's secrets"""
+
+
+def secret_placeholder(name: str) -> str:
+    """Marker a message body carries in place of the secret ``name``"""
+    return f'[[secret:{name}]]'
+
+
+def serialize_message(message: EmailMessage) -> Dict:
+    """JSON-safe form of ``message`` (everything but subject and ``to``)"""
+    attachments = []
+    for attachment in message.attachments:
+        if not isinstance(attachment, tuple):
+            raise TypeError('MIME attachments cannot be queued; attach (filename, content, mimetype)')
+        filename, content, mimetype = attachment
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        attachments.append({
+            'filename': filename,
+            'content': base64.b64encode(content).decode('ascii'),
+            'mimetype': mimetype,
+        })
+    return {
+        'body': message.body,
+        'from_email': message.from_email,
+        'cc': list(message.cc),
+        'bcc': list(message.bcc),
+        'reply_to': list(message.reply_to),
+        'headers': dict(message.extra_headers),
+        'content_subtype': message.content_subtype,
+        'alternatives': [list(alternative) for alternative in getattr(message, 'alternatives', [])],
+        'attachments': attachments,
+    }
+
+
+def _fill(content, secrets: Dict[str, str]):
+    if not secrets or not isinstance(content, str):
+        return content
+    for name, value in secrets.items():
+        content = content.replace(secret_placeholder(name), value)
+    return content
+
+
+def build_message(email, connection=None, secrets: Optional[Dict[str, str]] = None) -> EmailMultiAlternatives:
+    """
+    The ``EmailMultiAlternatives`` stored in an ``OutgoingEmail`` row, with
+    ``secrets`` filled into the bodies
+    """
+    data = email.message
+    message = EmailMultiAlternatives(
+        subject=email.subject,
+        body=_fill(data.get('body', ''), secrets),
+        from_email=data.get('from_email'),
+        to=email.recipients,
+        cc=data.get('cc'),
+        bcc=data.get('bcc'),
+        reply_to=data.get('reply_to'),
+        headers=data.get('headers'),
+        connection=connection,
+    )
+    message.content_subtype = data.get('content_subtype', 'plain')
+    for content, mimetype in data.get('alternatives', []):
+        message.attach_alternative(_fill(content, secrets), mimetype)
+    for attachment in data.get('attachments', []):
+        content = base64.b64decode(attachment['content'])
+        message.attach(attachment['filename'], content, attachment['mimetype'])
+    return message
+
+
+class EmailOutbox:
+    """Persistent outbox drained over reused SMTP connections"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._wake_pending = False
+
+    # Enqueueing --------------------------------------------------------------
+
+    def enqueue(
+        self,
+        message: EmailMessage,
+        category: str = '',
+        priority: int = PRIORITY_NORMAL,
+        secrets: Optional[Dict[str, str]] = None,
+        secrets_ttl: Optional[int] = None,
+    ):
+        """
+        Store ``message`` for the sender; returns the ``OutgoingEmail`` row.
+        ``secrets`` are kept in the cache for ``secrets_ttl`` seconds and
+        replace their placeholders only when the message is sent.
+        """
+        from apps.communications.models import OutgoingEmail
+
+        data = serialize_message(message)
+        if secrets:
+            data['secrets'] = sorted(secrets)
+        email = OutgoingEmail.objects.create(
+            category=category,
+            priority=priority,
+            subject=message.subject,
+            recipients=list(message.to),
+            message=data,
+        )
+        if secrets:
+            cache.set(SECRETS_KEY.format(email.pk), dict(secrets), secrets_ttl)
+        if getattr(settings, 'EMAIL_OUTBOX_IMMEDIATE', True):
+            # The sender must see the committed row
+            transaction.on_commit(self.wake)
+        return email
+
+    def wake(self) -> None:
+        """Drain the outbox on the sender thread (at most one drain waiting)"""
+        with self._lock:
+            if self._wake_pending:
+                return
+            self._wake_pending = True
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='email-outbox')
+        self._executor.submit(self._drain_in_worker)
+
+    def _drain_in_worker(self) -> None:
+        with self._lock:
+            self._wake_pending = False
+        try:
+            self.send_pending()
+        except Exception as e:
+            logger.error(f'Email outbox drain failed: {e}')
+        finally:
+            connections.close_all()
+
+    # Sending -----------------------------------------------------------------
+
+    def send_pending(self, limit: Optional[int] = None) -> Dict[str, int]:
+        """
+        Send due messages batch by batch until none are left (or ``limit``
+        messages were attempted); returns ``{'sent', 'retrying', 'failed'}``.
+        """
+        batch_size = getattr(settings, 'EMAIL_OUTBOX_BATCH_SIZE', 50)
+        totals = {'sent': 0, 'retrying': 0, 'failed': 0}
+        attempted = 0
+        with self._send_lock:
+            self.requeue_stale()
+            while limit is None or attempted < limit:
+                size = batch_size if limit is None else min(batch_size, limit - attempted)
+                batch = self._claim(size)
+                if not batch:
+                    break
+                for key, count in self._send_batch(batch).items():
+                    totals[key] += count
+                attempted += len(batch)
+                if len(batch) < size:
+                    break
+        if any(totals.values()):
+            logger.info(f'Email outbox: {totals}')
+        return totals
+
+    def _claim(self, size: int) -> List:
+        from apps.communications.models import OutgoingEmail
+
+        now = timezone.now()
+        with transaction.atomic():
+            batch = list(
+                OutgoingEmail.objects.select_for_update(skip_locked=True)
+                .filter(status='queued', next_attempt_at__lte=now)
+                .order_by('priority', 'next_attempt_at')[:size]
+            )
+            if batch:
+                OutgoingEmail.objects.filter(pk__in=[email.pk for email in batch]).update(
+                    status='sending', claimed_at=now
+                )
+        return batch
+
+    def _send_batch(self, batch: List) -> Dict[str, int]:
+        from apps.communications.models import OutgoingEmail
+
+        counts = {'sent': 0, 'retrying': 0, 'failed': 0}
+        sent_ids = []
+        connection = get_connection()
+        try:
+            connection.open()
+        except Exception as e:
+            logger.warning(f'Email outbox could not connect: {e}')
+            for email in batch:
+                counts[self._record_failure(email, e)] += 1
+            return counts
+
+        try:
+            for email in batch:
+                try:
+                    message = build_message(email, connection, self._secrets(email))
+                    if not connection.send_messages([message]):
+                        raise RuntimeError('Email backend accepted no messages')
+                    sent_ids.append(email.pk)
+                except Exception as e:
+                    counts[self._record_failure(email, e)] += 1
+                    # The server may have dropped us; start the rest on a fresh connection
+                    try:
+                        connection.close()
+                        connection.open()
+                    except Exception as reconnect_error:
+                        logger.warning(f'Email outbox reconnect failed: {reconnect_error}')
+        finally:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+        if sent_ids:
+            OutgoingEmail.objects.filter(pk__in=sent_ids).update(
+                status='sent', sent_at=timezone.now(), last_error=''
+            )
+            cache.delete_many(
+                [SECRETS_KEY.format(email.pk) for email in batch
+                 if email.pk in sent_ids and email.message.get('secrets')]
+            )
+            counts['sent'] = len(sent_ids)
+        return counts
+
+    @staticmethod
+    def _secrets(email) -> Optional[Dict[str, str]]:
+        if not email.message.get('secrets'):
+            return None
+        secrets = cache.get(SECRETS_KEY.format(email.pk))
+        if secrets is None:
+            raise SecretsExpired('Message secrets expired before it was sent')
+        return secrets
+
+    def _record_failure(self, email, error: Exception) -> str:
+        from apps.communications.models import OutgoingEmail
+
+        attempts = email.attempts + 1
+        max_attempts = getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 5)
+        fields = {'attempts': attempts, 'last_error': str(error)[:2000]}
+        # Retrying cannot bring expired secrets back
+        if attempts >= max_attempts or isinstance(error, SecretsExpired):
+            fields['status'] = 'failed'
+            outcome = 'failed'
+            logger.error(f'Giving up on email {email.pk} to {email.recipients}: {error}')
+        else:
+            base = getattr(settings, 'EMAIL_OUTBOX_RETRY_BASE_SECONDS', 30)
+            cap = getattr(settings, 'EMAIL_OUTBOX_RETRY_MAX_SECONDS', 3600)
+            fields['status'] = 'queued'
+            fields['next_attempt_at'] = timezone.now() + timedelta(
+                seconds=min(base * 2 ** (attempts - 1), cap)
+            )
+            outcome = 'retrying'
+        OutgoingEmail.objects.filter(pk=email.pk).update(**fields)
+        return outcome
+
+    # Maintenance -------------------------------------------------------------
+
+    def requeue_stale(self) -> int:
+        """Queue again messages left ``sending`` by a process that died"""
+        from apps.communications.models import OutgoingEmail
+
+        timeout = getattr(settings, 'EMAIL_OUTBOX_CLAIM_TIMEOUT', 300)
+        return OutgoingEmail.objects.filter(
+            status='sending', claimed_at__lt=timezone.now() - timedelta(seconds=timeout)
+        ).update(status='queued')
+
+    def purge(self) -> int:
+        """Delete sent / failed messages past ``EMAIL_OUTBOX_RETENTION_DAYS``"""
+        from apps.communications.models import OutgoingEmail
+
+        days = getattr(settings, 'EMAIL_OUTBOX_RETENTION_DAYS', 7)
+        deleted, _ = OutgoingEmail.objects.filter(
+            status__in=('sent', 'failed'), created_at__lt=timezone.now() - timedelta(days=days)
+        ).delete()
+        return deleted
+
+    def stats(self) -> Dict[str, int]:
+        from apps.communications.models import OutgoingEmail
+
+        counts = dict(
+            OutgoingEmail.objects.order_by().values_list('status').annotate(count=Count('pk'))
+        )
+        return {status: counts.get(status, 0) for status, _ in OutgoingEmail.STATUS_CHOICES}
+
+
+# Singleton instance
+email_outbox = EmailOutbox()
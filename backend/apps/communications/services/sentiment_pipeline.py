@@ -0,0 +1,230 @@
+"""
+Communication Sentiment Pipeline
+
+Each Communication is classified once and the label / score are stored on
+the row. A background job (apps.orders.scheduler) labels new rows in
+batches: one Gemini prompt per batch of messages when AI is configured,
+keyword / rating rules otherwise or for anything the model skipped.
+
+Reporting reads the stored labels with conditional aggregates, so sentiment
+counts are one query and daily trends one GROUP BY over the period. Rows the
+labeller has not reached yet are counted with the same keyword / rating rules
+inside that query.
+"""
+
+import json
+import logging
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from utils.llm_gateway import llm_gateway
+
+logger = logging.getLogger(__name__)
+
+POSITIVE_KEYWORDS = ('thank', 'great', 'excellent', 'love', 'amazing')
+NEGATIVE_KEYWORDS = ('terrible', 'awful', 'disappointed', 'angry', 'frustrated')
+
+# Rule-based sentiment as ORM filters, for rows without a stored label
+POSITIVE_RULE = Q(rating__gte=4)
+for _keyword in POSITIVE_KEYWORDS:
+    POSITIVE_RULE |= Q(message__icontains=_keyword)
+NEGATIVE_RULE = Q(rating__lte=2) | Q(communication_type='complaint')
+for _keyword in NEGATIVE_KEYWORDS:
+    NEGATIVE_RULE |= Q(message__icontains=_keyword)
+
+UNLABELLED = Q(sentiment__isnull=True)
+COUNTS_POSITIVE = Q(sentiment='positive') | (UNLABELLED & POSITIVE_RULE)
+COUNTS_NEGATIVE = Q(sentiment='negative') | (UNLABELLED & NEGATIVE_RULE)
+
+LABELS = ('positive', 'negative', 'neutral')
+LABEL_FIELDS = ['sentiment', 'sentiment_score', 'sentiment_method', 'sentiment_analyzed_at']
+
+# Characters of each message sent to the model
+MAX_MESSAGE_CHARS = 600
+
+
+class SentimentPipeline:
+    """Label communications once, then aggregate the stored labels"""
+
+    def __init__(self):
+        self._model = None
+        self._model_checked = False
+
+    # Classification ----------------------------------------------------------
+
+    @property
+    def model(self):
+        """Gemini model, created on first use; None when AI is not configured"""
+        if not self._model_checked:
+            self._model_checked = True
+            api_key = getattr(settings, 'GOOGLE_AI_API_KEY', None)
+            if api_key:
+                try:
+                    self._model = llm_gateway.get_model('gemini-2.0-flash')
+                except Exception as e:
+                    logger.warning(f'Sentiment pipeline running without AI: {e}')
+        return self._model
+
+    def classify_rule_based(self, communication) -> Tuple[str, float]:
+        """Label and score from rating, type and keywords"""
+        message = (communication.message or '').lower()
+        positive_hits = sum(keyword in message for keyword in POSITIVE_KEYWORDS)
+        negative_hits = sum(keyword in message for keyword in NEGATIVE_KEYWORDS)
+        if communication.communication_type == 'complaint':
+            negative_hits += 1
+
+        rating = communication.rating
+        if rating is not None:
+            # Explicit ratings outweigh wording
+            if rating >= 4:
+                positive_hits += 2
+            elif rating <= 2:
+                negative_hits += 2
+
+        score = max(-1.0, min(1.0, (positive_hits - negative_hits) / 3))
+        if score > 0:
+            return 'positive', round(score, 2)
+        if score < 0:
+            return 'negative', round(score, 2)
+        return 'neutral', 0.0
+
+    def classify_with_ai(self, communications: List) -> Dict[int, Tuple[str, float]]:
+        """
+        Label a batch of communications with a single prompt.
+
+        Returns ``{pk: (label, score)}`` for the rows the model answered
+        validly; callers fall back to the rules for the rest.
+        """
+        entries = []
+        for communication in communications:
+            message = (communication.message or '')[:MAX_MESSAGE_CHARS].replace('\n', ' ')
+            entries.append(
+                f'[{communication.pk}] type={communication.communication_type} '
+                f'rating={communication.rating or "-"} '
+                f'subject={communication.subject!r} message={message!r}'
+            )
+
+        prompt = (
+            'Classify the sentiment of each customer communication below.\n'
+            'Respond with only a JSON array, one object per communication:\n'
+            '[{"id": 12, "sentiment": "positive|negative|neutral", "score": 0.8}]\n'
+            'score ranges from -1 (very negative) to 1 (very positive).\n\n'
+            + '\n'.join(entries)
+        )
+        # Every batch is a distinct prompt, so skip the response cache
+        response_text = llm_gateway.generate(self.model, prompt, cache=False)
+        start, end = response_text.find('['), response_text.rfind(']') + 1
+        if start < 0 or end <= start:
+            return {}
+
+        results = {}
+        for item in json.loads(response_text[start:end]):
+            try:
+                label = str(item['sentiment']).lower()
+                score = max(-1.0, min(1.0, float(item.get('score', 0))))
+                pk = int(item['id'])
+            except (KeyError, TypeError, ValueError):
+                continue
+            if label in LABELS:
+                results[pk] = (label, round(score, 2))
+        return results
+
+    def label(self, communications: List, use_ai: Optional[bool] = None) -> int:
+        """Classify and store labels for ``communications``; returns rows written"""
+        from apps.communications.models import Communication
+
+        if not communications:
+            return 0
+        if use_ai is None:
+            use_ai = self.model is not None
+
+        ai_results = {}
+        if use_ai and self.model is not None:
+            try:
+                ai_results = self.classify_with_ai(communications)
+            except Exception as e:
+                logger.error(f'AI sentiment batch failed, using rules: {e}')
+
+        now = timezone.now()
+        for communication in communications:
+            result = ai_results.get(communication.pk)
+            method = 'ai' if result else 'rule_based'
+            label, score = result or self.classify_rule_based(communication)
+            communication.sentiment = label
+            communication.sentiment_score = score
+            communication.sentiment_method = method
+            communication.sentiment_analyzed_at = now
+
+        Communication.objects.bulk_update(communications, LABEL_FIELDS)
+        return len(communications)
+
+    def label_pending(
+        self,
+        batch_size: Optional[int] = None,
+        limit: Optional[int] = None,
+        use_ai: Optional[bool] = None,
+    ) -> int:
+        """Label unlabelled communications oldest first, in batches"""
+        from apps.communications.models import Communication
+
+        batch_size = batch_size or getattr(settings, 'SENTIMENT_BATCH_SIZE', 20)
+        labelled = 0
+        while limit is None or labelled < limit:
+            size = batch_size if limit is None else min(batch_size, limit - labelled)
+            batch = list(
+                Communication.objects.filter(sentiment__isnull=True)
+                .order_by('created_at')
+                .only('id', 'communication_type', 'subject', 'message', 'rating')[:size]
+            )
+            if not batch:
+                break
+            labelled += self.label(batch, use_ai=use_ai)
+        return labelled
+
+    # Reporting ---------------------------------------------------------------
+
+    @staticmethod
+    def _count_aggregates() -> Dict:
+        return {
+            'total': Count('pk'),
+            'positive': Count('pk', filter=COUNTS_POSITIVE),
+            'negative': Count('pk', filter=COUNTS_NEGATIVE),
+            'unlabelled': Count('pk', filter=UNLABELLED),
+        }
+
+    def sentiment_counts(self, queryset) -> Dict:
+        """Positive / negative / neutral totals for ``queryset`` in one query"""
+        counts = queryset.order_by().aggregate(**self._count_aggregates())
+        counts['neutral'] = max(0, counts['total'] - counts['positive'] - counts['negative'])
+        return counts
+
+    def trends(self, queryset, days: int) -> List[Dict]:
+        """Daily sentiment counts for the last ``days`` days with communications"""
+        start = (timezone.now() - timedelta(days=days - 1)).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        rows = (
+            queryset.filter(created_at__gte=start)
+            .annotate(date=TruncDate('created_at'))
+            .values('date')
+            .annotate(**self._count_aggregates())
+            .order_by('date')
+        )
+        return [
+            {
+                'date': row['date'].isoformat(),
+                'total': row['total'],
+                'positive': row['positive'],
+                'negative': row['negative'],
+                'neutral': max(0, row['total'] - row['positive'] - row['negative']),
+            }
+            for row in rows
+        ]
+
+
+# Singleton instance
+sentiment_pipeline = SentimentPipeline()
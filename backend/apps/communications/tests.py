@@ -1,5 +1,6 @@
 from django.test import TestCase
 from django.contrib.auth import get_user_model
+from django.core.mail.backends.locmem import EmailBackend as LocmemEmailBackend
 from django.utils import timezone
 from .models import (
     Communication,
@@ -127,4 +128,367 @@ class CommunicationTagTests(TestCase):
             created_by=self.user
         )
         self.assertEqual(tag.name, 'Test Tag')
-        self.assertEqual(tag.color, '#007bff')
\ No newline at end of file
+        self.assertEqual(tag.color, '#007bff')
+
+class SentimentPipelineTests(TestCase):
+    def setUp(self):
+        from .services.sentiment_pipeline import sentiment_pipeline
+
+        self.pipeline = sentiment_pipeline
+        self.user = User.objects.create_user(
+            email='sentiment@example.com',
+            password='testpass123'
+        )
+        self.messages = [
+            ('feedback', 'Thank you, the food was amazing', 5),
+            ('complaint', 'Delivery was late and I am frustrated', None),
+            ('inquiry', 'What are your opening hours?', None),
+        ]
+        for index, (comm_type, message, rating) in enumerate(self.messages):
+            Communication.objects.create(
+                user=self.user,
+                communication_type=comm_type,
+                subject=f'Subject {index}',
+                message=message,
+                rating=rating,
+                reference_number=f'SENT-{index}'
+            )
+
+    def test_label_pending_stores_labels_once(self):
+        """Test unlabelled communications are labelled in batches"""
+        labelled = self.pipeline.label_pending(batch_size=2, use_ai=False)
+        self.assertEqual(labelled, 3)
+        self.assertEqual(
+            list(Communication.objects.order_by('reference_number').values_list('sentiment', flat=True)),
+            ['positive', 'negative', 'neutral']
+        )
+        self.assertEqual(self.pipeline.label_pending(use_ai=False), 0)
+
+    def test_ai_batch_falls_back_to_rules_for_skipped_rows(self):
+        """Test one prompt labels the batch and missing answers use the rules"""
+        from unittest.mock import MagicMock, patch
+
+        first = Communication.objects.get(reference_number='SENT-0')
+        model = MagicMock()
+        model.generate_content.return_value.text = (
+            f'```json\n[{{"id": {first.pk}, "sentiment": "neutral", "score": 0.1}}]\n```'
+        )
+        with patch.object(type(self.pipeline), 'model', model):
+            self.pipeline.label_pending(use_ai=True)
+
+        self.assertEqual(model.generate_content.call_count, 1)
+        first.refresh_from_db()
+        self.assertEqual((first.sentiment, first.sentiment_method), ('neutral', 'ai'))
+        complaint = Communication.objects.get(reference_number='SENT-1')
+        self.assertEqual((complaint.sentiment, complaint.sentiment_method), ('negative', 'rule_based'))
+
+    def test_trends_group_stored_and_unlabelled_rows_by_day(self):
+        """Test daily trends come from one grouped query"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        Communication.objects.filter(reference_number='SENT-2').update(sentiment='positive')
+        with CaptureQueriesContext(connection) as queries:
+            trends = self.pipeline.trends(Communication.objects.all(), 7)
+
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(len(trends), 1)
+        self.assertEqual(trends[0]['date'], timezone.now().date().isoformat())
+        self.assertEqual(
+            (trends[0]['total'], trends[0]['positive'], trends[0]['negative'], trends[0]['neutral']),
+            (3, 2, 1, 0)
+        )
+
+
+class CountingEmailBackend(LocmemEmailBackend):
+    """Locmem backend that counts connections and rejects @bounce.test"""
+
+    opened = 0
+
+    def open(self):
+        CountingEmailBackend.opened += 1
+        return True
+
+    def send_messages(self, messages):
+        for message in messages:
+            if any(to.endswith('@bounce.test') for to in message.to):
+                raise ConnectionError('550 mailbox unavailable')
+        return super().send_messages(messages)
+
+
+class EmailOutboxTests(TestCase):
+    def setUp(self):
+        from apps.communications.services.email_outbox import email_outbox
+
+        self.outbox = email_outbox
+        CountingEmailBackend.opened = 0
+
+    def _queue(self, to, **kwargs):
+        from django.core.mail import EmailMultiAlternatives
+
+        message = EmailMultiAlternatives('Hello', 'Plain body', 'noreply@chefsync.com', [to])
+        message.attach_alternative('<p>HTML body</p>', 'text/html')
+        return self.outbox.enqueue(message, **kwargs)
+
+    def test_enqueue_does_not_send(self):
+        """Test request handlers only store the message"""
+        from django.core import mail
+
+        email = self._queue('a@example.com', category='otp')
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual((email.status, email.category), ('queued', 'otp'))
+
+    def test_batch_is_sent_over_one_connection(self):
+        """Test queued messages share a connection and keep their content"""
+        from django.core import mail
+        from django.core.mail import EmailMessage
+
+        for i in range(3):
+            self._queue(f'user{i}@example.com')
+        invoice = EmailMessage('Invoice', '<p>Attached</p>', 'noreply@chefsync.com', ['c@example.com'])
+        invoice.content_subtype = 'html'
+        invoice.attach('invoice.pdf', b'%PDF-1.4', 'application/pdf')
+        self.outbox.enqueue(invoice, category='invoice', priority=1)
+
+        backend = 'apps.communications.tests.CountingEmailBackend'
+        with self.settings(EMAIL_BACKEND=backend):
+            totals = self.outbox.send_pending()
+
+        self.assertEqual(totals, {'sent': 4, 'retrying': 0, 'failed': 0})
+        self.assertEqual(CountingEmailBackend.opened, 1)
+        # Higher priority first
+        self.assertEqual(mail.outbox[0].subject, 'Invoice')
+        self.assertEqual(mail.outbox[0].content_subtype, 'html')
+        self.assertEqual(mail.outbox[0].attachments[0][1], b'%PDF-1.4')
+        self.assertEqual(mail.outbox[1].alternatives[0][0], '<p>HTML body</p>')
+        self.assertEqual(self.outbox.stats()['sent'], 4)
+
+    def test_failures_back_off_then_fail(self):
+        """Test a rejected message is retried later and fails after max attempts"""
+        from django.core import mail
+        from apps.communications.models import OutgoingEmail
+
+        bad = self._queue('x@bounce.test')
+        self._queue('ok@example.com')
+
+        backend = 'apps.communications.tests.CountingEmailBackend'
+        with self.settings(EMAIL_BACKEND=backend, EMAIL_OUTBOX_MAX_ATTEMPTS=2):
+            totals = self.outbox.send_pending()
+            bad.refresh_from_db()
+            self.assertEqual(totals, {'sent': 1, 'retrying': 1, 'failed': 0})
+            self.assertEqual((bad.status, bad.attempts), ('queued', 1))
+            self.assertGreater(bad.next_attempt_at, timezone.now())
+            self.assertIn('550', bad.last_error)
+
+            # Not due yet
+            self.assertEqual(self.outbox.send_pending()['retrying'], 0)
+
+            OutgoingEmail.objects.filter(pk=bad.pk).update(next_attempt_at=timezone.now())
+            self.assertEqual(self.outbox.send_pending()['failed'], 1)
+
+        bad.refresh_from_db()
+        self.assertEqual(bad.status, 'failed')
+        self.assertEqual(len(mail.outbox), 1)
+
+
+    def test_secrets_stay_out_of_the_row(self):
+        """Test secrets are filled in at send time and an expired one fails the message"""
+        from django.core import mail
+        from django.core.cache import cache
+        from django.core.mail import EmailMultiAlternatives
+        from apps.communications.services.email_outbox import SECRETS_KEY, secret_placeholder
+
+        body = f'Code: {secret_placeholder("otp")}'
+        message = EmailMultiAlternatives('Code', body, 'noreply@chefsync.com', ['a@example.com'])
+        message.attach_alternative(f'<b>{secret_placeholder("otp")}</b>', 'text/html')
+        sent = self.outbox.enqueue(message, category='otp', secrets={'otp': '123987'}, secrets_ttl=60)
+        expired = self.outbox.enqueue(message, category='otp', secrets={'otp': '555111'}, secrets_ttl=60)
+        cache.delete(SECRETS_KEY.format(expired.pk))
+
+        self.assertNotIn('123987', str(sent.message))
+        self.assertEqual(self.outbox.send_pending(), {'sent': 1, 'retrying': 0, 'failed': 1})
+        self.assertEqual(mail.outbox[0].body, 'Code: 123987')
+        self.assertEqual(mail.outbox[0].alternatives[0][0], '<b>123987</b>')
+        self.assertIsNone(cache.get(SECRETS_KEY.format(sent.pk)))
+
+
+class EmailBroadcastTests(TestCase):
+    def setUp(self):
+        from rest_framework.test import APIClient
+
+        from apps.communications.services.broadcast_service import broadcast_sender
+
+        self.sender = broadcast_sender
+        self.admin = User.objects.create_user(
+            email='broadcast-admin@example.com', password='testpass123', name='Admin', role='admin'
+        )
+        self.users = [
+            User.objects.create_user(email=f'reader{i}@example.com', password='testpass123', name=f'Reader {i}')
+            for i in range(5)
+        ]
+        User.objects.create_user(email='gone@example.com', password='testpass123', is_active=False)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        CountingEmailBackend.opened = 0
+
+    def test_send_to_all_runs_as_broadcast(self):
+        """Test send_to_all answers 202 and the worker sends in connection-sharing batches"""
+        from django.core import mail
+
+        backend = 'apps.communications.tests.CountingEmailBackend'
+        with self.settings(
+            EMAIL_BACKEND=backend,
+            EMAIL_BROADCAST_WORKERS=0,
+            EMAIL_BROADCAST_BATCH_SIZE=2,
+            EMAIL_BROADCAST_BATCH_PAUSE=0,
+        ):
+            response = self.client.post(
+                '/api/communications/communications/send_email/',
+                {'send_to_all': True, 'subject': 'News', 'message': 'Hello all'},
+                format='json',
+            )
+
+        self.assertEqual(response.status_code, 202)
+        broadcast_url = response.data['broadcast']['status_url']
+        self.assertEqual(response['Location'], broadcast_url)
+        # 5 readers + the admin, not the inactive user
+        self.assertEqual(len(mail.outbox), 6)
+        self.assertEqual(CountingEmailBackend.opened, 1)
+        self.assertEqual(Communication.objects.filter(subject='News').count(), 6)
+
+        status_response = self.client.get(broadcast_url)
+        self.assertEqual(status_response.data['status'], 'completed')
+        self.assertEqual((status_response.data['sent'], status_response.data['failed']), (6, 0))
+        self.assertEqual(status_response.data['progress'], 100.0)
+
+    def test_only_admins_can_broadcast(self):
+        """Test non-admin users cannot email everyone"""
+        self.client.force_authenticate(self.users[0])
+
+        response = self.client.post(
+            '/api/communications/communications/send_email/',
+            {'send_to_all': True, 'subject': 'News', 'message': 'Hello all'},
+            format='json',
+        )
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_stalled_broadcast_resumes_after_last_user(self):
+        """Test a broadcast whose worker died continues where it stopped"""
+        from datetime import timedelta
+
+        from django.core import mail
+        from apps.communications.models import EmailBroadcast
+
+        ids = sorted(user.pk for user in self.users)
+        broadcast = EmailBroadcast.objects.create(
+            created_by=self.admin,
+            subject='Resumed',
+            message='Hi',
+            user_ids=ids,
+            status='running',
+            total_recipients=5,
+            sent_count=2,
+            last_user_id=ids[1],
+            heartbeat_at=timezone.now() - timedelta(hours=1),
+        )
+
+        with self.settings(EMAIL_BROADCAST_WORKERS=0, EMAIL_BROADCAST_BATCH_PAUSE=0):
+            self.assertEqual(self.sender.resume_stalled(), 1)
+
+        broadcast.refresh_from_db()
+        self.assertEqual((broadcast.status, broadcast.sent_count), ('completed', 5))
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), sorted(u.email for u in self.users[2:]))
+
+    def test_worker_stops_once_its_lease_is_taken(self):
+        """Test a stalled worker that wakes up after a resume sends nothing more"""
+        from django.core import mail
+        from django.core.mail import get_connection
+        from apps.communications.models import EmailBroadcast
+
+        broadcast = EmailBroadcast.objects.create(
+            created_by=self.admin,
+            subject='Leased',
+            message='Hi',
+            status='running',
+            lease='resumed-worker',
+            heartbeat_at=timezone.now(),
+        )
+        # resume_stalled already had the first user sent by the new worker
+        Communication.objects.create(
+            user=self.users[0],
+            subject='Leased',
+            message='Hi',
+            communication_type='email',
+            reference_number=f'COM-B{broadcast.pk}-{self.users[0].pk}',
+        )
+        page = [(user.pk, user.email) for user in self.users[:3]]
+        owned = EmailBroadcast.objects.filter(pk=broadcast.pk, status='running', lease='stalled-worker')
+
+        with self.settings(EMAIL_BROADCAST_HEARTBEAT_SECONDS=0):
+            self.assertFalse(self.sender._send_page(broadcast, page, get_connection(), owned))
+
+        self.assertEqual(mail.outbox, [])
+        broadcast.refresh_from_db()
+        self.assertEqual((broadcast.last_user_id, broadcast.sent_count), (0, 0))
+
+
+class EmailRendererTests(TestCase):
+    def setUp(self):
+        from utils.email_renderer import email_renderer
+
+        self.renderer = email_renderer
+        self.renderer.clear()
+        self.context = {
+            'user_name': "O'Brien & Sons",
+            'communication_type': 'Complaint',
+            'reference_number': 'COM-TEST',
+            'new_status': 'Resolved',
+            'site_name': 'ChefSync Kitchen',
+        }
+
+    def tearDown(self):
+        self.renderer.clear()
+
+    def test_html_matches_template_and_text_has_no_markup(self):
+        """Test the cached HTML is the normal render and the text part is clean"""
+        from django.template.loader import render_to_string
+
+        name = 'emails/communication_status_update.html'
+        html_content, text_content = self.renderer.render(name, self.context)
+
+        self.assertEqual(
+            html_content,
+            render_to_string(name, {**self.context, 'logo_base64': self.renderer.logo_base64}),
+        )
+        self.assertIn("O'Brien & Sons", text_content)
+        self.assertIn('COM-TEST', text_content)
+        self.assertNotIn('<', text_content)
+        self.assertNotIn('font-family', text_content)
+        self.assertNotIn('\n\n\n', text_content)
+
+    def test_templates_compile_once(self):
+        """Test repeated sends reuse the compiled templates"""
+        for _ in range(3):
+            self.renderer.render('emails/communication_status_update.html', self.context)
+
+        self.assertEqual(self.renderer.compiles, 1)
+        self.assertEqual(self.renderer.stats()['templates'], ['emails/communication_status_update.html'])
+
+    def test_text_source_keeps_control_flow_inside_tags(self):
+        """Test template tags survive markup stripping"""
+        from django.template import Context, Template
+
+        from utils.email_renderer import text_template_source
+
+        source = text_template_source(
+            '<style>p { color: red; }</style>'
+            '<a href="{{ url }}" {% if bold %}class="b"{% endif %}>Hi {{ name }}</a>&amp;<br>'
+            '{% if bold %}<p>Bold</p>{% endif %}'
+        )
+
+        self.assertEqual(
+            Template(source).render(Context({'url': 'x', 'name': 'A&B', 'bold': True}, autoescape=False)).strip(),
+            'Hi A&B&\nBold',
+        )
@@ -691,14 +691,15 @@ class CommunicationViewSet(viewsets.ModelViewSet):
             }
         )
 
-    @action(detail=False, methods=["post"])
-    def send_email(self, request):
-        """Send email to specific users or all users"""
-        from django.conf import settings
-        from django.contrib.auth import get_user_model
-        from django.core.mail import send_mail
+    def _start_broadcast(self, request):
+        """Queue an email to specific users or all users (see send_email)"""
+        from .services.broadcast_service import broadcast_sender, serialize_broadcast
 
-        User = get_user_model()
+        if request.user.role != "admin":
+            return Response(
+                {"error": "Only admins can email users"},
+                status=status.HTTP_403_FORBIDDEN,
+            )
 
         user_ids = request.data.get("user_ids", [])
         send_to_all = request.data.get("send_to_all", False)
@@ -711,45 +712,19 @@ class CommunicationViewSet(viewsets.ModelViewSet):
                 {"error": "Subject and message are required"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-
-        # Get recipients
-        if send_to_all:
-            recipients = User.objects.filter(is_active=True)
-        elif user_ids:
-            recipients = User.objects.filter(user_id__in=user_ids, is_active=True)
-        else:
+        if not send_to_all and not user_ids:
             return Response(
                 {"error": "Either user_ids or send_to_all must be provided"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        sent_count = 0
-        failed_count = 0
-
-        for user in recipients:
-            try:
-                send_mail(
-                    subject=subject,
-                    message=message,
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[user.email],
-                    html_message=html_message,
-                    fail_silently=False,
-                )
-                sent_count += 1
-
-                # Create communication record
-                Communication.objects.create(
-                    user=user,
-                    subject=subject,
-                    message=message,
-                    communication_type="email",
-                    reference_number=f"COM-{uuid.uuid4().hex[:8].upper()}",
-                    assigned_to=request.user,
-                )
-            except Exception as e:
-                failed_count += 1
-                continue
+        broadcast = broadcast_sender.start(
+            request.user,
+            subject,
+            message,
+            html_message=html_message,
+            user_ids=None if send_to_all else user_ids,
+        )
 
         # Log activity
         AdminActivityLog.objects.create(
@@ -757,20 +732,61 @@ class CommunicationViewSet(viewsets.ModelViewSet):
             action="send_email",
             resource_type="communication",
             resource_id="email_bulk",
-            description=f"Sent {sent_count} emails, {failed_count} failed",
+            description=f"Queued email broadcast {broadcast.pk} to {broadcast.total_recipients} users",
             ip_address=request.META.get("REMOTE_ADDR"),
             user_agent=request.META.get("HTTP_USER_AGENT"),
         )
 
+        data = serialize_broadcast(broadcast)
         return Response(
             {
-                "message": f"Successfully sent {sent_count} emails",
-                "sent": sent_count,
-                "failed": failed_count,
+                "message": f"Sending email to {broadcast.total_recipients} users",
+                "broadcast": data,
             },
-            status=status.HTTP_200_OK,
+            status=status.HTTP_202_ACCEPTED,
+            headers={"Location": data["status_url"]},
         )
 
+    @action(detail=False, methods=["get"], url_path="broadcasts")
+    def broadcasts(self, request):
+        """Recent email broadcasts with their progress"""
+        from .models import EmailBroadcast
+        from .services.broadcast_service import serialize_broadcast
+
+        if request.user.role != "admin":
+            return Response(status=status.HTTP_403_FORBIDDEN)
+
+        broadcasts = EmailBroadcast.objects.all()[:50]
+        return Response({"results": [serialize_broadcast(b) for b in broadcasts]})
+
+    @action(
+        detail=False,
+        methods=["get", "delete"],
+        url_path=r"broadcasts/(?P<broadcast_id>[0-9]+)",
+        url_name="broadcast-status",
+    )
+    def broadcast_status(self, request, broadcast_id=None):
+        """Progress of an email broadcast; DELETE cancels it"""
+        from .models import EmailBroadcast
+        from .services.broadcast_service import broadcast_sender, serialize_broadcast
+
+        if request.user.role != "admin":
+            return Response(status=status.HTTP_403_FORBIDDEN)
+
+        if request.method == "DELETE" and not broadcast_sender.cancel(broadcast_id):
+            if not EmailBroadcast.objects.filter(pk=broadcast_id).exists():
+                return Response({"error": "Broadcast not found"}, status=status.HTTP_404_NOT_FOUND)
+            return Response(
+                {"error": "Broadcast already finished"},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        try:
+            broadcast = EmailBroadcast.objects.get(pk=broadcast_id)
+        except EmailBroadcast.DoesNotExist:
+            return Response({"error": "Broadcast not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(serialize_broadcast(broadcast))
+
     @action(detail=True, methods=["get"])
     def responses(self, request, pk=None):
         """Get all responses for a communication"""
@@ -1275,10 +1291,18 @@ class CommunicationViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=["post"])
     def send_email(self, request):
-        """Send custom email with optional template"""
+        """
+        Send custom email with optional template to ``recipients``, or with
+        ``send_to_all`` / ``user_ids`` queue an email broadcast to users
+        """
         from django.conf import settings
         from django.core.mail import EmailMessage
 
+        from .services.email_outbox import email_outbox
+
+        if "send_to_all" in request.data or "user_ids" in request.data:
+            return self._start_broadcast(request)
+
         subject = request.data.get("subject")
         body = request.data.get("body")
         recipients = request.data.get("recipients", [])
@@ -1312,7 +1336,7 @@ class CommunicationViewSet(viewsets.ModelViewSet):
             email.attach(attachment.name, attachment.read(), attachment.content_type)
 
         try:
-            email.send()
+            email_outbox.enqueue(email, category="custom")
             return Response(
                 {"success": True, "sent_to": recipients, "count": len(recipients)}
             )
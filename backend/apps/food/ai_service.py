@@ -2,12 +2,13 @@
 AI-powered service for intelligent menu analysis and filtering using Google Gemini
 """
 
-import google.generativeai as genai
 from django.conf import settings
 import json
 import logging
 from typing import List, Dict, Any
 
+from utils.llm_gateway import llm_gateway
+
 logger = logging.getLogger(__name__)
 
 
@@ -22,8 +23,7 @@ class BulkMenuAIService:
             self.model = None
         else:
             try:
-                genai.configure(api_key=api_key)
-                self.model = genai.GenerativeModel('gemini-pro')
+                self.model = llm_gateway.get_model('gemini-pro')
                 logger.info("Gemini AI initialized successfully")
             except Exception as e:
                 logger.error(f"Failed to initialize Gemini AI: {e}")
@@ -68,8 +68,7 @@ class BulkMenuAIService:
             Return ONLY valid JSON, no extra text.
             """
             
-            response = self.model.generate_content(prompt)
-            result = json.loads(response.text)
+            result = json.loads(llm_gateway.generate(self.model, prompt))
             
             return {
                 'ai_generated': True,
@@ -133,10 +132,9 @@ class BulkMenuAIService:
             If no menus match well, return an empty array: []
             """
             
-            response = self.model.generate_content(prompt)
+            response_text = llm_gateway.generate(self.model, prompt).strip()
             
             # Extract JSON array from response
-            response_text = response.text.strip()
             # Remove markdown code blocks if present
             if '```json' in response_text:
                 response_text = response_text.split('```json')[1].split('```')[0].strip()
@@ -194,8 +192,7 @@ class BulkMenuAIService:
             Example: [{"index": 3, "reason": "Perfect vegetarian options for your dietary preference"}]
             """
             
-            response = self.model.generate_content(prompt)
-            recommendations = json.loads(response.text)
+            recommendations = json.loads(llm_gateway.generate(self.model, prompt))
             
             result = []
             for rec in recommendations:
@@ -0,0 +1,282 @@
+"""
+Local semantic search index for bulk menus
+
+Approved, available bulk menus are embedded in-process as hashed TF-IDF
+vectors (words, word bigrams and character trigrams hashed into a fixed
+number of buckets, ``log(1 + tf)`` term frequency, smoothed IDF, L2-normalised)
+held in a NumPy matrix. A query is embedded the same way and ranked by cosine
+similarity, so search needs no network and answers in milliseconds; the
+Gemini model is only asked to rerank the top few results.
+
+Keeping the index current:
+- saving / deleting a ``BulkMenu`` or ``BulkMenuItem`` in this process
+  re-embeds that menu before the next search (``apps.food.signals``)
+- changes made by other processes are picked up by a watermark check (latest
+  ``updated_at`` and row count of menus and items) at most every
+  ``BULK_MENU_SEARCH_REFRESH_INTERVAL`` seconds, which rebuilds the index
+"""
+
+import functools
+import logging
+import re
+import threading
+import time
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Count, Max
+
+logger = logging.getLogger(__name__)
+
+# Hash buckets per vector (float32, so 16 KiB per menu)
+N_FEATURES = 2 ** 12
+
+# Relative weight of each feature kind; character trigrams are numerous, so
+# they mostly break ties and catch typos / word variants
+WORD_WEIGHT = 1.0
+BIGRAM_WEIGHT = 0.5
+CHAR_WEIGHT = 0.3
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+STOP_WORDS = frozenset({
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'i', 'in',
+    'is', 'it', 'me', 'my', 'of', 'on', 'or', 'our', 'some', 'that', 'the',
+    'this', 'to', 'we', 'with', 'want', 'need', 'looking', 'food', 'menu',
+})
+
+SPICE_TERMS = {
+    'mild': 'mild',
+    'medium': 'medium spicy',
+    'hot': 'hot spicy',
+    'very_hot': 'very hot spicy',
+}
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_RE.findall(text.lower()) if token not in STOP_WORDS]
+
+
+@functools.lru_cache(maxsize=65536)
+def _token_features(token: str) -> Tuple[Tuple[int, ...], Tuple[float, ...]]:
+    """Buckets and weights of a word and its character trigrams"""
+    padded = f'<{token}>'
+    features = [f'w:{token}'] + [f'c:{padded[i:i + 3]}' for i in range(len(padded) - 2)]
+    weights = [WORD_WEIGHT] + [CHAR_WEIGHT] * (len(features) - 1)
+    return tuple(_bucket(feature) for feature in features), tuple(weights)
+
+
+def _bucket(feature: str) -> int:
+    # crc32 is stable across processes, unlike hash()
+    return zlib.crc32(feature.encode('utf-8')) % N_FEATURES
+
+
+def hashed_counts(text: str) -> np.ndarray:
+    """Weighted feature counts of ``text`` as a dense ``N_FEATURES`` vector"""
+    tokens = tokenize(text)
+    buckets, weights = [], []
+    for token in tokens:
+        token_buckets, token_weights = _token_features(token)
+        buckets.extend(token_buckets)
+        weights.extend(token_weights)
+    for first, second in zip(tokens, tokens[1:]):
+        buckets.append(_bucket(f'b:{first} {second}'))
+        weights.append(BIGRAM_WEIGHT)
+    return np.bincount(buckets, weights=weights, minlength=N_FEATURES).astype(np.float32)
+
+
+def sublinear_tf(counts: np.ndarray) -> np.ndarray:
+    """``log(1 + tf)``, which stays positive for fractional feature weights"""
+    return np.log1p(counts)
+
+
+def menu_document(menu) -> str:
+    """Searchable text of a bulk menu; ``menu.items`` should be prefetched"""
+    items = list(menu.items.all())
+    parts = [
+        # Name counted twice so it outweighs long descriptions
+        menu.menu_name, menu.menu_name,
+        menu.description or '',
+        menu.get_meal_type_display(),
+    ]
+    for item in items:
+        parts.append(item.item_name)
+        if item.description:
+            parts.append(item.description)
+        if item.spice_level in SPICE_TERMS:
+            parts.append(SPICE_TERMS[item.spice_level])
+    if items and all(item.is_vegetarian for item in items):
+        parts.append('vegetarian veg meat free')
+    elif any(item.is_vegetarian for item in items):
+        parts.append('vegetarian options')
+    return ' '.join(parts)
+
+
+class BulkMenuSearchIndex:
+    """In-memory hashed TF-IDF index over searchable bulk menus"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._ids = np.empty(0, dtype=np.int64)
+        self._meal_types = np.empty(0, dtype=object)
+        self._tf = np.empty((0, N_FEATURES), dtype=np.float32)
+        self._idf: Optional[np.ndarray] = None
+        self._matrix: Optional[np.ndarray] = None
+        self._built = False
+        self._dirty = set()
+        self._watermark = None
+        self._watermark_checked_at = 0.0
+        self.rebuilds = 0
+
+    # Maintenance -------------------------------------------------------------
+
+    def mark_dirty(self, menu_id: int) -> None:
+        """Re-embed ``menu_id`` before the next search"""
+        with self._lock:
+            self._dirty.add(menu_id)
+
+    def rebuild(self) -> int:
+        """Embed every searchable menu from scratch; returns the menu count"""
+        with self._lock:
+            watermark = self._read_watermark()
+            menus = self._load_menus()
+            self._ids = np.array([menu.id for menu in menus], dtype=np.int64)
+            self._meal_types = np.array([menu.meal_type for menu in menus], dtype=object)
+            self._tf = self._embed(menus)
+            self._dirty.clear()
+            self._matrix = None
+            self._built = True
+            self._watermark = watermark
+            self._watermark_checked_at = time.monotonic()
+            self.rebuilds += 1
+            logger.info(f'Bulk menu search index built with {len(menus)} menus')
+            return len(menus)
+
+    def refresh(self, menu_ids: Iterable[int]) -> None:
+        """Re-embed ``menu_ids``, dropping the ones no longer searchable"""
+        menu_ids = set(menu_ids)
+        with self._lock:
+            menus = self._load_menus(menu_ids)
+            keep = ~np.isin(self._ids, list(menu_ids))
+            self._ids = np.concatenate(
+                [self._ids[keep], np.array([menu.id for menu in menus], dtype=np.int64)]
+            )
+            self._meal_types = np.concatenate(
+                [self._meal_types[keep], np.array([menu.meal_type for menu in menus], dtype=object)]
+            )
+            self._tf = np.vstack([self._tf[keep], self._embed(menus)])
+            self._dirty -= menu_ids
+            self._matrix = None
+            # Our own write moved the watermark; don't rebuild for it
+            self._watermark = self._read_watermark()
+            self._watermark_checked_at = time.monotonic()
+
+    def clear(self) -> None:
+        """Forget all vectors; the next search rebuilds (tests)"""
+        with self._lock:
+            self._ids = np.empty(0, dtype=np.int64)
+            self._meal_types = np.empty(0, dtype=object)
+            self._tf = np.empty((0, N_FEATURES), dtype=np.float32)
+            self._idf = self._matrix = self._watermark = None
+            self._built = False
+            self._dirty.clear()
+            self.rebuilds = 0
+
+    # Search ------------------------------------------------------------------
+
+    def search(
+        self,
+        query: str,
+        meal_type: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Tuple[int, float]]:
+        """
+        ``(menu_id, score)`` pairs for menus sharing features with ``query``,
+        best cosine similarity first.
+        """
+        with self._lock:
+            self._ensure_current()
+            if not len(self._ids):
+                return []
+            matrix = self._weighted_matrix()
+            query_vector = sublinear_tf(hashed_counts(query)) * self._idf
+            norm = np.linalg.norm(query_vector)
+            if not norm:
+                return []
+            scores = matrix @ (query_vector / norm)
+            if meal_type:
+                scores = np.where(self._meal_types == meal_type, scores, 0.0)
+            ids = self._ids
+
+        matches = np.flatnonzero(scores > 0)
+        if limit is not None and len(matches) > limit:
+            matches = matches[np.argpartition(-scores[matches], limit - 1)[:limit]]
+        order = matches[np.argsort(-scores[matches], kind='stable')]
+        return [(int(ids[i]), round(float(scores[i]), 4)) for i in order]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'menus': int(len(self._ids)),
+                'features': N_FEATURES,
+                'memory_kib': round(self._tf.nbytes / 1024, 1),
+                'pending_updates': len(self._dirty),
+                'rebuilds': self.rebuilds,
+            }
+
+    # Internals ---------------------------------------------------------------
+
+    def _ensure_current(self) -> None:
+        if not self._built:
+            self.rebuild()
+            return
+        interval = getattr(settings, 'BULK_MENU_SEARCH_REFRESH_INTERVAL', 30)
+        if time.monotonic() - self._watermark_checked_at >= interval:
+            watermark = self._read_watermark()
+            self._watermark_checked_at = time.monotonic()
+            if watermark != self._watermark:
+                self.rebuild()
+                return
+        if self._dirty:
+            self.refresh(set(self._dirty))
+
+    def _weighted_matrix(self) -> np.ndarray:
+        if self._matrix is None:
+            document_frequency = (self._tf > 0).sum(axis=0)
+            count = len(self._ids)
+            self._idf = (np.log((1 + count) / (1 + document_frequency)) + 1).astype(np.float32)
+            matrix = self._tf * self._idf
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            self._matrix = matrix / np.maximum(norms, 1e-12)
+        return self._matrix
+
+    @staticmethod
+    def _embed(menus: List) -> np.ndarray:
+        tf = np.empty((len(menus), N_FEATURES), dtype=np.float32)
+        for row, menu in enumerate(menus):
+            tf[row] = sublinear_tf(hashed_counts(menu_document(menu)))
+        return tf
+
+    @staticmethod
+    def _load_menus(menu_ids: Optional[Iterable[int]] = None) -> List:
+        from .models import BulkMenu
+
+        queryset = BulkMenu.objects.filter(
+            availability_status=True, approval_status='approved'
+        ).prefetch_related('items').order_by('id')
+        if menu_ids is not None:
+            queryset = queryset.filter(id__in=list(menu_ids))
+        return list(queryset)
+
+    @staticmethod
+    def _read_watermark() -> Tuple:
+        from .models import BulkMenu, BulkMenuItem
+
+        menus = BulkMenu.objects.order_by().aggregate(last=Max('updated_at'), count=Count('pk'))
+        items = BulkMenuItem.objects.order_by().aggregate(last=Max('updated_at'), count=Count('pk'))
+        return (menus['last'], menus['count'], items['last'], items['count'])
+
+
+# Singleton instance
+menu_search_index = BulkMenuSearchIndex()
@@ -1,11 +1,55 @@
 import base64
+import logging
 import uuid
 
+from django.db import models
 from rest_framework import serializers
 from utils.cloudinary_utils import get_optimized_url, upload_image_to_cloudinary
 
 from .models import BulkMenu, BulkMenuItem, Cuisine, Food, FoodCategory, FoodPrice, FoodReview, Offer
 
+logger = logging.getLogger(__name__)
+
+# Sentinel: the row is being serialized on its own, not through KitchenGeoListSerializer
+NOT_BATCHED = object()
+
+
+class KitchenGeoListSerializer(serializers.ListSerializer):
+    """
+    List serializer that prices the whole list in one pass.
+
+    Kitchen addresses for every chef are fetched with one query and distance,
+    delivery fee and ETA are computed with the vectorised helpers in
+    ``utils.geo``; row serializers read them back via ``KitchenGeoMixin``.
+    """
+
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        self.child._kitchen_geo = NOT_BATCHED
+        user_location = self.context.get('user_location')
+        if user_location and items:
+            try:
+                from .utils import kitchen_geo_for
+                self.child._kitchen_geo = kitchen_geo_for(
+                    items, user_location, getattr(self.child, 'kitchen_geo_preparation_attr', None)
+                )
+            except Exception as e:
+                logger.error(f"Batch delivery calculation failed, using per-row path: {e}")
+        return super().to_representation(items)
+
+
+class KitchenGeoMixin:
+    """Row-level access to distances computed by ``KitchenGeoListSerializer``"""
+
+    kitchen_geo_preparation_attr = None
+
+    def _batched_geo(self, obj):
+        """``NOT_BATCHED``, or the row's geo dict (None when the chef has no kitchen coordinates)"""
+        kitchen_geo = getattr(self, '_kitchen_geo', NOT_BATCHED)
+        if kitchen_geo is NOT_BATCHED:
+            return NOT_BATCHED
+        return kitchen_geo.get(id(obj))
+
 
 class CuisineSerializer(serializers.ModelSerializer):
     image_url = serializers.SerializerMethodField()
@@ -174,7 +218,9 @@ class FoodPriceSerializer(serializers.ModelSerializer):
         return None
 
 
-class FoodSerializer(serializers.ModelSerializer):
+class FoodSerializer(KitchenGeoMixin, serializers.ModelSerializer):
+    kitchen_geo_preparation_attr = 'preparation_time'
+
     primary_image = serializers.SerializerMethodField()
     thumbnail_url = serializers.SerializerMethodField()
     category_name = serializers.CharField(source="food_category.name", read_only=True)
@@ -216,6 +262,7 @@ class FoodSerializer(serializers.ModelSerializer):
             # Chef availability
             'chef_is_currently_open', 'chef_availability_message', 'chef_operating_hours_readable'
         ]
+        list_serializer_class = KitchenGeoListSerializer
         read_only_fields = [
             "food_id",
             "chef",
@@ -290,6 +337,10 @@ class FoodSerializer(serializers.ModelSerializer):
         user_location = self.context.get('user_location')
         if not user_location:
             return None
+
+        geo = self._batched_geo(obj)
+        if geo is not NOT_BATCHED:
+            return geo['delivery_fee'] if geo else None
             
         try:
             from apps.users.models import Address
@@ -322,6 +373,10 @@ class FoodSerializer(serializers.ModelSerializer):
         user_location = self.context.get('user_location')
         if not user_location:
             return None
+
+        geo = self._batched_geo(obj)
+        if geo is not NOT_BATCHED:
+            return geo['distance_km'] if geo else None
             
         try:
             from apps.users.models import Address
@@ -350,6 +405,10 @@ class FoodSerializer(serializers.ModelSerializer):
     
     def get_estimated_delivery_time(self, obj):
         """Calculate estimated delivery time"""
+        geo = self._batched_geo(obj)
+        if geo is not NOT_BATCHED:
+            return geo['estimated_delivery_time'] if geo else None
+
         distance = self.get_distance_km(obj)
         if distance is None:
             return None
@@ -861,7 +920,7 @@ class BulkMenuItemSerializer(serializers.ModelSerializer):
         read_only_fields = ["created_at", "updated_at"]
 
 
-class BulkMenuWithItemsSerializer(serializers.ModelSerializer):
+class BulkMenuWithItemsSerializer(KitchenGeoMixin, serializers.ModelSerializer):
     """Serializer for BulkMenu with nested items"""
     items = BulkMenuItemSerializer(many=True, read_only=True)
     chef_name = serializers.CharField(source="chef.username", read_only=True)
@@ -920,6 +979,7 @@ class BulkMenuWithItemsSerializer(serializers.ModelSerializer):
             "created_at",
             "updated_at",
         ]
+        list_serializer_class = KitchenGeoListSerializer
         read_only_fields = ["chef", "approved_by", "approved_at", "created_at", "updated_at"]
     
     def validate_image(self, value):
@@ -1011,6 +1071,10 @@ class BulkMenuWithItemsSerializer(serializers.ModelSerializer):
         user_location = self.context.get('user_location')
         if not user_location:
             return 300  # Return base fee if no location
+
+        geo = self._batched_geo(obj)
+        if geo is not NOT_BATCHED:
+            return geo['delivery_fee'] if geo else 300  # Base fee if no kitchen location
             
         try:
             from apps.users.models import Address
@@ -1046,6 +1110,10 @@ class BulkMenuWithItemsSerializer(serializers.ModelSerializer):
         user_location = self.context.get('user_location')
         if not user_location:
             return None
+
+        geo = self._batched_geo(obj)
+        if geo is not NOT_BATCHED:
+            return geo['distance_km'] if geo else None
             
         try:
             from apps.users.models import Address
@@ -1,7 +1,9 @@
-from django.db.models.signals import post_save, pre_delete
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 from .models import Food, BulkMenu, BulkMenuItem
+from .menu_search import menu_search_index
 from apps.communications.utils import NotificationManager
 
 User = get_user_model()
@@ -146,4 +148,24 @@ def notify_chef_on_bulk_menu_item_deletion(sender, instance, **kwargs):
             instance.bulk_menu.chef,
             instance.item_name,
             instance.bulk_menu.menu_name
-        )
\ No newline at end of file
+        )
+
+
+@receiver(post_save, sender=BulkMenu)
+@receiver(post_delete, sender=BulkMenu)
+def update_search_index_for_bulk_menu(sender, instance, **kwargs):
+    """
+    Re-embed the menu in the bulk menu search index once the change commits
+    """
+    menu_id = instance.pk
+    transaction.on_commit(lambda: menu_search_index.mark_dirty(menu_id))
+
+
+@receiver(post_save, sender=BulkMenuItem)
+@receiver(post_delete, sender=BulkMenuItem)
+def update_search_index_for_bulk_menu_item(sender, instance, **kwargs):
+    """
+    Re-embed the item's menu in the bulk menu search index once the change commits
+    """
+    menu_id = instance.bulk_menu_id
+    transaction.on_commit(lambda: menu_search_index.mark_dirty(menu_id))
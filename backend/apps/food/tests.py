@@ -1,3 +1,201 @@
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
 
-# Create your tests here.
+
+class GeoHelpersTest(SimpleTestCase):
+    """Vectorised geo helpers must agree with the scalar delivery utilities"""
+
+    def test_vectorised_matches_scalar(self):
+        from apps.food.utils import calculate_delivery_fee, estimate_delivery_time
+        from utils import geo
+
+        user_lat, user_lng = 9.6615, 80.0255
+        kitchen_lats = [9.6615, 9.70, 9.80, 10.10]
+        kitchen_lngs = [80.0255, 80.05, 80.20, 80.40]
+
+        distances = geo.haversine_km(user_lat, user_lng, kitchen_lats, kitchen_lngs)
+        fees = geo.delivery_fees(distances)
+        etas = geo.delivery_times(distances.round(2), [30, 20, 45, 30])
+
+        for i, (lat, lng) in enumerate(zip(kitchen_lats, kitchen_lngs)):
+            fee_data = calculate_delivery_fee(user_lat, user_lng, lat, lng)
+            self.assertAlmostEqual(fees[i], fee_data["total_delivery_fee"], places=6)
+            self.assertAlmostEqual(distances[i], geo.haversine_distance_km(user_lat, user_lng, lat, lng), places=9)
+            self.assertEqual(etas[i], estimate_delivery_time(fee_data["distance_km"], [30, 20, 45, 30][i]))
+
+        self.assertEqual(fees[0], geo.BASE_DELIVERY_FEE)
+        self.assertTrue(geo.within_radius(distances, 25.0)[:3].all())
+
+
+class LLMGatewayTest(SimpleTestCase):
+    """Shared Gemini gateway: response cache, single flight and deadlines"""
+
+    def setUp(self):
+        from utils.llm_gateway import llm_gateway
+
+        llm_gateway.reset()
+        self.gateway = llm_gateway
+
+    def _model(self, text='[1, 0]', delay=0.0):
+        import time
+        from unittest.mock import MagicMock
+
+        model = MagicMock()
+        model.model_name = 'test-model'
+
+        def generate_content(prompt, request_options=None):
+            time.sleep(delay)
+            response = MagicMock()
+            response.text = text
+            response.usage_metadata.prompt_token_count = 10
+            response.usage_metadata.candidates_token_count = 2
+            return response
+
+        model.generate_content.side_effect = generate_content
+        return model
+
+    def test_identical_prompts_served_from_cache(self):
+        model = self._model()
+        menus = [{'menu_name': 'Rice & Curry'}, {'menu_name': 'Vegetarian Kottu'}]
+        from apps.food.ai_service import BulkMenuAIService
+
+        service = BulkMenuAIService()
+        service.model = model
+        first = service.filter_menus_by_query('vegetarian', menus)
+        second = service.filter_menus_by_query('vegetarian', menus)
+
+        self.assertEqual(first, second)
+        self.assertEqual(first[0]['menu_name'], 'Vegetarian Kottu')
+        self.assertEqual(model.generate_content.call_count, 1)
+        stats = self.gateway.stats()['models']['test-model']
+        self.assertEqual((stats['calls'], stats['cache_hits'], stats['prompt_tokens']), (1, 1, 10))
+
+    def test_concurrent_identical_prompts_coalesce(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        model = self._model(text='ok', delay=0.2)
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(lambda _: self.gateway.generate(model, 'same prompt', cache=False), range(4)))
+
+        self.assertEqual(results, ['ok'] * 4)
+        self.assertEqual(model.generate_content.call_count, 1)
+        self.assertEqual(self.gateway.stats()['models']['test-model']['coalesced'], 3)
+
+    def test_waiting_for_a_slot_respects_the_deadline(self):
+        import threading
+        import time
+
+        from utils.llm_gateway import LLMTimeout
+
+        model = self._model(text='slow', delay=0.5)
+        with self.settings(LLM_MAX_CONCURRENCY=1):
+            self.gateway.reset()
+            worker = threading.Thread(target=self.gateway.generate, args=(model, 'first'))
+            worker.start()
+            time.sleep(0.05)
+            with self.assertRaises(LLMTimeout):
+                self.gateway.generate(model, 'second', timeout=0.1)
+            worker.join()
+        self.gateway.reset()
+
+
+class BulkMenuSearchIndexTest(TestCase):
+    """Local TF-IDF search over bulk menus, kept current by model signals"""
+
+    def setUp(self):
+        from django.contrib.auth import get_user_model
+
+        from apps.food.menu_search import menu_search_index
+
+        self.index = menu_search_index
+        self.index.clear()
+        self.chef = get_user_model().objects.create_user(
+            email='search-chef@test.com', password='pass12345', name='Chef', role='cook'
+        )
+        self.kottu = self._menu('Vegetarian Kottu Feast', 'lunch', 'Street style kottu', [
+            ('Vegetable Kottu', True, 'medium'), ('Dhal Curry', True, 'mild'),
+        ])
+        self.biryani = self._menu('Chicken Biryani Party Pack', 'dinner', 'Dum cooked biryani', [
+            ('Chicken Biryani', False, 'hot'), ('Raita', True, None),
+        ])
+        self.hoppers = self._menu('Breakfast Hoppers', 'breakfast', 'Egg and plain hoppers', [
+            ('Egg Hopper', False, None), ('Pol Sambol', True, 'medium'),
+        ])
+
+    def _menu(self, name, meal_type, description, items):
+        from apps.food.models import BulkMenu, BulkMenuItem
+
+        with self.captureOnCommitCallbacks(execute=True):
+            menu = BulkMenu.objects.create(
+                chef=self.chef, menu_name=name, meal_type=meal_type, description=description,
+                base_price_per_person=1500, approval_status='approved',
+            )
+            for item_name, vegetarian, spice in items:
+                BulkMenuItem.objects.create(
+                    bulk_menu=menu, item_name=item_name, is_vegetarian=vegetarian, spice_level=spice
+                )
+        return menu
+
+    def _ids(self, query, **kwargs):
+        return [menu_id for menu_id, _ in self.index.search(query, **kwargs)]
+
+    def test_ranks_by_relevance_and_tolerates_typos(self):
+        self.assertEqual(self._ids('spicy biryani for a party')[0], self.biryani.id)
+        self.assertEqual(self._ids('vegitarian kotu')[0], self.kottu.id)
+        self.assertNotIn(self.hoppers.id, self._ids('hoppers', meal_type='lunch'))
+        self.assertEqual(self.index.search('xyz qqq'), [])
+
+    def test_saves_update_the_index_without_a_rebuild(self):
+        self._ids('warmup')
+        self.assertEqual(self.index.rebuilds, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.hoppers.menu_name = 'String Hopper Brunch'
+            self.hoppers.save()
+        self.assertEqual(self._ids('brunch')[0], self.hoppers.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.biryani.approval_status = 'rejected'
+            self.biryani.save()
+        self.assertNotIn(self.biryani.id, self._ids('biryani'))
+        self.assertEqual(self.index.rebuilds, 1)
+
+    def test_changes_from_other_processes_trigger_a_rebuild(self):
+        from apps.food.models import BulkMenu
+
+        self._ids('warmup')
+        # queryset.update() sends no signals, like a write from another worker
+        BulkMenu.objects.filter(pk=self.kottu.pk).update(menu_name='Lamprais Lunch', updated_at=timezone.now())
+        with self.settings(BULK_MENU_SEARCH_REFRESH_INTERVAL=0):
+            self.assertEqual(self._ids('lamprais')[0], self.kottu.id)
+        self.assertEqual(self.index.rebuilds, 2)
+
+    def test_ai_search_reranks_only_top_matches(self):
+        from unittest.mock import patch
+
+        from rest_framework.test import APIClient
+
+        client = APIClient()
+        client.force_authenticate(self.chef)
+        with self.settings(BULK_MENU_SEARCH_RERANK_K=2), \
+                patch('apps.orders.customer_bulk_views.ai_service') as ai_service:
+            ai_service.is_available.return_value = True
+            ai_service.filter_menus_by_query.side_effect = lambda query, menus: list(reversed(menus))
+            response = client.post(
+                '/api/orders/customer-bulk-orders/ai-search/', {'query': 'curry kottu biryani'}, format='json'
+            )
+
+        self.assertEqual(response.status_code, 200)
+        reranked = ai_service.filter_menus_by_query.call_args[0][1]
+        self.assertEqual(len(reranked), 2)
+        # Only matching menus are returned
+        self.assertEqual(response.data['total_results'], 2)
+        self.assertNotIn(self.hoppers.id, [menu['id'] for menu in response.data['menus']])
+        self.assertTrue(response.data['ai_powered'])
+        self.assertEqual([menu['id'] for menu in response.data['menus'][:2]], [m['id'] for m in reranked[::-1]])
+
+        with self.settings(BULK_MENU_SEARCH_RESULTS=1):
+            response = client.post(
+                '/api/orders/customer-bulk-orders/ai-search/', {'query': 'spicy biryani'}, format='json'
+            )
+        self.assertEqual([menu['id'] for menu in response.data['menus']], [self.biryani.id])
@@ -1,9 +1,9 @@
 """
 Utility functions for food delivery calculations
 """
-import math
-from typing import Dict, Any
-from decimal import Decimal
+from typing import Dict, Any, Iterable
+
+from utils import geo
 
 
 def calculate_distance(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
@@ -11,19 +11,7 @@ def calculate_distance(lat1: float, lng1: float, lat2: float, lng2: float) -> fl
     Calculate the distance between two points using Haversine formula
     Returns distance in kilometers
     """
-    # Convert latitude and longitude from degrees to radians
-    lat1, lng1, lat2, lng2 = map(math.radians, [lat1, lng1, lat2, lng2])
-    
-    # Haversine formula
-    dlat = lat2 - lat1
-    dlng = lng2 - lng1
-    a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlng/2)**2
-    c = 2 * math.asin(math.sqrt(a))
-    
-    # Radius of earth in kilometers
-    r = 6371
-    
-    return c * r
+    return geo.haversine_distance_km(lat1, lng1, lat2, lng2)
 
 
 def calculate_delivery_fee(user_lat: float, user_lng: float, kitchen_lat: float, kitchen_lng: float) -> Dict[str, Any]:
@@ -44,25 +32,14 @@ def calculate_delivery_fee(user_lat: float, user_lng: float, kitchen_lat: float,
         Dict with distance, fees, and total
     """
     distance = calculate_distance(user_lat, user_lng, kitchen_lat, kitchen_lng)
-    
-    BASE_FEE = Decimal('300.00')
-    ADDITIONAL_FEE_PER_KM = Decimal('100.00')
-    FREE_DISTANCE_KM = 5
-    
-    if distance <= FREE_DISTANCE_KM:
-        delivery_fee = BASE_FEE
-        additional_fee = Decimal('0.00')
-    else:
-        additional_km = distance - FREE_DISTANCE_KM
-        additional_fee = Decimal(str(additional_km)) * ADDITIONAL_FEE_PER_KM
-        delivery_fee = BASE_FEE + additional_fee
+    delivery_fee = float(geo.delivery_fees(distance))
     
     return {
         'distance_km': round(distance, 2),
-        'base_fee': float(BASE_FEE),
-        'additional_fee': float(additional_fee),
-        'total_delivery_fee': float(delivery_fee),
-        'free_distance_km': FREE_DISTANCE_KM
+        'base_fee': geo.BASE_DELIVERY_FEE,
+        'additional_fee': delivery_fee - geo.BASE_DELIVERY_FEE,
+        'total_delivery_fee': delivery_fee,
+        'free_distance_km': geo.FREE_DISTANCE_KM
     }
 
 
@@ -77,10 +54,7 @@ def estimate_delivery_time(distance_km: float, preparation_time_minutes: int = 3
     Returns:
         Total estimated time in minutes
     """
-    # Average delivery speed: 20 km/h in city traffic
-    travel_time_minutes = (distance_km / 20) * 60
-    
-    return int(preparation_time_minutes + travel_time_minutes)
+    return int(geo.delivery_times(distance_km, preparation_time_minutes))
 
 
 def validate_delivery_radius(kitchen_lat: float, kitchen_lng: float, user_lat: float, user_lng: float, max_radius_km: float = 25.0) -> Dict[str, Any]:
@@ -106,4 +80,65 @@ def validate_delivery_radius(kitchen_lat: float, kitchen_lng: float, user_lat: f
         'distance_km': round(distance, 2),
         'max_radius_km': max_radius_km,
         'message': 'Delivery available' if is_deliverable else f'Location is outside delivery radius ({max_radius_km}km)'
-    }
\ No newline at end of file
+    }
+
+
+def kitchen_geo_for(objects: Iterable, user_location: Dict[str, float], preparation_attr: str = None) -> Dict[int, Dict[str, Any]]:
+    """
+    Distance, delivery fee and ETA for a page of chef-owned objects in one pass
+    
+    Looks up every chef's active kitchen address with a single query and runs
+    the vectorised geo functions over all of them, instead of one address
+    query and one scalar calculation per row.
+    
+    Args:
+        objects: Objects with a ``chef_id`` (foods, bulk menus)
+        user_location: Dict with ``latitude`` and ``longitude``
+        preparation_attr: Optional attribute holding preparation minutes for the ETA
+        
+    Returns:
+        Dict keyed by ``id(obj)`` with distance_km, delivery_fee and estimated_delivery_time;
+        objects whose chef has no kitchen coordinates are omitted
+    """
+    from apps.users.models import Address
+
+    objects = list(objects)
+    chef_ids = {obj.chef_id for obj in objects if obj.chef_id}
+    if not objects or not chef_ids:
+        return {}
+
+    # First active kitchen per chef, matching Address.objects.filter(...).first()
+    kitchens = {}
+    for row in Address.objects.filter(
+        user_id__in=chef_ids, address_type='kitchen', is_active=True
+    ).order_by('pk').values('user_id', 'latitude', 'longitude'):
+        kitchens.setdefault(row['user_id'], row)
+
+    located = [
+        obj for obj in objects
+        if obj.chef_id in kitchens
+        and kitchens[obj.chef_id]['latitude'] and kitchens[obj.chef_id]['longitude']
+    ]
+    if not located:
+        return {}
+
+    kitchen_lats = [float(kitchens[obj.chef_id]['latitude']) for obj in located]
+    kitchen_lngs = [float(kitchens[obj.chef_id]['longitude']) for obj in located]
+    distances = geo.haversine_km(
+        user_location['latitude'], user_location['longitude'], kitchen_lats, kitchen_lngs
+    )
+    fees = geo.delivery_fees(distances)
+    preparation = [
+        (getattr(obj, preparation_attr, None) if preparation_attr else None) or 30
+        for obj in located
+    ]
+    etas = geo.delivery_times(distances.round(2), preparation)
+
+    return {
+        id(obj): {
+            'distance_km': round(float(distance), 2),
+            'delivery_fee': float(fee),
+            'estimated_delivery_time': int(eta),
+        }
+        for obj, distance, fee, eta in zip(located, distances, fees, etas)
+    }
@@ -0,0 +1,163 @@
+"""
+Server-Sent Events stream for delivery chat
+
+Clients open ``GET /api/orders/orders/<pk>/chat/stream/`` with an
+``EventSource`` and receive each new chat message as it is committed, instead
+of polling ``chat/messages/``.
+
+The stream only works on the ASGI application (config.asgi): under WSGI
+Django buffers an async streaming response until it ends, so it would never
+send an event and would hold a worker thread until the tab closes. It is off
+unless ``DELIVERY_CHAT_SSE`` is set, and refuses requests that did not come
+through ASGI; clients then keep polling.
+
+EventSource cannot send an Authorization header. Instead of the access token,
+the client first asks ``POST chat/stream-ticket/`` (normal JWT auth) for a
+signed ticket bound to the user and order, valid for
+``DELIVERY_CHAT_TICKET_SECONDS``, and passes it as ``?ticket=``. Messages
+missed while disconnected are replayed from the ``Last-Event-ID`` header or
+the ``?after=`` cursor.
+"""
+
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+
+from .models import Order
+from .serializers import DeliveryChatSerializer
+from .services.chat_broker import get_chat_broker
+from .services.delivery_chat_service import InvalidChatCursor, delivery_chat_service
+
+# Comment line sent while idle so proxies keep the connection open
+HEARTBEAT_SECONDS = 15
+
+
+TICKET_SALT = "apps.orders.chat_stream"
+
+
+def stream_enabled() -> bool:
+    return getattr(settings, "DELIVERY_CHAT_SSE", False)
+
+
+def issue_stream_ticket(user, order) -> str:
+    """Signed ticket letting ``user`` open the stream of ``order``"""
+    return signing.dumps({"user": user.pk, "order": order.pk}, salt=TICKET_SALT)
+
+
+def _authenticate(request, pk):
+    """Resolve the user from ``?ticket=``, if it is valid for order ``pk``"""
+    ticket = request.GET.get("ticket")
+    if not ticket:
+        return None
+    try:
+        payload = signing.loads(
+            ticket,
+            salt=TICKET_SALT,
+            max_age=getattr(settings, "DELIVERY_CHAT_TICKET_SECONDS", 60),
+        )
+    except signing.BadSignature:
+        return None
+    if payload.get("order") != pk:
+        return None
+    return get_user_model().objects.filter(pk=payload.get("user"), is_active=True).first()
+
+
+def _load_backlog(order, user, after):
+    """Messages the client missed, serialized for the stream"""
+    if not after:
+        return []
+    messages = delivery_chat_service.get_messages(order, after=after)
+    delivery_chat_service.mark_read(order, user)
+    return [DeliveryChatSerializer(message).data for message in messages]
+
+
+async def _close_subscription(subscription, pending):
+    if pending is not None:
+        pending.cancel()
+        try:
+            await pending
+        except (asyncio.CancelledError, StopAsyncIteration):
+            pass
+    await subscription.aclose()
+
+
+def _format_event(payload):
+    data = json.dumps(payload, cls=DjangoJSONEncoder)
+    return f"id: {payload.get('message_id', '')}\nevent: message\ndata: {data}\n\n"
+
+
+async def delivery_chat_stream(request, pk):
+    """Stream new chat messages for an order to its customer or delivery partner"""
+    if not stream_enabled() or not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {"error": "Chat streaming is not available, poll chat/messages/ instead"},
+            status=404,
+        )
+
+    user = await sync_to_async(_authenticate)(request, pk)
+    if user is None:
+        return JsonResponse(
+            {"error": "Authentication credentials were not provided or are invalid"},
+            status=401,
+        )
+
+    try:
+        order = await Order.objects.aget(pk=pk)
+    except Order.DoesNotExist:
+        return JsonResponse({"error": "Order not found"}, status=404)
+
+    if user.pk not in (order.customer_id, order.delivery_partner_id):
+        return JsonResponse(
+            {"error": "You are not authorized to view these messages"}, status=403
+        )
+
+    # Start listening before reading the backlog so nothing committed in
+    # between is lost; any overlap between the two is dropped by message id.
+    subscription = get_chat_broker().subscribe(order.pk)
+    next_message = asyncio.ensure_future(subscription.__anext__())
+    await asyncio.sleep(0)
+
+    after = request.headers.get("Last-Event-ID") or request.GET.get("after")
+    try:
+        backlog = await sync_to_async(_load_backlog)(order, user, after)
+    except InvalidChatCursor as e:
+        await _close_subscription(subscription, next_message)
+        return JsonResponse({"error": str(e)}, status=400)
+
+    async def event_stream():
+        nonlocal next_message
+        try:
+            yield "retry: 3000\n\n"
+            # Tells the client the stream is live (it polls if this never arrives)
+            yield "event: ready\ndata: {}\n\n"
+            seen = set()
+            for payload in backlog:
+                seen.add(payload.get("message_id"))
+                yield _format_event(payload)
+
+            while True:
+                if next_message is None:
+                    next_message = asyncio.ensure_future(subscription.__anext__())
+                done, _ = await asyncio.wait({next_message}, timeout=HEARTBEAT_SECONDS)
+                if not done:
+                    yield ": keep-alive\n\n"
+                    continue
+                payload = next_message.result()
+                next_message = None
+                if payload.get("message_id") in seen:
+                    continue
+                yield _format_event(payload)
+        finally:
+            await _close_subscription(subscription, next_message)
+
+    response = StreamingHttpResponse(event_stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
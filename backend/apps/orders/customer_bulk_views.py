@@ -8,6 +8,7 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from django.conf import settings
 from django.utils import timezone
 from django.db import transaction
 
@@ -15,10 +16,37 @@ from .models import Order, OrderItem, BulkOrder
 from .serializers import CustomerBulkOrderSerializer, BulkOrderDetailSerializer
 from apps.food.models import BulkMenu, BulkMenuItem
 from apps.food.ai_service import ai_service
+from apps.food.menu_search import menu_search_index
+from apps.admin_management.services.ai_jobs import ai_job
 
 logger = logging.getLogger(__name__)
 
 
+def _menu_search_data(menu):
+    """Search result dict for a bulk menu with prefetched items"""
+    menu_items = menu.items.all()
+    mandatory_items = [item.item_name for item in menu_items if not item.is_optional]
+    optional_items = [item.item_name for item in menu_items if item.is_optional]
+    
+    return {
+        'id': menu.id,
+        'menu_name': menu.menu_name,
+        'description': menu.description or '',
+        'meal_type': menu.meal_type,
+        'meal_type_display': menu.get_meal_type_display(),
+        'chef_name': menu.chef.name if hasattr(menu.chef, 'name') else menu.chef.username,
+        'base_price_per_person': float(menu.base_price_per_person),
+        'min_persons': menu.min_persons,
+        'max_persons': menu.max_persons,
+        'image_url': str(menu.image) if menu.image else None,
+        'menu_items_summary': {
+            'mandatory_items': mandatory_items,
+            'optional_items': optional_items,
+            'total_items': len(mandatory_items) + len(optional_items)
+        }
+    }
+
+
 class CustomerBulkOrderViewSet(viewsets.ViewSet):
     """
     ViewSet for customers to place bulk orders from available bulk menus
@@ -227,6 +255,11 @@ class CustomerBulkOrderViewSet(viewsets.ViewSet):
         """
         AI-powered natural language search for bulk menus
         
+        Menus are ranked by the local search index (apps.food.menu_search);
+        only the best BULK_MENU_SEARCH_RESULTS matches are loaded and
+        returned, and when AI is configured it reranks the top
+        BULK_MENU_SEARCH_RERANK_K.
+        
         Request body:
         {
             "query": "healthy vegetarian food for corporate event",
@@ -245,48 +278,36 @@ class CustomerBulkOrderViewSet(viewsets.ViewSet):
         logger.info(f"🔍 AI Search query: '{query}' from user: {request.user.email}")
         
         try:
-            # Get available bulk menus
-            menus_queryset = BulkMenu.objects.filter(
+            # Rank locally with the search index; only the top matches are loaded
+            limit = getattr(settings, 'BULK_MENU_SEARCH_RESULTS', 20)
+            ranked_ids = [
+                menu_id for menu_id, _ in
+                menu_search_index.search(query, meal_type=meal_type_filter, limit=limit)
+            ]
+            menus = BulkMenu.objects.filter(
+                id__in=ranked_ids,
                 availability_status=True,
                 approval_status='approved'
-            ).select_related('chef')
+            ).select_related('chef').prefetch_related('items').in_bulk()
+            # A menu changed since it was indexed may no longer be available
+            menus_data = [
+                _menu_search_data(menus[menu_id]) for menu_id in ranked_ids if menu_id in menus
+            ]
             
-            if meal_type_filter:
-                menus_queryset = menus_queryset.filter(meal_type=meal_type_filter)
-            
-            # Convert to list of dicts for AI processing
-            menus_data = []
-            for menu in menus_queryset:
-                menu_items = BulkMenuItem.objects.filter(bulk_menu=menu)
-                mandatory_items = [item.item_name for item in menu_items if not item.is_optional]
-                optional_items = [item.item_name for item in menu_items if item.is_optional]
-                
-                menus_data.append({
-                    'id': menu.id,
-                    'menu_name': menu.menu_name,
-                    'description': menu.description or '',
-                    'meal_type': menu.meal_type,
-                    'meal_type_display': menu.get_meal_type_display(),
-                    'chef_name': menu.chef.name if hasattr(menu.chef, 'name') else menu.chef.username,
-                    'base_price_per_person': float(menu.base_price_per_person),
-                    'min_persons': menu.min_persons,
-                    'max_persons': menu.max_persons,
-                    'image_url': str(menu.image) if menu.image else None,
-                    'menu_items_summary': {
-                        'mandatory_items': mandatory_items,
-                        'optional_items': optional_items,
-                        'total_items': len(mandatory_items) + len(optional_items)
-                    }
-                })
-            
-            # Use AI to filter and rank menus
-            filtered_menus = ai_service.filter_menus_by_query(query, menus_data)
+            # Only the top few matches go to the AI model for reranking
+            rerank_count = min(getattr(settings, 'BULK_MENU_SEARCH_RERANK_K', 8), len(menus_data))
+            ai_reranked = rerank_count > 1 and ai_service.is_available()
+            if ai_reranked:
+                menus_data = (
+                    ai_service.filter_menus_by_query(query, menus_data[:rerank_count])
+                    + menus_data[rerank_count:]
+                )
             
             return Response({
                 'query': query,
-                'total_results': len(filtered_menus),
-                'ai_powered': ai_service.is_available(),
-                'menus': filtered_menus
+                'total_results': len(menus_data),
+                'ai_powered': ai_reranked,
+                'menus': menus_data
             })
             
         except Exception as e:
@@ -297,6 +318,7 @@ class CustomerBulkOrderViewSet(viewsets.ViewSet):
             )
     
     @action(detail=True, methods=['get'], url_path='ai-analyze')
+    @ai_job('ai_analyze_menu')
     def ai_analyze_menu(self, request, pk=None):
         """
         Get AI-powered analysis and categorization of a specific bulk menu
@@ -343,6 +365,7 @@ class CustomerBulkOrderViewSet(viewsets.ViewSet):
             )
     
     @action(detail=False, methods=['get'], url_path='ai-recommendations')
+    @ai_job('bulk_menu_ai_recommendations')
     def ai_recommendations(self, request):
         """
         Get AI-powered personalized menu recommendations
@@ -368,12 +391,12 @@ class CustomerBulkOrderViewSet(viewsets.ViewSet):
             menus_queryset = BulkMenu.objects.filter(
                 availability_status=True,
                 approval_status='approved'
-            ).select_related('chef')
+            ).select_related('chef').prefetch_related('items')
             
             # Convert to list of dicts
             menus_data = []
             for menu in menus_queryset:
-                menu_items = BulkMenuItem.objects.filter(bulk_menu=menu)
+                menu_items = menu.items.all()
                 mandatory_items = [item.item_name for item in menu_items if not item.is_optional]
                 
                 menus_data.append({
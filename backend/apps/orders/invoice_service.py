@@ -15,6 +15,7 @@ from reportlab.lib.units import inch
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
 from reportlab.pdfgen import canvas
 
+from apps.communications.services.email_outbox import email_outbox
 from .models import Order, BulkOrder
 
 
@@ -357,8 +358,8 @@ class InvoiceService:
             'application/pdf'
         )
         
-        # Send email
-        email.send()
+        # Queue email (sent by the outbox sender)
+        email_outbox.enqueue(email, category='invoice')
         
         return True
 
@@ -0,0 +1,72 @@
+"""
+Management command to rebuild DeliveryRollup rows from completed DeliveryLogs.
+Use after a deploy that introduces the rollups, or to repair them after manual data fixes.
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from apps.orders.models import DeliveryLog, DeliveryRollup, Order
+from apps.orders.services.delivery_log_service import delivery_log_service
+
+
+class Command(BaseCommand):
+    help = 'Rebuild per-agent daily delivery rollups from completed delivery logs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--backfill-logs',
+            action='store_true',
+            help='Create completed delivery logs for delivered orders that have none',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show what would be rebuilt without writing anything',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+
+        if options['backfill_logs']:
+            missing = Order.objects.filter(
+                status='delivered',
+                delivery_partner__isnull=False,
+                delivery_log__isnull=True,
+            )
+            if dry_run:
+                self.stdout.write(f'Would create delivery logs for {missing.count()} delivered orders')
+            else:
+                created = 0
+                for order in missing.iterator():
+                    # Closing the log also folds it into the rollups
+                    if delivery_log_service.close_log(order):
+                        created += 1
+                self.stdout.write(f'Created delivery logs for {created} delivered orders')
+
+        logs = DeliveryLog.objects.filter(
+            status='completed', end_time__isnull=False
+        ).select_related('order')
+
+        if dry_run:
+            self.stdout.write(
+                self.style.WARNING(
+                    f'[DRY RUN] Would rebuild rollups from {logs.count()} completed delivery logs'
+                )
+            )
+            return
+
+        rollups = {}
+        with transaction.atomic():
+            DeliveryRollup.objects.all().delete()
+            for log in logs.iterator():
+                key = (log.delivery_agent_id, timezone.localdate(log.end_time))
+                if key not in rollups:
+                    rollups[key] = DeliveryRollup(delivery_agent_id=key[0], date=key[1])
+                rollups[key].add_delivery(log)
+            DeliveryRollup.objects.bulk_create(rollups.values())
+            logs.filter(counted_in_rollup=False).update(counted_in_rollup=True)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt {len(rollups)} delivery rollups')
+        )
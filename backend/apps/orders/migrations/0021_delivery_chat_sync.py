@@ -0,0 +1,71 @@
+# Generated by Django 5.2.5 on 2025-10-26 10:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_unread_counts(apps, schema_editor):
+    """Seed read states from messages that are still unread"""
+    DeliveryChat = apps.get_model("orders", "DeliveryChat")
+    DeliveryChatReadState = apps.get_model("orders", "DeliveryChatReadState")
+
+    unread = (
+        DeliveryChat.objects.filter(is_read=False)
+        .order_by()
+        .values("order_id", "receiver_id")
+        .annotate(total=models.Count("id"))
+    )
+    DeliveryChatReadState.objects.bulk_create(
+        [
+            DeliveryChatReadState(
+                order_id=row["order_id"],
+                user_id=row["receiver_id"],
+                unread_count=row["total"],
+            )
+            for row in unread.iterator()
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0020_merge_20251025_1420'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeliveryChatReadState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('unread_count', models.PositiveIntegerField(default=0)),
+                ('last_read_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'delivery_chat_read_states',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='deliverychat',
+            index=models.Index(fields=['order', 'created_at'], name='delivery_ch_order_i_65d238_idx'),
+        ),
+        migrations.AddField(
+            model_name='deliverychatreadstate',
+            name='order',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chat_read_states', to='orders.order'),
+        ),
+        migrations.AddField(
+            model_name='deliverychatreadstate',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='delivery_chat_read_states', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterUniqueTogether(
+            name='deliverychatreadstate',
+            unique_together={('order', 'user')},
+        ),
+        migrations.RunPython(backfill_unread_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.5 on 2025-10-26 11:40
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0021_delivery_chat_sync'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deliverylog',
+            name='counted_in_rollup',
+            field=models.BooleanField(default=False, help_text='Whether this delivery is included in DeliveryRollup'),
+        ),
+        migrations.CreateModel(
+            name='DeliveryRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(db_index=True)),
+                ('delivery_count', models.PositiveIntegerField(default=0)),
+                ('on_time_count', models.PositiveIntegerField(default=0)),
+                ('late_count', models.PositiveIntegerField(default=0)),
+                ('total_duration_minutes', models.PositiveIntegerField(default=0)),
+                ('total_distance_km', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10)),
+                ('total_delivery_fee', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('total_order_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('duration_histogram', models.JSONField(blank=True, default=dict, help_text='Delivery count per whole minute of duration, for percentiles')),
+                ('p50_duration_minutes', models.PositiveIntegerField(blank=True, null=True)),
+                ('p90_duration_minutes', models.PositiveIntegerField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('delivery_agent', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='delivery_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'delivery_rollups',
+                'ordering': ['-date'],
+                'unique_together': {('delivery_agent', 'date')},
+            },
+        ),
+    ]
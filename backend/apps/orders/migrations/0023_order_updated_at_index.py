@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2025-10-26 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0022_delivery_rollups'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='order',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
@@ -187,7 +187,7 @@ class Order(models.Model):
 
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     confirmed_at = models.DateTimeField(null=True, blank=True)
     cancelled_at = models.DateTimeField(null=True, blank=True)
 
@@ -790,9 +790,59 @@ class DeliveryChat(models.Model):
     def __str__(self):
         return f"Message {self.message_id} - Order {self.order.order_id}"
 
+    def save(self, *args, **kwargs):
+        is_new = self._state.adding
+        super().save(*args, **kwargs)
+        # Keep the receiver's unread counter in step with new messages
+        if is_new:
+            DeliveryChatReadState.increment_unread(self.order_id, self.receiver_id)
+
     class Meta:
         db_table = "delivery_chats"
         ordering = ["created_at"]
+        indexes = [
+            models.Index(fields=["order", "created_at"]),
+        ]
+
+
+class DeliveryChatReadState(models.Model):
+    """Per-participant unread counter for an order's delivery chat"""
+
+    order = models.ForeignKey(
+        Order, on_delete=models.CASCADE, related_name="chat_read_states"
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="delivery_chat_read_states",
+    )
+    unread_count = models.PositiveIntegerField(default=0)
+    last_read_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Chat read state - Order {self.order_id} - User {self.user_id}"
+
+    @classmethod
+    def increment_unread(cls, order_id, user_id):
+        """Atomically add one unread message for ``user_id``"""
+        from django.utils import timezone
+
+        updated = cls.objects.filter(order_id=order_id, user_id=user_id).update(
+            unread_count=models.F("unread_count") + 1, updated_at=timezone.now()
+        )
+        if not updated:
+            state, created = cls.objects.get_or_create(
+                order_id=order_id, user_id=user_id, defaults={"unread_count": 1}
+            )
+            if not created:
+                cls.objects.filter(pk=state.pk).update(
+                    unread_count=models.F("unread_count") + 1
+                )
+
+    class Meta:
+        db_table = "delivery_chat_read_states"
+        unique_together = ["order", "user"]
 
 
 class DeliveryLog(models.Model):
@@ -825,19 +875,156 @@ class DeliveryLog(models.Model):
         max_length=20, choices=STATUS_CHOICES, default="in_progress"
     )
     notes = models.TextField(blank=True, null=True)
+    counted_in_rollup = models.BooleanField(
+        default=False, help_text="Whether this delivery is included in DeliveryRollup"
+    )
 
     def __str__(self):
         return f"Log {self.log_id} - Order {self.order.order_id}"
 
     def save(self, *args, **kwargs):
+        from django.db import transaction
+
         # Auto-calculate total time if end_time is set
         if self.end_time and self.start_time:
             delta = self.end_time - self.start_time
             self.total_time_minutes = int(delta.total_seconds() / 60)
-        super().save(*args, **kwargs)
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+            # Fold a closed delivery into the rollups exactly once; the
+            # conditional UPDATE makes concurrent saves count it only once.
+            if self.status == "completed" and self.end_time and not self.counted_in_rollup:
+                claimed = DeliveryLog.objects.filter(
+                    pk=self.pk, counted_in_rollup=False
+                ).update(counted_in_rollup=True)
+                self.counted_in_rollup = True
+                if claimed:
+                    DeliveryRollup.record_delivery(self)
 
     class Meta:
         db_table = "delivery_logs"
         ordering = ["-start_time"]
-        db_table = "delivery_logs"
-        ordering = ["-start_time"]
+
+
+class DeliveryRollup(models.Model):
+    """Per-agent, per-day delivery performance, updated as DeliveryLogs close"""
+
+    delivery_agent = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="delivery_rollups",
+    )
+    date = models.DateField(db_index=True)
+    delivery_count = models.PositiveIntegerField(default=0)
+    on_time_count = models.PositiveIntegerField(default=0)
+    late_count = models.PositiveIntegerField(default=0)
+    total_duration_minutes = models.PositiveIntegerField(default=0)
+    total_distance_km = models.DecimalField(
+        max_digits=10, decimal_places=2, default=Decimal("0.00")
+    )
+    total_delivery_fee = models.DecimalField(
+        max_digits=12, decimal_places=2, default=Decimal("0.00")
+    )
+    total_order_amount = models.DecimalField(
+        max_digits=12, decimal_places=2, default=Decimal("0.00")
+    )
+    duration_histogram = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Delivery count per whole minute of duration, for percentiles",
+    )
+    p50_duration_minutes = models.PositiveIntegerField(null=True, blank=True)
+    p90_duration_minutes = models.PositiveIntegerField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Rollup {self.date} - Agent {self.delivery_agent_id}"
+
+    @staticmethod
+    def duration_percentile(histogram, percentile):
+        """Nearest-rank percentile from a {minutes: count} histogram"""
+        total = sum(histogram.values())
+        if not total:
+            return None
+        rank = max(1, math.ceil(percentile / 100 * total))
+        seen = 0
+        for minutes in sorted(histogram, key=int):
+            seen += histogram[minutes]
+            if seen >= rank:
+                return int(minutes)
+        return None
+
+    def add_delivery(self, log):
+        """Accumulate one completed DeliveryLog into this row (caller saves)"""
+        order = log.order
+        duration = max(log.total_time_minutes or 0, 0)
+
+        self.delivery_count += 1
+        self.total_duration_minutes += duration
+        self.total_distance_km += log.distance_km or Decimal("0.00")
+        self.total_delivery_fee += order.delivery_fee or Decimal("0.00")
+        self.total_order_amount += order.total_amount or Decimal("0.00")
+        if order.estimated_delivery_time:
+            if log.end_time <= order.estimated_delivery_time:
+                self.on_time_count += 1
+            else:
+                self.late_count += 1
+
+        histogram = dict(self.duration_histogram or {})
+        histogram[str(duration)] = histogram.get(str(duration), 0) + 1
+        self.duration_histogram = histogram
+        self.p50_duration_minutes = self.duration_percentile(histogram, 50)
+        self.p90_duration_minutes = self.duration_percentile(histogram, 90)
+
+    @classmethod
+    def record_delivery(cls, log):
+        """Add a completed DeliveryLog to its agent's rollup for the day it ended"""
+        from django.db import transaction
+        from django.utils import timezone
+
+        day = timezone.localdate(log.end_time)
+        with transaction.atomic():
+            cls.objects.get_or_create(delivery_agent_id=log.delivery_agent_id, date=day)
+            rollup = cls.objects.select_for_update().get(
+                delivery_agent_id=log.delivery_agent_id, date=day
+            )
+            rollup.add_delivery(log)
+            rollup.save()
+
+    @classmethod
+    def summarize(cls, rollups):
+        """Combine rollup rows (any agents/days) into one set of stats"""
+        summary = {
+            "delivery_count": 0,
+            "on_time_count": 0,
+            "late_count": 0,
+            "total_duration_minutes": 0,
+            "total_distance_km": Decimal("0.00"),
+            "total_delivery_fee": Decimal("0.00"),
+            "total_order_amount": Decimal("0.00"),
+        }
+        histogram = {}
+        for rollup in rollups:
+            for field in summary:
+                summary[field] += getattr(rollup, field)
+            for minutes, count in (rollup.duration_histogram or {}).items():
+                histogram[minutes] = histogram.get(minutes, 0) + count
+
+        count = summary["delivery_count"]
+        rated = summary["on_time_count"] + summary["late_count"]
+        summary["avg_duration_minutes"] = (
+            round(summary["total_duration_minutes"] / count, 1) if count else None
+        )
+        summary["on_time_rate"] = (
+            round(summary["on_time_count"] / rated * 100, 1) if rated else 0
+        )
+        summary["p50_duration_minutes"] = cls.duration_percentile(histogram, 50)
+        summary["p90_duration_minutes"] = cls.duration_percentile(histogram, 90)
+        return summary
+
+    class Meta:
+        db_table = "delivery_rollups"
+        ordering = ["-date"]
+        unique_together = ["delivery_agent", "date"]
@@ -5,6 +5,7 @@ Automatically cancels orders that haven't been confirmed by chef within 10 minut
 import logging
 from datetime import timedelta
 
+from django.conf import settings
 from django.utils import timezone
 from django_apscheduler.jobstores import DjangoJobStore
 from django_apscheduler.models import DjangoJobExecution
@@ -95,6 +96,104 @@ def delete_old_job_executions(max_age=604_800):
         logger.error(f'❌ Error cleaning up old job executions: {str(e)}')
 
 
+def refresh_admin_dashboard_snapshot():
+    """
+    Recompute the admin dashboard stats snapshot when writes have marked it
+    stale or it is older than ADMIN_DASHBOARD_SNAPSHOT_MAX_AGE.
+    """
+    try:
+        from apps.admin_management.services.dashboard_snapshot import dashboard_snapshot_service
+
+        if dashboard_snapshot_service.refresh_if_due():
+            logger.debug('📊 Admin dashboard snapshot refreshed')
+    except Exception as e:
+        logger.error(f'❌ Error refreshing admin dashboard snapshot: {str(e)}')
+
+
+def label_communication_sentiment():
+    """
+    Store sentiment labels on communications that do not have one yet,
+    in batches of SENTIMENT_BATCH_SIZE (one AI prompt per batch).
+    """
+    try:
+        from apps.communications.services.sentiment_pipeline import sentiment_pipeline
+
+        labelled = sentiment_pipeline.label_pending(
+            limit=getattr(settings, 'SENTIMENT_LABEL_MAX_PER_RUN', 200)
+        )
+        if labelled:
+            logger.info(f'💬 Labelled sentiment for {labelled} communications')
+    except Exception as e:
+        logger.error(f'❌ Error labelling communication sentiment: {str(e)}')
+
+
+def expire_ai_jobs():
+    """
+    Fail AI jobs left queued / running past AI_JOB_TIMEOUT_SECONDS (their
+    process restarted) and delete finished jobs past AI_JOB_RETENTION_HOURS.
+    """
+    try:
+        from apps.admin_management.services.ai_jobs import ai_job_runner
+
+        counts = ai_job_runner.expire_jobs()
+        if counts['expired'] or counts['deleted']:
+            logger.info(
+                f"🧹 AI jobs: {counts['expired']} expired, {counts['deleted']} deleted"
+            )
+    except Exception as e:
+        logger.error(f'❌ Error expiring AI jobs: {str(e)}')
+
+
+def cleanup_expired_auth_records():
+    """
+    Delete expired JWT tokens, email OTPs and referral tokens in bounded,
+    throttled batches (see AuthHousekeeping).
+    """
+    try:
+        from apps.authentication.services.housekeeping import auth_housekeeping
+
+        results = auth_housekeeping.run()
+        removed = {task: result['deleted'] for task, result in results.items() if result.get('deleted')}
+        if removed:
+            logger.info(f'🧹 Auth housekeeping removed {removed}')
+        return results
+    except Exception as e:
+        logger.error(f'❌ Error cleaning up expired auth records: {str(e)}')
+        return {}
+
+
+def send_email_outbox():
+    """
+    Send queued emails the sender thread has not picked up (retries, or
+    messages queued by a process that has since stopped) and delete old
+    sent / failed messages.
+    """
+    try:
+        from apps.communications.services.email_outbox import email_outbox
+
+        email_outbox.send_pending()
+        purged = email_outbox.purge()
+        if purged:
+            logger.info(f'🧹 Deleted {purged} old outbox emails')
+    except Exception as e:
+        logger.error(f'❌ Error sending email outbox: {str(e)}')
+
+
+def resume_email_broadcasts():
+    """
+    Resume email broadcasts whose worker stopped (process restart) from the
+    last user they reached.
+    """
+    try:
+        from apps.communications.services.broadcast_service import broadcast_sender
+
+        resumed = broadcast_sender.resume_stalled()
+        if resumed:
+            logger.info(f'📧 Resumed {resumed} email broadcasts')
+    except Exception as e:
+        logger.error(f'❌ Error resuming email broadcasts: {str(e)}')
+
+
 # Create the scheduler instance
 scheduler = BackgroundScheduler()
 
@@ -123,6 +222,74 @@ def start_scheduler():
             max_instances=1,  # Only one instance should run at a time
         )
         
+        # Register admin dashboard snapshot refresh
+        scheduler.add_job(
+            refresh_admin_dashboard_snapshot,
+            trigger=IntervalTrigger(
+                seconds=getattr(settings, 'ADMIN_DASHBOARD_SNAPSHOT_INTERVAL', 60)
+            ),
+            id='refresh_admin_dashboard_snapshot',
+            name='Refresh admin dashboard snapshot',
+            replace_existing=True,
+            max_instances=1,
+        )
+        
+        # Register communication sentiment labelling
+        scheduler.add_job(
+            label_communication_sentiment,
+            trigger=IntervalTrigger(
+                seconds=getattr(settings, 'SENTIMENT_LABEL_INTERVAL', 60)
+            ),
+            id='label_communication_sentiment',
+            name='Label communication sentiment',
+            replace_existing=True,
+            max_instances=1,
+        )
+        
+        # Register AI job expiry / cleanup - runs every 5 minutes
+        scheduler.add_job(
+            expire_ai_jobs,
+            trigger=IntervalTrigger(minutes=5),
+            id='expire_ai_jobs',
+            name='Expire and clean up AI jobs',
+            replace_existing=True,
+            max_instances=1,
+        )
+        
+        # Register email outbox sender
+        scheduler.add_job(
+            send_email_outbox,
+            trigger=IntervalTrigger(
+                seconds=getattr(settings, 'EMAIL_OUTBOX_POLL_SECONDS', 30)
+            ),
+            id='send_email_outbox',
+            name='Send queued emails',
+            replace_existing=True,
+            max_instances=1,
+        )
+        
+        # Register stalled broadcast resume - runs every 5 minutes
+        scheduler.add_job(
+            resume_email_broadcasts,
+            trigger=IntervalTrigger(minutes=5),
+            id='resume_email_broadcasts',
+            name='Resume stalled email broadcasts',
+            replace_existing=True,
+            max_instances=1,
+        )
+        
+        # Register expired token / OTP cleanup
+        scheduler.add_job(
+            cleanup_expired_auth_records,
+            trigger=IntervalTrigger(
+                minutes=getattr(settings, 'HOUSEKEEPING_INTERVAL_MINUTES', 60)
+            ),
+            id='cleanup_expired_auth_records',
+            name='Clean up expired tokens and OTPs',
+            replace_existing=True,
+            max_instances=1,
+        )
+        
         # Register cleanup job - runs once a week
         scheduler.add_job(
             delete_old_job_executions,
@@ -1223,7 +1223,8 @@ class DeliveryChatSerializer(serializers.ModelSerializer):
 
     def get_sender_role(self, obj):
         """Get sender's role (customer or delivery_agent)"""
-        if hasattr(obj.sender, "deliveryagent"):
+        # Role lives on the (select_related) sender row; avoids a profile query per message
+        if obj.sender.role in ["delivery_agent", "DeliveryAgent"]:
             return "delivery_agent"
         return "customer"
 
@@ -1231,7 +1232,7 @@ class DeliveryChatSerializer(serializers.ModelSerializer):
         """Check if message was sent by the current user"""
         request = self.context.get("request")
         if request and request.user:
-            return obj.sender == request.user
+            return obj.sender_id == request.user.pk
         return False
 
 
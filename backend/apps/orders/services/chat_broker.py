@@ -0,0 +1,148 @@
+"""
+Delivery Chat Broker
+
+Pub/sub fan-out for delivery chat messages, keyed by order id. Messages are
+published when a ``DeliveryChat`` row is committed and pushed to every open
+Server-Sent Events stream for that order.
+
+Backends:
+- ``InMemoryChatBroker`` (default): single process / single node deployments
+- ``RedisChatBroker``: multi-node deployments, requires the ``redis`` package
+
+Select the backend with the ``DELIVERY_CHAT_BROKER`` setting (dotted path).
+"""
+
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+from typing import AsyncIterator, Dict, Optional
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class BaseChatBroker:
+    """Interface every chat broker backend implements"""
+
+    def publish(self, order_id: int, payload: Dict) -> None:
+        """Publish ``payload`` to subscribers of ``order_id``. Safe to call from sync code."""
+        raise NotImplementedError
+
+    def subscribe(self, order_id: int) -> AsyncIterator[Dict]:
+        """Async iterator yielding payloads published for ``order_id``"""
+        raise NotImplementedError
+
+
+class InMemoryChatBroker(BaseChatBroker):
+    """
+    Process-local broker backed by one asyncio queue per subscriber.
+
+    Publishing happens in request threads while subscribers live on the ASGI
+    event loop, so payloads are handed over with ``call_soon_threadsafe``.
+    """
+
+    QUEUE_SIZE = 100
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def publish(self, order_id: int, payload: Dict) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers.get(order_id, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._offer, queue, payload)
+            except RuntimeError:
+                # Event loop already closed; the subscriber is going away
+                pass
+
+    async def subscribe(self, order_id: int) -> AsyncIterator[Dict]:
+        queue = asyncio.Queue(maxsize=self.QUEUE_SIZE)
+        subscriber = (asyncio.get_running_loop(), queue)
+        with self._lock:
+            self._subscribers[order_id].add(subscriber)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            with self._lock:
+                self._subscribers[order_id].discard(subscriber)
+                if not self._subscribers[order_id]:
+                    del self._subscribers[order_id]
+
+    def subscriber_count(self, order_id: Optional[int] = None) -> int:
+        with self._lock:
+            if order_id is not None:
+                return len(self._subscribers.get(order_id, ()))
+            return sum(len(subs) for subs in self._subscribers.values())
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, payload: Dict) -> None:
+        # A slow client drops messages instead of growing memory; it can
+        # resync through the ?after= cursor on reconnect.
+        try:
+            queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            logger.warning("Dropping delivery chat message for slow subscriber")
+
+
+class RedisChatBroker(BaseChatBroker):
+    """Broker for multi-node deployments using Redis pub/sub"""
+
+    CHANNEL_PREFIX = 'delivery_chat:'
+
+    def __init__(self, url: Optional[str] = None):
+        try:
+            import redis
+            import redis.asyncio as redis_asyncio
+        except ImportError:
+            raise ImproperlyConfigured(
+                "RedisChatBroker requires the 'redis' package. Install it or use InMemoryChatBroker."
+            )
+        self.url = url or getattr(settings, 'DELIVERY_CHAT_REDIS_URL', 'redis://localhost:6379/0')
+        self._client = redis.Redis.from_url(self.url)
+        self._async_redis = redis_asyncio
+
+    def publish(self, order_id: int, payload: Dict) -> None:
+        self._client.publish(
+            f"{self.CHANNEL_PREFIX}{order_id}", json.dumps(payload, cls=DjangoJSONEncoder)
+        )
+
+    async def subscribe(self, order_id: int) -> AsyncIterator[Dict]:
+        client = self._async_redis.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(f"{self.CHANNEL_PREFIX}{order_id}")
+        try:
+            async for message in pubsub.listen():
+                if message.get('type') == 'message':
+                    yield json.loads(message['data'])
+        finally:
+            await pubsub.unsubscribe()
+            await pubsub.aclose()
+            await client.aclose()
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_chat_broker() -> BaseChatBroker:
+    """Return the process-wide broker configured by ``DELIVERY_CHAT_BROKER``"""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                backend_path = getattr(
+                    settings,
+                    'DELIVERY_CHAT_BROKER',
+                    'apps.orders.services.chat_broker.InMemoryChatBroker',
+                )
+                _broker = import_string(backend_path)()
+    return _broker
@@ -0,0 +1,104 @@
+"""
+Delivery Chat Service
+
+Incremental sync for the customer <-> delivery partner chat:
+- ``?after=<message_id | ISO timestamp>`` returns only messages newer than the cursor
+- Unread counts come from per-participant ``DeliveryChatReadState`` rows that are
+  maintained when messages are written, so a poll never counts the conversation
+"""
+
+import uuid
+from datetime import datetime
+from typing import List, Optional
+
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from ..models import DeliveryChat, DeliveryChatReadState, Order
+
+
+class InvalidChatCursor(ValueError):
+    """Raised when an ``after`` cursor is neither a message id nor a timestamp"""
+
+
+class DeliveryChatService:
+    """Cursor-based reads and counter-based unread tracking for delivery chats"""
+
+    def get_messages(self, order: Order, after: Optional[str] = None) -> List[DeliveryChat]:
+        """Return messages for ``order`` in send order, optionally only those after the cursor"""
+        messages = (
+            DeliveryChat.objects.filter(order=order)
+            .select_related('sender')
+            .order_by('created_at', 'id')
+        )
+        if after:
+            messages = messages.filter(self._cursor_filter(order, after))
+        return list(messages)
+
+    def get_unread_count(self, order: Order, user) -> int:
+        unread = (
+            DeliveryChatReadState.objects.filter(order=order, user=user)
+            .values_list('unread_count', flat=True)
+            .first()
+        )
+        return unread or 0
+
+    def mark_read(self, order: Order, user) -> int:
+        """
+        Mark the user's received messages as read.
+
+        Skips all writes when the counter says there is nothing unread.
+        Returns the remaining unread count.
+        """
+        if not self.get_unread_count(order, user):
+            return 0
+
+        marked = DeliveryChat.objects.filter(
+            order=order, receiver=user, is_read=False
+        ).update(is_read=True)
+
+        # Subtract what was actually marked so messages that arrive
+        # concurrently are not lost from the counter.
+        DeliveryChatReadState.objects.filter(order=order, user=user).update(
+            unread_count=Greatest(F('unread_count') - marked, 0),
+            last_read_at=timezone.now(),
+        )
+        return self.get_unread_count(order, user)
+
+    @staticmethod
+    def next_cursor(messages: List[DeliveryChat], after: Optional[str] = None) -> Optional[str]:
+        """Cursor the client should send on its next poll"""
+        if messages:
+            return str(messages[-1].message_id)
+        return after
+
+    def _cursor_filter(self, order: Order, after: str) -> Q:
+        try:
+            message_id = uuid.UUID(str(after))
+        except ValueError:
+            message_id = None
+
+        if message_id is not None:
+            anchor = (
+                DeliveryChat.objects.filter(order=order, message_id=message_id)
+                .values('id', 'created_at')
+                .first()
+            )
+            if anchor is None:
+                raise InvalidChatCursor(f"Unknown message id: {after}")
+            return Q(created_at__gt=anchor['created_at']) | Q(
+                created_at=anchor['created_at'], id__gt=anchor['id']
+            )
+
+        timestamp = parse_datetime(str(after).replace(' ', '+'))
+        if not isinstance(timestamp, datetime):
+            raise InvalidChatCursor(f"Invalid cursor: {after}")
+        if timezone.is_naive(timestamp):
+            timestamp = timezone.make_aware(timestamp)
+        return Q(created_at__gt=timestamp)
+
+
+# Singleton instance
+delivery_chat_service = DeliveryChatService()
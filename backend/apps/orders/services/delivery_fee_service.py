@@ -9,7 +9,6 @@ This service calculates dynamic delivery fees based on:
 """
 
 import logging
-import math
 from datetime import datetime, time
 from decimal import Decimal
 from typing import Dict, List, Optional, Tuple
@@ -20,6 +19,7 @@ import requests
 from decouple import config
 from django.conf import settings
 from django.core.cache import cache
+from utils.geo import haversine_distance_km
 
 logger = logging.getLogger(__name__)
 
@@ -260,24 +260,7 @@ class DeliveryFeeCalculator:
         Calculate distance between two points using Haversine formula
         Returns distance in kilometers
         """
-        # Earth radius in kilometers
-        R = 6371.0
-        
-        # Convert to radians
-        lat1_rad = math.radians(lat1)
-        lon1_rad = math.radians(lon1)
-        lat2_rad = math.radians(lat2)
-        lon2_rad = math.radians(lon2)
-        
-        # Haversine formula
-        dlat = lat2_rad - lat1_rad
-        dlon = lon2_rad - lon1_rad
-        
-        a = math.sin(dlat / 2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlon / 2)**2
-        c = 2 * math.asin(math.sqrt(a))
-        
-        distance = R * c
-        return distance
+        return haversine_distance_km(lat1, lon1, lat2, lon2)
     
     def _get_route_waypoints(
         self,
@@ -0,0 +1,91 @@
+"""
+Delivery Log Service
+
+Keeps a ``DeliveryLog`` in step with the delivery lifecycle:
+- opened when a delivery partner claims the order
+- pickup time stamped when the order is picked up
+- closed when the order is delivered, which folds it into ``DeliveryRollup``
+
+Delivery stats screens read the rollups instead of scanning orders.
+"""
+
+import logging
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, Optional
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from ..models import DeliveryLog, DeliveryRollup, Order
+
+logger = logging.getLogger(__name__)
+
+
+class DeliveryLogService:
+    """Lifecycle of delivery logs and reads over the delivery rollups"""
+
+    def open_log(self, order: Order, delivery_agent) -> DeliveryLog:
+        log, _ = DeliveryLog.objects.get_or_create(
+            order=order,
+            defaults={
+                'delivery_agent': delivery_agent,
+                'start_time': timezone.now(),
+                'distance_km': order.distance_km or Decimal('0.00'),
+            },
+        )
+        return log
+
+    def mark_picked_up(self, order: Order):
+        DeliveryLog.objects.filter(order=order, pickup_time__isnull=True).update(
+            pickup_time=timezone.now()
+        )
+
+    def close_log(self, order: Order, status: str = 'completed', end_time=None) -> Optional[DeliveryLog]:
+        """Close the order's delivery log; saving it updates the rollups"""
+        if not order.delivery_partner_id:
+            return None
+
+        log = DeliveryLog.objects.filter(order=order).first()
+        if log is None:
+            # Order was assigned before logs were kept; start from the claim time
+            log = DeliveryLog(
+                order=order,
+                delivery_agent_id=order.delivery_partner_id,
+                start_time=self._claimed_at(order),
+                distance_km=order.distance_km or Decimal('0.00'),
+            )
+        if log.status != 'in_progress':
+            return log
+
+        log.end_time = end_time or order.actual_delivery_time or timezone.now()
+        log.status = status
+        log.save()
+        return log
+
+    def summarize(self, start_date: Optional[date] = None, delivery_agent=None) -> Dict:
+        """Delivery stats for a date range (and optionally one agent) from the rollups"""
+        rollups = DeliveryRollup.objects.all()
+        if start_date:
+            rollups = rollups.filter(date__gte=start_date)
+        if delivery_agent is not None:
+            rollups = rollups.filter(delivery_agent=delivery_agent)
+        return DeliveryRollup.summarize(rollups)
+
+    def summarize_days(self, days: int, delivery_agent=None) -> Dict:
+        start_date = timezone.localdate() - timedelta(days=days)
+        return self.summarize(start_date=start_date, delivery_agent=delivery_agent)
+
+    @staticmethod
+    def _claimed_at(order: Order):
+        timestamps = order.status_timestamps or {}
+        for status in ('out_for_delivery', 'picked_up', 'ready'):
+            value = timestamps.get(status)
+            parsed = parse_datetime(value) if value else None
+            if parsed:
+                return parsed
+        return order.created_at
+
+
+# Singleton instance
+delivery_log_service = DeliveryLogService()
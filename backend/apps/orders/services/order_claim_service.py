@@ -0,0 +1,113 @@
+"""
+Order Claim Service
+
+Assigns an order to a delivery partner with a single conditional UPDATE
+(``... WHERE delivery_partner IS NULL``) so that concurrent "accept" taps
+resolve to exactly one winner without a read/modify/write window.
+
+Claim attempts and lost races are counted in the cache so contention on the
+available-orders board can be monitored cheaply.
+"""
+
+import logging
+from typing import Dict, Optional, Tuple
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from ..models import Order
+
+logger = logging.getLogger(__name__)
+
+
+class OrderClaimService:
+    """Race-free claiming of orders by delivery partners"""
+
+    CLAIM_ATTEMPTS_KEY = 'orders:claim:attempts'
+    CLAIM_CONFLICTS_KEY = 'orders:claim:conflicts'
+
+    def claim_for_delivery(
+        self,
+        order: Order,
+        delivery_partner,
+        new_status: str = 'out_for_delivery'
+    ) -> Tuple[bool, Optional[int]]:
+        """
+        Claim ``order`` for ``delivery_partner`` if nobody else has.
+
+        Returns:
+            Tuple of (claimed, winner_id). ``winner_id`` is the id of the
+            delivery partner holding the order after the attempt.
+        """
+        now = timezone.now()
+        status_timestamps = dict(order.status_timestamps or {})
+        if order.status != new_status:
+            status_timestamps[new_status] = now.isoformat()
+
+        claimed = Order.objects.filter(
+            pk=order.pk, delivery_partner__isnull=True
+        ).update(
+            delivery_partner=delivery_partner,
+            status=new_status,
+            status_timestamps=status_timestamps,
+            updated_at=now,
+        )
+        self._increment(self.CLAIM_ATTEMPTS_KEY)
+
+        if not claimed:
+            self._increment(self.CLAIM_CONFLICTS_KEY)
+            winner_id = (
+                Order.objects.filter(pk=order.pk)
+                .values_list('delivery_partner_id', flat=True)
+                .first()
+            )
+            logger.info(
+                f"Delivery claim conflict on order {order.pk}: "
+                f"user {delivery_partner.pk} lost to user {winner_id}"
+            )
+            return False, winner_id
+
+        order.delivery_partner = delivery_partner
+        order.status = new_status
+        order.status_timestamps = status_timestamps
+        order.updated_at = now
+
+        # The conditional UPDATE bypasses post_save, so send the status
+        # notification the signal would otherwise have produced.
+        try:
+            from apps.communications.utils import NotificationManager
+
+            NotificationManager.notify_order_status_change(order, new_status)
+        except Exception as e:
+            logger.error(f"Failed to send claim notification for order {order.pk}: {str(e)}")
+
+        return True, delivery_partner.pk
+
+    def get_contention_stats(self) -> Dict:
+        """Return claim attempt/conflict counters since the cache was last cleared"""
+        attempts = cache.get(self.CLAIM_ATTEMPTS_KEY, 0)
+        conflicts = cache.get(self.CLAIM_CONFLICTS_KEY, 0)
+        return {
+            'attempts': attempts,
+            'conflicts': conflicts,
+            'conflict_rate': round(conflicts / attempts, 4) if attempts else 0.0,
+        }
+
+    def reset_contention_stats(self):
+        cache.delete_many([self.CLAIM_ATTEMPTS_KEY, self.CLAIM_CONFLICTS_KEY])
+
+    @staticmethod
+    def _increment(key: str):
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Key missing (first use or evicted); add() keeps concurrent
+            # initialisers from clobbering each other.
+            cache.add(key, 0, None)
+            cache.incr(key)
+        except Exception as e:
+            logger.debug(f"Claim counter {key} unavailable: {str(e)}")
+
+
+# Singleton instance
+order_claim_service = OrderClaimService()
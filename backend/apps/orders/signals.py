@@ -1,8 +1,13 @@
+import logging
+
+from django.db import transaction
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 from apps.communications.utils import NotificationManager
-from .models import Order, BulkOrder
+from .models import Order, BulkOrder, DeliveryChat
+
+logger = logging.getLogger(__name__)
 
 User = get_user_model()
 
@@ -46,4 +51,26 @@ def notify_bulk_order_collaboration(sender, instance, created, **kwargs):
             subject=f"Bulk Order Collaboration Update: #{instance.order.order_number}",
             message=f"There has been an update to the collaboration status for bulk order #{instance.order.order_number}.",
             notification_type='bulk_order'
-        )
\ No newline at end of file
+        )
+
+
+@receiver(post_save, sender=DeliveryChat)
+def publish_delivery_chat_message(sender, instance, created, **kwargs):
+    """
+    Push new chat messages to open chat streams once the row is committed
+    """
+    if not created:
+        return
+
+    from .serializers import DeliveryChatSerializer
+    from .services.chat_broker import get_chat_broker
+
+    payload = DeliveryChatSerializer(instance).data
+
+    def _publish():
+        try:
+            get_chat_broker().publish(instance.order_id, payload)
+        except Exception as e:
+            logger.error(f"Failed to publish chat message {instance.message_id}: {str(e)}")
+
+    transaction.on_commit(_publish)
@@ -0,0 +1,75 @@
+import asyncio
+import threading
+
+from django.test import SimpleTestCase, TestCase
+
+
+class InMemoryChatBrokerTest(SimpleTestCase):
+    """Messages published from request threads reach async subscribers"""
+
+    def test_publish_from_thread_reaches_subscriber(self):
+        from apps.orders.services.chat_broker import InMemoryChatBroker
+
+        broker = InMemoryChatBroker()
+
+        async def scenario():
+            subscription = broker.subscribe(42)
+            receive = asyncio.ensure_future(subscription.__anext__())
+            await asyncio.sleep(0)
+            self.assertEqual(broker.subscriber_count(42), 1)
+
+            publisher = threading.Thread(target=broker.publish, args=(42, {"message": "On my way"}))
+            publisher.start()
+            publisher.join()
+            broker.publish(7, {"message": "other order"})
+
+            payload = await asyncio.wait_for(receive, timeout=1)
+            await subscription.aclose()
+            return payload
+
+        self.assertEqual(asyncio.run(scenario()), {"message": "On my way"})
+        self.assertEqual(broker.subscriber_count(), 0)
+
+
+class ChatStreamTicketTest(TestCase):
+    """Stream tickets are scoped to one order and the stream is ASGI-only"""
+
+    def setUp(self):
+        from django.contrib.auth import get_user_model
+
+        from apps.orders.models import Order
+
+        User = get_user_model()
+        self.customer = User.objects.create_user(
+            email="stream-customer@test.com", password="pass12345", name="Customer", role="customer"
+        )
+        self.chef = User.objects.create_user(
+            email="stream-chef@test.com", password="pass12345", name="Chef", role="cook"
+        )
+        self.order = Order.objects.create(customer=self.customer, chef=self.chef, status="out_for_delivery")
+        self.other_order = Order.objects.create(customer=self.customer, chef=self.chef, status="pending")
+
+    def test_ticket_only_opens_its_own_order(self):
+        from django.test import RequestFactory
+
+        from apps.orders.chat_stream_views import _authenticate, issue_stream_ticket
+
+        ticket = issue_stream_ticket(self.customer, self.order)
+        request = RequestFactory().get("/stream/", {"ticket": ticket})
+        self.assertEqual(_authenticate(request, self.order.pk), self.customer)
+        self.assertIsNone(_authenticate(request, self.other_order.pk))
+        self.assertIsNone(_authenticate(RequestFactory().get("/stream/", {"ticket": ticket + "x"}), self.order.pk))
+
+    def test_clients_poll_when_streaming_is_off_or_not_asgi(self):
+        from rest_framework.test import APIClient
+
+        client = APIClient()
+        client.force_authenticate(self.customer)
+        url = f"/api/orders/orders/{self.order.pk}/chat/stream-ticket/"
+        self.assertEqual(client.post(url).json(), {"stream": False})
+
+        with self.settings(DELIVERY_CHAT_SSE=True):
+            ticket = client.post(url).json()["ticket"]
+            # The test client is WSGI: the stream refuses rather than buffering forever
+            response = client.get(f"/api/orders/orders/{self.order.pk}/chat/stream/", {"ticket": ticket})
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,54 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+
+User = get_user_model()
+
+
+class DeliveryChatServiceTest(TestCase):
+    """Cursor reads and write-maintained unread counters for delivery chat"""
+
+    def setUp(self):
+        from apps.orders.models import Order
+
+        self.customer = User.objects.create_user(
+            email="chat-customer@test.com", password="pass12345", name="Customer", role="customer"
+        )
+        self.chef = User.objects.create_user(
+            email="chat-chef@test.com", password="pass12345", name="Chef", role="cook"
+        )
+        self.rider = User.objects.create_user(
+            email="chat-rider@test.com", password="pass12345", name="Rider", role="delivery_agent"
+        )
+        self.order = Order.objects.create(
+            customer=self.customer, chef=self.chef, delivery_partner=self.rider, status="out_for_delivery"
+        )
+
+    def _send(self, sender, receiver, text):
+        from apps.orders.models import DeliveryChat
+
+        return DeliveryChat.objects.create(order=self.order, sender=sender, receiver=receiver, message=text)
+
+    def test_after_cursor_returns_only_newer_messages(self):
+        from apps.orders.services.delivery_chat_service import delivery_chat_service
+
+        first = self._send(self.customer, self.rider, "Where are you?")
+        self._send(self.rider, self.customer, "Arriving in 5 minutes")
+        self._send(self.customer, self.rider, "Thanks")
+
+        newer = delivery_chat_service.get_messages(self.order, after=str(first.message_id))
+        self.assertEqual([m.message for m in newer], ["Arriving in 5 minutes", "Thanks"])
+        self.assertEqual(delivery_chat_service.next_cursor(newer), str(newer[-1].message_id))
+        self.assertEqual(delivery_chat_service.get_messages(self.order, after=str(newer[-1].message_id)), [])
+
+    def test_unread_counter_tracks_writes_and_reads(self):
+        from apps.orders.services.delivery_chat_service import delivery_chat_service
+
+        self._send(self.customer, self.rider, "Hello")
+        self._send(self.customer, self.rider, "Are you close?")
+
+        self.assertEqual(delivery_chat_service.get_unread_count(self.order, self.rider), 2)
+        self.assertEqual(delivery_chat_service.get_unread_count(self.order, self.customer), 0)
+
+        self.assertEqual(delivery_chat_service.mark_read(self.order, self.rider), 0)
+        self.assertFalse(self.order.chat_messages.filter(receiver=self.rider, is_read=False).exists())
@@ -0,0 +1,88 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+
+User = get_user_model()
+
+
+class DeliveryRollupTest(TestCase):
+    """Closing delivery logs keeps the per-agent daily rollups current"""
+
+    def setUp(self):
+        self.customer = User.objects.create_user(
+            email="rollup-customer@test.com", password="pass12345", name="Customer", role="customer"
+        )
+        self.chef = User.objects.create_user(
+            email="rollup-chef@test.com", password="pass12345", name="Chef", role="cook"
+        )
+        self.rider = User.objects.create_user(
+            email="rollup-rider@test.com", password="pass12345", name="Rider", role="delivery_agent"
+        )
+
+    def _deliver(self, minutes, late=False):
+        from apps.orders.models import Order
+        from apps.orders.services.delivery_log_service import delivery_log_service
+
+        end = timezone.now()
+        order = Order.objects.create(
+            customer=self.customer,
+            chef=self.chef,
+            delivery_partner=self.rider,
+            status="out_for_delivery",
+            delivery_fee=Decimal("300.00"),
+            total_amount=Decimal("1500.00"),
+            distance_km=Decimal("4.50"),
+            estimated_delivery_time=end + timedelta(minutes=-5 if late else 5),
+        )
+        log = delivery_log_service.open_log(order, self.rider)
+        log.start_time = end - timedelta(minutes=minutes)
+        log.save()
+        return delivery_log_service.close_log(order, end_time=end)
+
+    def test_closing_logs_updates_rollup(self):
+        from apps.orders.models import DeliveryRollup
+
+        for minutes in (20, 30, 40):
+            self._deliver(minutes)
+        self._deliver(60, late=True)
+
+        rollup = DeliveryRollup.objects.get(delivery_agent=self.rider)
+        self.assertEqual(rollup.delivery_count, 4)
+        self.assertEqual(rollup.on_time_count, 3)
+        self.assertEqual(rollup.late_count, 1)
+        self.assertEqual(rollup.total_delivery_fee, Decimal("1200.00"))
+        self.assertEqual(rollup.p50_duration_minutes, 30)
+        self.assertEqual(rollup.p90_duration_minutes, 60)
+
+        summary = DeliveryRollup.summarize(DeliveryRollup.objects.all())
+        self.assertEqual(summary["avg_duration_minutes"], 37.5)
+        self.assertEqual(summary["on_time_rate"], 75.0)
+
+    def test_resaving_closed_log_is_not_counted_twice(self):
+        from apps.orders.models import DeliveryRollup
+
+        log = self._deliver(25)
+        log.notes = "Left at the door"
+        log.save()
+
+        self.assertEqual(DeliveryRollup.objects.get(delivery_agent=self.rider).delivery_count, 1)
+
+    def test_rebuild_command_matches_incremental_rollups(self):
+        from apps.orders.models import DeliveryRollup
+
+        for minutes in (15, 45):
+            self._deliver(minutes)
+        before = DeliveryRollup.objects.get(delivery_agent=self.rider)
+
+        call_command("rebuild_delivery_rollups", stdout=StringIO())
+
+        after = DeliveryRollup.objects.get(delivery_agent=self.rider)
+        self.assertEqual(after.delivery_count, before.delivery_count)
+        self.assertEqual(after.total_duration_minutes, before.total_duration_minutes)
+        self.assertEqual(after.duration_histogram, before.duration_histogram)
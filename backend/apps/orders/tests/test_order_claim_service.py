@@ -0,0 +1,52 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+
+
+User = get_user_model()
+
+
+class OrderClaimServiceTest(TestCase):
+    """The conditional UPDATE must hand an order to exactly one delivery partner"""
+
+    def setUp(self):
+        from apps.orders.models import Order
+
+        cache.clear()
+        self.customer = User.objects.create_user(
+            email="claim-customer@test.com", password="pass12345", name="Customer", role="customer"
+        )
+        self.chef = User.objects.create_user(
+            email="claim-chef@test.com", password="pass12345", name="Chef", role="cook"
+        )
+        self.rider_a = User.objects.create_user(
+            email="rider-a@test.com", password="pass12345", name="Rider A", role="delivery_agent"
+        )
+        self.rider_b = User.objects.create_user(
+            email="rider-b@test.com", password="pass12345", name="Rider B", role="delivery_agent"
+        )
+        self.order = Order.objects.create(customer=self.customer, chef=self.chef, status="ready")
+
+    def test_second_claim_loses_to_first(self):
+        from apps.orders.models import Order
+        from apps.orders.services.order_claim_service import order_claim_service
+
+        # Both riders loaded the order before either claimed it
+        stale_copy = Order.objects.get(pk=self.order.pk)
+
+        claimed, winner_id = order_claim_service.claim_for_delivery(self.order, self.rider_a)
+        self.assertTrue(claimed)
+        self.assertEqual(winner_id, self.rider_a.pk)
+
+        claimed, winner_id = order_claim_service.claim_for_delivery(stale_copy, self.rider_b)
+        self.assertFalse(claimed)
+        self.assertEqual(winner_id, self.rider_a.pk)
+
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.delivery_partner_id, self.rider_a.pk)
+        self.assertEqual(self.order.status, "out_for_delivery")
+        self.assertIn("out_for_delivery", self.order.status_timestamps)
+
+        stats = order_claim_service.get_contention_stats()
+        self.assertEqual(stats["attempts"], 2)
+        self.assertEqual(stats["conflicts"], 1)
@@ -3,6 +3,7 @@ from rest_framework.routers import DefaultRouter
 
 from . import views
 from .bulk_views import BulkOrderManagementViewSet, CollaborationRequestViewSet
+from .chat_stream_views import delivery_chat_stream
 from .customer_bulk_views import CustomerBulkOrderViewSet
 from .customer_views import (
     customer_dashboard_stats,
@@ -44,6 +45,12 @@ router.register(
 
 urlpatterns = [
     path("", include(router.urls)),
+    # Delivery chat push stream (Server-Sent Events, ASGI only)
+    path(
+        "orders/<int:pk>/chat/stream/",
+        delivery_chat_stream,
+        name="delivery-chat-stream",
+    ),
     # Customer-specific views
     path(
         "customer/stats/",
@@ -9,8 +9,11 @@ from apps.food.models import FoodPrice, FoodReview
 
 logger = logging.getLogger(__name__)
 from apps.payments.models import Payment
+from utils.db_routing import using_replica
+from utils.geo import haversine_distance_km
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db.models import Avg, Count, F, Q, Sum
+from django.db.models import Avg, F, Q, Sum
 from django.http import JsonResponse
 from django.utils import timezone
 from rest_framework import serializers, status, viewsets
@@ -24,6 +27,7 @@ from .models import (
     DeliveryIssue,
     DeliveryLog,
     DeliveryReview,
+    DeliveryRollup,
     LocationUpdate,
     Order,
     OrderItem,
@@ -38,6 +42,13 @@ from .serializers import (
     DeliveryReviewSerializer,
     UserAddressSerializer,
 )
+from .chat_stream_views import issue_stream_ticket, stream_enabled
+from .services.delivery_log_service import delivery_log_service
+from .services.delivery_chat_service import (
+    InvalidChatCursor,
+    delivery_chat_service,
+)
+from .services.order_claim_service import order_claim_service
 
 User = get_user_model()
 
@@ -525,23 +536,7 @@ class OrderViewSet(viewsets.ModelViewSet):
 
         # If chef location is provided, calculate distance
         if chef_lat is not None and chef_lng is not None:
-            from math import atan2, cos, radians, sin, sqrt
-
-            # Calculate distance using Haversine formula
-            def calculate_distance(lat1, lon1, lat2, lon2):
-                R = 6371  # Earth's radius in kilometers
-
-                lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
-                dlat = lat2 - lat1
-                dlon = lon2 - lon1
-
-                a = sin(dlat / 2) ** 2 + cos(lat1) * cos(lat2) * sin(dlon / 2) ** 2
-                c = 2 * atan2(sqrt(a), sqrt(1 - a))
-                distance = R * c
-
-                return distance
-
-            distance_km = calculate_distance(
+            distance_km = haversine_distance_km(
                 agent_lat, agent_lng, float(chef_lat), float(chef_lng)
             )
             # Validate distance to avoid DB out-of-range and unrealistic deliveries
@@ -570,9 +565,18 @@ class OrderViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_200_OK,
                 )
 
-        order.delivery_partner = request.user
-        order.status = "out_for_delivery"
-        order.save()
+        # Conditional UPDATE: only one concurrent accept can win the order
+        claimed, winner_id = order_claim_service.claim_for_delivery(
+            order, request.user
+        )
+        if not claimed:
+            return Response(
+                {
+                    "error": "Order already taken",
+                    "delivery_partner_id": winner_id,
+                },
+                status=status.HTTP_409_CONFLICT,
+            )
 
         # Add status history
         OrderStatusHistory.objects.create(
@@ -581,6 +585,7 @@ class OrderViewSet(viewsets.ModelViewSet):
             changed_by=request.user,
             notes="Order accepted by delivery agent",
         )
+        delivery_log_service.open_log(order, request.user)
 
         return Response(
             {
@@ -964,6 +969,12 @@ class OrderViewSet(viewsets.ModelViewSet):
             order=order, status=new_status, changed_by=request.user, notes=notes
         )
 
+        # Keep the delivery log (and through it the delivery rollups) current
+        if new_status == "picked_up":
+            delivery_log_service.mark_picked_up(order)
+        elif new_status == "delivered":
+            delivery_log_service.close_log(order)
+
         return Response(
             {
                 "success": f"Order status updated to {new_status}",
@@ -1035,7 +1046,7 @@ class OrderViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=["get"])
     def dashboard_summary(self, request):
-        today = timezone.now().date()
+        today = timezone.localdate()
 
         # Get delivery partner's orders
         delivery_orders = Order.objects.filter(delivery_partner=request.user)
@@ -1043,38 +1054,20 @@ class OrderViewSet(viewsets.ModelViewSet):
         active_deliveries = delivery_orders.exclude(
             status__in=["delivered", "cancelled"]
         ).count()
-        completed_today = delivery_orders.filter(
-            status="delivered", updated_at__date=today
-        ).count()
-        todays_earnings = (
-            delivery_orders.filter(
-                status="delivered", updated_at__date=today
-            ).aggregate(total=Sum("delivery_fee"))["total"]
-            or 0
-        )
 
-        # Calculate average delivery time
-        completed_orders = delivery_orders.filter(status="delivered").exclude(
-            actual_delivery_time__isnull=True
+        # Completed deliveries come from the per-day rollups, not an order scan
+        today_stats = delivery_log_service.summarize(
+            start_date=today, delivery_agent=request.user
         )
-
-        avg_time_minutes = 0
-        if completed_orders.exists():
-            total_seconds = sum(
-                [
-                    (order.actual_delivery_time - order.created_at).total_seconds()
-                    for order in completed_orders
-                    if order.actual_delivery_time
-                ]
-            )
-            avg_time_minutes = total_seconds / 60 / completed_orders.count()
+        overall_stats = delivery_log_service.summarize(delivery_agent=request.user)
 
         return Response(
             {
                 "active_deliveries": active_deliveries,
-                "completed_today": completed_today,
-                "todays_earnings": float(todays_earnings),
-                "avg_delivery_time_min": round(avg_time_minutes, 1),
+                "completed_today": today_stats["delivery_count"],
+                "todays_earnings": float(today_stats["total_delivery_fee"]),
+                "avg_delivery_time_min": overall_stats["avg_duration_minutes"] or 0,
+                "p90_delivery_time_min": overall_stats["p90_duration_minutes"],
             }
         )
 
@@ -1105,6 +1098,7 @@ class OrderViewSet(viewsets.ModelViewSet):
         OrderStatusHistory.objects.create(
             order=order, status="picked_up", changed_by=request.user, notes=notes
         )
+        delivery_log_service.mark_picked_up(order)
 
         return Response(
             {
@@ -1370,11 +1364,15 @@ class OrderViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        # Get all messages for this order
-        messages = DeliveryChat.objects.filter(order=order).order_by("created_at")
+        # Mark messages as read if user is the receiver (no-op when nothing is unread)
+        unread_count = delivery_chat_service.mark_read(order, request.user)
 
-        # Mark messages as read if user is the receiver
-        messages.filter(receiver=request.user, is_read=False).update(is_read=True)
+        # Only return messages newer than the client's cursor, if one was given
+        after = request.query_params.get("after")
+        try:
+            messages = delivery_chat_service.get_messages(order, after=after)
+        except InvalidChatCursor as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
         serializer = DeliveryChatSerializer(
             messages, many=True, context={"request": request}
@@ -1384,9 +1382,32 @@ class OrderViewSet(viewsets.ModelViewSet):
             {
                 "order_number": order.order_number,
                 "messages": serializer.data,
-                "unread_count": messages.filter(
-                    receiver=request.user, is_read=False
-                ).count(),
+                "unread_count": unread_count,
+                "next_cursor": delivery_chat_service.next_cursor(messages, after),
+            }
+        )
+
+    @action(detail=True, methods=["post"], url_path="chat/stream-ticket")
+    def chat_stream_ticket(self, request, pk=None):
+        """Short-lived ticket for the chat SSE stream, or stream=False to keep polling"""
+        order = self.get_object()
+
+        if not (
+            order.customer == request.user or order.delivery_partner == request.user
+        ):
+            return Response(
+                {"error": "You are not authorized to view these messages"},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        if not stream_enabled():
+            return Response({"stream": False})
+
+        return Response(
+            {
+                "stream": True,
+                "ticket": issue_stream_ticket(request.user, order),
+                "expires_in": getattr(settings, "DELIVERY_CHAT_TICKET_SECONDS", 60),
             }
         )
 
@@ -1848,6 +1869,7 @@ def chef_recent_activity(request):
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
+@using_replica
 def chef_income_data(request):
     """
     API endpoint that returns chef income analytics data for different time periods
@@ -1969,6 +1991,7 @@ def chef_income_data(request):
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
+@using_replica
 def chef_income_breakdown(request):
     """
     API endpoint that returns chef income breakdown by categories
@@ -2272,7 +2295,7 @@ def calculate_checkout(request):
             except Exception as e:
                 logger.warning(f"⚠️ Failed to calculate dynamic delivery fee: {str(e)}")
                 # Fallback to basic calculation with surcharges
-                distance_km = delivery_fee_calculator._haversine_distance(
+                distance_km = haversine_distance_km(
                     float(chef_latitude),
                     float(chef_longitude),
                     float(delivery_latitude),
@@ -2521,20 +2544,7 @@ def place_order(request):
 
             # Calculate distance if both coordinates available
             if chef_lat and chef_lng and delivery_lat and delivery_lng:
-                from math import atan2, cos, radians, sin, sqrt
-
-                def haversine_distance(lat1, lon1, lat2, lon2):
-                    R = 6371  # Earth's radius in km
-                    lat1, lon1, lat2, lon2 = map(
-                        radians, [float(lat1), float(lon1), float(lat2), float(lon2)]
-                    )
-                    dlat = lat2 - lat1
-                    dlon = lon2 - lon1
-                    a = sin(dlat / 2) ** 2 + cos(lat1) * cos(lat2) * sin(dlon / 2) ** 2
-                    c = 2 * atan2(sqrt(a), sqrt(1 - a))
-                    return R * c
-
-                distance_km = haversine_distance(
+                distance_km = haversine_distance_km(
                     chef_lat, chef_lng, delivery_lat, delivery_lng
                 )
 
@@ -2903,9 +2913,9 @@ class DeliveryTrackingViewSet(viewsets.ViewSet):
             ).values("issue_id", "issue_type", "description", "status", "created_at")
 
             # Get unread messages count
-            unread_messages = DeliveryChat.objects.filter(
-                order=order, receiver=request.user, is_read=False
-            ).count()
+            unread_messages = delivery_chat_service.get_unread_count(
+                order, request.user
+            )
 
             return Response(
                 {
@@ -3010,47 +3020,10 @@ class DeliveryTrackingViewSet(viewsets.ViewSet):
                 status__in=["out_for_delivery", "ready", "preparing"]
             ).count()
 
-            # Completed deliveries in time range
-            completed_orders = Order.objects.filter(
-                status="delivered", actual_delivery_time__gte=start_date
-            )
-            completed_count = completed_orders.count()
-
-            # Average delivery time (in minutes)
-            avg_delivery_time = None
-            if completed_count > 0:
-                completed_with_times = completed_orders.exclude(
-                    estimated_delivery_time__isnull=True,
-                    actual_delivery_time__isnull=True,
-                )
-
-                if completed_with_times.exists():
-                    total_minutes = 0
-                    count = 0
-                    for order in completed_with_times:
-                        if order.actual_delivery_time and order.created_at:
-                            delta = order.actual_delivery_time - order.created_at
-                            total_minutes += delta.total_seconds() / 60
-                            count += 1
-
-                    if count > 0:
-                        avg_delivery_time = round(total_minutes / count, 1)
-
-            # On-time delivery rate
-            on_time_count = 0
-            late_count = 0
-            for order in completed_orders:
-                if order.estimated_delivery_time and order.actual_delivery_time:
-                    if order.actual_delivery_time <= order.estimated_delivery_time:
-                        on_time_count += 1
-                    else:
-                        late_count += 1
-
-            on_time_rate = (
-                round((on_time_count / (on_time_count + late_count) * 100), 1)
-                if (on_time_count + late_count) > 0
-                else 0
-            )
+            # Completed delivery performance comes from the per-agent daily rollups
+            start_day = timezone.localdate() - timedelta(days=days)
+            rollups = DeliveryRollup.objects.filter(date__gte=start_day)
+            summary = DeliveryRollup.summarize(rollups)
 
             # Issue statistics
             total_issues = DeliveryIssue.objects.filter(
@@ -3062,27 +3035,16 @@ class DeliveryTrackingViewSet(viewsets.ViewSet):
                 created_at__gte=start_date,
             ).count()
 
-            # Revenue from deliveries
-            total_revenue = (
-                completed_orders.aggregate(total=Sum("total_amount"))["total"] or 0
-            )
-
-            delivery_fee_revenue = (
-                completed_orders.aggregate(total=Sum("delivery_fee"))["total"] or 0
-            )
-
             # Top performing delivery partners
             top_partners = (
-                Order.objects.filter(
-                    status="delivered",
-                    actual_delivery_time__gte=start_date,
-                    delivery_partner__isnull=False,
+                rollups.values(
+                    "delivery_agent__id",
+                    "delivery_agent__username",
                 )
-                .values(
-                    "delivery_partner__id",
-                    "delivery_partner__username",
+                .annotate(
+                    delivery_count=Sum("delivery_count"),
+                    total_earned=Sum("total_delivery_fee"),
                 )
-                .annotate(delivery_count=Count("id"), total_earned=Sum("delivery_fee"))
                 .order_by("-delivery_count")[:5]
             )
 
@@ -3092,18 +3054,23 @@ class DeliveryTrackingViewSet(viewsets.ViewSet):
                     "period_days": days,
                     "stats": {
                         "active_deliveries": active_count,
-                        "completed_deliveries": completed_count,
-                        "avg_delivery_time_minutes": avg_delivery_time,
-                        "on_time_delivery_rate": on_time_rate,
+                        "completed_deliveries": summary["delivery_count"],
+                        "avg_delivery_time_minutes": summary["avg_duration_minutes"],
+                        "p50_delivery_time_minutes": summary["p50_duration_minutes"],
+                        "p90_delivery_time_minutes": summary["p90_duration_minutes"],
+                        "on_time_delivery_rate": summary["on_time_rate"],
+                        "total_distance_km": float(summary["total_distance_km"]),
                         "total_issues": total_issues,
                         "open_issues": open_issues,
-                        "total_revenue": float(total_revenue),
-                        "delivery_fee_revenue": float(delivery_fee_revenue),
+                        "total_revenue": float(summary["total_order_amount"]),
+                        "delivery_fee_revenue": float(
+                            summary["total_delivery_fee"]
+                        ),
                     },
                     "top_delivery_partners": [
                         {
-                            "id": partner["delivery_partner__id"],
-                            "name": partner.get("delivery_partner__username")
+                            "id": partner["delivery_agent__id"],
+                            "name": partner.get("delivery_agent__username")
                             or "Unknown",
                             "deliveries": partner["delivery_count"],
                             "total_earned": (
@@ -3225,19 +3192,24 @@ class DeliveryTrackingViewSet(viewsets.ViewSet):
                 )
 
             if request.method == "GET":
-                # Get chat messages
-                messages = DeliveryChat.objects.filter(order=order).select_related(
-                    "sender", "receiver"
-                )
-
                 # Mark messages as read for current user
-                DeliveryChat.objects.filter(
-                    order=order, receiver=request.user, is_read=False
-                ).update(is_read=True)
+                delivery_chat_service.mark_read(order, request.user)
+
+                # Get chat messages, only those after the cursor if one was given
+                after = request.query_params.get("after")
+                try:
+                    messages = delivery_chat_service.get_messages(order, after=after)
+                except InvalidChatCursor as e:
+                    return Response(
+                        {"error": str(e)}, status=status.HTTP_400_BAD_REQUEST
+                    )
 
                 return Response(
                     {
                         "success": True,
+                        "next_cursor": delivery_chat_service.next_cursor(
+                            messages, after
+                        ),
                         "messages": [
                             {
                                 "message_id": str(msg.message_id),
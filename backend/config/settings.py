@@ -14,6 +14,7 @@ import os
 from pathlib import Path
 
 from decouple import config
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -77,6 +78,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "apps.admin_management.middleware.RequestMetricsMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "config.middleware.SecurityHeadersMiddleware",  # Custom security headers for OAuth
@@ -114,21 +116,92 @@ WSGI_APPLICATION = "config.wsgi.application"
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
 # Database configuration - MySQL (reverted)
+# Connections are kept for DB_CONN_MAX_AGE seconds and pinged before reuse
+# after errors (DB_CONN_HEALTH_CHECKS). Django keeps one connection per
+# thread, so this only saves the connect under servers whose worker threads
+# outlive a request (gunicorn sync / gthread workers, uWSGI). runserver starts
+# a new thread per request, so every request still opens its own connection
+# there and the kept one is only closed when the thread ends (set
+# DB_CONN_MAX_AGE=0 if that matters locally). For ASGI or threaded servers, where
+# per-thread persistent connections pile up, set DB_POOL=True: the
+# utils.mysql_pool backend shares a pool of connections per process
+# (DB_POOL_* options) and returns them at the end of each request.
+DB_POOL = config("DB_POOL", default=False, cast=bool)
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.mysql",
+        "ENGINE": "utils.mysql_pool" if DB_POOL else "django.db.backends.mysql",
         "NAME": config("DB_NAME", default="chefsync_db"),
         "USER": config("DB_USER", default="root"),
         "PASSWORD": config("DB_PASSWORD", default=""),
         "HOST": config("DB_HOST", default="localhost"),
         "PORT": config("DB_PORT", default="3306"),
+        "CONN_MAX_AGE": 0 if DB_POOL else config("DB_CONN_MAX_AGE", default=60, cast=int),
+        "CONN_HEALTH_CHECKS": config("DB_CONN_HEALTH_CHECKS", default=True, cast=bool),
         "OPTIONS": {
             "charset": "utf8mb4",
             "init_command": "SET sql_mode='STRICT_TRANS_TABLES'",
+            "connect_timeout": config("DB_CONNECT_TIMEOUT", default=10, cast=int),
+        },
+        "POOL_OPTIONS": {
+            "size": config("DB_POOL_SIZE", default=10, cast=int),
+            "max_overflow": config("DB_POOL_MAX_OVERFLOW", default=10, cast=int),
+            "recycle": config("DB_POOL_RECYCLE", default=3600, cast=int),
+            "timeout": config("DB_POOL_TIMEOUT", default=30, cast=int),
+            "pre_ping": config("DB_POOL_PRE_PING", default=True, cast=bool),
         },
     }
 }
 
+# Read replica for analytics, admin dashboards / exports / AI and chef income
+# views (utils.db_routing.using_replica). Without DB_REPLICA_HOST everything
+# reads from the primary. Reads fall back to the primary while the replica
+# is unreachable or more than DB_REPLICA_MAX_LAG seconds behind (0: no lag
+# check), measured every DB_REPLICA_LAG_CHECK_INTERVAL seconds.
+DB_REPLICA_HOST = config("DB_REPLICA_HOST", default="")
+if DB_REPLICA_HOST:
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "HOST": DB_REPLICA_HOST,
+        "PORT": config("DB_REPLICA_PORT", default=DATABASES["default"]["PORT"]),
+        "USER": config("DB_REPLICA_USER", default=DATABASES["default"]["USER"]),
+        "PASSWORD": config(
+            "DB_REPLICA_PASSWORD", default=DATABASES["default"]["PASSWORD"]
+        ),
+        # Tests read the primary's test database through this alias
+        "TEST": {"MIRROR": "default"},
+    }
+DATABASE_ROUTERS = ["utils.db_routing.ReplicaRouter"]
+DB_REPLICA_MAX_LAG = config("DB_REPLICA_MAX_LAG", default=30, cast=int)
+DB_REPLICA_LAG_CHECK_INTERVAL = config("DB_REPLICA_LAG_CHECK_INTERVAL", default=5, cast=int)
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# OTP codes, login throttles and rate limits
+# (apps.authentication.services.otp_service / login_throttle) must be shared
+# by all workers. Local memory is per process, so outside DEBUG it refuses to
+# start: use django.core.cache.backends.redis.RedisCache with
+# CACHE_LOCATION=redis://... (the redis package is in requirements.txt) or
+# memcached.
+CACHES = {
+    "default": {
+        "BACKEND": config(
+            "CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": config("CACHE_LOCATION", default="chefsync"),
+        "KEY_PREFIX": config("CACHE_KEY_PREFIX", default="chefsync"),
+    }
+}
+PER_PROCESS_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+if not DEBUG and CACHES["default"]["BACKEND"] in PER_PROCESS_CACHES:
+    raise ImproperlyConfigured(
+        f"CACHE_BACKEND {CACHES['default']['BACKEND']} is not shared between "
+        "processes; OTP codes and login throttles need Redis or memcached when "
+        "DEBUG is off."
+    )
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -180,7 +253,7 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "apps.authentication.authentication.CustomJWTAuthentication",
         "rest_framework.authentication.SessionAuthentication",
         "rest_framework.authentication.BasicAuthentication",
     ],
@@ -413,6 +486,149 @@ GOOGLE_OAUTH_CLIENT_SECRET = config("GOOGLE_OAUTH_CLIENT_SECRET", default="")
 # Used by apps.admin_management.services.ai_service.AdminAIService
 GOOGLE_AI_API_KEY = config("GOOGLE_AI_API_KEY", default="")
 
+# System health sampler (admin dashboard system_health / realtime_stats)
+# Seconds between samples, samples kept in memory, and how often (seconds)
+# to also store a sample as SystemHealthMetric rows (0 disables)
+SYSTEM_HEALTH_SAMPLE_INTERVAL = config(
+    "SYSTEM_HEALTH_SAMPLE_INTERVAL", default=5, cast=int
+)
+SYSTEM_HEALTH_BUFFER_SIZE = config("SYSTEM_HEALTH_BUFFER_SIZE", default=720, cast=int)
+SYSTEM_HEALTH_PERSIST_INTERVAL = config(
+    "SYSTEM_HEALTH_PERSIST_INTERVAL", default=0, cast=int
+)
+
+# Admin dashboard stats snapshot: how often (seconds) the scheduler checks it,
+# and the age (seconds) after which it is recomputed even without writes
+ADMIN_DASHBOARD_SNAPSHOT_INTERVAL = config(
+    "ADMIN_DASHBOARD_SNAPSHOT_INTERVAL", default=60, cast=int
+)
+ADMIN_DASHBOARD_SNAPSHOT_MAX_AGE = config(
+    "ADMIN_DASHBOARD_SNAPSHOT_MAX_AGE", default=300, cast=int
+)
+
+# Admin analytics cube: seconds between incremental (updated_at watermark)
+# refreshes and between full reloads of the in-memory order history
+ANALYTICS_CUBE_REFRESH_SECONDS = config(
+    "ANALYTICS_CUBE_REFRESH_SECONDS", default=30, cast=int
+)
+ANALYTICS_CUBE_FULL_RELOAD = config("ANALYTICS_CUBE_FULL_RELOAD", default=3600, cast=int)
+
+# Admin AI result cache (forecast / anomaly / recommendation / insight results)
+# Seconds a result stays fresh, extra seconds a stale result is served while it
+# is recomputed in the background, seconds between order watermark checks, and
+# thread pool size for cold dashboard computations (0 computes inline)
+ADMIN_AI_CACHE_TTL = config("ADMIN_AI_CACHE_TTL", default=900, cast=int)
+ADMIN_AI_CACHE_GRACE = config("ADMIN_AI_CACHE_GRACE", default=300, cast=int)
+ADMIN_AI_WATERMARK_INTERVAL = config("ADMIN_AI_WATERMARK_INTERVAL", default=10, cast=int)
+ADMIN_AI_CACHE_WORKERS = config("ADMIN_AI_CACHE_WORKERS", default=4, cast=int)
+
+# Communication sentiment labelling (scheduler job): seconds between runs,
+# communications per AI prompt, and max communications labelled per run
+SENTIMENT_LABEL_INTERVAL = config("SENTIMENT_LABEL_INTERVAL", default=60, cast=int)
+SENTIMENT_BATCH_SIZE = config("SENTIMENT_BATCH_SIZE", default=20, cast=int)
+SENTIMENT_LABEL_MAX_PER_RUN = config("SENTIMENT_LABEL_MAX_PER_RUN", default=200, cast=int)
+
+# Shared Gemini gateway (utils.llm_gateway): response cache TTL (seconds) and
+# size, max concurrent model calls per process, and per-call deadline (seconds)
+LLM_CACHE_TTL = config("LLM_CACHE_TTL", default=600, cast=int)
+LLM_CACHE_MAX_ENTRIES = config("LLM_CACHE_MAX_ENTRIES", default=512, cast=int)
+LLM_MAX_CONCURRENCY = config("LLM_MAX_CONCURRENCY", default=4, cast=int)
+LLM_TIMEOUT_SECONDS = config("LLM_TIMEOUT_SECONDS", default=20, cast=float)
+
+# Bulk menu search (apps.food.menu_search): seconds between checks for menu
+# changes made by other processes, matches returned per search, and top local
+# matches reranked by the AI model
+BULK_MENU_SEARCH_REFRESH_INTERVAL = config(
+    "BULK_MENU_SEARCH_REFRESH_INTERVAL", default=30, cast=int
+)
+BULK_MENU_SEARCH_RESULTS = config("BULK_MENU_SEARCH_RESULTS", default=20, cast=int)
+BULK_MENU_SEARCH_RERANK_K = config("BULK_MENU_SEARCH_RERANK_K", default=8, cast=int)
+
+# AI job runner (apps.admin_management.services.ai_jobs): worker threads per
+# process (0 runs jobs inline), max queued + running jobs per process, whether
+# AI endpoints answer 202 + job id unless called with ?async=false (the
+# frontend polls ai/jobs/<id>/), seconds before a pending job is failed, and
+# hours finished jobs are kept
+AI_JOB_WORKERS = config("AI_JOB_WORKERS", default=4, cast=int)
+AI_JOB_MAX_PENDING = config("AI_JOB_MAX_PENDING", default=50, cast=int)
+AI_JOBS_ASYNC_DEFAULT = config("AI_JOBS_ASYNC_DEFAULT", default=True, cast=bool)
+AI_JOB_TIMEOUT_SECONDS = config("AI_JOB_TIMEOUT_SECONDS", default=600, cast=int)
+AI_JOB_RETENTION_HOURS = config("AI_JOB_RETENTION_HOURS", default=24, cast=int)
+
+# JWT principal cache (apps.authentication.services.principal_cache): seconds a
+# resolved user is reused without a query (0 disables), and max cached users
+AUTH_PRINCIPAL_CACHE_TTL = config("AUTH_PRINCIPAL_CACHE_TTL", default=30, cast=int)
+AUTH_PRINCIPAL_CACHE_MAX_ENTRIES = config(
+    "AUTH_PRINCIPAL_CACHE_MAX_ENTRIES", default=10000, cast=int
+)
+
+# Refresh token revocation (apps.authentication.services.token_revocation):
+# seconds between syncs of revoked JTIs from jwt_tokens, seconds between full
+# Bloom filter rebuilds, the filter's minimum capacity (it is sized for twice
+# the live revoked tokens) and false-positive rate, and seconds between
+# batched last_used_at / usage_count writes (0 = write inline)
+TOKEN_REVOCATION_SYNC_INTERVAL = config("TOKEN_REVOCATION_SYNC_INTERVAL", default=5, cast=int)
+TOKEN_REVOCATION_REBUILD_INTERVAL = config(
+    "TOKEN_REVOCATION_REBUILD_INTERVAL", default=3600, cast=int
+)
+TOKEN_REVOCATION_BLOOM_MIN_CAPACITY = config(
+    "TOKEN_REVOCATION_BLOOM_MIN_CAPACITY", default=100000, cast=int
+)
+TOKEN_REVOCATION_BLOOM_FP_RATE = config("TOKEN_REVOCATION_BLOOM_FP_RATE", default=0.01, cast=float)
+TOKEN_USAGE_FLUSH_INTERVAL = config("TOKEN_USAGE_FLUSH_INTERVAL", default=30, cast=int)
+
+# Auth housekeeping (apps.authentication.services.housekeeping, scheduler job
+# every HOUSEKEEPING_INTERVAL_MINUTES): expired rows are deleted in batches of
+# HOUSEKEEPING_BATCH_SIZE with HOUSEKEEPING_BATCH_PAUSE seconds between batches,
+# at most HOUSEKEEPING_MAX_BATCHES batches per table per run. Rows are kept
+# this long past expiry first
+HOUSEKEEPING_INTERVAL_MINUTES = config("HOUSEKEEPING_INTERVAL_MINUTES", default=60, cast=int)
+HOUSEKEEPING_BATCH_SIZE = config("HOUSEKEEPING_BATCH_SIZE", default=1000, cast=int)
+HOUSEKEEPING_BATCH_PAUSE = config("HOUSEKEEPING_BATCH_PAUSE", default=0.2, cast=float)
+HOUSEKEEPING_MAX_BATCHES = config("HOUSEKEEPING_MAX_BATCHES", default=100, cast=int)
+HOUSEKEEPING_TOKEN_RETENTION_HOURS = config(
+    "HOUSEKEEPING_TOKEN_RETENTION_HOURS", default=24, cast=int
+)
+HOUSEKEEPING_OTP_RETENTION_HOURS = config("HOUSEKEEPING_OTP_RETENTION_HOURS", default=24, cast=int)
+HOUSEKEEPING_REFERRAL_RETENTION_DAYS = config(
+    "HOUSEKEEPING_REFERRAL_RETENTION_DAYS", default=30, cast=int
+)
+
+# Email outbox (apps.communications.services.email_outbox): wake the sender
+# thread when a message is queued (otherwise only the scheduler job every
+# EMAIL_OUTBOX_POLL_SECONDS sends), messages per SMTP connection, attempts
+# before giving up, retry backoff (base seconds, doubling, capped), seconds
+# before a message stuck in "sending" is queued again, days sent / failed
+# messages are kept
+EMAIL_OUTBOX_IMMEDIATE = config("EMAIL_OUTBOX_IMMEDIATE", default=True, cast=bool)
+EMAIL_OUTBOX_POLL_SECONDS = config("EMAIL_OUTBOX_POLL_SECONDS", default=30, cast=int)
+EMAIL_OUTBOX_BATCH_SIZE = config("EMAIL_OUTBOX_BATCH_SIZE", default=50, cast=int)
+EMAIL_OUTBOX_MAX_ATTEMPTS = config("EMAIL_OUTBOX_MAX_ATTEMPTS", default=5, cast=int)
+EMAIL_OUTBOX_RETRY_BASE_SECONDS = config("EMAIL_OUTBOX_RETRY_BASE_SECONDS", default=30, cast=int)
+EMAIL_OUTBOX_RETRY_MAX_SECONDS = config("EMAIL_OUTBOX_RETRY_MAX_SECONDS", default=3600, cast=int)
+EMAIL_OUTBOX_CLAIM_TIMEOUT = config("EMAIL_OUTBOX_CLAIM_TIMEOUT", default=300, cast=int)
+EMAIL_OUTBOX_RETENTION_DAYS = config("EMAIL_OUTBOX_RETENTION_DAYS", default=7, cast=int)
+
+# Email broadcasts (apps.communications.services.broadcast_service): worker
+# threads (0 sends inline), recipients per page / SMTP batch, seconds between
+# pages, seconds between heartbeats while sending, seconds without a heartbeat
+# before a broadcast is resumed elsewhere (keep it well above the heartbeat)
+EMAIL_BROADCAST_WORKERS = config("EMAIL_BROADCAST_WORKERS", default=1, cast=int)
+EMAIL_BROADCAST_BATCH_SIZE = config("EMAIL_BROADCAST_BATCH_SIZE", default=100, cast=int)
+EMAIL_BROADCAST_BATCH_PAUSE = config("EMAIL_BROADCAST_BATCH_PAUSE", default=1.0, cast=float)
+EMAIL_BROADCAST_HEARTBEAT_SECONDS = config("EMAIL_BROADCAST_HEARTBEAT_SECONDS", default=30, cast=int)
+EMAIL_BROADCAST_STALE_SECONDS = config("EMAIL_BROADCAST_STALE_SECONDS", default=300, cast=int)
+
+# Keep compiled email templates (utils.email_renderer) for the life of the
+# process; turn off while editing templates
+EMAIL_TEMPLATE_CACHE = config("EMAIL_TEMPLATE_CACHE", default=True, cast=bool)
+
+# Request metrics (/api/admin-management/metrics/ and dashboard endpoint_metrics)
+# Bearer token for Prometheus scrapes; empty serves metrics only when DEBUG
+METRICS_AUTH_TOKEN = config("METRICS_AUTH_TOKEN", default="")
+# Log a warning for requests running more SQL queries than this
+REQUEST_METRICS_QUERY_WARN = config("REQUEST_METRICS_QUERY_WARN", default=50, cast=int)
+
 # Google OAuth Settings
 SOCIALACCOUNT_PROVIDERS = {
     "google": {
@@ -447,6 +663,28 @@ OTP_EXPIRY_MINUTES = config(
     "OTP_EXPIRY_MINUTES", default=30, cast=int
 )  # Extended to 30 minutes
 OTP_LENGTH = config("OTP_LENGTH", default=6, cast=int)
+# Wrong codes allowed before a code is dropped
+OTP_MAX_ATTEMPTS = config("OTP_MAX_ATTEMPTS", default=3, cast=int)
+# How long a verified email may complete registration without a DB lookup
+OTP_VERIFIED_TTL_MINUTES = config("OTP_VERIFIED_TTL_MINUTES", default=60, cast=int)
+# Requests per email / per client IP; every comma-separated rate applies
+OTP_SEND_RATE_EMAIL = config("OTP_SEND_RATE_EMAIL", default="1/m,5/h")
+OTP_SEND_RATE_IP = config("OTP_SEND_RATE_IP", default="10/m,30/h")
+OTP_VERIFY_RATE_EMAIL = config("OTP_VERIFY_RATE_EMAIL", default="10/h")
+OTP_VERIFY_RATE_IP = config("OTP_VERIFY_RATE_IP", default="30/h")
+# Threads writing EmailOTP audit rows (0: write inline)
+OTP_AUDIT_WORKERS = config("OTP_AUDIT_WORKERS", default=1, cast=int)
+
+# Login lockout (apps.authentication.services.login_throttle): failures per
+# email within a sliding window lock the account; failure counts and
+# last_login are written in batches every LOGIN_BOOKKEEPING_FLUSH_INTERVAL
+# seconds (0: on every login)
+LOGIN_MAX_FAILED_ATTEMPTS = config("LOGIN_MAX_FAILED_ATTEMPTS", default=5, cast=int)
+LOGIN_FAILURE_WINDOW_MINUTES = config("LOGIN_FAILURE_WINDOW_MINUTES", default=15, cast=int)
+LOGIN_LOCKOUT_MINUTES = config("LOGIN_LOCKOUT_MINUTES", default=30, cast=int)
+LOGIN_BOOKKEEPING_FLUSH_INTERVAL = config(
+    "LOGIN_BOOKKEEPING_FLUSH_INTERVAL", default=60, cast=int
+)
 EMAIL_VERIFICATION_REQUIRED = config(
     "EMAIL_VERIFICATION_REQUIRED", default=True, cast=bool
 )
@@ -501,6 +739,22 @@ MEDIA_ROOT = BASE_DIR / "media"
 USE_LOCAL_STORAGE = config("USE_LOCAL_STORAGE", default=False, cast=bool)
 LOCAL_MEDIA_ROOT = BASE_DIR / "local_media"
 
+# Delivery chat push channel (SSE on the ASGI app)
+# Only enable DELIVERY_CHAT_SSE when served by an ASGI server (e.g. uvicorn
+# config.asgi:application); under WSGI (runserver, gunicorn) the chat keeps
+# polling. Stream tickets replace the access token in the stream URL.
+DELIVERY_CHAT_SSE = config("DELIVERY_CHAT_SSE", default=False, cast=bool)
+DELIVERY_CHAT_TICKET_SECONDS = config("DELIVERY_CHAT_TICKET_SECONDS", default=60, cast=int)
+# InMemoryChatBroker only reaches subscribers in the same process; use
+# apps.orders.services.chat_broker.RedisChatBroker for multi-node deployments.
+DELIVERY_CHAT_BROKER = config(
+    "DELIVERY_CHAT_BROKER",
+    default="apps.orders.services.chat_broker.InMemoryChatBroker",
+)
+DELIVERY_CHAT_REDIS_URL = config(
+    "DELIVERY_CHAT_REDIS_URL", default="redis://localhost:6379/0"
+)
+
 # Admin Feature Flags
 ADMIN_FEATURES_V2 = config("ADMIN_FEATURES_V2", default=True, cast=bool)
 ADMIN_NOTIFICATIONS_V2 = config("ADMIN_NOTIFICATIONS_V2", default=True, cast=bool)
@@ -0,0 +1,113 @@
+"""
+Benchmark: admin analytics view computations over the in-memory order cube
+
+Builds a synthetic cube of N orders (default 1,000,000, ~2.5 items each) and
+times the OrderCube computations each admin analytics view runs (the views
+only shape their results into the response and log the request), plus an
+incremental watermark refresh of 1,000 changed orders.
+
+Usage: python scripts/benchmark_analytics_cube.py [orders] [repeats]
+"""
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from apps.admin_management.services.analytics_cube import OrderCube
+
+NOW = datetime(2025, 10, 26, 12, 0)
+HISTORY_DAYS = 365
+STATUSES = np.array(["delivered", "cancelled", "pending", "out_for_delivery", "preparing"], dtype=object)
+
+
+def make_cube(order_count, seed=42):
+    rng = np.random.default_rng(seed)
+    created = np.datetime64(NOW, "ns") - rng.integers(
+        0, HISTORY_DAYS * 86_400, order_count
+    ).astype("timedelta64[s]").astype("timedelta64[ns]")
+    orders = pd.DataFrame(
+        {
+            "order_id": np.arange(1, order_count + 1, dtype=np.int64),
+            "created_at": created,
+            "updated_at": created,
+            "customer_id": rng.integers(1, max(order_count // 8, 2), order_count),
+            "chef_id": rng.integers(1, 2_000, order_count),
+            "amount": rng.gamma(2.0, 1_500.0, order_count).round(2),
+            "status": STATUSES[rng.choice(len(STATUSES), order_count, p=[0.8, 0.08, 0.04, 0.04, 0.04])],
+            "paid": rng.random(order_count) < 0.85,
+        }
+    )
+    items_per_order = rng.integers(1, 5, order_count)
+    item_orders = np.repeat(np.arange(order_count), items_per_order)
+    items = pd.DataFrame(
+        {
+            "order_id": orders["order_id"].to_numpy()[item_orders],
+            "food_id": rng.integers(1, 20_000, len(item_orders)),
+            "quantity": rng.integers(1, 4, len(item_orders)),
+            "total_price": rng.gamma(2.0, 600.0, len(item_orders)).round(2),
+            "created_at": orders["created_at"].to_numpy()[item_orders],
+            "paid": orders["paid"].to_numpy()[item_orders],
+        }
+    )
+    return OrderCube(orders, items, time.monotonic())
+
+
+# The same OrderCube calls the AdminDashboardViewSet actions make, with the
+# views' default ranges
+VIEWS = {
+    "growth_analytics": lambda cube: cube.daily_totals(NOW - timedelta(days=30), NOW),
+    "orders_distribution (7d)": lambda cube: cube.weekday_counts(NOW - timedelta(days=7), NOW),
+    "orders_distribution (30d)": lambda cube: cube.daily_totals(NOW - timedelta(days=30), NOW, fill=False),
+    "customer_segmentation": lambda cube: cube.customer_segments(NOW - timedelta(days=30), NOW),
+    "predictive_analytics": lambda cube: (
+        cube.recent_daily_revenue(NOW - timedelta(days=30), NOW),
+        cube.food_summary(start=NOW - timedelta(days=30), paid=True, sort_by="total_quantity").head(5),
+        cube.lifetime_value_segments(NOW - timedelta(days=30)),
+    ),
+    "anomaly_detection": lambda cube: cube.period_comparison(
+        NOW - timedelta(days=7), NOW - timedelta(days=14)
+    ),
+    "top_performing_chefs": lambda cube: cube.chef_summary(paid=True).head(50),
+    "top_performing_food_items": lambda cube: cube.food_summary(paid=True).head(50),
+}
+
+
+def best_of(func, repeats, *args):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def incremental_refresh(cube, changed=1_000):
+    orders = cube.orders.tail(changed).copy()
+    orders["updated_at"] = np.datetime64(NOW, "ns")
+    items = cube.items[cube.items["order_id"].isin(orders["order_id"].to_numpy())]
+    return cube.apply_delta(orders, items, time.monotonic())
+
+
+def main():
+    order_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    started = time.perf_counter()
+    cube = make_cube(order_count)
+    print(f"cube: {len(cube.orders):,} orders, {len(cube.items):,} items "
+          f"(built in {time.perf_counter() - started:.2f}s, "
+          f"{(cube.orders.memory_usage(deep=True).sum() + cube.items.memory_usage(deep=True).sum()) / 2**20:.0f} MiB)")
+
+    print(f"{'view':>28} {'ms':>10}")
+    for name, view in VIEWS.items():
+        print(f"{name:>28} {best_of(view, repeats, cube) * 1000:>10.1f}")
+    print(f"{'incremental refresh (1k)':>28} {best_of(incremental_refresh, repeats, cube) * 1000:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark: emails rendered per second, per-send rendering vs utils.email_renderer
+
+The per-send path is what the email services did before: read and encode the
+logo, render_to_string (templates loaded from disk, as with DEBUG on) and
+strip_tags for the text part. Runs with minimal template-only settings, so no
+database or .env is needed.
+
+Usage: python scripts/benchmark_email_rendering.py [messages]
+"""
+import base64
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+import django
+from django.conf import settings
+
+settings.configure(
+    BASE_DIR=BACKEND_DIR,
+    TEMPLATES=[{
+        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "DIRS": [os.path.join(BACKEND_DIR, "templates")],
+    }],
+)
+django.setup()
+
+from django.template.loader import render_to_string
+from django.utils.html import strip_tags
+
+from utils.email_renderer import email_renderer
+
+TEMPLATES = {
+    "emails/otp_email_beautiful.html": {
+        "user_name": "Nimal Perera",
+        "email": "nimal@example.com",
+        "otp_code": "482913",
+        "purpose": "registration",
+        "expiry_minutes": 10,
+        "frontend_url": "https://chefsync.example.com",
+    },
+    "emails/approval_email.html": {
+        "user_name": "Nimal Perera",
+        "user_email": "nimal@example.com",
+        "role_display": "Cook",
+        "status": "approved",
+        "admin_notes": None,
+        "login_url": "https://chefsync.example.com/auth/login",
+        "support_url": "https://chefsync.example.com/contact",
+    },
+    "emails/communication_status_update.html": {
+        "user_name": "Nimal Perera",
+        "communication_type": "Complaint",
+        "reference_number": "COM-1A2B3C4D",
+        "subject": "Late delivery",
+        "old_status": "Pending",
+        "new_status": "Resolved",
+        "status_title": "Resolved",
+        "status_message": "Your complaint has been resolved.",
+        "admin_name": "Admin",
+        "site_name": "ChefSync Kitchen",
+    },
+}
+
+
+def per_send(name, context):
+    logo_path = os.path.join(BACKEND_DIR, "templates", "emails", "logo.svg")
+    logo_base64 = None
+    if os.path.exists(logo_path):
+        with open(logo_path, "rb") as logo_file:
+            logo_base64 = base64.b64encode(logo_file.read()).decode("utf-8")
+    html_content = render_to_string(name, {**context, "logo_base64": logo_base64})
+    return html_content, strip_tags(html_content)
+
+
+def cached(name, context):
+    return email_renderer.render(name, context)
+
+
+def rate(func, name, context, messages):
+    start = time.perf_counter()
+    for _ in range(messages):
+        func(name, context)
+    return messages / (time.perf_counter() - start)
+
+
+def main():
+    messages = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    print(f"{'template':<42} {'per-send/s':>12} {'cached/s':>12} {'speedup':>10}")
+    for name, context in TEMPLATES.items():
+        # Same HTML either way; only the text part is built differently
+        assert cached(name, context)[0] == per_send(name, context)[0]
+
+        before = rate(per_send, name, context, messages)
+        after = rate(cached, name, context, messages)
+        print(f"{name:<42} {before:>12,.0f} {after:>12,.0f} {after / before:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Micro-benchmark: per-kitchen scalar delivery pricing vs the vectorised utils.geo path
+
+Usage: python scripts/benchmark_geo.py [repeats]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from apps.food.utils import calculate_delivery_fee, estimate_delivery_time
+from utils import geo
+
+USER_LAT, USER_LNG = 9.6615, 80.0255  # Jaffna
+
+
+def make_kitchens(count):
+    rng = random.Random(count)
+    lats = [USER_LAT + rng.uniform(-0.3, 0.3) for _ in range(count)]
+    lngs = [USER_LNG + rng.uniform(-0.3, 0.3) for _ in range(count)]
+    return lats, lngs
+
+
+def scalar_path(lats, lngs):
+    results = []
+    for lat, lng in zip(lats, lngs):
+        fee_data = calculate_delivery_fee(USER_LAT, USER_LNG, lat, lng)
+        results.append((fee_data['total_delivery_fee'], estimate_delivery_time(fee_data['distance_km'], 30)))
+    return results
+
+
+def vector_path(lats, lngs):
+    distances = geo.haversine_km(USER_LAT, USER_LNG, np.asarray(lats), np.asarray(lngs))
+    return geo.delivery_fees(distances), geo.delivery_times(distances.round(2), 30)
+
+
+def best_of(func, repeats, *args):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    print(f"{'kitchens':>10} {'scalar ms':>12} {'vector ms':>12} {'speedup':>10}")
+    for count in (1, 10, 100, 1000, 10000):
+        lats, lngs = make_kitchens(count)
+
+        # Both paths must agree before timing them
+        fees, etas = vector_path(lats, lngs)
+        expected = scalar_path(lats, lngs)
+        assert np.allclose(fees, [fee for fee, _ in expected])
+        assert list(etas) == [eta for _, eta in expected]
+
+        scalar_ms = best_of(scalar_path, repeats, lats, lngs) * 1000
+        vector_ms = best_of(vector_path, repeats, lats, lngs) * 1000
+        print(f"{count:>10} {scalar_ms:>12.3f} {vector_ms:>12.3f} {scalar_ms / vector_ms:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
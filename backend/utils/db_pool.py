@@ -0,0 +1,231 @@
+"""
+Database connection pooling and connection metrics
+
+Django opens a connection per request unless ``CONN_MAX_AGE`` keeps it for
+the thread that opened it. That works for sync workers with a few threads,
+but not for ASGI or thread-per-request deployments, where connections are
+tied to short-lived threads. ``utils.mysql_pool`` is a MySQL backend
+(``DB_POOL=True``) that borrows connections from a ``ConnectionPool`` shared
+by all threads of the process instead. Closing a connection at the end of a
+request hands it back to the pool.
+
+- up to ``size`` idle connections are kept, and ``max_overflow`` more may
+  be open while busy. Past that, a borrower waits up to ``timeout`` seconds.
+- connections older than ``recycle`` seconds are closed instead of reused.
+- with ``pre_ping`` an idle connection is pinged before it is handed out,
+  and dropped if the server has closed it.
+- a forked child (preforking servers) starts with empty pools:
+  ``reset_pools_after_fork`` runs in the child (``os.register_at_fork``, see
+  ``utils.mysql_pool``) so it never shares the parent's sockets.
+
+``connection_stats()`` reports, per database alias, the connection settings,
+how many times this process set up a connection (Django's
+``connection_created`` signal: a new connection, or one borrowed from the
+pool) and the pool's counters. It is shown in the admin health view.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_OPTIONS = {
+    "size": 10,
+    "max_overflow": 10,
+    "recycle": 3600,
+    "timeout": 30,
+    "pre_ping": True,
+}
+
+
+class PoolTimeout(Exception):
+    """No pooled connection became free within the pool's timeout"""
+
+
+class ConnectionPool:
+    """Thread-safe pool of DB-API connections"""
+
+    def __init__(self, size=10, max_overflow=10, recycle=3600, timeout=30, pre_ping=True):
+        self.size = size
+        self.max_overflow = max_overflow
+        self.recycle = recycle
+        self.timeout = timeout
+        self.pre_ping = pre_ping
+        self._condition = threading.Condition()
+        # (connection, created_at); most recently returned is reused first
+        self._idle = deque()
+        self._created_at: Dict[int, float] = {}
+        self._open = 0
+        # Connections inherited over a fork; see reset_after_fork
+        self._inherited = []
+        self.created = 0
+        self.reused = 0
+        self.discarded = 0
+        self.waits = 0
+        self.timeouts = 0
+
+    def acquire(self, connect: Callable, ping: Optional[Callable] = None):
+        """An idle connection, or a new one from ``connect()``"""
+        deadline = None
+        while True:
+            connection = None
+            with self._condition:
+                while self._idle:
+                    connection, created_at = self._idle.pop()
+                    if self.recycle and time.monotonic() - created_at > self.recycle:
+                        self._discard(connection)
+                        connection = None
+                        continue
+                    break
+                if connection is None:
+                    if self._open < self.size + self.max_overflow:
+                        # Reserve the slot; connect outside the lock
+                        self._open += 1
+                        break
+                    if deadline is None:
+                        self.waits += 1
+                        deadline = time.monotonic() + self.timeout
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        raise PoolTimeout(
+                            f"No database connection free after {self.timeout}s "
+                            f"({self._open} open)"
+                        )
+                    self._condition.wait(remaining)
+                    continue
+
+            # Ping outside the lock so a slow server does not stall other borrowers
+            if self.pre_ping and ping is not None:
+                try:
+                    ping(connection)
+                except Exception:
+                    with self._condition:
+                        self._discard(connection)
+                        self._condition.notify()
+                    continue
+            with self._condition:
+                self.reused += 1
+            return connection
+
+        try:
+            connection = connect()
+        except Exception:
+            with self._condition:
+                self._open -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self._created_at[id(connection)] = time.monotonic()
+            self.created += 1
+        return connection
+
+    def release(self, connection, reusable: bool = True) -> None:
+        """Hand ``connection`` back; it is closed if unusable or surplus"""
+        with self._condition:
+            created_at = self._created_at.get(id(connection), 0.0)
+            expired = self.recycle and time.monotonic() - created_at > self.recycle
+            if reusable and not expired and len(self._idle) < self.size:
+                self._idle.append((connection, created_at))
+            else:
+                self._discard(connection)
+            self._condition.notify()
+
+    def reset_after_fork(self) -> None:
+        """
+        Forget the connections a forked child inherited. They are the
+        parent's: closing one here would end the parent's session over the
+        shared socket, so they stay referenced (never closed or collected)
+        and unused. The lock is replaced too, as another thread may have held
+        it at fork time.
+        """
+        self._inherited.extend(connection for connection, _ in self._idle)
+        self._condition = threading.Condition()
+        self._idle = deque()
+        self._created_at = {}
+        self._open = 0
+
+    def _discard(self, connection) -> None:
+        # Called with the lock held
+        self._created_at.pop(id(connection), None)
+        self._open -= 1
+        self.discarded += 1
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def stats(self) -> Dict:
+        with self._condition:
+            idle = len(self._idle)
+            return {
+                "size": self.size,
+                "max_overflow": self.max_overflow,
+                "open": self._open,
+                "idle": idle,
+                "in_use": self._open - idle,
+                "created": self.created,
+                "reused": self.reused,
+                "discarded": self.discarded,
+                "waits": self.waits,
+                "timeouts": self.timeouts,
+            }
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def reset_pools_after_fork() -> None:
+    """``os.register_at_fork`` child hook: start every pool empty"""
+    global _pools_lock
+    _pools_lock = threading.Lock()
+    for pool in _pools.values():
+        pool.reset_after_fork()
+
+
+def get_pool(alias: str, options: Optional[Dict] = None) -> ConnectionPool:
+    """The process-wide pool for database ``alias``"""
+    pool = _pools.get(alias)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(alias)
+            if pool is None:
+                pool = ConnectionPool(**{**DEFAULT_POOL_OPTIONS, **(options or {})})
+                _pools[alias] = pool
+    return pool
+
+
+# Connections set up by this process, per alias
+_connects: Dict[str, int] = {}
+
+
+def _count_connection(sender, connection, **kwargs) -> None:
+    _connects[connection.alias] = _connects.get(connection.alias, 0) + 1
+
+
+connection_created.connect(_count_connection, dispatch_uid="utils.db_pool.count_connection")
+
+
+def connection_stats() -> Dict[str, Dict]:
+    """Connection settings and counters for every configured database"""
+    stats = {}
+    for alias in settings.DATABASES:
+        settings_dict = connections.settings[alias]
+        entry = {
+            "vendor": connections[alias].vendor,
+            "engine": settings_dict["ENGINE"],
+            "conn_max_age": settings_dict.get("CONN_MAX_AGE"),
+            "health_checks": settings_dict.get("CONN_HEALTH_CHECKS", False),
+            "connects": _connects.get(alias, 0),
+            "pool": _pools[alias].stats() if alias in _pools else None,
+        }
+        stats[alias] = entry
+    return stats
@@ -0,0 +1,197 @@
+"""
+Read-replica routing for reporting workloads
+
+Analytics, admin dashboards / exports / AI endpoints and the chef income
+views only read, but used to share the primary with checkout writes. Views
+and code blocks marked with ``using_replica`` send their reads to the
+``replica`` database alias (``DB_REPLICA_HOST``) through ``ReplicaRouter``:
+
+    @api_view(["GET"])
+    @permission_classes([IsAdminUser])
+    @using_replica
+    def order_analytics(request): ...
+
+    with using_replica():
+        rows = list(Order.objects.values(...))
+
+Reads fall back to the primary when:
+
+- no replica is configured
+- the block runs inside a transaction on the primary (it must see its own
+  writes)
+- the replica is unreachable or more than ``DB_REPLICA_MAX_LAG`` seconds
+  behind (``SHOW REPLICA STATUS``, checked at most every
+  ``DB_REPLICA_LAG_CHECK_INTERVAL`` seconds per process)
+
+Writes always go to the primary, including saves of objects read from the
+replica. The flag lives in a ``ContextVar``, so it does not leak across
+requests or threads. Code that hands work to another thread (e.g. AI jobs)
+must decorate the function that runs there.
+"""
+
+import contextlib
+import functools
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, Optional
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+logger = logging.getLogger(__name__)
+
+REPLICA_ALIAS = "replica"
+
+_replica_reads: ContextVar[bool] = ContextVar("replica_reads", default=False)
+
+
+@contextlib.contextmanager
+def _replica_context():
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def using_replica(func: Optional[Callable] = None):
+    """Decorator (``@using_replica``) or context manager (``with using_replica():``)"""
+    if func is None:
+        return _replica_context()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with _replica_context():
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+class ReplicaMonitor:
+    """Per-process view of whether the replica is reachable and caught up"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.healthy = False
+        self.lag: Optional[float] = None
+        self.checked_at = 0.0
+        self.last_error: Optional[str] = None
+        self.replica_reads = 0
+        self.fallbacks = 0
+
+    @staticmethod
+    def configured() -> bool:
+        return REPLICA_ALIAS in settings.DATABASES
+
+    def available(self) -> bool:
+        """Whether reads may go to the replica now (refreshes a stale check)"""
+        interval = getattr(settings, "DB_REPLICA_LAG_CHECK_INTERVAL", 5)
+        if time.monotonic() - self.checked_at >= interval and self._lock.acquire(blocking=False):
+            # One thread checks; the others use the last result meanwhile
+            try:
+                self.check()
+            finally:
+                self._lock.release()
+        return self.healthy
+
+    def check(self) -> bool:
+        max_lag = getattr(settings, "DB_REPLICA_MAX_LAG", 30)
+        try:
+            lag = self.read_lag() if max_lag else 0.0
+            healthy = lag is not None and lag <= max_lag
+            error = None if healthy else (
+                "replication stopped" if lag is None else f"{lag:.0f}s behind"
+            )
+        except Exception as e:
+            lag, healthy, error = None, False, str(e)
+            # Reconnect on the next check rather than reuse a broken connection
+            try:
+                connections[REPLICA_ALIAS].close()
+            except Exception:
+                pass
+        if healthy != self.healthy:
+            if healthy:
+                logger.info("Read replica available, routing reporting reads to it")
+            else:
+                logger.warning(f"Read replica unusable ({error}), reading from the primary")
+        self.healthy, self.lag, self.last_error = healthy, lag, error
+        self.checked_at = time.monotonic()
+        return healthy
+
+    @staticmethod
+    def read_lag() -> Optional[float]:
+        """Seconds the replica is behind; None when replication is stopped"""
+        connection = connections[REPLICA_ALIAS]
+        if connection.vendor != "mysql":
+            connection.ensure_connection()
+            return 0.0
+        with connection.cursor() as cursor:
+            try:
+                cursor.execute("SHOW REPLICA STATUS")
+            except Exception:
+                # MySQL before 8.0.22
+                cursor.execute("SHOW SLAVE STATUS")
+            row = cursor.fetchone()
+            if row is None:
+                # Not a replica itself (e.g. behind a proxy): nothing to lag
+                return 0.0
+            status = dict(zip([column[0] for column in cursor.description], row))
+        lag = status.get("Seconds_Behind_Source", status.get("Seconds_Behind_Master"))
+        return None if lag is None else float(lag)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.healthy = False
+            self.lag = None
+            self.checked_at = 0.0
+            self.last_error = None
+            self.replica_reads = self.fallbacks = 0
+
+    def stats(self) -> Dict:
+        return {
+            "configured": self.configured(),
+            "healthy": self.healthy,
+            "lag_seconds": self.lag,
+            "last_error": self.last_error,
+            "replica_reads": self.replica_reads,
+            "fallbacks": self.fallbacks,
+        }
+
+
+# Singleton instance
+replica_monitor = ReplicaMonitor()
+
+
+class ReplicaRouter:
+    """Send reads inside ``using_replica`` to the replica; everything else to the primary"""
+
+    def db_for_read(self, model, **hints):
+        if not _replica_reads.get() or not replica_monitor.configured():
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block or not replica_monitor.available():
+            replica_monitor.fallbacks += 1
+            return DEFAULT_DB_ALIAS
+        replica_monitor.replica_reads += 1
+        return REPLICA_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Django would otherwise write an instance back to the database it was read from
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db == REPLICA_ALIAS:
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Same data on both aliases
+        databases = {DEFAULT_DB_ALIAS, REPLICA_ALIAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets its schema through replication
+        if db == REPLICA_ALIAS:
+            return False
+        return None
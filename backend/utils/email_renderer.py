@@ -0,0 +1,195 @@
+"""
+Cached rendering for HTML email templates
+
+Every email used to re-read and base64-encode ``templates/emails/logo.svg``,
+load and compile its template from disk (no cached loader while DEBUG) and
+run ``strip_tags`` over the whole rendered HTML, inline CSS included, to get
+the plain-text part. ``email_renderer`` does the per-template work once:
+
+- static assets (the logo as base64) are loaded on first use or by
+  ``warm()`` at startup, and passed to every template as ``logo_base64``
+- each template is compiled once and kept (``EMAIL_TEMPLATE_CACHE``; turn it
+  off to pick up template edits without a restart)
+- its plain-text version is derived once from the template source: ``<head>``,
+  ``<style>`` and ``<script>`` are dropped, markup is stripped and entities
+  decoded, while template tags are kept, so the text part is rendered like
+  the HTML one (variables substituted, unescaped) instead of being scraped
+  from it
+
+Per message only the two compiled templates are rendered.
+"""
+
+import base64
+import html
+import logging
+import os
+import re
+import threading
+from typing import Dict, Optional, Tuple
+
+from django.conf import settings
+from django.template import Context, engines
+
+logger = logging.getLogger(__name__)
+
+LOGO_PATH = os.path.join("templates", "emails", "logo.svg")
+
+# Compiled at startup (apps.communications); others on first use
+PRELOAD_TEMPLATES = (
+    "emails/otp_email_beautiful.html",
+    "emails/approval_email.html",
+    "emails/communication_response.html",
+    "emails/communication_status_update.html",
+)
+
+# Blocks with no text content for the plain-text version
+NON_TEXT_BLOCK_RE = re.compile(r"<(head|style|script)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+TEMPLATE_TOKEN_RE = re.compile(r"({%.*?%}|{{.*?}}|{#.*?#})", re.DOTALL)
+BREAK_TAG_RE = re.compile(r"<(br|/p|/div|/h[1-6]|/tr|/li|/table)\b", re.IGNORECASE)
+BLANK_LINES_RE = re.compile(r"\n\s*\n+")
+SPACES_RE = re.compile(r"[ \t]+")
+
+
+def text_template_source(source: str) -> str:
+    """Template source for the plain-text part of an HTML template source"""
+    source = NON_TEXT_BLOCK_RE.sub("", source)
+    # Line breaks where the HTML would break lines
+    source = BREAK_TAG_RE.sub(lambda match: "\n" + match.group(0), source)
+
+    parts = []
+    in_tag = False
+    for token in TEMPLATE_TOKEN_RE.split(source):
+        if token.startswith("{#"):
+            continue
+        if token.startswith("{%"):
+            # Control flow is kept even inside a tag so blocks stay balanced
+            parts.append(token)
+            continue
+        if token.startswith("{{"):
+            if not in_tag:
+                parts.append(token)
+            continue
+        text = []
+        position = 0
+        while position < len(token):
+            if in_tag:
+                end = token.find(">", position)
+                if end < 0:
+                    break
+                position = end + 1
+                in_tag = False
+            else:
+                start = token.find("<", position)
+                if start < 0:
+                    text.append(token[position:])
+                    break
+                text.append(token[position:start])
+                position = start + 1
+                in_tag = True
+        parts.append(html.unescape("".join(text)))
+    # Whitespace is tidied here, once; rendering only collapses the blank
+    # lines left by template tags
+    return tidy_text("".join(parts))
+
+
+def tidy_text(text: str) -> str:
+    lines = (SPACES_RE.sub(" ", line).strip() for line in text.splitlines())
+    return BLANK_LINES_RE.sub("\n\n", "\n".join(lines)).strip()
+
+
+class CompiledEmailTemplate:
+    """An email template with its derived plain-text template"""
+
+    __slots__ = ("name", "html", "text")
+
+    def __init__(self, name: str):
+        engine = engines["django"].engine
+        self.name = name
+        self.html = engine.get_template(name)
+        self.text = engine.from_string(text_template_source(self.html.source))
+
+    def render(self, context: Dict) -> Tuple[str, str]:
+        html_content = self.html.render(Context(context))
+        text_content = self.text.render(Context(context, autoescape=False))
+        return html_content, BLANK_LINES_RE.sub("\n\n", text_content).strip()
+
+
+class EmailRenderer:
+    """Compiled email templates and static assets, loaded once per process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._templates: Dict[str, CompiledEmailTemplate] = {}
+        self._assets: Optional[Dict[str, Optional[str]]] = None
+        self.renders = 0
+        self.compiles = 0
+
+    @property
+    def assets(self) -> Dict[str, Optional[str]]:
+        if self._assets is None:
+            with self._lock:
+                if self._assets is None:
+                    self._assets = {"logo_base64": self._load_base64(LOGO_PATH)}
+        return self._assets
+
+    @property
+    def logo_base64(self) -> Optional[str]:
+        return self.assets["logo_base64"]
+
+    def template(self, name: str) -> CompiledEmailTemplate:
+        compiled = self._templates.get(name)
+        if compiled is None:
+            compiled = CompiledEmailTemplate(name)
+            self.compiles += 1
+            if getattr(settings, "EMAIL_TEMPLATE_CACHE", True):
+                with self._lock:
+                    self._templates[name] = compiled
+        return compiled
+
+    def render(self, name: str, context: Dict) -> Tuple[str, str]:
+        """``(html, text)`` for template ``name``; assets are in the context"""
+        self.renders += 1
+        return self.template(name).render({**self.assets, **context})
+
+    def render_html(self, name: str, context: Dict) -> str:
+        self.renders += 1
+        return self.template(name).html.render(Context({**self.assets, **context}))
+
+    def warm(self, names=()) -> None:
+        """Load assets and compile ``names`` now (startup) rather than on first send"""
+        self.assets
+        for name in names:
+            try:
+                self.template(name)
+            except Exception as e:
+                logger.warning(f"Could not compile email template {name}: {e}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._templates.clear()
+            self._assets = None
+            self.renders = self.compiles = 0
+
+    def stats(self) -> Dict:
+        return {
+            "templates": sorted(self._templates),
+            "compiles": self.compiles,
+            "renders": self.renders,
+            "logo_loaded": bool(self._assets and self._assets["logo_base64"]),
+        }
+
+    @staticmethod
+    def _load_base64(relative_path: str) -> Optional[str]:
+        path = os.path.join(settings.BASE_DIR, relative_path)
+        try:
+            with open(path, "rb") as asset:
+                data = asset.read()
+        except OSError:
+            # Templates fall back to an emoji when there is no logo
+            logger.info(f"Email asset {relative_path} not found, templates will use their fallback")
+            return None
+        return base64.b64encode(data).decode("utf-8") if data else None
+
+
+# Singleton instance
+email_renderer = EmailRenderer()
@@ -0,0 +1,67 @@
+"""
+Geo helpers shared by menu listings, checkout and delivery
+
+Single home for the Haversine distance and the distance-based delivery fee /
+ETA rules. The array functions take NumPy arrays (or anything array-like) of
+kitchen coordinates so a whole listing page is priced in one pass; the scalar
+``haversine_distance_km`` is kept for one-off distance checks where NumPy
+call overhead would dominate.
+"""
+
+import math
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+
+# Menu delivery fee structure: first 5 km at the base fee, then per extra km
+BASE_DELIVERY_FEE = 300.0
+ADDITIONAL_FEE_PER_KM = 100.0
+FREE_DISTANCE_KM = 5
+
+# Average delivery speed in city traffic
+AVERAGE_SPEED_KMH = 20.0
+
+
+def haversine_distance_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance in km between two points"""
+    lat1, lng1, lat2, lng2 = map(math.radians, [float(lat1), float(lng1), float(lat2), float(lng2)])
+    dlat = lat2 - lat1
+    dlng = lng2 - lng1
+    a = math.sin(dlat / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def haversine_km(lat1, lng1, lat2, lng2) -> np.ndarray:
+    """
+    Vectorised great-circle distance in km.
+
+    Arguments broadcast against each other, so one user location can be
+    compared with arrays of kitchen coordinates.
+    """
+    lat1, lng1, lat2, lng2 = (
+        np.radians(np.asarray(value, dtype=np.float64)) for value in (lat1, lng1, lat2, lng2)
+    )
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def delivery_fees(distance_km) -> np.ndarray:
+    """Delivery fee (LKR) for each distance: base fee plus a per-km charge beyond the free distance"""
+    distance_km = np.asarray(distance_km, dtype=np.float64)
+    return BASE_DELIVERY_FEE + np.maximum(distance_km - FREE_DISTANCE_KM, 0.0) * ADDITIONAL_FEE_PER_KM
+
+
+def delivery_times(distance_km, preparation_time_minutes=30) -> np.ndarray:
+    """Estimated minutes until delivery: preparation plus travel at the average speed"""
+    distance_km = np.asarray(distance_km, dtype=np.float64)
+    travel_minutes = distance_km / AVERAGE_SPEED_KMH * 60
+    return np.floor(np.asarray(preparation_time_minutes, dtype=np.float64) + travel_minutes).astype(np.int64)
+
+
+def within_radius(distance_km, max_radius_km: float) -> np.ndarray:
+    """Boolean mask of distances inside the delivery radius"""
+    return np.asarray(distance_km, dtype=np.float64) <= max_radius_km
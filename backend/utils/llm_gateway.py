@@ -0,0 +1,271 @@
+"""
+Shared gateway for Gemini ``generate_content`` calls
+
+Every AI feature (admin chatbot / summaries, communication sentiment and
+topics, bulk menu analysis / search / recommendations) goes through
+``llm_gateway.generate`` instead of calling the model directly, which adds:
+
+- a response cache keyed by a hash of model name + prompt, bounded by
+  ``LLM_CACHE_TTL`` seconds and ``LLM_CACHE_MAX_ENTRIES`` (LRU)
+- single-flight: identical prompts already in flight wait for that call
+  instead of issuing their own
+- a process-wide limit of ``LLM_MAX_CONCURRENCY`` concurrent model calls
+- a per-call deadline (``LLM_TIMEOUT_SECONDS``) covering the wait for a
+  slot, the wait on a coalesced call and the HTTP request itself
+- per-model call / cache / error counts, latency and token usage
+
+Failures raise ``LLMError`` subclasses so the callers' existing
+``except Exception`` fallbacks keep working.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LLMError(Exception):
+    """Base error for gateway calls"""
+
+
+class LLMUnavailable(LLMError):
+    """No model configured"""
+
+
+class LLMTimeout(LLMError):
+    """The call did not finish before its deadline"""
+
+
+class ModelStats:
+    """Running totals for one model"""
+
+    __slots__ = (
+        "calls",
+        "cache_hits",
+        "coalesced",
+        "errors",
+        "timeouts",
+        "latency_ms_sum",
+        "latency_ms_max",
+        "prompt_tokens",
+        "response_tokens",
+    )
+
+    def __init__(self):
+        for field in self.__slots__:
+            setattr(self, field, 0)
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = {field: getattr(self, field) for field in self.__slots__}
+        data["avg_latency_ms"] = (
+            round(self.latency_ms_sum / self.calls, 1) if self.calls else None
+        )
+        requests = self.calls + self.cache_hits + self.coalesced
+        data["cache_hit_rate"] = (
+            round((self.cache_hits + self.coalesced) / requests * 100, 1) if requests else 0
+        )
+        return data
+
+
+class LLMGateway:
+    """Cached, coalesced and rate-limited access to Gemini models"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._models: Dict[str, Any] = {}
+        self._configured = False
+        self._semaphore: Optional[threading.BoundedSemaphore] = None
+        self._stats: Dict[str, ModelStats] = {}
+
+    # Models ------------------------------------------------------------------
+
+    def get_model(self, name: str):
+        """Shared ``GenerativeModel`` for ``name``; None without an API key"""
+        api_key = getattr(settings, "GOOGLE_AI_API_KEY", None)
+        if not api_key:
+            return None
+        with self._lock:
+            model = self._models.get(name)
+            if model is None:
+                import google.generativeai as genai
+
+                if not self._configured:
+                    genai.configure(api_key=api_key)
+                    self._configured = True
+                model = self._models[name] = genai.GenerativeModel(name)
+            return model
+
+    # Calls -------------------------------------------------------------------
+
+    def generate(
+        self,
+        model,
+        prompt: str,
+        cache: bool = True,
+        ttl: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> str:
+        """
+        Response text of ``model.generate_content(prompt)``.
+
+        ``cache=False`` skips the response cache (single-flight still
+        applies); ``ttl`` / ``timeout`` override the configured defaults.
+        """
+        if model is None:
+            raise LLMUnavailable("AI model not configured")
+
+        model_name = str(getattr(model, "model_name", type(model).__name__))
+        timeout = timeout or getattr(settings, "LLM_TIMEOUT_SECONDS", 20)
+        deadline = time.monotonic() + timeout
+        key = hashlib.sha256(f"{model_name}\0{prompt}".encode("utf-8")).hexdigest()
+        stats = self._model_stats(model_name)
+
+        with self._lock:
+            if cache:
+                cached = self._cache.get(key)
+                if cached is not None and cached[1] > time.monotonic():
+                    self._cache.move_to_end(key)
+                    stats.cache_hits += 1
+                    return cached[0]
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+            else:
+                stats.coalesced += 1
+
+        if not owner:
+            try:
+                return future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except FutureTimeoutError:
+                with self._lock:
+                    stats.timeouts += 1
+                raise LLMTimeout(f"Timed out waiting for a coalesced {model_name} call")
+
+        try:
+            text = self._call(model, model_name, prompt, deadline, stats)
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(text)
+            if cache:
+                self._store(key, text, ttl)
+            return text
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _call(self, model, model_name: str, prompt: str, deadline: float, stats: ModelStats) -> str:
+        semaphore = self._get_semaphore()
+        if not semaphore.acquire(timeout=max(0.0, deadline - time.monotonic())):
+            with self._lock:
+                stats.timeouts += 1
+            raise LLMTimeout(f"No free {model_name} slot before the deadline")
+        started = time.perf_counter()
+        try:
+            remaining = max(1.0, deadline - time.monotonic())
+            response = model.generate_content(prompt, request_options={"timeout": remaining})
+            text = response.text
+        except Exception as e:
+            elapsed = time.monotonic() >= deadline
+            with self._lock:
+                stats.errors += 1
+                if elapsed:
+                    stats.timeouts += 1
+            if elapsed:
+                raise LLMTimeout(f"{model_name} call exceeded its deadline: {e}") from e
+            raise
+        finally:
+            semaphore.release()
+
+        latency_ms = (time.perf_counter() - started) * 1000
+        usage = getattr(response, "usage_metadata", None)
+        with self._lock:
+            stats.calls += 1
+            stats.latency_ms_sum += latency_ms
+            stats.latency_ms_max = max(stats.latency_ms_max, latency_ms)
+            stats.prompt_tokens += int(getattr(usage, "prompt_token_count", 0) or 0)
+            stats.response_tokens += int(getattr(usage, "candidates_token_count", 0) or 0)
+        logger.debug(f"{model_name} call took {latency_ms:.0f} ms")
+        return text
+
+    # Cache / metrics ---------------------------------------------------------
+
+    def _store(self, key: str, text: str, ttl: Optional[int]) -> None:
+        ttl = ttl if ttl is not None else getattr(settings, "LLM_CACHE_TTL", 600)
+        max_entries = getattr(settings, "LLM_CACHE_MAX_ENTRIES", 512)
+        with self._lock:
+            self._cache[key] = (text, time.monotonic() + ttl)
+            self._cache.move_to_end(key)
+            while len(self._cache) > max_entries:
+                self._cache.popitem(last=False)
+
+    def _get_semaphore(self) -> threading.BoundedSemaphore:
+        if self._semaphore is None:
+            with self._lock:
+                if self._semaphore is None:
+                    self._semaphore = threading.BoundedSemaphore(
+                        getattr(settings, "LLM_MAX_CONCURRENCY", 4)
+                    )
+        return self._semaphore
+
+    def _model_stats(self, model_name: str) -> ModelStats:
+        with self._lock:
+            stats = self._stats.get(model_name)
+            if stats is None:
+                stats = self._stats[model_name] = ModelStats()
+            return stats
+
+    def clear_cache(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def reset(self) -> None:
+        """Drop cached responses and metrics (tests)"""
+        with self._lock:
+            self._cache.clear()
+            self._stats.clear()
+            self._semaphore = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "cache_entries": len(self._cache),
+                "in_flight": len(self._inflight),
+                "models": {name: stats.as_dict() for name, stats in self._stats.items()},
+            }
+
+    def prometheus_gauges(self) -> Dict[str, float]:
+        """Flat totals across models for the Prometheus endpoint"""
+        totals = ModelStats()
+        with self._lock:
+            for stats in self._stats.values():
+                for field in ModelStats.__slots__:
+                    setattr(totals, field, getattr(totals, field) + getattr(stats, field))
+            cache_entries = len(self._cache)
+        return {
+            "llm_calls_total": totals.calls,
+            "llm_cache_hits_total": totals.cache_hits,
+            "llm_coalesced_total": totals.coalesced,
+            "llm_errors_total": totals.errors,
+            "llm_timeouts_total": totals.timeouts,
+            "llm_latency_ms_sum": round(totals.latency_ms_sum, 1),
+            "llm_prompt_tokens_total": totals.prompt_tokens,
+            "llm_response_tokens_total": totals.response_tokens,
+            "llm_cache_entries": cache_entries,
+        }
+
+
+# Singleton instance
+llm_gateway = LLMGateway()
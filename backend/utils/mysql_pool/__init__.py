@@ -0,0 +1,4 @@
+"""
+MySQL database backend with a per-process connection pool (``DB_POOL=True``,
+``ENGINE = "utils.mysql_pool"``); see ``utils.db_pool``.
+"""
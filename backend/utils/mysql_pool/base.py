@@ -0,0 +1,69 @@
+"""
+``django.db.backends.mysql`` with connections borrowed from ``utils.db_pool``
+
+``get_new_connection`` takes a connection from the alias's pool and closing
+the connection (end of request, ``connections.close_all()``) hands it back.
+Settings come from ``DATABASES[alias]["POOL_OPTIONS"]``; use ``CONN_MAX_AGE = 0``
+so every request returns its connection.
+
+A connection goes back to the pool in autocommit mode with no open
+transaction. One that saw an error, or whose rollback failed, is closed
+instead. A forked worker starts with empty pools instead of sharing the
+parent's sockets.
+"""
+
+import os
+
+from django.db.backends.mysql import base as mysql_base
+from django.utils.asyncio import async_unsafe
+
+from utils.db_pool import get_pool, reset_pools_after_fork
+
+os.register_at_fork(after_in_child=reset_pools_after_fork)
+
+
+class DatabaseWrapper(mysql_base.DatabaseWrapper):
+    """MySQL connections from a process-wide pool"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._reused_connection = False
+
+    @property
+    def pool(self):
+        return get_pool(self.alias, self.settings_dict.get("POOL_OPTIONS"))
+
+    @async_unsafe
+    def get_new_connection(self, conn_params):
+        self._reused_connection = True
+
+        def connect():
+            self._reused_connection = False
+            return mysql_base.DatabaseWrapper.get_new_connection(self, conn_params)
+
+        # Session settings (isolation level, SQL_AUTO_IS_NULL) survive in the
+        # pool, so only new connections are initialised
+        return self.pool.acquire(connect, ping=lambda connection: connection.ping())
+
+    def init_connection_state(self):
+        if not self._reused_connection:
+            super().init_connection_state()
+
+    def _set_autocommit(self, autocommit):
+        # Pooled connections come back in autocommit; skip the round trip
+        if self.connection.get_autocommit() != autocommit:
+            super()._set_autocommit(autocommit)
+
+    def _close(self):
+        if self.connection is None:
+            return
+        connection = self.connection
+        reusable = not self.errors_occurred
+        if reusable and (self.in_atomic_block or not connection.get_autocommit()):
+            try:
+                connection.rollback()
+                connection.autocommit(self.settings_dict["AUTOCOMMIT"])
+            except self.Database.Error:
+                reusable = False
+        with self.wrap_database_errors:
+            self.pool.release(connection, reusable=reusable)
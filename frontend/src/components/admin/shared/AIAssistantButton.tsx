@@ -100,23 +100,13 @@ export const AIAssistantButton: React.FC<AIAssistantButtonProps> = ({
     
     // Get AI response from backend
     try {
-      const response = await fetch('/api/admin-management/ai/chat/', {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-          'Authorization': `Bearer ${localStorage.getItem('access_token')}`
-        },
-        body: JSON.stringify({
+      // Runs as a background job; runJob polls until the answer is ready
+      const data = await aiService.runJob('post', '/admin-management/ai/chat/', {
+        data: {
           message: userMessage,
           context: messages.slice(-5) // Last 5 messages for context
-        })
+        }
       });
-      
-      if (!response.ok) {
-        throw new Error('Failed to get AI response');
-      }
-      
-      const data = await response.json();
       const aiResponse = data.data?.message || data.message || "I'm here to help with your admin tasks!";
       
       addMessage(aiResponse, "ai");
@@ -138,23 +128,13 @@ export const AIAssistantButton: React.FC<AIAssistantButtonProps> = ({
     addMessage(query, "user");
     
     try {
-      const response = await fetch('/api/admin-management/ai/chat/', {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-          'Authorization': `Bearer ${localStorage.getItem('access_token')}`
-        },
-        body: JSON.stringify({
+      // Runs as a background job; runJob polls until the answer is ready
+      const data = await aiService.runJob('post', '/admin-management/ai/chat/', {
+        data: {
           message: query,
           context: messages.slice(-5)
-        })
+        }
       });
-      
-      if (!response.ok) {
-        throw new Error('Failed to get AI response');
-      }
-      
-      const data = await response.json();
       const aiResponse = data.data?.message || data.message || "Here's what I found for you!";
       
       addMessage(aiResponse, "ai");
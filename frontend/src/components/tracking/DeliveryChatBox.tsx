@@ -16,6 +16,20 @@ import { Input } from '@/components/ui/input';
 import { useToast } from '@/hooks/use-toast';
 import { deliveryChatService, ChatMessage } from '@/services/deliveryChatService';
 
+// Pushed messages carry no viewer context, so keep is_own_message from
+// whichever copy (pushed or the send response) knows it.
+const mergeMessage = (messages: ChatMessage[], incoming: ChatMessage): ChatMessage[] => {
+  const index = messages.findIndex(m => m.message_id === incoming.message_id);
+  if (index === -1) return [...messages, incoming];
+  const merged = [...messages];
+  merged[index] = {
+    ...messages[index],
+    ...incoming,
+    is_own_message: messages[index].is_own_message || incoming.is_own_message,
+  };
+  return merged;
+};
+
 interface DeliveryChatBoxProps {
   orderId: number;
   deliveryPartnerName: string;
@@ -47,20 +61,45 @@ export const DeliveryChatBox: React.FC<DeliveryChatBoxProps> = ({
     }
   }, [isOpen, orderId]);
 
-  // Poll for new messages every 5 seconds
+  // Poll every 5 seconds; when the server streams (ASGI), receive pushed
+  // messages over SSE instead and go back to polling if the stream fails
   useEffect(() => {
     if (!isOpen || !orderId) return;
 
-    const stopPolling = deliveryChatService.pollMessages(
-      orderId,
-      (data) => {
-        setMessages(data.messages);
-      },
-      5000
-    );
+    let cancelled = false;
+    let cleanup: (() => void) | null = null;
+
+    const startPolling = async () => {
+      const stopPolling = await deliveryChatService.pollMessages(
+        orderId,
+        (data) => {
+          setMessages(data.messages);
+        },
+        5000
+      );
+      if (cancelled) stopPolling();
+      else cleanup = stopPolling;
+    };
+
+    deliveryChatService
+      .subscribeMessages(
+        orderId,
+        (message) => {
+          setMessages(prev => mergeMessage(prev, message));
+        },
+        () => {
+          if (!cancelled) startPolling();
+        }
+      )
+      .then((unsubscribe) => {
+        if (cancelled) unsubscribe?.();
+        else if (unsubscribe) cleanup = unsubscribe;
+        else startPolling();
+      });
 
     return () => {
-      stopPolling.then(cleanup => cleanup());
+      cancelled = true;
+      cleanup?.();
     };
   }, [isOpen, orderId]);
 
@@ -110,8 +149,8 @@ export const DeliveryChatBox: React.FC<DeliveryChatBoxProps> = ({
         message_type: 'text',
       });
 
-      // Add new message to list
-      setMessages(prev => [...prev, response.message]);
+      // Add new message to list (it may already have arrived over the stream)
+      setMessages(prev => mergeMessage(prev, response.message));
       setNewMessage('');
       scrollToBottom();
     } catch (error: any) {
@@ -26,6 +26,7 @@ import {
   AdvancedAnalyticsData,
   analyticsService,
 } from "@/services/analyticsService";
+import { aiService } from "@/services/aiService";
 
 // Import icons
 import {
@@ -301,18 +302,12 @@ const AnalyticsHub: React.FC = () => {
   // Load business insights with better error handling
   const loadBusinessInsights = useCallback(async () => {
     try {
-      const response = await fetch(
-        `/api/admin-management/ai/business-insights/`,
-        {
-          headers: {
-            Authorization: `Bearer ${localStorage.getItem("access_token")}`,
-            "Content-Type": "application/json",
-          },
-        }
-      );
+      // Runs as a background job; runJob polls until the insights are ready
+      const data = await aiService
+        .runJob("get", "/admin-management/ai/business-insights/")
+        .catch(() => null);
 
-      if (response.ok) {
-        const data = await response.json();
+      if (data) {
         setBusinessInsights(data.data?.insights || null);
       } else {
         // Set fallback data for better UX
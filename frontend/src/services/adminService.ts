@@ -148,6 +148,22 @@ export interface SystemHealth {
   }>;
 }
 
+export interface EndpointMetric {
+  endpoint: string;
+  method: string;
+  requests: number;
+  avg_ms: number;
+  p50_ms: number | null;
+  p95_ms: number | null;
+  total_time_ms: number;
+  avg_queries: number;
+  max_queries: number;
+  avg_query_ms: number;
+  avg_response_bytes: number;
+  status_classes: Record<string, number>;
+  error_rate: number;
+}
+
 export interface AdminUser {
   id: number;
   email: string;
@@ -457,6 +473,24 @@ class AdminService {
     }
   }
 
+  async getEndpointMetrics(
+    sort: string = "total_time",
+    limit: number = 20
+  ): Promise<EndpointMetric[]> {
+    try {
+      const response = await apiClient.get(
+        `${this.baseUrl}/dashboard/endpoint_metrics/`,
+        {
+          params: { sort, limit },
+        }
+      );
+      return response.data.endpoints;
+    } catch (error) {
+      console.error("Error fetching endpoint metrics:", error);
+      throw new Error("Failed to fetch endpoint metrics");
+    }
+  }
+
   async getRecentActivities(limit: number = 10): Promise<AdminActivityLog[]> {
     try {
       const response = await apiClient.get(
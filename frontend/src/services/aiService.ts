@@ -172,10 +172,51 @@ export interface AIDashboardSummary {
   ai_service_status: boolean;
 }
 
+export interface AIJob {
+  job_id: string;
+  job_type: string;
+  status: 'queued' | 'running' | 'succeeded' | 'failed';
+  status_url: string;
+  status_code?: number;
+  result?: any;
+  error?: string;
+}
+
 /**
  * AI Service Class
  */
 class AIService {
+  /**
+   * Call an AI endpoint that may answer 202 with a background job, and poll
+   * ai/jobs/<id>/ until it finishes. Resolves to the body the endpoint would
+   * have returned synchronously.
+   */
+  async runJob(
+    method: 'get' | 'post',
+    url: string,
+    options: { data?: any; params?: any; pollInterval?: number; timeout?: number } = {}
+  ): Promise<any> {
+    const { data, params, pollInterval = 1500, timeout = 120000 } = options;
+    const response = await apiClient.request({ method, url, data, params });
+    if (response.status !== 202) return response.data;
+
+    let job: AIJob = response.data.data;
+    const deadline = Date.now() + timeout;
+    while (job.status === 'queued' || job.status === 'running') {
+      if (Date.now() > deadline) {
+        throw new Error('AI job is taking too long, please try again later');
+      }
+      await new Promise(resolve => setTimeout(resolve, pollInterval));
+      const polled = await apiClient.get(`/admin-management/ai/jobs/${job.job_id}/`);
+      job = polled.data.data;
+    }
+
+    if (job.status === 'failed' || (job.status_code ?? 200) >= 400) {
+      throw new Error(job.error || job.result?.error || 'AI job failed');
+    }
+    return job.result;
+  }
+
   /**
    * Get sales forecast for the next N days
    */
@@ -18,6 +18,7 @@ export interface ChatMessagesResponse {
   order_number: string;
   messages: ChatMessage[];
   unread_count: number;
+  next_cursor?: string | null;
 }
 
 export interface SendMessageRequest {
@@ -110,6 +111,66 @@ class DeliveryChatService {
     };
   }
 
+  /**
+   * Subscribe to pushed messages over Server-Sent Events.
+   * Resolves to a cleanup function, or null when the server does not stream
+   * (WSGI deployments) or EventSource is unavailable, so callers keep polling.
+   * onFallback is called if the stream fails or never becomes ready; the
+   * stream is closed by then and callers should start polling.
+   */
+  async subscribeMessages(
+    orderId: number,
+    onMessage: (message: ChatMessage) => void,
+    onFallback: () => void,
+    after?: string
+  ): Promise<(() => void) | null> {
+    if (typeof EventSource === 'undefined') return null;
+
+    let ticket: string;
+    try {
+      const response = await apiClient.post(`${this.baseUrl}/${orderId}/chat/stream-ticket/`);
+      if (!response.data?.stream) return null;
+      ticket = response.data.ticket;
+    } catch (error) {
+      return null;
+    }
+
+    const params = new URLSearchParams({ ticket });
+    if (after) params.set('after', after);
+
+    const baseUrl = apiClient.defaults.baseURL || '/api';
+    const source = new EventSource(
+      `${baseUrl}${this.baseUrl}/${orderId}/chat/stream/?${params.toString()}`
+    );
+
+    let closed = false;
+    const close = () => {
+      closed = true;
+      clearTimeout(readyTimer);
+      source.close();
+    };
+    const fallBack = () => {
+      if (closed) return;
+      close();
+      onFallback();
+    };
+    // The server sends "ready" as soon as the stream is live
+    const readyTimer = setTimeout(fallBack, 10000);
+
+    source.addEventListener('ready', () => clearTimeout(readyTimer));
+    source.addEventListener('message', (event) => {
+      try {
+        onMessage(JSON.parse((event as MessageEvent).data));
+      } catch (error) {
+        console.error('Invalid chat stream event:', error);
+      }
+    });
+    // Tickets are short-lived, so a dropped stream is not reconnected
+    source.onerror = fallBack;
+
+    return close;
+  }
+
   /**
    * Format timestamp for display
    */